@@ -12,6 +12,9 @@ from pathlib import Path
 # 添加父目录到 Python 路径以导入 run_github_project
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from run_github_project import GitHubProjectRunner
+from project_runner.batch import BatchItem, run_batch
+from project_runner.instances import InstanceRegistry
+from project_runner.options import RunOptions
 
 # 尝试加载本地 .env 文件
 try:
@@ -26,6 +29,9 @@ except Exception as e:
 # 导入搜索代理
 from search_agent import GitHubSearchAgent
 from smart_search_agent import SmartSearchAgent
+from query_confidence import DEFAULT_LEARNED_PATH
+from relevance_model import DEFAULT_LOG_PATH
+from usage import usage_tracker
 
 
 class GitHubAgent:
@@ -33,7 +39,9 @@ class GitHubAgent:
     
     def __init__(self, github_token=None, proxy=None,
                  use_llm=False, llm_provider="deepseek", llm_api_key=None,
-                 use_smart_filter=False):
+                 use_smart_filter=False, bypass_threshold=0.8,
+                 cascade_provider=None, cascade_band=(40, 75),
+                 relevance_model_path=None, score_log_path=None, learned_keywords_path=None):
         """
         初始化 GitHub Agent
         
@@ -44,6 +52,12 @@ class GitHubAgent:
             llm_provider: LLM 提供商
             llm_api_key: LLM API 密钥
             use_smart_filter: 是否使用智能过滤（基于 README 的 LLM 评分）
+            bypass_threshold: 规则分析置信度达到该值时跳过 LLM 查询分析
+            cascade_provider: 智能过滤的级联评分便宜模型提供商（可选）
+            cascade_band: 升级到强模型的分数区间
+            relevance_model_path: 本地相关性模型路径（可选）
+            score_log_path: LLM 评分日志路径（可选），记录评分用于训练本地模型
+            learned_keywords_path: 学习到的关键词的保存路径（可选），默认不持久化
         """
         # 根据是否启用智能过滤选择不同的搜索代理
         if use_smart_filter:
@@ -52,7 +66,13 @@ class GitHubAgent:
                 github_token=github_token,
                 use_llm=True,  # 智能过滤必须启用 LLM
                 llm_provider=llm_provider,
-                llm_api_key=llm_api_key
+                llm_api_key=llm_api_key,
+                bypass_threshold=bypass_threshold,
+                cascade_provider=cascade_provider,
+                cascade_band=cascade_band,
+                relevance_model_path=relevance_model_path,
+                score_log_path=score_log_path,
+                learned_keywords_path=learned_keywords_path
             )
         else:
             print("🔍 使用基础搜索模式")
@@ -60,7 +80,9 @@ class GitHubAgent:
                 github_token=github_token,
                 use_llm=use_llm,
                 llm_provider=llm_provider,
-                llm_api_key=llm_api_key
+                llm_api_key=llm_api_key,
+                bypass_threshold=bypass_threshold,
+                learned_keywords_path=learned_keywords_path
             )
         
         self.proxy = proxy
@@ -73,6 +95,35 @@ class GitHubAgent:
             user_query: 用户的自然语言查询
             auto_run: 是否自动运行第一个项目
         """
+        with usage_tracker.query(user_query):
+            self._run_query(user_query, auto_run)
+    
+    def _run_query(self, user_query: str, auto_run: bool):
+        """处理用户查询（LLM 用量归属到该查询）"""
+        repos = self._search(user_query)
+        if not repos:
+            return
+        
+        # 查询分析和评分都被规则跳过时也显示，说明没有调用 LLM 的原因
+        summary = usage_tracker.summary(user_query)
+        if summary['total']['calls'] or summary['bypassed']:
+            print(usage_tracker.format_summary(user_query) + "\n")
+        
+        # 5. 交互式选择
+        if auto_run and repos:
+            selected_repo = repos[0]
+            print(f"\n🚀 自动运行第一个项目: {selected_repo.full_name}")
+        else:
+            selected_repo = self.search_agent.interactive_select(repos)
+        
+        if not selected_repo:
+            return
+        
+        # 6. 运行项目
+        self.run_project(selected_repo)
+    
+    def _search(self, user_query: str) -> list:
+        """分析查询、搜索并展示结果，返回排序后的仓库列表"""
         print("=" * 70)
         print("🤖 GitHub AI Agent")
         print("=" * 70)
@@ -112,23 +163,36 @@ class GitHubAgent:
         
         if not repos:
             print("😢 没有找到合适的项目")
-            return
+            return []
         
         # 4. 显示结果
         self.search_agent.display_results(repos)
+        return repos
+    
+    def run_batch(self, user_query: str, top: int, work_dir: str = 'batch-projects',
+                  report_path: str = 'batch-report.jsonl', **batch_options) -> list:
+        """
+        搜索后批量克隆、安装并启动前 top 个项目
         
-        # 5. 交互式选择
-        if auto_run and repos:
-            selected_repo = repos[0]
-            print(f"\n🚀 自动运行第一个项目: {selected_repo.full_name}")
-        else:
-            selected_repo = self.search_agent.interactive_select(repos)
-        
-        if not selected_repo:
-            return
+        Args:
+            user_query: 用户的自然语言查询
+            top: 运行的项目数
+            work_dir: 批量工作目录
+            report_path: JSONL 报告路径
+            **batch_options: 传给 run_batch 的其他参数（并发上限、运行时长等）
         
-        # 6. 运行项目
-        self.run_project(selected_repo)
+        Returns:
+            BatchResult 列表
+        """
+        with usage_tracker.query(user_query):
+            repos = self._search(user_query)
+        if not repos:
+            return []
+        items = [
+            BatchItem(repo.html_url, getattr(repo, 'size', None) or None, repo.language)
+            for repo in repos[:top]
+        ]
+        return run_batch(items, GitHubProjectRunner, work_dir, report_path, use_proxy=self.proxy, **batch_options)
     
     def run_project(self, repo):
         """运行选中的项目"""
@@ -138,8 +202,12 @@ class GitHubAgent:
         
         # 创建项目运行器
         runner = GitHubProjectRunner(
-            repo_url=repo.html_url,
-            proxy=self.proxy
+            github_url=repo.html_url,
+            use_proxy=self.proxy,
+            # 同一项目已在运行时直接返回它的地址
+            run_options=RunOptions(instances=InstanceRegistry()),
+            repo_size_kb=getattr(repo, 'size', None) or None,
+            repo_language=repo.language
         )
         
         # 执行运行流程
@@ -147,6 +215,8 @@ class GitHubAgent:
         
         if success:
             print("\n✅ 项目运行成功！")
+            if runner.ready_url:
+                print(f"🔗 访问地址: {runner.ready_url}")
         else:
             print("\n❌ 项目运行失败")
     
@@ -200,12 +270,18 @@ def main():
   # 智能过滤模式（最精准，但较慢）
   python agent.py --llm --smart-filter --query "找适合毕业设计的前端项目"
   
+  # 级联评分（glm-4-flash 初筛，不确定的再用 deepseek 评分）
+  python agent.py --llm --smart-filter --cascade-provider glm --query "React 管理后台"
+  
   # 使用其他模型
   python agent.py --llm --llm-provider openai    # GPT-4
   python agent.py --llm --llm-provider qwen      # 通义千问
   python agent.py --llm --llm-provider glm       # 智谱 GLM
   python agent.py --llm --llm-provider anthropic # Claude
   
+  # 批量运行前 5 个结果，结果写入 batch-report.jsonl
+  python agent.py --query "React 管理后台" --batch 5
+  
   # 交互模式
   python agent.py --llm --smart-filter
         """
@@ -216,6 +292,10 @@ def main():
     parser.add_argument('--token', '-t', help='GitHub Personal Access Token')
     parser.add_argument('--auto-run', '-a', action='store_true', 
                        help='自动运行第一个搜索结果')
+    parser.add_argument('--batch', type=int, metavar='N',
+                       help='批量克隆、安装并启动前 N 个搜索结果（需要 --query），结果写入 --report')
+    parser.add_argument('--report', default='batch-report.jsonl',
+                       help='批量运行的 JSONL 报告路径（默认: batch-report.jsonl）')
     
     # LLM 相关参数
     parser.add_argument('--llm', action='store_true',
@@ -226,9 +306,26 @@ def main():
     parser.add_argument('--llm-key', help='LLM API 密钥（或设置环境变量）')
     parser.add_argument('--smart-filter', action='store_true',
                        help='启用智能过滤（基于 README 的 LLM 评分，需要 --llm）')
+    parser.add_argument('--usage-log', help='LLM 用量记录输出文件（JSONL）')
+    parser.add_argument('--bypass-threshold', type=float, default=0.8,
+                       help='规则分析置信度达到该值时跳过 LLM 查询分析（默认: 0.8，设为 2 表示从不跳过）')
+    parser.add_argument('--cascade-provider',
+                       choices=['glm', 'qwen', 'deepseek', 'openai', 'anthropic'],
+                       help='智能过滤的级联评分：先用该提供商的便宜模型评分，不确定的再用 --llm-provider 评分')
+    parser.add_argument('--cascade-band', default='40,75',
+                       help='升级到强模型的分数区间（默认: 40,75）')
+    parser.add_argument('--relevance-model',
+                       help='本地相关性模型（python -m github_agent.relevance_model train 生成），预测确定时跳过 LLM 评分')
+    parser.add_argument('--score-log', nargs='?', const=str(DEFAULT_LOG_PATH), metavar='PATH',
+                       help=f'把智能过滤的 LLM 评分追加到 JSONL，用于训练本地相关性模型（默认路径: {DEFAULT_LOG_PATH}）')
+    parser.add_argument('--learn-keywords', nargs='?', const=str(DEFAULT_LEARNED_PATH), metavar='PATH',
+                       help=f'把从 LLM 分析中学到的关键词保存到文件，跨会话提高跳过率（默认路径: {DEFAULT_LEARNED_PATH}）')
     
     args = parser.parse_args()
     
+    if args.usage_log:
+        usage_tracker.set_sink(Path(args.usage_log))
+    
     # 创建 Agent
     agent = GitHubAgent(
         github_token=args.token,
@@ -236,16 +333,31 @@ def main():
         use_llm=args.llm,
         llm_provider=args.llm_provider,
         llm_api_key=args.llm_key,
-        use_smart_filter=args.smart_filter  # 智能过滤
+        use_smart_filter=args.smart_filter,  # 智能过滤
+        bypass_threshold=args.bypass_threshold,
+        cascade_provider=args.cascade_provider,
+        cascade_band=tuple(float(v) for v in args.cascade_band.split(',')),
+        relevance_model_path=args.relevance_model,
+        score_log_path=args.score_log,
+        learned_keywords_path=args.learn_keywords
     )
     
     # 运行模式
-    if args.query:
+    if args.batch:
+        if not args.query:
+            parser.error('--batch 需要同时指定 --query')
+        agent.run_batch(args.query, args.batch, report_path=args.report)
+    elif args.query:
         # 直接查询模式
         agent.run_query(args.query, auto_run=args.auto_run)
     else:
         # 交互模式
         agent.interactive_mode()
+        
+        # 会话级用量汇总
+        if usage_tracker.records or usage_tracker.bypassed:
+            print("\n📊 本次会话 LLM 用量")
+            print(usage_tracker.format_summary())
 
 
 if __name__ == "__main__":
@@ -0,0 +1,132 @@
+"""
+模型级联评分模块
+
+先用便宜、快速的模型（如 glm-4-flash、qwen-turbo）给所有候选仓库评分，
+只把分数落在不确定区间、或靠近 top-k 分界线的候选交给更强的模型重新评分。
+"""
+
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+try:
+    from .logger import logger
+except ImportError:  # 以脚本方式运行时（github_agent 目录在 sys.path 中）
+    from logger import logger
+
+
+def _as_score(result: Dict[str, Any]) -> float:
+    """把 LLM 返回的 score 转为数字（无法解析时视为 0）"""
+    try:
+        return float(result.get('score', 0))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class CascadeScorer:
+    """两级模型级联评分器"""
+
+    def __init__(
+        self,
+        cheap_analyzer,
+        strong_analyzer,
+        band: Tuple[float, float] = (40, 75),
+        top_k_margin: float = 5
+    ):
+        """
+        Args:
+            cheap_analyzer: 便宜模型的 LLM 分析器（需提供 complete 方法）
+            strong_analyzer: 强模型的 LLM 分析器
+            band: 不确定区间 (下限, 上限)，落在区间内的分数会升级到强模型
+            top_k_margin: 与 top-k 分界分数相差不超过该值的候选也会升级
+        """
+        self.cheap_analyzer = cheap_analyzer
+        self.strong_analyzer = strong_analyzer
+        self.band = band
+        self.top_k_margin = top_k_margin
+        self.stats = {
+            'cheap': {'calls': 0, 'latency': 0.0},
+            'strong': {'calls': 0, 'latency': 0.0},
+        }
+
+    def select_for_escalation(self, scores: Sequence[float], top_k: int) -> List[int]:
+        """
+        选出需要强模型重新评分的候选
+
+        Args:
+            scores: 便宜模型给出的分数
+            top_k: 最终返回的数量
+
+        Returns:
+            需要升级的候选下标
+        """
+        low, high = self.band
+        ranked = sorted(scores, reverse=True)
+        # 分界线取第 k 名和第 k+1 名的中点；候选不足 top_k 时没有分界线
+        cutoff: Optional[float] = None
+        if 0 < top_k < len(ranked):
+            cutoff = (ranked[top_k - 1] + ranked[top_k]) / 2
+
+        return [
+            i for i, score in enumerate(scores)
+            if low <= score <= high
+            or (cutoff is not None and abs(score - cutoff) <= self.top_k_margin)
+        ]
+
+    def _timed(self, tier: str, fn: Callable[..., Dict], *args, **kwargs) -> Dict:
+        """执行一次评分并累计该层的调用次数和耗时"""
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self.stats[tier]['calls'] += 1
+            self.stats[tier]['latency'] += time.perf_counter() - start
+
+    def score_all(
+        self,
+        score_fn: Callable[..., Dict],
+        candidates: List[Tuple[Dict, Optional[str]]],
+        user_query: str,
+        top_k: int
+    ) -> List[Dict]:
+        """
+        级联评分
+
+        Args:
+            score_fn: 单个仓库的评分函数，签名同 SmartFilter.score_repo
+            candidates: (仓库信息, README 内容) 列表
+            user_query: 用户原始查询
+            top_k: 最终返回的数量
+
+        Returns:
+            与 candidates 一一对应的评分结果，包含 tier 字段（cheap / strong）
+        """
+        results = []
+        for repo, readme in candidates:
+            result = self._timed(
+                'cheap', score_fn, repo, user_query, readme,
+                analyzer=self.cheap_analyzer, call_site='score:cheap'
+            )
+            results.append({**result, 'tier': 'cheap'})
+
+        escalate = self.select_for_escalation([_as_score(r) for r in results], top_k)
+        logger.info(f"🪜 级联评分: {len(escalate)}/{len(candidates)} 个候选升级到强模型")
+
+        for i in escalate:
+            repo, readme = candidates[i]
+            result = self._timed(
+                'strong', score_fn, repo, user_query, readme,
+                analyzer=self.strong_analyzer, call_site='score:strong'
+            )
+            results[i] = {**result, 'tier': 'strong', 'cheap_score': results[i].get('score')}
+
+        return results
+
+    def format_stats(self) -> str:
+        """格式化各层的调用次数和耗时"""
+        lines = ["🪜 级联评分统计:"]
+        for tier, stats in self.stats.items():
+            avg = stats['latency'] / stats['calls'] if stats['calls'] else 0.0
+            lines.append(
+                f"   - {tier}: {stats['calls']} 次, 总耗时 {stats['latency']:.2f}s, 平均 {avg:.2f}s"
+            )
+        return '\n'.join(lines)
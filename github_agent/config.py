@@ -6,6 +6,7 @@ import os
 from dataclasses import dataclass
 from typing import Optional
 from pathlib import Path
+from urllib.parse import urlparse
 
 
 @dataclass
@@ -17,10 +18,11 @@ class LLMConfig:
     temperature: float = 0.3
     timeout: int = 30
     max_retries: int = 3
+    api_base: Optional[str] = None  # 覆盖 API 地址的 scheme + host，例如本地 stub 服务
     
     @property
     def api_url(self) -> str:
-        """获取 API URL"""
+        """获取 API URL（设置了 api_base 或 LLM_API_BASE 时保留路径、替换主机）"""
         urls = {
             'openai': 'https://api.openai.com/v1/chat/completions',
             'anthropic': 'https://api.anthropic.com/v1/messages',
@@ -28,7 +30,11 @@ class LLMConfig:
             'qwen': 'https://dashscope.aliyuncs.com/compatible-mode/v1/chat/completions',
             'glm': 'https://open.bigmodel.cn/api/paas/v4/chat/completions',
         }
-        return urls.get(self.provider, '')
+        url = urls.get(self.provider, '')
+        api_base = self.api_base or os.getenv('LLM_API_BASE')
+        if api_base and url:
+            return api_base.rstrip('/') + urlparse(url).path
+        return url
     
     @property
     def default_model(self) -> str:
@@ -124,6 +130,30 @@ class Constants:
         'java': ['java'],
     }
     
+    # 常见技术关键词（规则分析置信度评估用，可通过 LLM 历史结果扩展）
+    KNOWN_KEYWORDS = {
+        'crawler', 'spider', 'scraper', 'websocket', 'http', 'grpc', 'rest', 'graphql',
+        'cli', 'orm', 'database', 'cache', 'redis', 'queue', 'logger', 'logging',
+        'parser', 'compiler', 'interpreter', 'async', 'framework', 'server', 'proxy',
+        'react', 'vue', 'angular', 'svelte', 'nextjs', 'nuxt', 'vite', 'webpack',
+        'css', 'tailwind', 'animation', 'webgl', 'threejs', 'canvas', 'svg', 'chart',
+        'admin', 'dashboard', 'editor', 'markdown', 'ui', 'components', 'electron',
+        'docker', 'kubernetes', 'terraform', 'ansible', 'nginx', 'monitoring',
+        'django', 'flask', 'fastapi', 'express', 'spring', 'gin', 'tokio', 'axum',
+        'llm', 'agent', 'chatbot', 'rag', 'embedding', 'transformer', 'pytorch',
+        'tensorflow', 'scikit-learn', 'pandas', 'numpy', 'jupyter', 'ocr', 'tts',
+        'auth', 'oauth', 'jwt', 'crypto', 'blockchain', 'game', 'engine', 'emulator',
+    }
+    
+    # 模型价格表（美元 / 百万 tokens）：输入、输出、缓存命中的输入
+    MODEL_PRICES = {
+        'gpt-4o-mini': {'input': 0.15, 'output': 0.60, 'cached': 0.075},
+        'claude-3-5-sonnet-20241022': {'input': 3.00, 'output': 15.00, 'cached': 0.30},
+        'deepseek-chat': {'input': 0.27, 'output': 1.10, 'cached': 0.07},
+        'qwen-turbo': {'input': 0.05, 'output': 0.20, 'cached': 0.02},
+        'glm-4-flash': {'input': 0.0, 'output': 0.0, 'cached': 0.0},
+    }
+    
     # LLM System Prompt
     SYSTEM_PROMPT = """你是一个 GitHub 项目搜索助手。用户会用自然语言描述他们想找的项目，你需要分析并提取关键信息。
 
@@ -6,9 +6,18 @@ LLM 查询分析器 - 使用大模型理解自然语言需求
 
 import os
 import json
-from typing import Dict, Optional
+import time
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
 import requests
 
+try:
+    from .singleflight import default_group, make_key
+    from .usage import usage_tracker
+except ImportError:  # 以脚本方式运行时（github_agent 目录在 sys.path 中）
+    from singleflight import default_group, make_key
+    from usage import usage_tracker
+
 
 class LLMQueryAnalyzer:
     """使用 LLM 分析用户查询"""
@@ -42,13 +51,15 @@ class LLMQueryAnalyzer:
         }
     }
     
-    def __init__(self, provider: str = "deepseek", api_key: Optional[str] = None):
+    def __init__(self, provider: str = "deepseek", api_key: Optional[str] = None,
+                 api_base: Optional[str] = None):
         """
         初始化 LLM 分析器
         
         Args:
             provider: LLM 提供商 ("openai", "anthropic", "deepseek", "qwen", "glm")
             api_key: API 密钥
+            api_base: 覆盖 API 的 scheme + host（默认读取 LLM_API_BASE），用于本地 stub 服务
         """
         self.provider = provider.lower()
         
@@ -59,6 +70,9 @@ class LLMQueryAnalyzer:
         # 获取配置
         config = self.MODELS[self.provider]
         self.api_url = config['api_url']
+        api_base = api_base or os.getenv('LLM_API_BASE')
+        if api_base:
+            self.api_url = api_base.rstrip('/') + urlparse(self.api_url).path
         self.model = config['model']
         self.api_type = config['api_type']
         
@@ -121,14 +135,7 @@ class LLMQueryAnalyzer:
         user_prompt = f"用户需求：{user_query}\n\n请分析这个需求并返回 JSON 格式的结果。"
         
         try:
-            if self.api_type == 'openai':
-                # OpenAI 兼容的 API (OpenAI, DeepSeek, Qwen, GLM)
-                result = self._call_openai_compatible(system_prompt, user_prompt)
-            elif self.api_type == 'anthropic':
-                # Anthropic Claude API
-                result = self._call_anthropic(system_prompt, user_prompt)
-            else:
-                raise ValueError(f"未知的 API 类型: {self.api_type}")
+            result = self.complete(system_prompt, user_prompt)
             
             # 解析 JSON 结果
             analysis = json.loads(result)
@@ -170,10 +177,51 @@ class LLMQueryAnalyzer:
             # 降级到简单规则
             return self._fallback_analyze(user_query)
     
-    def _call_openai_compatible(self, system_prompt: str, user_prompt: str) -> str:
+    def complete(self, system_prompt: str, user_prompt: str, call_site: str = 'analyze') -> str:
+        """
+        调用 LLM 并返回原始文本结果
+        
+        相同提供商、模型和 prompt 的并发调用会被合并为一次上游请求，
+        每次实际的上游请求都会记录到 usage_tracker
+        
+        Args:
+            system_prompt: 系统提示
+            user_prompt: 用户提示
+            call_site: 调用位置（analyze / score），用于用量统计
+        """
+        key = make_key(self.provider, self.model, system_prompt, user_prompt)
+        return default_group.do(key, self._complete, system_prompt, user_prompt, call_site)
+    
+    def _complete(self, system_prompt: str, user_prompt: str, call_site: str) -> str:
+        """按 API 类型分发调用，并记录用量"""
+        start = time.perf_counter()
+        try:
+            if self.api_type == 'openai':
+                # OpenAI 兼容的 API (OpenAI, DeepSeek, Qwen, GLM)
+                content, usage = self._call_openai_compatible(system_prompt, user_prompt)
+            elif self.api_type == 'anthropic':
+                # Anthropic Claude API
+                content, usage = self._call_anthropic(system_prompt, user_prompt)
+            else:
+                raise ValueError(f"未知的 API 类型: {self.api_type}")
+        except Exception as e:
+            usage_tracker.record(
+                self.provider, self.model, call_site, self.api_type,
+                latency=time.perf_counter() - start, error=str(e)
+            )
+            raise
+        
+        usage_tracker.record(
+            self.provider, self.model, call_site, self.api_type,
+            usage=usage, latency=time.perf_counter() - start
+        )
+        return content
+    
+    def _call_openai_compatible(self, system_prompt: str, user_prompt: str) -> Tuple[str, Dict]:
         """
         调用 OpenAI 兼容的 API
         适用于: OpenAI, DeepSeek, Qwen, GLM 等
+        返回 (内容, usage)
         """
         headers = {
             'Authorization': f'Bearer {self.api_key}',
@@ -197,10 +245,10 @@ class LLMQueryAnalyzer:
         response.raise_for_status()
         
         result = response.json()
-        return result['choices'][0]['message']['content']
+        return result['choices'][0]['message']['content'], result.get('usage')
     
-    def _call_anthropic(self, system_prompt: str, user_prompt: str) -> str:
-        """调用 Anthropic Claude API"""
+    def _call_anthropic(self, system_prompt: str, user_prompt: str) -> Tuple[str, Dict]:
+        """调用 Anthropic Claude API，返回 (内容, usage)"""
         headers = {
             'x-api-key': self.api_key,
             'anthropic-version': '2023-06-01',
@@ -231,7 +279,7 @@ class LLMQueryAnalyzer:
             end = content.rindex('}') + 1
             content = content[start:end]
         
-        return content
+        return content, result.get('usage')
     
     def _fallback_analyze(self, user_query: str) -> Dict[str, any]:
         """降级到简单规则分析"""
@@ -273,7 +321,8 @@ class LLMQueryAnalyzer:
             'language': language,
             'sort': 'stars',
             'order': 'desc',
-            'description': user_query
+            'description': user_query,
+            'source': 'fallback'
         }
 
 
@@ -4,13 +4,16 @@ LLM 查询分析器 - 重构版
 """
 
 import json
-from typing import Dict, Any, Optional
+import time
+from typing import Dict, Any, Optional, Tuple
 import requests
 
 from .config import LLMConfig, Constants
 from .logger import logger
 from .exceptions import LLMError, ConfigurationError, ValidationError
 from .utils import validate_query
+from .singleflight import default_group, make_key
+from .usage import usage_tracker
 
 
 class LLMQueryAnalyzer:
@@ -65,18 +68,7 @@ class LLMQueryAnalyzer:
             user_prompt = f"用户需求：{user_query}\n\n请分析这个需求并返回 JSON 格式的结果。"
             
             # 调用 LLM
-            if self.config.api_type == 'openai':
-                result = self._call_openai_compatible(
-                    Constants.SYSTEM_PROMPT, 
-                    user_prompt
-                )
-            elif self.config.api_type == 'anthropic':
-                result = self._call_anthropic(
-                    Constants.SYSTEM_PROMPT, 
-                    user_prompt
-                )
-            else:
-                raise LLMError(f"不支持的 API 类型: {self.config.api_type}")
+            result = self.complete(Constants.SYSTEM_PROMPT, user_prompt)
             
             # 解析 JSON
             analysis = self._parse_response(result)
@@ -99,11 +91,69 @@ class LLMQueryAnalyzer:
             logger.error(f"LLM 分析失败: {e}")
             raise LLMError(f"LLM 分析过程出错: {e}")
     
+    def complete(
+        self, 
+        system_prompt: str, 
+        user_prompt: str, 
+        call_site: str = 'analyze'
+    ) -> str:
+        """
+        调用 LLM 并返回原始文本结果
+        
+        相同提供商、模型和 prompt 的并发调用会被合并为一次上游请求，
+        每次实际的上游请求都会记录到 usage_tracker
+        
+        Args:
+            system_prompt: 系统提示
+            user_prompt: 用户提示
+            call_site: 调用位置（analyze / score），用于用量统计
+        
+        Returns:
+            LLM 响应内容
+        
+        Raises:
+            LLMError: 不支持的 API 类型时抛出
+            requests.exceptions.RequestException: 请求失败时抛出
+        """
+        key = make_key(
+            self.config.provider,
+            self.config.default_model,
+            system_prompt,
+            user_prompt
+        )
+        return default_group.do(
+            key, self._complete, system_prompt, user_prompt, call_site
+        )
+    
+    def _complete(self, system_prompt: str, user_prompt: str, call_site: str) -> str:
+        """按 API 类型分发调用，并记录用量"""
+        start = time.perf_counter()
+        try:
+            if self.config.api_type == 'openai':
+                content, usage = self._call_openai_compatible(system_prompt, user_prompt)
+            elif self.config.api_type == 'anthropic':
+                content, usage = self._call_anthropic(system_prompt, user_prompt)
+            else:
+                raise LLMError(f"不支持的 API 类型: {self.config.api_type}")
+        except Exception as e:
+            usage_tracker.record(
+                self.config.provider, self.config.default_model, call_site,
+                self.config.api_type, latency=time.perf_counter() - start,
+                error=str(e)
+            )
+            raise
+        
+        usage_tracker.record(
+            self.config.provider, self.config.default_model, call_site,
+            self.config.api_type, usage=usage, latency=time.perf_counter() - start
+        )
+        return content
+    
     def _call_openai_compatible(
         self, 
         system_prompt: str, 
         user_prompt: str
-    ) -> str:
+    ) -> Tuple[str, Optional[Dict[str, Any]]]:
         """
         调用 OpenAI 兼容的 API
         
@@ -112,7 +162,7 @@ class LLMQueryAnalyzer:
             user_prompt: 用户提示
         
         Returns:
-            LLM 响应内容
+            (LLM 响应内容, usage 字典)
         
         Raises:
             requests.exceptions.RequestException: 请求失败时抛出
@@ -146,13 +196,13 @@ class LLMQueryAnalyzer:
         response.raise_for_status()
         
         result = response.json()
-        return result['choices'][0]['message']['content']
+        return result['choices'][0]['message']['content'], result.get('usage')
     
     def _call_anthropic(
         self, 
         system_prompt: str, 
         user_prompt: str
-    ) -> str:
+    ) -> Tuple[str, Optional[Dict[str, Any]]]:
         """
         调用 Anthropic Claude API
         
@@ -161,7 +211,7 @@ class LLMQueryAnalyzer:
             user_prompt: 用户提示
         
         Returns:
-            LLM 响应内容
+            (LLM 响应内容, usage 字典)
         
         Raises:
             requests.exceptions.RequestException: 请求失败时抛出
@@ -203,7 +253,7 @@ class LLMQueryAnalyzer:
             end = content.rindex('}') + 1
             content = content[start:end]
         
-        return content
+        return content, result.get('usage')
     
     def _parse_response(self, response: str) -> Dict[str, Any]:
         """
@@ -0,0 +1,448 @@
+#!/usr/bin/env python3
+"""
+本地 LLM Stub 服务 - 离线、可复现的性能测试
+
+同时支持 OpenAI 兼容的 chat completions 协议和 Anthropic messages 协议：
+- 可配置的延迟分布（fixed / uniform / normal / lognormal）
+- 错误注入（按比例返回 429 / 5xx）
+- 流式输出（SSE）
+- 录制真实会话（转发到上游并保存）与回放
+
+使用方法:
+  python -m github_agent.llm_stub --port 8765 --latency lognormal:0.8,0.4
+  export LLM_API_BASE=http://127.0.0.1:8765
+  python agent.py --llm --query "python crawler"
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    from .singleflight import make_key
+except ImportError:  # 以脚本方式运行时（github_agent 目录在 sys.path 中）
+    from singleflight import make_key
+
+
+def parse_latency(spec: str) -> Tuple[str, List[float]]:
+    """
+    解析延迟分布描述
+
+    Args:
+        spec: 例如 "fixed:0.2"、"uniform:0.1,0.5"、"normal:0.5,0.1"、"lognormal:0.8,0.4"
+              （lognormal 的参数为中位数和对数标准差）
+
+    Returns:
+        (分布名称, 参数列表)
+
+    Raises:
+        ValueError: 格式无效时抛出
+    """
+    name, _, params = spec.partition(':')
+    expected = {'fixed': 1, 'uniform': 2, 'normal': 2, 'lognormal': 2}
+    if name not in expected:
+        raise ValueError(f"未知的延迟分布: {name}. 可用: {', '.join(expected)}")
+
+    values = [float(v) for v in params.split(',') if v.strip()] if params else []
+    if len(values) != expected[name]:
+        raise ValueError(f"延迟分布 {name} 需要 {expected[name]} 个参数: {spec}")
+    return name, values
+
+
+@dataclass
+class StubConfig:
+    """Stub 服务配置"""
+    latency: str = 'fixed:0'
+    error_rate: float = 0.0
+    error_codes: List[int] = field(default_factory=lambda: [429, 500, 503])
+    stream_chunk_delay: float = 0.0
+    seed: Optional[int] = None
+    replay_path: Optional[Path] = None
+    record_path: Optional[Path] = None
+    upstream_base: Optional[str] = None
+
+
+def request_key(protocol: str, body: Dict[str, Any]) -> str:
+    """按协议、模型和消息内容生成回放 key（忽略 temperature、stream 等参数）"""
+    return make_key(protocol, body.get('model'), body.get('system'), body.get('messages'))
+
+
+def _estimate_tokens(text: str) -> int:
+    """粗略估计 token 数"""
+    return max(1, len(text) // 4)
+
+
+def synthesize_content(body: Dict[str, Any]) -> str:
+    """
+    在没有录制数据时生成确定性的响应内容
+
+    查询分析请求返回关键词 JSON，评分请求返回由 prompt 哈希决定的分数。
+    """
+    messages = body.get('messages') or []
+    system = body.get('system') or ''
+    if messages and messages[0].get('role') == 'system':
+        system = messages[0].get('content', '')
+    user = messages[-1].get('content', '') if messages else ''
+    if isinstance(user, list):
+        user = ' '.join(part.get('text', '') for part in user if isinstance(part, dict))
+
+    if '评估' in system or '评分' in user:
+        digest = int(hashlib.sha256(user.encode('utf-8')).hexdigest(), 16)
+        score = digest % 101
+        return json.dumps({
+            'score': score,
+            'reason': f'stub 评分 {score}',
+            'relevant': score >= 30
+        }, ensure_ascii=False)
+
+    query = user.split('\n')[0].replace('用户需求：', '')
+    words = [w.lower() for w in re.findall(r'[A-Za-z][A-Za-z0-9.+#-]*', query)]
+    return json.dumps({
+        'keywords': words[:2],
+        'count': 10,
+        'language': None,
+        'category': 'library',
+        'description': query
+    }, ensure_ascii=False)
+
+
+class LLMStubServer(ThreadingHTTPServer):
+    """OpenAI / Anthropic 兼容的本地 stub 服务"""
+
+    daemon_threads = True
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0,
+                 config: Optional[StubConfig] = None):
+        """
+        Args:
+            host: 监听地址
+            port: 监听端口，0 表示随机端口
+            config: Stub 配置
+        """
+        super().__init__((host, port), _StubHandler)
+        self.config = config or StubConfig()
+        self.latency_dist = parse_latency(self.config.latency)
+        self.rng = random.Random(self.config.seed)
+        self.lock = threading.Lock()
+        self.stats = {'requests': 0, 'errors': 0, 'replayed': 0, 'recorded': 0, 'synthesized': 0}
+        self.recordings: Dict[str, Dict[str, Any]] = {}
+        self._thread: Optional[threading.Thread] = None
+
+        if self.config.replay_path and Path(self.config.replay_path).exists():
+            self.load_recordings(Path(self.config.replay_path))
+
+    @property
+    def url(self) -> str:
+        """服务地址，可直接作为 LLMConfig.api_base / LLM_API_BASE"""
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def load_recordings(self, path: Path):
+        """加载录制的 JSONL 文件"""
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    entry = json.loads(line)
+                    self.recordings[entry['key']] = entry
+
+    def sample_latency(self) -> float:
+        """按配置的分布采样一次延迟（秒）"""
+        name, params = self.latency_dist
+        with self.lock:
+            if name == 'fixed':
+                value = params[0]
+            elif name == 'uniform':
+                value = self.rng.uniform(params[0], params[1])
+            elif name == 'normal':
+                value = self.rng.gauss(params[0], params[1])
+            else:
+                value = self.rng.lognormvariate(math.log(max(params[0], 1e-6)), params[1])
+        return max(value, 0.0)
+
+    def pick_error(self) -> Optional[int]:
+        """按错误率决定是否注入错误，返回 HTTP 状态码"""
+        if self.config.error_rate <= 0:
+            return None
+        with self.lock:
+            if self.rng.random() < self.config.error_rate:
+                return self.rng.choice(self.config.error_codes)
+        return None
+
+    def record(self, key: str, protocol: str, body: Dict[str, Any],
+               status: int, response: Dict[str, Any]):
+        """保存一条录制数据"""
+        entry = {'key': key, 'protocol': protocol, 'request': body,
+                 'status': status, 'response': response}
+        with self.lock:
+            self.recordings[key] = entry
+            self.stats['recorded'] += 1
+            if self.config.record_path:
+                with open(self.config.record_path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+    def count(self, stat: str):
+        """统计计数"""
+        with self.lock:
+            self.stats[stat] += 1
+
+    def start(self) -> 'LLMStubServer':
+        """在后台线程中启动服务"""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """停止服务"""
+        self.shutdown()
+        self.server_close()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def __enter__(self) -> 'LLMStubServer':
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """请求处理器"""
+
+    server: LLMStubServer
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        raw = self.rfile.read(length)
+
+        if self.path.endswith('/chat/completions'):
+            protocol = 'openai'
+        elif self.path.endswith('/messages'):
+            protocol = 'anthropic'
+        else:
+            self._send_json(404, {'error': {'message': f'unknown path: {self.path}'}})
+            return
+
+        try:
+            body = json.loads(raw or b'{}')
+        except json.JSONDecodeError:
+            self._send_json(400, {'error': {'message': 'invalid JSON body'}})
+            return
+
+        self.server.count('requests')
+        time.sleep(self.server.sample_latency())
+
+        error_code = self.server.pick_error()
+        if error_code:
+            self.server.count('errors')
+            headers = {'Retry-After': '1'} if error_code == 429 else {}
+            self._send_json(error_code, {'error': {'message': 'injected error', 'code': error_code}},
+                            headers)
+            return
+
+        key = request_key(protocol, body)
+        recorded = self.server.recordings.get(key)
+        if recorded:
+            self.server.count('replayed')
+            status, response = recorded['status'], recorded['response']
+        elif self.server.config.upstream_base:
+            status, response = self._forward(protocol, body)
+            self.server.record(key, protocol, body, status, response)
+        else:
+            self.server.count('synthesized')
+            status = 200
+            response = self._build_response(protocol, body, synthesize_content(body))
+
+        if status == 200 and body.get('stream'):
+            self._stream(protocol, body, self._extract_content(protocol, response),
+                         response.get('usage'))
+        else:
+            self._send_json(status, response)
+
+    def _forward(self, protocol: str, body: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        """转发到上游真实 API（录制模式）"""
+        import requests
+
+        headers = {k: v for k, v in self.headers.items()
+                   if k.lower() in ('authorization', 'x-api-key', 'anthropic-version', 'content-type')}
+        upstream_body = dict(body)
+        upstream_body.pop('stream', None)
+        url = self.server.config.upstream_base.rstrip('/') + self.path
+        response = requests.post(url, headers=headers, json=upstream_body, timeout=120)
+        return response.status_code, response.json()
+
+    @staticmethod
+    def _extract_content(protocol: str, response: Dict[str, Any]) -> str:
+        """从完整响应中取出文本"""
+        if protocol == 'anthropic':
+            return ''.join(block.get('text', '') for block in response.get('content', []))
+        return response['choices'][0]['message']['content']
+
+    @staticmethod
+    def _build_response(protocol: str, body: Dict[str, Any], content: str) -> Dict[str, Any]:
+        """构造非流式响应"""
+        prompt_text = json.dumps(body.get('messages', []), ensure_ascii=False) + str(body.get('system', ''))
+        prompt_tokens = _estimate_tokens(prompt_text)
+        completion_tokens = _estimate_tokens(content)
+        model = body.get('model', 'stub')
+
+        if protocol == 'anthropic':
+            return {
+                'id': 'msg_stub',
+                'type': 'message',
+                'role': 'assistant',
+                'model': model,
+                'content': [{'type': 'text', 'text': content}],
+                'stop_reason': 'end_turn',
+                'usage': {'input_tokens': prompt_tokens, 'output_tokens': completion_tokens},
+            }
+        return {
+            'id': 'chatcmpl-stub',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': model,
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': content},
+                'finish_reason': 'stop',
+            }],
+            'usage': {
+                'prompt_tokens': prompt_tokens,
+                'completion_tokens': completion_tokens,
+                'total_tokens': prompt_tokens + completion_tokens,
+            },
+        }
+
+    def _send_json(self, status: int, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+        data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _stream(self, protocol: str, body: Dict[str, Any], content: str, usage: Optional[Dict]):
+        """以 SSE 方式分块输出"""
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+
+        chunks = [content[i:i + 16] for i in range(0, len(content), 16)] or ['']
+        model = body.get('model', 'stub')
+
+        if protocol == 'anthropic':
+            self._event('message_start', {'type': 'message_start', 'message': {
+                'id': 'msg_stub', 'type': 'message', 'role': 'assistant', 'model': model,
+                'content': [], 'usage': {'input_tokens': (usage or {}).get('input_tokens', 0),
+                                         'output_tokens': 0}}})
+            self._event('content_block_start', {'type': 'content_block_start', 'index': 0,
+                                                'content_block': {'type': 'text', 'text': ''}})
+            for chunk in chunks:
+                self._event('content_block_delta', {'type': 'content_block_delta', 'index': 0,
+                                                    'delta': {'type': 'text_delta', 'text': chunk}})
+            self._event('content_block_stop', {'type': 'content_block_stop', 'index': 0})
+            self._event('message_delta', {'type': 'message_delta', 'delta': {'stop_reason': 'end_turn'},
+                                          'usage': {'output_tokens': (usage or {}).get('output_tokens', 0)}})
+            self._event('message_stop', {'type': 'message_stop'})
+        else:
+            for chunk in chunks:
+                self._event(None, {'id': 'chatcmpl-stub', 'object': 'chat.completion.chunk', 'model': model,
+                                   'choices': [{'index': 0, 'delta': {'content': chunk}, 'finish_reason': None}]})
+            self._event(None, {'id': 'chatcmpl-stub', 'object': 'chat.completion.chunk', 'model': model,
+                               'choices': [{'index': 0, 'delta': {}, 'finish_reason': 'stop'}],
+                               'usage': usage})
+            self.wfile.write(b'data: [DONE]\n\n')
+            self.wfile.flush()
+
+    def _event(self, event: Optional[str], payload: Dict[str, Any]):
+        """写出一个 SSE 事件"""
+        data = ''
+        if event:
+            data += f'event: {event}\n'
+        data += f'data: {json.dumps(payload, ensure_ascii=False)}\n\n'
+        self.wfile.write(data.encode('utf-8'))
+        self.wfile.flush()
+        if self.server.config.stream_chunk_delay:
+            time.sleep(self.server.config.stream_chunk_delay)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='本地 LLM Stub 服务（OpenAI / Anthropic 兼容）',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+示例:
+  # 合成响应，对数正态延迟（中位数 0.8s），5% 错误
+  python -m github_agent.llm_stub --latency lognormal:0.8,0.4 --error-rate 0.05
+
+  # 录制真实会话
+  python -m github_agent.llm_stub --upstream https://api.deepseek.com --record session.jsonl
+
+  # 回放录制的会话
+  python -m github_agent.llm_stub --replay session.jsonl
+
+  # 让 Agent 指向 stub
+  export LLM_API_BASE=http://127.0.0.1:8765
+        """
+    )
+    parser.add_argument('--host', default='127.0.0.1', help='监听地址')
+    parser.add_argument('--port', type=int, default=8765, help='监听端口')
+    parser.add_argument('--latency', default='fixed:0',
+                        help='延迟分布: fixed:S | uniform:A,B | normal:MU,SIGMA | lognormal:MEDIAN,SIGMA')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='注入错误的比例 (0-1)')
+    parser.add_argument('--error-codes', default='429,500,503', help='注入的 HTTP 状态码，逗号分隔')
+    parser.add_argument('--stream-chunk-delay', type=float, default=0.0, help='流式输出每块之间的延迟（秒）')
+    parser.add_argument('--seed', type=int, help='随机种子（保证延迟和错误可复现）')
+    parser.add_argument('--replay', help='回放的录制文件（JSONL）')
+    parser.add_argument('--record', help='录制输出文件（JSONL），需配合 --upstream')
+    parser.add_argument('--upstream', help='录制模式下转发的上游地址，例如 https://api.deepseek.com')
+
+    args = parser.parse_args()
+
+    config = StubConfig(
+        latency=args.latency,
+        error_rate=args.error_rate,
+        error_codes=[int(c) for c in args.error_codes.split(',') if c.strip()],
+        stream_chunk_delay=args.stream_chunk_delay,
+        seed=args.seed,
+        replay_path=Path(args.replay) if args.replay else None,
+        record_path=Path(args.record) if args.record else None,
+        upstream_base=args.upstream,
+    )
+
+    server = LLMStubServer(args.host, args.port, config)
+    print(f"🧪 LLM Stub 服务已启动: {server.url}")
+    print(f"   OpenAI 兼容: {server.url}/v1/chat/completions")
+    print(f"   Anthropic:   {server.url}/v1/messages")
+    if server.recordings:
+        print(f"   已加载 {len(server.recordings)} 条录制数据")
+    print(f"   export LLM_API_BASE={server.url}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\n⏹️  已停止，统计: {server.stats}")
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,248 @@
+"""
+规则分析置信度评估模块
+
+对 "python crawler"、"rust websocket" 这类明确的技术查询，规则分析的结果
+和 LLM 一样好。这里给规则分析打一个置信度分数，超过阈值时直接跳过 LLM。
+关键词词典可以从历史 LLM 分析结果中学习，使跳过率随使用逐渐提高
+（学习结果默认只保存在内存中，指定 learned_path 时才写入文件）。
+"""
+
+import json
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+try:
+    from .config import Constants
+    from .utils import clean_keywords
+except ImportError:  # 以脚本方式运行时（github_agent 目录在 sys.path 中）
+    from config import Constants
+    from utils import clean_keywords
+
+
+# 开启持久化时的默认学习结果保存位置（agent.py --learn-keywords）
+DEFAULT_LEARNED_PATH = Path.home() / '.github_agent' / 'learned_keywords.json'
+
+# ASCII 技术词、连续中文、数字
+_TOKEN_PATTERN = re.compile(r'[A-Za-z][A-Za-z0-9.+#_-]*|[\u4e00-\u9fff]+|\d+')
+_CJK_PATTERN = re.compile(r'[\u4e00-\u9fff]')
+
+# 跳过 LLM 时关键词个数的范围：GitHub 搜索是 AND 逻辑，关键词过多时需要 LLM 精简；
+# 只有语言没有关键词的查询（如 "python"）搜索结果没有意义，也交给 LLM
+MIN_BYPASS_KEYWORDS = 1
+MAX_BYPASS_KEYWORDS = 2
+
+
+@dataclass
+class ConfidenceResult:
+    """置信度评估结果"""
+    confidence: float
+    keywords: List[str] = field(default_factory=list)
+    language: Optional[str] = None
+    unknown: List[str] = field(default_factory=list)
+
+
+def _strip_stop_words(phrase: str) -> str:
+    """去掉中文短语首尾的停用词，例如 "爬虫库" -> "爬虫"、"找个" -> "" """
+    stop_words = sorted(Constants.STOP_WORDS, key=len, reverse=True)
+    changed = True
+    while phrase and changed:
+        changed = False
+        for word in stop_words:
+            if phrase.startswith(word):
+                phrase = phrase[len(word):]
+                changed = True
+            if phrase.endswith(word):
+                phrase = phrase[:-len(word)]
+                changed = True
+    return phrase
+
+
+def tokenize(query: str) -> List[str]:
+    """
+    切分查询：ASCII 技术词、中文短语（去掉首尾停用词）
+
+    Args:
+        query: 查询文本
+
+    Returns:
+        清理后的词列表
+    """
+    tokens = []
+    for token in _TOKEN_PATTERN.findall(query):
+        if _CJK_PATTERN.match(token):
+            token = _strip_stop_words(token)
+        if token:
+            tokens.append(token)
+    return clean_keywords(tokens)
+
+
+class QueryConfidenceScorer:
+    """规则分析置信度评估器"""
+
+    def __init__(
+        self,
+        threshold: float = 0.8,
+        learned_path: Optional[Path] = None,
+        min_observations: int = 2
+    ):
+        """
+        Args:
+            threshold: 置信度阈值，达到该值时跳过 LLM（大于 1 表示从不跳过）
+            learned_path: 学习结果的 JSON 文件路径，默认 None 不持久化
+            min_observations: 关键词、以及中文短语到关键词的映射至少被观察到几次才生效
+        """
+        self.threshold = threshold
+        self.learned_path = Path(learned_path) if learned_path else None
+        self.min_observations = min_observations
+        self._lock = threading.Lock()
+
+        self.language_aliases: Dict[str, str] = {
+            alias: lang
+            for lang, aliases in Constants.LANGUAGE_MAP.items()
+            for alias in aliases
+        }
+        self.learned_keywords: set = set()
+        # 尚未达到 min_observations 的候选关键词
+        self.keyword_counts: Counter = Counter()
+        self.phrase_counts: Dict[str, Counter] = {}
+        self._load()
+
+    def _load(self):
+        """加载学习结果"""
+        if not self.learned_path or not self.learned_path.exists():
+            return
+        try:
+            data = json.loads(self.learned_path.read_text(encoding='utf-8'))
+        except (OSError, json.JSONDecodeError):
+            return
+        self.learned_keywords = set(data.get('keywords', []))
+        self.keyword_counts = Counter(data.get('candidates', {}))
+        self.phrase_counts = {
+            phrase: Counter(counts) for phrase, counts in data.get('phrases', {}).items()
+        }
+
+    def _save(self):
+        """保存学习结果"""
+        if not self.learned_path:
+            return
+        data = {
+            'keywords': sorted(self.learned_keywords),
+            'candidates': dict(self.keyword_counts),
+            'phrases': {phrase: dict(counts) for phrase, counts in self.phrase_counts.items()},
+        }
+        self.learned_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.learned_path.with_suffix('.tmp')
+        tmp_path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding='utf-8')
+        tmp_path.replace(self.learned_path)
+
+    def is_known(self, word: str) -> bool:
+        """是否为已知技术关键词"""
+        word = word.lower()
+        return word in Constants.KNOWN_KEYWORDS or word in self.learned_keywords
+
+    def phrase_keyword(self, phrase: str) -> Optional[str]:
+        """中文短语学习到的英文关键词（观察次数不足时返回 None）"""
+        counts = self.phrase_counts.get(phrase)
+        if not counts:
+            return None
+        keyword, seen = counts.most_common(1)[0]
+        return keyword if seen >= self.min_observations else None
+
+    def score(self, query: str) -> ConfidenceResult:
+        """
+        评估规则分析的置信度
+
+        已知语言 / 关键词 / 学习到的中文短语计 1 分，未知 ASCII 词计 0.5 分，
+        未知中文描述计 0 分；关键词超过 2 个时（GitHub 搜索是 AND 逻辑）打折，
+        这类查询无论分数多高都不跳过 LLM（见 should_bypass）。
+
+        Args:
+            query: 用户查询
+
+        Returns:
+            置信度评估结果（包含规则分析得到的关键词和语言）
+        """
+        tokens = tokenize(query)
+        keywords: List[str] = []
+        unknown: List[str] = []
+        language = None
+        points = 0.0
+
+        for token in tokens:
+            lower = token.lower()
+            if _CJK_PATTERN.match(token):
+                mapped = self.phrase_keyword(token)
+                if mapped:
+                    points += 1.0
+                    keywords.append(mapped)
+                else:
+                    unknown.append(token)
+            elif lower in self.language_aliases and language is None:
+                language = self.language_aliases[lower]
+                points += 1.0
+            elif self.is_known(lower):
+                points += 1.0
+                keywords.append(lower)
+            else:
+                points += 0.5
+                unknown.append(token)
+                keywords.append(lower)
+
+        if not tokens:
+            return ConfidenceResult(0.0, unknown=unknown)
+
+        confidence = points / len(tokens)
+        if len(keywords) > 2:
+            confidence *= 0.8
+        if not keywords and language is None:
+            confidence = 0.0
+
+        return ConfidenceResult(round(confidence, 3), keywords, language, unknown)
+
+    def should_bypass(self, result: ConfidenceResult) -> bool:
+        """置信度达到阈值、且关键词个数在 1-2 个之间时跳过 LLM"""
+        return (result.confidence >= self.threshold
+                and MIN_BYPASS_KEYWORDS <= len(result.keywords) <= MAX_BYPASS_KEYWORDS)
+
+    def learn(self, query: str, analysis: Dict[str, Any]):
+        """
+        从一次 LLM 分析结果中学习
+
+        - 查询中原样出现的 LLM 关键词被观察到 min_observations 次后加入已知关键词
+        - 只剩一个未知中文短语、且 LLM 恰好给出一个查询中没有的关键词时，
+          记录该短语到关键词的映射
+
+        Args:
+            query: 用户查询
+            analysis: LLM 分析结果
+        """
+        llm_keywords = [str(kw).lower() for kw in analysis.get('keywords') or []]
+        if not llm_keywords:
+            return
+
+        tokens = tokenize(query)
+        ascii_tokens = {t.lower() for t in tokens if not _CJK_PATTERN.match(t)}
+        phrases = [t for t in tokens if _CJK_PATTERN.match(t) and not self.phrase_keyword(t)]
+        new_keywords = [kw for kw in llm_keywords if kw not in ascii_tokens]
+
+        with self._lock:
+            changed = False
+            for kw in llm_keywords:
+                if kw in ascii_tokens and kw not in self.language_aliases and not self.is_known(kw):
+                    self.keyword_counts[kw] += 1
+                    if self.keyword_counts[kw] >= self.min_observations:
+                        # 单次 LLM 结果不可靠，多次一致后才作为跳过 LLM 的依据
+                        del self.keyword_counts[kw]
+                        self.learned_keywords.add(kw)
+                    changed = True
+
+            if len(phrases) == 1 and len(new_keywords) == 1:
+                self.phrase_counts.setdefault(phrases[0], Counter())[new_keywords[0]] += 1
+                changed = True
+
+            if changed:
+                self._save()
@@ -0,0 +1,419 @@
+#!/usr/bin/env python3
+"""
+本地相关性模型 - 从历史 LLM 评分中蒸馏
+
+开启 --score-log 后，SmartFilter 的每次 LLM 评分都会记录到 JSONL（查询、仓库信息、README 摘要、分数），
+再用这些数据训练一个基于哈希特征的逻辑回归模型（NumPy，CPU 即可）。
+模型预测足够确定（很相关或很不相关）时直接跳过 LLM。
+
+使用方法:
+  python -m github_agent.relevance_model train --log ~/.github_agent/score_log.jsonl
+  python -m github_agent.relevance_model evaluate --log ~/.github_agent/score_log.jsonl
+"""
+
+import argparse
+import json
+import math
+import random
+import re
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+try:
+    import numpy as np
+except ImportError:  # numpy 是可选依赖，只有训练 / 预测需要
+    np = None
+
+
+DEFAULT_LOG_PATH = Path.home() / '.github_agent' / 'score_log.jsonl'
+DEFAULT_MODEL_PATH = Path.home() / '.github_agent' / 'relevance_model.npz'
+
+# 哈希特征维度
+HASH_DIM = 1 << 18
+# 稠密特征数量（见 extract_features）
+DENSE_DIM = 7
+# README 只取前 500 个字符，与 LLM 评分时一致
+README_CHARS = 500
+
+_WORD_PATTERN = re.compile(r'[a-z0-9][a-z0-9+#.-]*|[\u4e00-\u9fff]{2,}')
+
+
+def tokenize_text(text: Optional[str]) -> List[str]:
+    """小写切词，保留英文技术词和中文短语"""
+    return _WORD_PATTERN.findall(text.lower()) if text else []
+
+
+def make_example(user_query: str, repo: Dict[str, Any], readme: Optional[str],
+                 score: Optional[float] = None) -> Dict[str, Any]:
+    """
+    构造一条样本（也是评分日志的行格式）
+
+    Args:
+        user_query: 用户查询
+        repo: 仓库信息
+        readme: README 内容
+        score: LLM 评分（预测时为 None）
+
+    Returns:
+        样本字典
+    """
+    return {
+        'query': user_query,
+        'repo': {
+            'full_name': repo.get('full_name', ''),
+            'description': repo.get('description') or '',
+            'language': repo.get('language') or '',
+            'topics': list(repo.get('topics') or []),
+            'stargazers_count': repo.get('stargazers_count', 0) or 0,
+        },
+        'readme': (readme or '')[:README_CHARS],
+        'score': score,
+    }
+
+
+class ScoreLogger:
+    """把 LLM 评分追加到 JSONL 文件"""
+
+    def __init__(self, path: Path = DEFAULT_LOG_PATH):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def log(self, user_query: str, repo: Dict[str, Any], readme: Optional[str],
+            score: Any, source: str = 'llm'):
+        """记录一条评分（无法解析为数字的分数会被忽略）"""
+        try:
+            score = float(score)
+        except (TypeError, ValueError):
+            return
+        example = make_example(user_query, repo, readme, score)
+        example['source'] = source
+        example['timestamp'] = time.time()
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(example, ensure_ascii=False) + '\n')
+
+
+def load_examples(path: Path) -> List[Dict[str, Any]]:
+    """读取评分日志"""
+    examples = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                example = json.loads(line)
+                if example.get('score') is not None:
+                    examples.append(example)
+    return examples
+
+
+@dataclass
+class FeatureBatch:
+    """一批样本的特征：稀疏哈希特征（COO 格式）+ 稠密特征"""
+    rows: Any
+    cols: Any
+    dense: Any
+    size: int
+
+
+class _Hasher:
+    """带缓存的特征哈希（crc32 跨进程稳定）"""
+
+    def __init__(self, dim: int = HASH_DIM):
+        self.dim = dim
+        self._cache: Dict[str, int] = {}
+
+    def __call__(self, feature: str) -> int:
+        index = self._cache.get(feature)
+        if index is None:
+            index = zlib.crc32(feature.encode('utf-8')) % self.dim
+            self._cache[feature] = index
+        return index
+
+    def hash_all(self, features: List[str]):
+        """批量哈希为 int64 数组（每个不同的特征只计算一次 crc32）"""
+        return np.fromiter(map(self, features), dtype=np.int64, count=len(features))
+
+
+def extract_features(examples: Iterable[Dict[str, Any]], hasher: Optional[_Hasher] = None) -> FeatureBatch:
+    """
+    批量提取特征
+
+    稀疏部分包含：查询词、仓库词、查询词 × 仓库词交叉特征（只取命中的词）、
+    查询词 × 语言；稠密部分为通用匹配度和 stars。切词和特征字符串逐条生成，
+    哈希、行号和稠密特征对整批样本用 NumPy 数组运算一次完成。
+
+    Args:
+        examples: 样本列表（make_example 的格式）
+        hasher: 特征哈希器
+
+    Returns:
+        FeatureBatch
+    """
+    if np is None:
+        raise ImportError("本地相关性模型需要 numpy: pip install numpy")
+
+    hasher = hasher or _Hasher()
+    features: List[str] = []
+    counts: List[int] = []
+    # 每条样本的 [查询词数, 名称命中, 描述 / 标签命中, README 命中, 语言命中, stars, 有 README, 有描述]
+    stats: List[List[float]] = []
+
+    for example in examples:
+        repo = example['repo']
+        query = example['query']
+        query_tokens = set(tokenize_text(query))
+        name_tokens = set(tokenize_text(repo.get('full_name', '').replace('/', ' ').replace('-', ' ')))
+        text_tokens = name_tokens | set(tokenize_text(repo.get('description'))) | {
+            t.lower() for t in repo.get('topics', [])
+        }
+        readme_tokens = set(tokenize_text(example.get('readme')))
+        language = (repo.get('language') or '').lower()
+
+        before = len(features)
+        features += [f'q:{t}' for t in query_tokens]
+        features += [f'r:{t}' for t in text_tokens]
+        features += [f'x:{q}|{t}' for q in query_tokens for t in text_tokens if q == t or q in t]
+        features += [f'xr:{q}' for q in query_tokens & readme_tokens]
+        features += [f'ql:{q}|{language}' for q in query_tokens]
+        counts.append(len(features) - before)
+
+        stats.append([
+            len(query_tokens), len(query_tokens & name_tokens), len(query_tokens & text_tokens),
+            len(query_tokens & readme_tokens), bool(language and language in query.lower()),
+            repo.get('stargazers_count', 0) or 0, bool(readme_tokens), bool(repo.get('description')),
+        ])
+
+    size = len(stats)
+    stats = np.asarray(stats, dtype=np.float64).reshape(size, 8)
+    n = np.maximum(stats[:, 0:1], 1)
+    dense = np.hstack([
+        stats[:, 1:4] / n,
+        stats[:, 4:5],
+        np.log1p(stats[:, 5:6]) / 12.0,
+        stats[:, 6:8],
+    ])
+    return FeatureBatch(
+        rows=np.repeat(np.arange(size, dtype=np.int64), counts),
+        cols=hasher.hash_all(features),
+        dense=dense,
+        size=size,
+    )
+
+
+def _sigmoid(z):
+    return 1.0 / (1.0 + np.exp(-np.clip(z, -30, 30)))
+
+
+class RelevanceModel:
+    """哈希特征逻辑回归，预测 0-100 的相关性分数"""
+
+    def __init__(self, confident_low: float = 30, confident_high: float = 80):
+        """
+        Args:
+            confident_low: 预测分数低于该值时认为确定不相关
+            confident_high: 预测分数高于该值时认为确定相关
+        """
+        if np is None:
+            raise ImportError("本地相关性模型需要 numpy: pip install numpy")
+        self.confident_low = confident_low
+        self.confident_high = confident_high
+        self.weights = np.zeros(HASH_DIM)
+        self.dense_weights = np.zeros(DENSE_DIM)
+        self.bias = 0.0
+        self.trained_examples = 0
+        self._hasher = _Hasher()
+
+    def _logits(self, batch: FeatureBatch):
+        sparse = np.bincount(batch.rows, weights=self.weights[batch.cols], minlength=batch.size)
+        return sparse + batch.dense @ self.dense_weights + self.bias
+
+    def fit(self, examples: List[Dict[str, Any]], epochs: int = 300,
+            learning_rate: float = 0.5, l2: float = 1e-4) -> 'RelevanceModel':
+        """
+        用 LLM 分数（除以 100 作为软标签）训练
+
+        Args:
+            examples: 带 score 的样本
+            epochs: 全量梯度下降轮数
+            learning_rate: 学习率
+            l2: L2 正则系数
+
+        Returns:
+            self
+        """
+        batch = extract_features(examples, self._hasher)
+        targets = np.clip(np.asarray([e['score'] for e in examples], dtype=np.float64) / 100.0, 0, 1)
+        n = max(batch.size, 1)
+
+        for _ in range(epochs):
+            error = _sigmoid(self._logits(batch)) - targets
+            grad = np.bincount(batch.cols, weights=error[batch.rows], minlength=HASH_DIM) / n
+            self.weights -= learning_rate * (grad + l2 * self.weights)
+            self.dense_weights -= learning_rate * (batch.dense.T @ error / n + l2 * self.dense_weights)
+            self.bias -= learning_rate * error.mean()
+
+        self.trained_examples = batch.size
+        return self
+
+    def predict(self, examples: List[Dict[str, Any]]):
+        """
+        预测相关性分数
+
+        Args:
+            examples: 样本列表（make_example 的格式）
+
+        Returns:
+            0-100 的分数数组
+        """
+        if not examples:
+            return np.zeros(0)
+        return 100.0 * _sigmoid(self._logits(extract_features(examples, self._hasher)))
+
+    def confident_mask(self, predictions):
+        """预测是否足够确定，可以跳过 LLM"""
+        if not self.trained_examples:
+            return np.zeros(len(predictions), dtype=bool)
+        return (predictions <= self.confident_low) | (predictions >= self.confident_high)
+
+    def save(self, path: Path = DEFAULT_MODEL_PATH):
+        """保存模型"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'wb') as f:
+            np.savez_compressed(
+                f,
+                weights=self.weights,
+                dense_weights=self.dense_weights,
+                meta=np.asarray([self.bias, self.trained_examples,
+                                 self.confident_low, self.confident_high]),
+            )
+
+    @classmethod
+    def load(cls, path: Path = DEFAULT_MODEL_PATH) -> 'RelevanceModel':
+        """加载模型"""
+        data = np.load(Path(path))
+        bias, trained, low, high = data['meta']
+        model = cls(confident_low=float(low), confident_high=float(high))
+        model.weights = data['weights']
+        model.dense_weights = data['dense_weights']
+        model.bias = float(bias)
+        model.trained_examples = int(trained)
+        return model
+
+
+def _spearman(a, b) -> float:
+    """Spearman 等级相关系数（不处理并列）"""
+    if len(a) < 2:
+        return float('nan')
+    rank_a = np.argsort(np.argsort(a))
+    rank_b = np.argsort(np.argsort(b))
+    if rank_a.std() == 0 or rank_b.std() == 0:
+        return float('nan')
+    return float(np.corrcoef(rank_a, rank_b)[0, 1])
+
+
+def evaluate(model: RelevanceModel, examples: List[Dict[str, Any]], top_k: int = 5) -> Dict[str, float]:
+    """
+    评估模型与 LLM 排序的一致程度（按查询分组）
+
+    Args:
+        model: 训练好的模型
+        examples: 带 LLM 分数的测试样本
+        top_k: top-k 重合度的 k
+
+    Returns:
+        指标字典：MAE、每个查询的平均 Spearman、top-k 重合率、可跳过比例及其中的一致率
+    """
+    predictions = model.predict(examples)
+    targets = np.asarray([e['score'] for e in examples], dtype=np.float64)
+    confident = model.confident_mask(predictions)
+
+    by_query: Dict[str, List[int]] = {}
+    for i, example in enumerate(examples):
+        by_query.setdefault(example['query'], []).append(i)
+
+    spearmans, overlaps = [], []
+    for indices in by_query.values():
+        idx = np.asarray(indices)
+        rho = _spearman(predictions[idx], targets[idx])
+        if not math.isnan(rho):
+            spearmans.append(rho)
+        k = min(top_k, len(idx))
+        top_pred = set(idx[np.argsort(-predictions[idx])[:k]])
+        top_true = set(idx[np.argsort(-targets[idx])[:k]])
+        overlaps.append(len(top_pred & top_true) / k)
+
+    # 可跳过的样本中，模型与 LLM 对 "相关 / 不相关" 的判断是否一致
+    agree = ((predictions >= 50) == (targets >= 50))[confident]
+
+    return {
+        'examples': len(examples),
+        'queries': len(by_query),
+        'mae': float(np.abs(predictions - targets).mean()) if len(examples) else float('nan'),
+        'spearman': float(np.mean(spearmans)) if spearmans else float('nan'),
+        f'top{top_k}_overlap': float(np.mean(overlaps)) if overlaps else float('nan'),
+        'confident_rate': float(confident.mean()) if len(examples) else 0.0,
+        'confident_agreement': float(agree.mean()) if agree.size else float('nan'),
+    }
+
+
+def split_by_query(examples: List[Dict[str, Any]], test_ratio: float = 0.2,
+                   seed: int = 0) -> tuple:
+    """按查询划分训练集 / 测试集，避免同一查询同时出现在两边"""
+    queries = sorted({e['query'] for e in examples})
+    random.Random(seed).shuffle(queries)
+    test_queries = set(queries[:max(1, int(len(queries) * test_ratio))]) if len(queries) > 1 else set()
+    train = [e for e in examples if e['query'] not in test_queries]
+    test = [e for e in examples if e['query'] in test_queries]
+    return train, test
+
+
+def main():
+    parser = argparse.ArgumentParser(description='本地相关性模型：训练与离线评估')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    train_parser = subparsers.add_parser('train', help='用评分日志训练模型')
+    train_parser.add_argument('--log', default=str(DEFAULT_LOG_PATH), help='评分日志（JSONL）')
+    train_parser.add_argument('--out', default=str(DEFAULT_MODEL_PATH), help='模型输出路径')
+    train_parser.add_argument('--epochs', type=int, default=300)
+
+    eval_parser = subparsers.add_parser('evaluate', help='按查询划分训练 / 测试集，评估与 LLM 排序的一致性')
+    eval_parser.add_argument('--log', default=str(DEFAULT_LOG_PATH), help='评分日志（JSONL）')
+    eval_parser.add_argument('--model', help='直接评估已有模型（默认在训练集上重新训练）')
+    eval_parser.add_argument('--test-ratio', type=float, default=0.2)
+    eval_parser.add_argument('--top-k', type=int, default=5)
+    eval_parser.add_argument('--epochs', type=int, default=300)
+
+    args = parser.parse_args()
+    examples = load_examples(Path(args.log))
+    print(f"📚 读取 {len(examples)} 条评分记录: {args.log}")
+
+    if args.command == 'train':
+        start = time.perf_counter()
+        model = RelevanceModel().fit(examples, epochs=args.epochs)
+        model.save(Path(args.out))
+        print(f"✅ 训练完成 ({time.perf_counter() - start:.2f}s)，模型已保存: {args.out}")
+        return
+
+    if args.model:
+        model, test = RelevanceModel.load(Path(args.model)), examples
+    else:
+        train, test = split_by_query(examples, args.test_ratio)
+        model = RelevanceModel().fit(train, epochs=args.epochs)
+        print(f"   训练集 {len(train)} 条，测试集 {len(test)} 条")
+
+    start = time.perf_counter()
+    metrics = evaluate(model, test, top_k=args.top_k)
+    elapsed = time.perf_counter() - start
+    print(f"📊 评估结果（预测 + 评估耗时 {elapsed * 1000:.1f}ms）:")
+    for name, value in metrics.items():
+        print(f"   {name}: {value:.3f}" if isinstance(value, float) else f"   {name}: {value}")
+
+
+if __name__ == '__main__':
+    main()
@@ -9,6 +9,14 @@ import requests
 from typing import List, Dict, Optional
 from dataclasses import dataclass
 
+from query_confidence import QueryConfidenceScorer
+try:
+    from .singleflight import default_group, make_key
+    from .usage import usage_tracker
+except ImportError:  # 以脚本方式运行时（github_agent 目录在 sys.path 中）
+    from singleflight import default_group, make_key
+    from usage import usage_tracker
+
 
 @dataclass
 class GitHubRepo:
@@ -22,6 +30,7 @@ class GitHubRepo:
     language: str
     topics: List[str]
     last_updated: str
+    size: int = 0  # 仓库大小（KB）
     
     def display(self, index: int, show_ai_score: bool = False) -> str:
         """格式化显示仓库信息"""
@@ -48,7 +57,8 @@ class GitHubSearchAgent:
     """GitHub 基础搜索代理"""
     
     def __init__(self, github_token: Optional[str] = None, use_llm: bool = False, 
-                 llm_provider: str = "deepseek", llm_api_key: Optional[str] = None):
+                 llm_provider: str = "deepseek", llm_api_key: Optional[str] = None,
+                 bypass_threshold: float = 0.8, learned_keywords_path: Optional[str] = None):
         """
         初始化 GitHub 搜索代理
         
@@ -57,6 +67,8 @@ class GitHubSearchAgent:
             use_llm: 是否使用 LLM 分析查询
             llm_provider: LLM 提供商
             llm_api_key: LLM API 密钥
+            bypass_threshold: 规则分析置信度达到该值时跳过 LLM（大于 1 表示从不跳过）
+            learned_keywords_path: 从 LLM 结果学习到的关键词的保存路径，默认 None 只保存在内存中
         """
         self.github_token = github_token or os.getenv('GITHUB_TOKEN')
         self.base_url = "https://api.github.com"
@@ -69,6 +81,8 @@ class GitHubSearchAgent:
         # LLM 配置
         self.use_llm = use_llm
         self.llm_analyzer = None
+        self.confidence_scorer = QueryConfidenceScorer(threshold=bypass_threshold,
+                                                       learned_path=learned_keywords_path)
         
         if use_llm:
             try:
@@ -95,9 +109,24 @@ class GitHubSearchAgent:
         """
         # 使用 LLM 分析
         if self.use_llm and self.llm_analyzer:
+            # 规则分析足够明确时跳过 LLM
+            confidence = self.confidence_scorer.score(user_query)
+            if self.confidence_scorer.should_bypass(confidence):
+                print(f"⚡ 查询足够明确（置信度 {confidence.confidence:.2f}），跳过 AI 分析")
+                usage_tracker.record_bypass('analyze')
+                analysis = self._simple_analyze(user_query)
+                analysis['keywords'] = confidence.keywords
+                analysis['language'] = confidence.language
+                analysis['source'] = 'rules'
+                analysis['confidence'] = confidence.confidence
+                return analysis
+            
             try:
                 print("🧠 使用 AI 分析需求...")
-                return self.llm_analyzer.analyze_query(user_query)
+                analysis = self.llm_analyzer.analyze_query(user_query)
+                if analysis.get('source') != 'fallback':
+                    self.confidence_scorer.learn(user_query, analysis)
+                return analysis
             except Exception as e:
                 print(f"⚠️  AI 分析失败，使用简单规则: {e}")
                 return self._simple_analyze(user_query)
@@ -189,10 +218,9 @@ class GitHubSearchAgent:
         print(f"🔍 搜索中... (查询: {query})")
         
         try:
-            response = requests.get(url, headers=self.headers, params=params, timeout=10)
-            response.raise_for_status()
-            
-            data = response.json()
+            # 相同 URL + 参数的并发搜索只发一次请求
+            key = make_key(url, params, self.headers.get('Authorization'))
+            data = default_group.do(key, self._fetch_json, url, params)
             total_count = data.get('total_count', 0)
             
             print(f"✅ GitHub API 响应:")
@@ -219,7 +247,8 @@ class GitHubSearchAgent:
                     forks=item['forks_count'],
                     language=item.get('language'),
                     topics=item.get('topics', []),
-                    last_updated=item['updated_at']
+                    last_updated=item['updated_at'],
+                    size=item.get('size', 0)
                 )
                 repos.append(repo)
             
@@ -229,6 +258,12 @@ class GitHubSearchAgent:
             print(f"❌ 搜索失败: {e}")
             return []
     
+    def _fetch_json(self, url: str, params: Dict) -> Dict:
+        """请求 GitHub API 并返回 JSON"""
+        response = requests.get(url, headers=self.headers, params=params, timeout=10)
+        response.raise_for_status()
+        return response.json()
+    
     def display_results(self, repos: List[GitHubRepo]):
         """显示搜索结果"""
         if not repos:
@@ -0,0 +1,86 @@
+"""
+请求合并模块（singleflight）
+
+同一时刻多个线程发起完全相同的上游请求（LLM 调用、GitHub API 调用）时，
+只有第一个调用者（leader）真正执行请求，其余调用者等待并共享同一个结果。
+"""
+
+import hashlib
+import json
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict
+
+
+def make_key(*parts: Any) -> str:
+    """
+    根据请求的组成部分生成规范化的 key
+
+    Args:
+        parts: 请求的组成部分（提供商、模型、prompt、URL、参数等）
+
+    Returns:
+        sha256 十六进制摘要
+    """
+    canonical = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class SingleFlight:
+    """合并相同 key 的并发调用"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, Future] = {}
+        self.calls = 0
+        self.shared = 0
+
+    def do(self, key: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        执行 fn，相同 key 的并发调用只执行一次
+
+        Args:
+            key: 请求 key，通常由 make_key 生成
+            fn: 实际执行请求的函数
+            args: 传给 fn 的位置参数
+            kwargs: 传给 fn 的关键字参数
+
+        Returns:
+            fn 的返回值（并发的调用者拿到的是同一个对象）
+
+        Raises:
+            fn 抛出的异常会同样传递给所有等待中的调用者
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+                self.calls += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    def in_flight(self) -> int:
+        """当前正在执行的请求数"""
+        with self._lock:
+            return len(self._calls)
+
+
+# 全局请求合并组（进程内所有 Agent 共享）
+default_group = SingleFlight()
@@ -5,22 +5,36 @@ Smart Filter - 使用 GitHub MCP + LLM 智能过滤搜索结果
 
 import json
 from typing import List, Dict, Optional
-from logger import get_logger
+from logger import logger
+try:
+    from .singleflight import default_group, make_key
+    from .usage import usage_tracker
+except ImportError:  # 以脚本方式运行时（github_agent 目录在 sys.path 中）
+    from singleflight import default_group, make_key
+    from usage import usage_tracker
+from relevance_model import make_example
 
-logger = get_logger(__name__)
+SCORE_SYSTEM_PROMPT = "你是一个专业的 GitHub 项目评估专家，擅长根据用户需求评估项目的相关性。"
 
 
 class SmartFilter:
     """智能过滤器 - 使用 README 内容和 LLM 评分"""
     
-    def __init__(self, llm_analyzer=None, mcp_client=None):
+    def __init__(self, llm_analyzer=None, mcp_client=None, cascade=None,
+                 relevance_model=None, score_logger=None):
         """
         Args:
             llm_analyzer: LLM 分析器实例
             mcp_client: MCP 客户端（如果有的话）
+            cascade: 级联评分器（CascadeScorer，可选），设置后先用便宜模型评分
+            relevance_model: 本地相关性模型（RelevanceModel，可选），预测确定时跳过 LLM
+            score_logger: 评分日志（ScoreLogger，可选），记录 LLM 评分用于训练本地模型
         """
         self.llm_analyzer = llm_analyzer
         self.mcp_client = mcp_client
+        self.cascade = cascade
+        self.relevance_model = relevance_model
+        self.score_logger = score_logger
     
     def fetch_readme(self, owner: str, repo: str) -> Optional[str]:
         """
@@ -33,6 +47,12 @@ class SmartFilter:
         Returns:
             README 内容（markdown 格式）或 None
         """
+        # 同一仓库的并发读取只请求一次
+        key = make_key('readme', owner, repo)
+        return default_group.do(key, self._fetch_readme, owner, repo)
+    
+    def _fetch_readme(self, owner: str, repo: str) -> Optional[str]:
+        """依次尝试常见 README 文件名"""
         # 尝试常见的 README 文件名
         readme_names = ['README.md', 'README.MD', 'readme.md', 'README', 'Readme.md']
         
@@ -64,7 +84,8 @@ class SmartFilter:
         logger.warning(f"⚠️  无法读取 {owner}/{repo} 的 README")
         return None
     
-    def score_repo(self, repo: Dict, user_query: str, readme_content: Optional[str]) -> Dict:
+    def score_repo(self, repo: Dict, user_query: str, readme_content: Optional[str],
+                   analyzer=None, call_site: str = 'score') -> Dict:
         """
         使用 LLM 对仓库进行评分
         
@@ -72,11 +93,14 @@ class SmartFilter:
             repo: 仓库信息
             user_query: 用户原始查询
             readme_content: README 内容
+            analyzer: 使用的 LLM 分析器（默认为 self.llm_analyzer）
+            call_site: 用量统计中的调用位置
             
         Returns:
             包含评分和理由的字典
         """
-        if not self.llm_analyzer:
+        analyzer = analyzer or self.llm_analyzer
+        if not analyzer:
             # 如果没有 LLM，只能用简单规则
             return {
                 'score': 50,
@@ -113,18 +137,10 @@ README 摘要：
 """
         
         try:
-            # 调用 LLM 评分
-            response = self.llm_analyzer.client.chat.completions.create(
-                model=self.llm_analyzer.model,
-                messages=[
-                    {"role": "system", "content": "你是一个专业的 GitHub 项目评估专家，擅长根据用户需求评估项目的相关性。"},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.3,
-                response_format={"type": "json_object"}
-            )
+            # 调用 LLM 评分（相同 prompt 的并发评分由分析器合并为一次请求）
+            response = analyzer.complete(SCORE_SYSTEM_PROMPT, prompt, call_site=call_site)
             
-            result = json.loads(response.choices[0].message.content)
+            result = json.loads(response)
             logger.debug(f"📊 {repo.get('full_name')}: 评分 {result.get('score', 0)}")
             return result
             
@@ -157,7 +173,7 @@ README 摘要：
         """
         logger.info(f"🧠 开始智能过滤 {len(repos)} 个仓库...")
         
-        scored_repos = []
+        candidates = []
         for i, repo in enumerate(repos, 1):
             owner, repo_name = repo['full_name'].split('/')
             
@@ -166,10 +182,33 @@ README 摘要：
             if fetch_readme:
                 logger.info(f"  [{i}/{len(repos)}] 读取 {repo['full_name']} 的 README...")
                 readme = self.fetch_readme(owner, repo_name)
-            
-            # LLM 评分
-            score_result = self.score_repo(repo, user_query, readme)
-            
+            candidates.append((repo, readme))
+        
+        # 本地模型预测确定的候选直接采用预测分数
+        score_results = [None] * len(candidates)
+        if self.relevance_model is not None:
+            score_results = self._predict_locally(candidates, user_query)
+        pending = [i for i, result in enumerate(score_results) if result is None]
+        pending_candidates = [candidates[i] for i in pending]
+        
+        # LLM 评分（配置了级联评分器时，先用便宜模型，再升级不确定的候选）
+        if self.cascade:
+            llm_results = self.cascade.score_all(self.score_repo, pending_candidates, user_query, top_k)
+            logger.info(self.cascade.format_stats())
+        else:
+            llm_results = [
+                self.score_repo(repo, user_query, readme) for repo, readme in pending_candidates
+            ]
+        
+        for i, result in zip(pending, llm_results):
+            score_results[i] = result
+            if self.score_logger and not result.get('reason', '').startswith('评分失败'):
+                repo, readme = candidates[i]
+                self.score_logger.log(user_query, repo, readme, result.get('score'),
+                                      source=result.get('tier', 'llm'))
+        
+        scored_repos = []
+        for (repo, _), score_result in zip(candidates, score_results):
             # 添加评分信息到仓库数据
             repo_with_score = {
                 **repo,
@@ -177,6 +216,8 @@ README 摘要：
                 'ai_reason': score_result.get('reason', ''),
                 'ai_relevant': score_result.get('relevant', True)
             }
+            if 'tier' in score_result:
+                repo_with_score['ai_tier'] = score_result['tier']
             scored_repos.append(repo_with_score)
         
         # 按 AI 评分排序
@@ -188,6 +229,34 @@ README 摘要：
         logger.info(f"✅ 智能过滤完成: {len(relevant_repos)}/{len(repos)} 个相关仓库")
         
         return relevant_repos[:top_k]
+    
+    def _predict_locally(self, candidates: List, user_query: str) -> List[Optional[Dict]]:
+        """
+        用本地相关性模型批量预测
+        
+        Returns:
+            与 candidates 对应的列表，预测确定的为评分字典，否则为 None
+        """
+        examples = [make_example(user_query, repo, readme) for repo, readme in candidates]
+        predictions = self.relevance_model.predict(examples)
+        confident = self.relevance_model.confident_mask(predictions)
+        
+        results: List[Optional[Dict]] = []
+        for prediction, is_confident in zip(predictions, confident):
+            if not is_confident:
+                results.append(None)
+                continue
+            score = int(round(float(prediction)))
+            usage_tracker.record_bypass('score')
+            results.append({
+                'score': score,
+                'reason': f'本地模型预测（{score}）',
+                'relevant': score >= 30,
+                'tier': 'local'
+            })
+        
+        logger.info(f"⚡ 本地模型跳过 {sum(r is not None for r in results)}/{len(candidates)} 次 LLM 评分")
+        return results
 
 
 def integrate_mcp_tools():
@@ -7,13 +7,18 @@ Smart Search Agent - 智能过滤搜索代理
 from typing import List, Dict, Optional
 from search_agent import GitHubSearchAgent, GitHubRepo
 from smart_filter import SmartFilter
+from cascade import CascadeScorer
+from relevance_model import ScoreLogger
 
 
 class SmartSearchAgent(GitHubSearchAgent):
     """智能搜索代理 - 带 LLM 评分的搜索"""
     
     def __init__(self, github_token: Optional[str] = None, use_llm: bool = True, 
-                 llm_provider: str = "deepseek", llm_api_key: Optional[str] = None):
+                 llm_provider: str = "deepseek", llm_api_key: Optional[str] = None,
+                 bypass_threshold: float = 0.8, cascade_provider: Optional[str] = None,
+                 cascade_band: tuple = (40, 75), relevance_model_path: Optional[str] = None,
+                 score_log_path: Optional[str] = None, learned_keywords_path: Optional[str] = None):
         """
         初始化智能搜索代理
         
@@ -22,9 +27,16 @@ class SmartSearchAgent(GitHubSearchAgent):
             use_llm: 必须为 True（智能过滤需要 LLM）
             llm_provider: LLM 提供商
             llm_api_key: LLM API 密钥
+            bypass_threshold: 规则分析置信度达到该值时跳过 LLM 查询分析
+            cascade_provider: 级联评分的便宜模型提供商（如 glm、qwen），None 表示不使用级联
+            cascade_band: 需要升级到强模型的分数区间
+            relevance_model_path: 本地相关性模型路径（可选），预测确定时跳过 LLM 评分
+            score_log_path: LLM 评分日志路径（用于训练本地模型），默认 None 不记录
+            learned_keywords_path: 学习到的关键词的保存路径，默认 None 不持久化
         """
         # 调用父类初始化
-        super().__init__(github_token, use_llm, llm_provider, llm_api_key)
+        super().__init__(github_token, use_llm, llm_provider, llm_api_key, bypass_threshold,
+                         learned_keywords_path)
         
         # 初始化智能过滤器
         self.smart_filter = None
@@ -32,7 +44,10 @@ class SmartSearchAgent(GitHubSearchAgent):
             try:
                 self.smart_filter = SmartFilter(
                     llm_analyzer=self.llm_analyzer,
-                    mcp_client=None  # 未来可以集成 MCP
+                    mcp_client=None,  # 未来可以集成 MCP
+                    cascade=self._build_cascade(cascade_provider, cascade_band),
+                    relevance_model=self._load_relevance_model(relevance_model_path),
+                    score_logger=ScoreLogger(score_log_path) if score_log_path else None
                 )
                 print(f"🧠 启用智能过滤（基于 README + LLM 评分）")
             except Exception as e:
@@ -41,6 +56,41 @@ class SmartSearchAgent(GitHubSearchAgent):
         else:
             print("⚠️  智能过滤需要 LLM，请启用 --llm")
     
+    def _build_cascade(self, cascade_provider: Optional[str],
+                       cascade_band: tuple) -> Optional[CascadeScorer]:
+        """创建级联评分器（便宜模型初始化失败时退回单模型评分）"""
+        if not cascade_provider:
+            return None
+        
+        try:
+            from llm_analyzer import LLMQueryAnalyzer
+            cheap_analyzer = LLMQueryAnalyzer(provider=cascade_provider)
+        except Exception as e:
+            print(f"⚠️  级联评分模型初始化失败，使用单模型评分: {e}")
+            return None
+        
+        print(f"🪜 启用级联评分: {cheap_analyzer.model} → {self.llm_analyzer.model}"
+              f"（升级区间 {cascade_band[0]}-{cascade_band[1]}）")
+        return CascadeScorer(cheap_analyzer, self.llm_analyzer, band=cascade_band)
+    
+    def _load_relevance_model(self, model_path: Optional[str]):
+        """加载本地相关性模型（需要 numpy，失败时退回纯 LLM 评分）"""
+        if not model_path:
+            return None
+        
+        try:
+            from relevance_model import RelevanceModel
+            model = RelevanceModel.load(model_path)
+        except ImportError:
+            print("⚠️  本地相关性模型需要 numpy: pip install numpy")
+            return None
+        except Exception as e:
+            print(f"⚠️  本地相关性模型加载失败: {e}")
+            return None
+        
+        print(f"⚡ 启用本地相关性模型（{model.trained_examples} 条训练数据）")
+        return model
+    
     def search_repositories(self, query: str, count: int = 10, sort: str = 'stars',
                            user_query: Optional[str] = None) -> List[GitHubRepo]:
         """
@@ -89,7 +139,8 @@ class SmartSearchAgent(GitHubSearchAgent):
                 'forks_count': repo.forks,
                 'language': repo.language,
                 'topics': repo.topics,
-                'updated_at': repo.last_updated
+                'updated_at': repo.last_updated,
+                'size': repo.size
             })
         
         # 使用智能过滤器评分和排序
@@ -112,7 +163,8 @@ class SmartSearchAgent(GitHubSearchAgent):
                 forks=item.get('forks_count', item.get('forks', 0)),
                 language=item.get('language'),
                 topics=item.get('topics', []),
-                last_updated=item.get('updated_at', '')
+                last_updated=item.get('updated_at', ''),
+                size=item.get('size', 0)
             )
             # 添加 AI 评分信息
             if 'ai_score' in item:
@@ -0,0 +1,44 @@
+"""
+测试模型级联评分
+"""
+
+import pytest
+from github_agent.cascade import CascadeScorer
+
+
+def test_select_for_escalation():
+    """测试不确定区间和 top-k 分界附近的候选被升级"""
+    scorer = CascadeScorer(None, None, band=(40, 75), top_k_margin=5)
+    scores = [95, 88, 80, 60, 20, 10]
+    # top-2 分界线为 (88 + 80) / 2 = 84，88 和 80 都在分界附近；60 在不确定区间
+    assert scorer.select_for_escalation(scores, top_k=2) == [1, 2, 3]
+    # 候选不足 top_k 时只看不确定区间
+    assert scorer.select_for_escalation([50, 90], top_k=5) == [0]
+
+
+def test_score_all_escalates_borderline():
+    """测试只有边界候选调用强模型，并统计每层调用"""
+    cheap, strong = object(), object()
+    cheap_scores = {'a/x': 95, 'a/y': 55, 'a/z': 5}
+    calls = []
+
+    def score_fn(repo, user_query, readme, analyzer=None, call_site='score'):
+        calls.append((repo['full_name'], call_site))
+        if analyzer is cheap:
+            return {'score': cheap_scores[repo['full_name']], 'relevant': True}
+        return {'score': 70, 'relevant': True}
+
+    scorer = CascadeScorer(cheap, strong)
+    candidates = [({'full_name': name}, None) for name in cheap_scores]
+    results = scorer.score_all(score_fn, candidates, "react admin", top_k=1)
+
+    assert [r['tier'] for r in results] == ['cheap', 'strong', 'cheap']
+    assert results[1]['score'] == 70
+    assert results[1]['cheap_score'] == 55
+    assert calls.count(('a/y', 'score:strong')) == 1
+    assert scorer.stats['cheap']['calls'] == 3
+    assert scorer.stats['strong']['calls'] == 1
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,77 @@
+"""
+测试本地 LLM Stub 服务
+"""
+
+import json
+
+import pytest
+import requests
+from github_agent.config import LLMConfig
+from github_agent.llm_analyzer_v2 import LLMQueryAnalyzer
+from github_agent.llm_stub import LLMStubServer, StubConfig, parse_latency, request_key
+
+
+def test_parse_latency():
+    """测试延迟分布解析"""
+    assert parse_latency('fixed:0.2') == ('fixed', [0.2])
+    assert parse_latency('lognormal:0.8,0.4') == ('lognormal', [0.8, 0.4])
+    with pytest.raises(ValueError):
+        parse_latency('pareto:1')
+    with pytest.raises(ValueError):
+        parse_latency('uniform:1')
+
+
+def test_api_base_overrides_host():
+    """测试 api_base 只替换主机，保留提供商路径"""
+    config = LLMConfig(provider='qwen', api_base='http://127.0.0.1:8765/')
+    assert config.api_url == 'http://127.0.0.1:8765/compatible-mode/v1/chat/completions'
+
+
+def test_analyzer_against_stub():
+    """测试分析器通过 stub 完成一次 OpenAI 兼容调用"""
+    with LLMStubServer(config=StubConfig(seed=1)) as stub:
+        analyzer = LLMQueryAnalyzer(LLMConfig(api_key='test', api_base=stub.url))
+        analysis = analyzer.analyze_query("python crawler")
+        assert analysis['keywords'] == ['python', 'crawler']
+        assert stub.stats['synthesized'] == 1
+
+
+def test_anthropic_streaming():
+    """测试 Anthropic 协议的流式输出"""
+    with LLMStubServer() as stub:
+        response = requests.post(
+            f'{stub.url}/v1/messages',
+            json={'model': 'claude', 'stream': True, 'system': 's',
+                  'messages': [{'role': 'user', 'content': '用户需求：rust websocket'}]},
+            stream=True, timeout=5
+        )
+        events = [line[len('event: '):] for line in response.iter_lines(decode_unicode=True)
+                  if line.startswith('event: ')]
+        assert events[0] == 'message_start'
+        assert 'content_block_delta' in events
+        assert events[-1] == 'message_stop'
+
+
+def test_error_injection_and_replay(tmp_path):
+    """测试错误注入和录制回放"""
+    with LLMStubServer(config=StubConfig(error_rate=1.0, error_codes=[429])) as stub:
+        response = requests.post(f'{stub.url}/v1/chat/completions',
+                                 json={'model': 'm', 'messages': []}, timeout=5)
+        assert response.status_code == 429
+        assert response.headers['Retry-After'] == '1'
+
+    body = {'model': 'm', 'messages': [{'role': 'user', 'content': 'hi'}]}
+    recording = tmp_path / 'session.jsonl'
+    recording.write_text(json.dumps({
+        'key': request_key('openai', body), 'protocol': 'openai', 'request': body, 'status': 200,
+        'response': {'choices': [{'message': {'content': 'recorded'}}]}
+    }) + '\n', encoding='utf-8')
+
+    with LLMStubServer(config=StubConfig(replay_path=recording)) as stub:
+        response = requests.post(f'{stub.url}/v1/chat/completions', json=body, timeout=5)
+        assert response.json()['choices'][0]['message']['content'] == 'recorded'
+        assert stub.stats['replayed'] == 1
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,75 @@
+"""
+测试规则分析置信度评估
+"""
+
+import pytest
+from github_agent.query_confidence import QueryConfidenceScorer, tokenize
+
+
+def test_tokenize():
+    """测试切分（去掉中文停用词和数字）"""
+    assert tokenize("找 10 个 python 爬虫库") == ["python", "爬虫"]
+    assert tokenize("rust websocket") == ["rust", "websocket"]
+
+
+def test_unambiguous_queries_bypass():
+    """测试明确的技术查询可以跳过 LLM"""
+    scorer = QueryConfidenceScorer(learned_path=None)
+
+    result = scorer.score("python crawler")
+    assert scorer.should_bypass(result)
+    assert result.language == "python"
+    assert result.keywords == ["crawler"]
+
+    assert scorer.should_bypass(scorer.score("rust websocket"))
+
+
+def test_descriptive_queries_use_llm():
+    """测试中文描述性查询不跳过 LLM"""
+    scorer = QueryConfidenceScorer(learned_path=None)
+    assert not scorer.should_bypass(scorer.score("找适合毕业设计的前端项目"))
+    assert not scorer.should_bypass(scorer.score("Python 爬虫"))
+    assert scorer.score("").confidence == 0.0
+
+
+def test_bypass_requires_one_or_two_keywords():
+    """测试关键词过多（AND 搜索容易无结果）或只有语言时不跳过 LLM"""
+    scorer = QueryConfidenceScorer(learned_path=None)
+    many = scorer.score("react admin dashboard")
+    assert len(many.keywords) == 3 and not scorer.should_bypass(many)
+
+    language_only = scorer.score("python")
+    assert language_only.language == "python" and language_only.keywords == []
+    assert not scorer.should_bypass(language_only)
+
+
+def test_learning_from_llm_outputs(tmp_path):
+    """测试从 LLM 结果学习后，跳过率提高"""
+    path = tmp_path / 'learned.json'
+    scorer = QueryConfidenceScorer(learned_path=path)
+
+    for _ in range(2):
+        scorer.learn("Python 爬虫", {'keywords': ['crawler'], 'language': 'python'})
+    scorer.learn("htmx 组件", {'keywords': ['htmx']})
+    # 只出现一次的关键词还不作为跳过 LLM 的依据
+    assert not scorer.is_known("htmx")
+    scorer.learn("htmx 表单", {'keywords': ['htmx']})
+
+    reloaded = QueryConfidenceScorer(learned_path=path)
+    result = reloaded.score("Python 爬虫")
+    assert reloaded.should_bypass(result)
+    assert result.keywords == ["crawler"]
+    assert reloaded.is_known("htmx")
+
+
+def test_learning_is_not_persisted_by_default():
+    """测试默认只在内存中学习，不写入文件"""
+    scorer = QueryConfidenceScorer()
+    assert scorer.learned_path is None
+    for _ in range(2):
+        scorer.learn("htmx 组件", {'keywords': ['htmx']})
+    assert scorer.is_known("htmx")
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
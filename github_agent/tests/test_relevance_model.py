@@ -0,0 +1,93 @@
+"""
+测试本地相关性模型
+"""
+
+import random
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from github_agent.relevance_model import (
+    DENSE_DIM, RelevanceModel, ScoreLogger, evaluate, extract_features, load_examples, make_example
+)
+
+
+def _synthetic_examples(n_queries: int = 12, per_query: int = 20, seed: int = 0):
+    """构造 LLM 分数与关键词匹配相关的样本"""
+    rng = random.Random(seed)
+    topics = ['crawler', 'websocket', 'animation', 'admin', 'orm', 'cli', 'chart', 'editor']
+    examples = []
+    for q in range(n_queries):
+        topic = topics[q % len(topics)]
+        query = f"{topic} library {q}"
+        for _ in range(per_query):
+            relevant = rng.random() < 0.5
+            repo_topic = topic if relevant else rng.choice([t for t in topics if t != topic])
+            repo = {
+                'full_name': f"user/{repo_topic}-{rng.randint(0, 999)}",
+                'description': f"A fast {repo_topic} toolkit",
+                'topics': [repo_topic],
+                'stargazers_count': rng.randint(100, 50000),
+            }
+            score = rng.randint(85, 98) if relevant else rng.randint(2, 20)
+            examples.append(make_example(query, repo, f"# {repo_topic}", score))
+    return examples
+
+
+def test_model_learns_llm_ranking():
+    """测试模型能复现 LLM 的排序，且对明显的样本给出确定预测"""
+    examples = _synthetic_examples()
+    train, test = examples[:200], examples[200:]
+    model = RelevanceModel().fit(train)
+
+    metrics = evaluate(model, test, top_k=5)
+    assert metrics['spearman'] > 0.6
+    assert metrics['confident_rate'] > 0.3
+    assert metrics['confident_agreement'] > 0.9
+
+
+def test_extract_features_batch_layout():
+    """测试批量特征的行号、哈希列和稠密特征"""
+    examples = [
+        make_example("react admin", {'full_name': 'user/react-admin', 'language': 'TypeScript'}, "admin panel"),
+        make_example("react admin", {'full_name': 'user/vue-chart', 'stargazers_count': 10}, None),
+    ]
+    batch = extract_features(examples)
+    assert batch.size == 2 and batch.dense.shape == (2, DENSE_DIM)
+    assert batch.rows.shape == batch.cols.shape and set(batch.rows.tolist()) == {0, 1}
+    assert np.all(np.diff(batch.rows) >= 0)
+    # 名称命中两个查询词；README 只命中 admin
+    assert batch.dense[0, :3].tolist() == [1.0, 1.0, 0.5]
+    assert batch.dense[1, :3].tolist() == [0.0, 0.0, 0.0]
+
+    empty = extract_features([])
+    assert empty.size == 0 and empty.rows.shape == (0,) and empty.dense.shape == (0, DENSE_DIM)
+
+
+def test_untrained_model_is_never_confident():
+    """测试未训练的模型不会跳过 LLM"""
+    model = RelevanceModel()
+    predictions = model.predict(_synthetic_examples(1, 5))
+    assert not model.confident_mask(predictions).any()
+
+
+def test_save_load_and_score_log(tmp_path):
+    """测试模型保存加载和评分日志"""
+    log = ScoreLogger(tmp_path / 'scores.jsonl')
+    for example in _synthetic_examples(4, 10):
+        log.log(example['query'], example['repo'], example['readme'], example['score'])
+    log.log("q", {'full_name': 'a/b'}, None, 'n/a')
+
+    examples = load_examples(tmp_path / 'scores.jsonl')
+    assert len(examples) == 40
+
+    model = RelevanceModel().fit(examples)
+    model.save(tmp_path / 'model.npz')
+    loaded = RelevanceModel.load(tmp_path / 'model.npz')
+    assert loaded.trained_examples == 40
+    assert np.allclose(loaded.predict(examples), model.predict(examples))
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
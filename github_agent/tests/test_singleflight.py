@@ -0,0 +1,67 @@
+"""
+测试请求合并
+"""
+
+import threading
+import time
+
+import pytest
+from github_agent.singleflight import SingleFlight, make_key
+
+
+def test_make_key_canonical():
+    """测试 key 规范化"""
+    assert make_key('deepseek', {'a': 1, 'b': 2}) == make_key('deepseek', {'b': 2, 'a': 1})
+    assert make_key('deepseek', 'prompt') != make_key('openai', 'prompt')
+
+
+def test_concurrent_calls_are_coalesced():
+    """测试相同 key 的并发调用只执行一次"""
+    group = SingleFlight()
+    calls = []
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow_call():
+        calls.append(1)
+        started.set()
+        release.wait(timeout=5)
+        return {'keywords': ['vue']}
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(group.do('k', slow_call)))
+    leader.start()
+    started.wait(timeout=5)
+
+    followers = [
+        threading.Thread(target=lambda: results.append(group.do('k', slow_call)))
+        for _ in range(4)
+    ]
+    for t in followers:
+        t.start()
+    while group.shared < 4:
+        time.sleep(0.001)
+    release.set()
+    for t in [leader] + followers:
+        t.join(timeout=5)
+
+    assert len(calls) == 1
+    assert len(results) == 5
+    assert all(r is results[0] for r in results)
+    assert group.in_flight() == 0
+
+
+def test_exception_is_shared_and_key_released():
+    """测试异常传递给调用者，且失败后可以重试"""
+    group = SingleFlight()
+
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        group.do('k', fail)
+    assert group.do('k', lambda: 42) == 42
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
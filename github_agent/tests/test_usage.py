@@ -0,0 +1,89 @@
+"""
+测试 LLM 用量统计
+"""
+
+import json
+
+import pytest
+from github_agent.usage import UsageTracker, parse_usage, estimate_cost
+
+
+def test_parse_usage_openai():
+    """测试解析 OpenAI 兼容的 usage"""
+    usage = {
+        'prompt_tokens': 120,
+        'completion_tokens': 30,
+        'prompt_tokens_details': {'cached_tokens': 100}
+    }
+    assert parse_usage('openai', usage) == (120, 30, 100)
+    # DeepSeek
+    assert parse_usage('openai', {'prompt_tokens': 50, 'completion_tokens': 5,
+                                  'prompt_cache_hit_tokens': 40}) == (50, 5, 40)
+    assert parse_usage('openai', None) == (0, 0, 0)
+
+
+def test_parse_usage_anthropic():
+    """测试解析 Anthropic usage（input_tokens 不含缓存部分）"""
+    usage = {'input_tokens': 20, 'output_tokens': 10, 'cache_read_input_tokens': 80}
+    assert parse_usage('anthropic', usage) == (100, 10, 80)
+
+
+def test_estimate_cost():
+    """测试费用估算"""
+    cost = estimate_cost('deepseek-chat', 1_000_000, 1_000_000, 0)
+    assert cost == pytest.approx(0.27 + 1.10)
+    cached = estimate_cost('deepseek-chat', 1_000_000, 0, 1_000_000)
+    assert cached == pytest.approx(0.07)
+    assert estimate_cost('unknown-model', 1000, 1000) == 0.0
+
+
+def test_tracker_summary_and_sink(tmp_path):
+    """测试按查询汇总和 JSONL 输出"""
+    sink = tmp_path / 'usage.jsonl'
+    tracker = UsageTracker(jsonl_path=sink)
+
+    with tracker.query("python crawler"):
+        tracker.record('deepseek', 'deepseek-chat', 'analyze',
+                       usage={'prompt_tokens': 100, 'completion_tokens': 20}, latency=0.5)
+        tracker.record('deepseek', 'deepseek-chat', 'score',
+                       usage={'prompt_tokens': 300, 'completion_tokens': 40}, latency=1.5)
+    tracker.record('deepseek', 'deepseek-chat', 'analyze', latency=0.2, error='timeout')
+
+    summary = tracker.summary()
+    assert summary['total']['calls'] == 3
+    assert summary['total']['errors'] == 1
+    assert summary['by_call_site']['score']['prompt_tokens'] == 300
+    assert summary['by_query']['python crawler']['calls'] == 2
+
+    query_summary = tracker.summary("python crawler")
+    assert query_summary['total']['completion_tokens'] == 60
+    assert query_summary['total']['latency_total'] == pytest.approx(2.0)
+
+    lines = sink.read_text(encoding='utf-8').splitlines()
+    assert len(lines) == 3
+    assert json.loads(lines[0])['query'] == "python crawler"
+    assert json.loads(lines[2])['success'] is False
+
+
+def test_bypasses_are_attributed_to_queries():
+    """测试跳过的调用按查询汇总，只有跳过时也会显示"""
+    tracker = UsageTracker()
+    with tracker.query("python crawler"):
+        tracker.record_bypass('analyze')
+        tracker.record_bypass('score')
+        tracker.record_bypass('score')
+    with tracker.query("rust websocket"):
+        tracker.record('deepseek', 'deepseek-chat', 'analyze', latency=0.1)
+        tracker.record_bypass('score')
+
+    assert tracker.summary("python crawler")['bypassed'] == {'analyze': 1, 'score': 2}
+    assert tracker.summary("rust websocket")['bypassed'] == {'score': 1}
+    assert tracker.summary()['bypassed'] == {'analyze': 1, 'score': 3}
+
+    text = tracker.format_summary("python crawler")
+    assert "0 次" in text and "跳过 LLM: analyze 1 次, score 2 次" in text
+    assert "Tokens" not in text and "重试" not in text
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,259 @@
+"""
+LLM 用量统计模块
+
+记录每次 LLM 调用的 token 用量、耗时和费用，以及规则足够确定而跳过的调用，
+按查询和会话汇总，并可追加写入 JSONL 文件。
+"""
+
+import json
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:
+    from .config import Constants
+except ImportError:  # 以脚本方式运行时（github_agent 目录在 sys.path 中）
+    from config import Constants
+
+
+# 当前正在处理的用户查询
+_current_query: ContextVar[Optional[str]] = ContextVar('current_query', default=None)
+
+
+@dataclass
+class LLMCallRecord:
+    """单次 LLM 调用记录"""
+    provider: str
+    model: str
+    call_site: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+    latency: float = 0.0
+    success: bool = True
+    error: Optional[str] = None
+    query: Optional[str] = None
+    cost: float = 0.0
+    timestamp: float = field(default_factory=time.time)
+
+
+def parse_usage(api_type: str, usage: Optional[Dict[str, Any]]) -> Tuple[int, int, int]:
+    """
+    解析 API 返回的 usage 字段
+
+    Args:
+        api_type: API 类型（openai / anthropic）
+        usage: 响应中的 usage 字典
+
+    Returns:
+        (prompt_tokens, completion_tokens, cached_tokens)，prompt_tokens 包含缓存命中部分
+    """
+    if not usage:
+        return 0, 0, 0
+
+    if api_type == 'anthropic':
+        cached = usage.get('cache_read_input_tokens') or 0
+        prompt = (usage.get('input_tokens') or 0) + cached
+        return prompt, usage.get('output_tokens') or 0, cached
+
+    details = usage.get('prompt_tokens_details') or {}
+    # DeepSeek 使用 prompt_cache_hit_tokens
+    cached = details.get('cached_tokens') or usage.get('prompt_cache_hit_tokens') or 0
+    return usage.get('prompt_tokens') or 0, usage.get('completion_tokens') or 0, cached
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int,
+                  cached_tokens: int = 0) -> float:
+    """
+    按 Constants.MODEL_PRICES 估算费用（美元）
+
+    Args:
+        model: 模型名称
+        prompt_tokens: 输入 token 数（包含缓存命中部分）
+        completion_tokens: 输出 token 数
+        cached_tokens: 缓存命中的输入 token 数
+
+    Returns:
+        估算费用，未知模型返回 0
+    """
+    prices = Constants.MODEL_PRICES.get(model)
+    if not prices:
+        return 0.0
+
+    uncached = max(prompt_tokens - cached_tokens, 0)
+    return (
+        uncached * prices['input']
+        + cached_tokens * prices['cached']
+        + completion_tokens * prices['output']
+    ) / 1_000_000
+
+
+def _aggregate(records: List[LLMCallRecord]) -> Dict[str, Any]:
+    """汇总一组调用记录"""
+    latencies = sorted(r.latency for r in records)
+    total_latency = sum(latencies)
+    return {
+        'calls': len(records),
+        'errors': sum(1 for r in records if not r.success),
+        'prompt_tokens': sum(r.prompt_tokens for r in records),
+        'completion_tokens': sum(r.completion_tokens for r in records),
+        'cached_tokens': sum(r.cached_tokens for r in records),
+        'cost': round(sum(r.cost for r in records), 6),
+        'latency_total': round(total_latency, 3),
+        'latency_avg': round(total_latency / len(records), 3) if records else 0.0,
+        'latency_p95': round(latencies[int(0.95 * (len(latencies) - 1))], 3) if records else 0.0,
+    }
+
+
+class UsageTracker:
+    """LLM 用量统计器"""
+
+    def __init__(self, jsonl_path: Optional[Path] = None):
+        """
+        Args:
+            jsonl_path: JSONL 输出文件路径（可选），每次调用追加一行
+        """
+        self._lock = threading.Lock()
+        self.records: List[LLMCallRecord] = []
+        # (查询, 调用位置) -> 跳过次数
+        self.bypassed: Counter = Counter()
+        self.jsonl_path = Path(jsonl_path) if jsonl_path else None
+
+    def set_sink(self, jsonl_path: Optional[Path]):
+        """设置（或取消）JSONL 输出文件"""
+        self.jsonl_path = Path(jsonl_path) if jsonl_path else None
+
+    @contextmanager
+    def query(self, user_query: str) -> Iterator[None]:
+        """在该上下文中发生的调用都归属到 user_query"""
+        token = _current_query.set(user_query)
+        try:
+            yield
+        finally:
+            _current_query.reset(token)
+
+    def record(
+        self,
+        provider: str,
+        model: str,
+        call_site: str,
+        api_type: str = 'openai',
+        usage: Optional[Dict[str, Any]] = None,
+        latency: float = 0.0,
+        error: Optional[str] = None
+    ) -> LLMCallRecord:
+        """
+        记录一次 LLM 调用
+
+        Args:
+            provider: LLM 提供商
+            model: 模型名称
+            call_site: 调用位置（analyze / score）
+            api_type: API 类型，用于解析 usage
+            usage: 响应中的 usage 字典
+            latency: 请求耗时（秒）
+            error: 失败时的错误信息
+
+        Returns:
+            调用记录
+        """
+        prompt, completion, cached = parse_usage(api_type, usage)
+        entry = LLMCallRecord(
+            provider=provider,
+            model=model,
+            call_site=call_site,
+            prompt_tokens=prompt,
+            completion_tokens=completion,
+            cached_tokens=cached,
+            latency=latency,
+            success=error is None,
+            error=error,
+            query=_current_query.get(),
+            cost=estimate_cost(model, prompt, completion, cached)
+        )
+
+        with self._lock:
+            self.records.append(entry)
+            if self.jsonl_path:
+                self.jsonl_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.jsonl_path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(asdict(entry), ensure_ascii=False) + '\n')
+
+        return entry
+
+    def record_bypass(self, call_site: str):
+        """记录一次因规则分析置信度足够而跳过的 LLM 调用（归属到当前查询）"""
+        with self._lock:
+            self.bypassed[(_current_query.get(), call_site)] += 1
+
+    def summary(self, user_query: Optional[str] = None) -> Dict[str, Any]:
+        """
+        汇总用量
+
+        Args:
+            user_query: 只汇总该查询的调用（默认汇总整个会话）
+
+        Returns:
+            汇总字典，包含总计、按调用位置、按模型和按查询的统计，以及按调用位置的跳过次数
+        """
+        with self._lock:
+            records = list(self.records)
+            bypassed_items = list(self.bypassed.items())
+
+        if user_query is not None:
+            records = [r for r in records if r.query == user_query]
+        bypassed: Counter = Counter()
+        for (query, call_site), count in bypassed_items:
+            if user_query is None or query == user_query:
+                bypassed[call_site] += count
+
+        def group_by(attr: str) -> Dict[str, Any]:
+            groups: Dict[str, List[LLMCallRecord]] = {}
+            for r in records:
+                groups.setdefault(getattr(r, attr) or '', []).append(r)
+            return {k: _aggregate(v) for k, v in groups.items()}
+
+        return {
+            'total': _aggregate(records),
+            'by_call_site': group_by('call_site'),
+            'by_model': group_by('model'),
+            'by_query': group_by('query') if user_query is None else {},
+            'bypassed': dict(bypassed),
+        }
+
+    def format_summary(self, user_query: Optional[str] = None) -> str:
+        """格式化用量汇总"""
+        summary = self.summary(user_query)
+        total = summary['total']
+        lines = [f"📈 LLM 调用: {total['calls']} 次 (失败 {total['errors']})"]
+        if total['calls']:
+            lines += [
+                f"   Tokens: 输入 {total['prompt_tokens']:,} (缓存 {total['cached_tokens']:,})"
+                f" / 输出 {total['completion_tokens']:,}",
+                f"   耗时: 总计 {total['latency_total']:.2f}s, 平均 {total['latency_avg']:.2f}s,"
+                f" p95 {total['latency_p95']:.2f}s",
+                f"   费用: ${total['cost']:.4f}",
+            ]
+        for site, stats in summary['by_call_site'].items():
+            lines.append(
+                f"   - {site}: {stats['calls']} 次, {stats['latency_total']:.2f}s, ${stats['cost']:.4f}"
+            )
+        if summary['bypassed']:
+            skipped = ', '.join(f"{k} {v} 次" for k, v in summary['bypassed'].items())
+            lines.append(f"   跳过 LLM: {skipped}")
+        return '\n'.join(lines)
+
+    def reset(self):
+        """清空记录"""
+        with self._lock:
+            self.records.clear()
+            self.bypassed.clear()
+
+
+# 全局用量统计器（会话级）
+usage_tracker = UsageTracker()
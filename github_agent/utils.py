@@ -4,7 +4,10 @@
 
 import re
 from typing import List, Dict, Optional
-from .config import Constants
+try:
+    from .config import Constants
+except ImportError:  # 以脚本方式运行时（github_agent 目录在 sys.path 中）
+    from config import Constants
 
 
 def extract_number(text: str) -> Optional[int]:
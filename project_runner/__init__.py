@@ -0,0 +1,3 @@
+"""
+GitHub 项目运行器的辅助模块（供 run_github_project.py 使用）
+"""
@@ -0,0 +1,284 @@
+"""
+源码包下载模式
+
+只想运行项目时不需要 git 历史：直接从 codeload.github.com 下载 tar.gz，
+边下载边解压到项目目录，不落地临时压缩包。下载中断时用 Range 请求续传，
+结束时校验字节数。
+"""
+
+import http.client
+import io
+import posixpath
+import re
+import shutil
+import tarfile
+import time
+import urllib.error
+import urllib.request
+from dataclasses import dataclass
+from pathlib import Path, PurePosixPath
+from typing import Optional, Tuple
+
+
+CODELOAD_URL = 'https://codeload.github.com/{owner}/{repo}/tar.gz/{ref}'
+
+_REPO_PATTERN = re.compile(r'github\.com[/:]([^/]+)/([^/]+?)(?:\.git)?/?$')
+_CONTENT_RANGE = re.compile(r'bytes (\d+)-\d+/(\d+|\*)')
+
+
+class ArchiveError(Exception):
+    """源码包下载或解压失败"""
+
+
+class ArchiveChanged(ArchiveError):
+    """续传时源码包已经变化（例如分支有了新提交），已读取的部分作废"""
+
+
+@dataclass
+class ArchiveResult:
+    """一次源码包下载的结果"""
+    bytes_received: int
+    seconds: float
+    resumes: int
+    files: int
+    commit: Optional[str] = None
+
+
+def parse_github_repo(url: str) -> Tuple[str, str]:
+    """
+    从 GitHub URL 中解析 owner 和仓库名
+
+    Args:
+        url: HTTPS 或 SSH 形式的仓库 URL
+
+    Returns:
+        (owner, repo)
+    """
+    match = _REPO_PATTERN.search(url.strip())
+    if not match:
+        raise ArchiveError(f"不是 GitHub 仓库地址: {url}")
+    return match.group(1), match.group(2)
+
+
+def archive_url(github_url: str, ref: Optional[str] = None) -> str:
+    """源码包下载地址（ref 为空时使用默认分支）"""
+    owner, repo = parse_github_repo(github_url)
+    return CODELOAD_URL.format(owner=owner, repo=repo, ref=ref or 'HEAD')
+
+
+def build_opener(proxy: Optional[str] = None) -> urllib.request.OpenerDirector:
+    """创建 urllib opener，指定代理时显式使用（否则沿用环境变量中的代理）"""
+    if proxy:
+        return urllib.request.build_opener(
+            urllib.request.ProxyHandler({'http': proxy, 'https': proxy})
+        )
+    return urllib.request.build_opener()
+
+
+class ResumableStream(io.RawIOBase):
+    """
+    可续传的 HTTP 下载流
+
+    连接中断时从已读取的位置发起 Range 请求继续读取；服务器不支持 Range 时
+    重新下载并跳过已读部分（ETag 不变才能确认是同一个文件，否则抛出 ArchiveChanged）。
+    读到结尾时与 Content-Length 校验字节数。
+    """
+
+    def __init__(self, url: str, opener=None, max_retries: int = 5, timeout: float = 30):
+        """
+        Args:
+            url: 下载地址
+            opener: urllib opener（用于代理）
+            max_retries: 最多续传次数
+            timeout: 单次连接超时（秒）
+        """
+        self.url = url
+        self.opener = opener or build_opener()
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.position = 0
+        self.total: Optional[int] = None
+        self.resumes = 0
+        self._etag: Optional[str] = None
+        self._response = None
+        self._open()
+
+    def readable(self) -> bool:
+        return True
+
+    def _open(self):
+        """从当前位置（重新）发起请求"""
+        headers = {'User-Agent': 'run-github-project'}
+        if self.position:
+            headers['Range'] = f'bytes={self.position}-'
+            if self._etag:
+                headers['If-Range'] = self._etag
+
+        try:
+            response = self.opener.open(urllib.request.Request(self.url, headers=headers),
+                                        timeout=self.timeout)
+        except urllib.error.HTTPError as e:
+            raise ArchiveError(f"下载失败: HTTP {e.code} {self.url}") from e
+
+        if self.position and response.status == 206:
+            match = _CONTENT_RANGE.match(response.headers.get('Content-Range', ''))
+            if not match or int(match.group(1)) != self.position:
+                response.close()
+                raise ArchiveError("服务器返回的续传范围不正确")
+        else:
+            # 首次请求，或服务器忽略了 Range / If-Range 不匹配（内容可能已变化）
+            etag = response.headers.get('ETag')
+            if self.position and (not etag or not self._etag or etag != self._etag):
+                response.close()
+                raise ArchiveChanged("续传时源码包已变化（ETag 不一致），需要重新下载")
+            length = response.headers.get('Content-Length')
+            self.total = int(length) if length else None
+            self._etag = etag
+            # 同一个文件：整体重下并跳过已读部分
+            skip = self.position
+            while skip:
+                chunk = response.read(min(skip, 1024 * 1024))
+                if not chunk:
+                    response.close()
+                    raise ArchiveError("续传时响应提前结束")
+                skip -= len(chunk)
+
+        if self._response is not None:
+            self._response.close()
+        self._response = response
+
+    def _resume(self, error: Exception):
+        """连接中断后续传（超过重试次数时抛出异常）"""
+        if self.resumes >= self.max_retries:
+            raise ArchiveError(f"下载中断且重试 {self.max_retries} 次仍失败: {error}") from error
+        self.resumes += 1
+        time.sleep(min(0.5 * 2 ** (self.resumes - 1), 8))
+        self._open()
+
+    def readinto(self, buffer) -> int:
+        while True:
+            try:
+                n = self._response.readinto(buffer)
+            except (OSError, http.client.HTTPException) as e:
+                self._resume(e)
+                continue
+
+            if n:
+                self.position += n
+                return n
+            if self.total is not None and self.position < self.total:
+                self._resume(ArchiveError(f"只收到 {self.position}/{self.total} 字节"))
+                continue
+            if self.total is not None and self.position != self.total:
+                raise ArchiveError(f"下载大小不一致: {self.position}/{self.total} 字节")
+            return 0
+
+    def close(self):
+        if self._response is not None:
+            self._response.close()
+            self._response = None
+        super().close()
+
+
+def _strip_top_level(name: str) -> Optional[str]:
+    """去掉源码包中的顶层目录（<repo>-<sha>/），并拒绝越界路径"""
+    path = PurePosixPath(name)
+    if path.is_absolute() or '..' in path.parts:
+        raise ArchiveError(f"源码包包含不安全的路径: {name}")
+    parts = path.parts[1:]
+    return str(PurePosixPath(*parts)) if parts else None
+
+
+def extract_stream(stream, dest: Path) -> Tuple[int, Optional[str]]:
+    """
+    流式解压 tar.gz 到 dest
+
+    Args:
+        stream: 可读的文件对象
+        dest: 目标目录
+
+    Returns:
+        (解压的文件数, 提交 SHA)，GitHub 源码包在 pax 头的 comment 中记录提交
+    """
+    files = 0
+    with tarfile.open(fileobj=stream, mode='r|gz') as tar:
+        for member in tar:
+            name = _strip_top_level(member.name)
+            if name is None:
+                continue
+            if member.issym():
+                target = posixpath.normpath(posixpath.join(posixpath.dirname(name), member.linkname))
+                if member.linkname.startswith('/') or target == '..' or target.startswith('../'):
+                    raise ArchiveError(f"源码包包含越界链接: {member.name} -> {member.linkname}")
+            elif member.islnk():
+                member.linkname = _strip_top_level(member.linkname) or ''
+            member.name = name
+            if hasattr(tarfile, 'data_filter'):
+                tar.extract(member, dest, filter='data')
+            else:
+                tar.extract(member, dest)
+            files += member.isfile()
+        commit = tar.pax_headers.get('comment')
+    return files, commit
+
+
+def download_archive(
+    github_url: str,
+    dest: Path,
+    ref: Optional[str] = None,
+    proxy: Optional[str] = None,
+    max_retries: int = 5
+) -> ArchiveResult:
+    """
+    下载源码包并边下载边解压到 dest
+
+    先解压到同级的临时目录，成功后再改名，失败时不会留下不完整的项目目录。
+    续传时发现源码包已变化，清空临时目录后从头重新下载。
+
+    Args:
+        github_url: 仓库 URL
+        dest: 项目目录（必须不存在）
+        ref: 分支、标签或提交，为空时使用默认分支
+        proxy: 代理地址
+        max_retries: 最多续传次数（源码包变化后从头重下的次数也计入）
+
+    Returns:
+        下载结果
+    """
+    dest = Path(dest)
+    partial = dest.with_name(dest.name + '.partial')
+    start = time.perf_counter()
+    restarts = 0
+
+    while True:
+        shutil.rmtree(partial, ignore_errors=True)
+        partial.mkdir(parents=True)
+        try:
+            stream = ResumableStream(archive_url(github_url, ref), build_opener(proxy), max_retries)
+        except (OSError, ArchiveError) as e:
+            shutil.rmtree(partial, ignore_errors=True)
+            raise e if isinstance(e, ArchiveError) else ArchiveError(f"无法连接下载服务器: {e}") from e
+
+        try:
+            files, commit = extract_stream(stream, partial)
+            # gzip 尾部之后可能还有补齐的数据，读完以便校验总字节数
+            while stream.read(64 * 1024):
+                pass
+        except ArchiveChanged:
+            shutil.rmtree(partial, ignore_errors=True)
+            if restarts >= max_retries:
+                raise
+            restarts += 1
+            continue
+        except (tarfile.TarError, EOFError, OSError) as e:
+            shutil.rmtree(partial, ignore_errors=True)
+            raise ArchiveError(f"源码包解压失败: {e}") from e
+        except ArchiveError:
+            shutil.rmtree(partial, ignore_errors=True)
+            raise
+        finally:
+            stream.close()
+        break
+
+    partial.rename(dest)
+    return ArchiveResult(stream.position, time.perf_counter() - start, stream.resumes + restarts, files, commit)
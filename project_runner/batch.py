@@ -0,0 +1,389 @@
+"""
+批量运行多个仓库
+
+每个仓库依次经过 clone → install → run 三个阶段，各阶段有独立的并发上限：
+clone 受网络限制，install 受 CPU / 磁盘限制，run 限制同时启动的开发服务器数。
+每个项目使用独立的工作目录（<work_dir>/<owner>/<repo>）、独立的日志文件和
+不冲突的端口（通过 PORT 环境变量传给开发服务器）。run 阶段在开发服务器就绪后
+立即停止它。每个项目完成后向 JSONL 报告追加一行，记录各阶段的耗时和结果。
+"""
+
+import io
+import json
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager, nullcontext
+from dataclasses import asdict, dataclass, field, replace
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+from .archive import ArchiveError, parse_github_repo
+from .options import CloneOptions, RunOptions
+from .profiler import Profiler
+
+
+PHASES = ('clone', 'install', 'run')
+
+DEFAULT_BASE_PORT = 3000
+PORT_RANGE = 1000
+
+
+@dataclass
+class BatchItem:
+    """批量任务中的一个仓库（size_kb / language 来自搜索结果，可以为空）"""
+    url: str
+    size_kb: Optional[int] = None
+    language: Optional[str] = None
+
+
+@dataclass
+class PhaseResult:
+    """一个阶段的结果"""
+    status: str  # ok / failed / skipped
+    seconds: float = 0.0
+    error: Optional[str] = None
+
+
+@dataclass
+class BatchResult:
+    """一个仓库的批量运行结果"""
+    url: str
+    project_path: Optional[str] = None
+    port: Optional[int] = None
+    log_path: Optional[str] = None
+    # 开发服务器就绪时的地址和启动耗时
+    ready_url: Optional[str] = None
+    time_to_ready: Optional[float] = None
+    phases: Dict[str, PhaseResult] = field(default_factory=dict)
+
+    @property
+    def success(self) -> bool:
+        return all(self.phases.get(phase, PhaseResult('skipped')).status == 'ok' for phase in PHASES)
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data['success'] = self.success
+        return data
+
+
+def read_urls(lines: Iterable[str]) -> List[str]:
+    """
+    读取仓库 URL 列表（忽略空行和 # 注释，去重并保持顺序）
+
+    Args:
+        lines: 文件或标准输入的行
+
+    Returns:
+        URL 列表
+    """
+    urls = []
+    for line in lines:
+        url = line.split('#', 1)[0].strip()
+        if url and url not in urls:
+            urls.append(url)
+    return urls
+
+
+def project_slug(url: str) -> str:
+    """仓库对应的目录名片段 owner/repo（无法解析时使用 URL 最后一段）"""
+    try:
+        owner, repo = parse_github_repo(url)
+        return f"{owner}/{repo}"
+    except ArchiveError:
+        name = url.rstrip('/').split('/')[-1]
+        return f"_/{name[:-4] if name.endswith('.git') else name}"
+
+
+class PortAllocator:
+    """为开发服务器分配互不冲突的端口"""
+
+    def __init__(self, start: int = DEFAULT_BASE_PORT, count: int = PORT_RANGE, host: str = '127.0.0.1'):
+        """
+        Args:
+            start: 起始端口
+            count: 可分配的端口数
+            host: 检查端口是否被占用时绑定的地址
+        """
+        self.start = start
+        self.count = count
+        self.host = host
+        self.assigned = set()
+        self._next = start
+        self._lock = threading.Lock()
+
+    def _is_free(self, port: int) -> bool:
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+            try:
+                sock.bind((self.host, port))
+            except OSError:
+                return False
+        return True
+
+    def allocate(self) -> int:
+        """
+        分配一个未分配、也没有被其他进程占用的端口
+
+        Returns:
+            端口号
+
+        Raises:
+            RuntimeError: 端口范围已用完
+        """
+        with self._lock:
+            for offset in range(self.count):
+                port = self.start + (self._next - self.start + offset) % self.count
+                if port not in self.assigned and self._is_free(port):
+                    self.assigned.add(port)
+                    # 依次向后分配，刚释放的端口不会立刻被复用
+                    self._next = port + 1
+                    return port
+        raise RuntimeError(f"端口 {self.start}-{self.start + self.count - 1} 已全部占用")
+
+    def release(self, port: int):
+        with self._lock:
+            self.assigned.discard(port)
+
+
+class ThreadOutput(io.TextIOBase):
+    """按线程分发的标准输出：批量模式下每个项目的输出写入各自的日志文件"""
+
+    def __init__(self, default):
+        self.default = default
+        self._local = threading.local()
+
+    def _target(self):
+        return getattr(self._local, 'target', None) or self.default
+
+    def write(self, text: str) -> int:
+        return self._target().write(text)
+
+    def flush(self):
+        self._target().flush()
+
+    @contextmanager
+    def route(self, target):
+        """在当前线程中把输出写入 target"""
+        previous = getattr(self._local, 'target', None)
+        self._local.target = target
+        try:
+            yield
+        finally:
+            self._local.target = previous
+
+
+class BatchRunner:
+    """批量克隆、安装和启动仓库"""
+
+    def __init__(
+        self,
+        make_runner: Callable[[BatchItem, Path, Dict[str, str]], object],
+        work_dir: Path,
+        report_path: Optional[Path] = None,
+        clone_jobs: int = 4,
+        install_jobs: int = 2,
+        run_jobs: int = 4,
+        ready_timeout: float = 120.0,
+        ports: Optional[PortAllocator] = None,
+        profiler: Optional[Profiler] = None
+    ):
+        """
+        Args:
+            make_runner: 创建单个项目运行器的函数 (仓库, 工作目录, 额外环境变量) -> 运行器，
+                运行器需要提供 project_path、clone_repository()、install_dependencies() 和
+                launch(ready_timeout)（返回 readiness.ServeResult，没有启动脚本时返回 None）
+            work_dir: 批量工作目录，每个项目位于 <work_dir>/<owner>/<repo>
+            report_path: JSONL 报告路径
+            clone_jobs: 同时克隆的仓库数（网络）
+            install_jobs: 同时安装依赖的项目数（CPU / 磁盘）
+            run_jobs: 同时运行的开发服务器数
+            ready_timeout: 每个项目等待开发服务器就绪的最长时间（秒）
+            ports: 端口分配器
+            profiler: 阶段分析器，各阶段按项目统计耗时和资源占用
+        """
+        self.make_runner = make_runner
+        self.work_dir = Path(work_dir)
+        self.report_path = Path(report_path) if report_path else None
+        self.limits = {'clone': clone_jobs, 'install': install_jobs, 'run': run_jobs}
+        self.semaphores = {phase: threading.Semaphore(limit) for phase, limit in self.limits.items()}
+        self.ready_timeout = ready_timeout
+        self.ports = ports or PortAllocator()
+        self.profiler = profiler
+        self._report_lock = threading.Lock()
+
+    def run(self, items: List[BatchItem]) -> List[BatchResult]:
+        """
+        处理所有仓库
+
+        Args:
+            items: 仓库列表
+
+        Returns:
+            按输入顺序排列的结果
+        """
+        self.work_dir.mkdir(parents=True, exist_ok=True)
+        console = sys.stdout
+        outputs = (ThreadOutput(sys.stdout), ThreadOutput(sys.stderr))
+        results: Dict[int, BatchResult] = {}
+        workers = max(1, min(len(items), sum(self.limits.values())))
+
+        print(f"📋 批量运行 {len(items)} 个仓库（并发: clone {self.limits['clone']} / "
+              f"install {self.limits['install']} / run {self.limits['run']}）")
+        sys.stdout, sys.stderr = outputs
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                futures = {pool.submit(self._process, item, outputs): index for index, item in enumerate(items)}
+                for future in as_completed(futures):
+                    result = future.result()
+                    results[futures[future]] = result
+                    self._write_report(result)
+                    console.write(self.format_result(result) + '\n')
+                    console.flush()
+        finally:
+            sys.stdout, sys.stderr = (output.default for output in outputs)
+        return [results[index] for index in range(len(items))]
+
+    def _phase(self, result: BatchResult, phase: str, fn: Callable[[], Optional[PhaseResult]]) -> bool:
+        """在该阶段的并发限制内执行 fn，记录耗时；fn 返回 None 表示成功"""
+        profiled = self.profiler.phase(phase, scope=project_slug(result.url)) if self.profiler else nullcontext()
+        with self.semaphores[phase], profiled:
+            start = time.perf_counter()
+            try:
+                outcome = fn() or PhaseResult('ok')
+            except Exception as e:
+                outcome = PhaseResult('failed', error=str(e))
+            outcome.seconds = time.perf_counter() - start
+        result.phases[phase] = outcome
+        return outcome.status == 'ok'
+
+    def _process(self, item: BatchItem, outputs) -> BatchResult:
+        slug = project_slug(item.url)
+        owner_dir = self.work_dir / slug.split('/')[0]
+        owner_dir.mkdir(parents=True, exist_ok=True)
+        log_path = self.work_dir / f"{slug.replace('/', '__')}.log"
+        result = BatchResult(item.url, log_path=str(log_path))
+
+        # 项目的输出（包括实时转发的命令输出）都写入它自己的日志文件
+        with open(log_path, 'a', encoding='utf-8', buffering=1) as log, \
+                outputs[0].route(log), outputs[1].route(log):
+            try:
+                port = self.ports.allocate()
+            except RuntimeError as e:
+                result.phases['clone'] = PhaseResult('failed', error=str(e))
+                return result
+            result.port = port
+            try:
+                runner = self.make_runner(item, owner_dir, {'PORT': str(port)})
+                result.project_path = str(runner.project_path)
+                if (self._phase(result, 'clone', lambda: _check(runner.clone_repository(), '克隆失败'))
+                        and self._phase(result, 'install', lambda: _check(runner.install_dependencies(), '安装依赖失败'))):
+                    self._phase(result, 'run', lambda: self._launch(runner, result))
+            finally:
+                self.ports.release(port)
+
+        for phase in PHASES:
+            result.phases.setdefault(phase, PhaseResult('skipped'))
+        return result
+
+    def _launch(self, runner, result: BatchResult) -> Optional[PhaseResult]:
+        served = runner.launch(self.ready_timeout)
+        if served is None:
+            return PhaseResult('skipped', error='没有可运行的脚本')
+        if served.ready:
+            result.ready_url = served.url
+            result.time_to_ready = served.seconds_to_ready
+            return None
+        process = served.process
+        if process.cancelled:
+            return PhaseResult('failed', error=f'{self.ready_timeout:g}s 内没有就绪')
+        lines = process.stderr.strip().splitlines() or process.stdout.strip().splitlines()
+        return PhaseResult('failed', error=lines[-1] if lines else f'退出码 {process.returncode}')
+
+    def _write_report(self, result: BatchResult):
+        if self.report_path is None:
+            return
+        with self._report_lock, open(self.report_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(result.to_dict(), ensure_ascii=False) + '\n')
+
+    @staticmethod
+    def format_result(result: BatchResult) -> str:
+        """单行摘要，例如 ✅ owner/repo  clone 3.1s ✅ | install 20.4s ✅ | run 2.5s ✅"""
+        icons = {'ok': '✅', 'failed': '❌', 'skipped': '⏭️'}
+        phases = ' | '.join(
+            f"{phase} {result.phases[phase].seconds:.1f}s {icons[result.phases[phase].status]}"
+            for phase in PHASES if phase in result.phases
+        )
+        line = f"{'✅' if result.success else '❌'} {project_slug(result.url)}  {phases}"
+        if result.time_to_ready is not None:
+            line += f"  → {result.ready_url}（就绪 {result.time_to_ready:.1f}s）"
+        errors = [p.error for p in result.phases.values() if p.status == 'failed' and p.error]
+        return line + (f"\n   {errors[0]}" if errors else '')
+
+
+def _check(ok: bool, message: str) -> Optional[PhaseResult]:
+    return None if ok else PhaseResult('failed', error=message)
+
+
+def run_batch(
+    items: List[BatchItem],
+    runner_class: Callable[..., object],
+    work_dir: Path,
+    report_path: Optional[Path] = None,
+    clone_jobs: int = 4,
+    install_jobs: int = 2,
+    run_jobs: int = 4,
+    base_port: int = DEFAULT_BASE_PORT,
+    clone_options: Optional[CloneOptions] = None,
+    run_options: Optional[RunOptions] = None,
+    **runner_options
+) -> List[BatchResult]:
+    """
+    批量克隆、安装并启动多个仓库
+
+    每个项目在 clone_options / run_options 的基础上使用自己的工作目录和 PORT，
+    已存在的项目目录增量更新（不交互询问）；阶段之间由批量调度器控制并发，运行器内部不再并行。
+
+    Args:
+        items: 仓库列表
+        runner_class: 项目运行器类，按 (url, clone_options=, run_options=, repo_size_kb=,
+            repo_language=, **runner_options) 创建
+        work_dir: 批量工作目录，每个项目位于 <work_dir>/<owner>/<repo>，日志位于 <work_dir>/<owner>__<repo>.log
+        report_path: JSONL 报告路径
+        clone_jobs / install_jobs / run_jobs: 各阶段的并发上限
+        base_port: 分配给开发服务器的起始端口
+        clone_options: 所有项目共用的克隆选项
+        run_options: 所有项目共用的运行选项，ready_timeout 为每个项目等待就绪的最长时间，就绪后立即停止
+        **runner_options: 传给运行器的其他参数（use_proxy、install_options、profiler、mirrors 等）
+
+    Returns:
+        按输入顺序排列的结果
+    """
+    clone_options = clone_options or CloneOptions()
+    run_options = run_options or RunOptions()
+
+    def make_runner(item: BatchItem, project_dir: Path, extra_env: Dict[str, str]):
+        return runner_class(
+            item.url,
+            clone_options=replace(clone_options, update=True, work_dir=project_dir),
+            run_options=replace(run_options, overlap=False, extra_env={**run_options.extra_env, **extra_env}),
+            repo_size_kb=item.size_kb,
+            repo_language=item.language,
+            **runner_options
+        )
+
+    if report_path:
+        Path(report_path).unlink(missing_ok=True)
+    batch = BatchRunner(
+        make_runner, Path(work_dir), report_path,
+        clone_jobs=clone_jobs, install_jobs=install_jobs, run_jobs=run_jobs,
+        ready_timeout=run_options.ready_timeout, ports=PortAllocator(base_port),
+        profiler=runner_options.get('profiler')
+    )
+    results = batch.run(items)
+    succeeded = sum(result.success for result in results)
+    print(f"\n📊 批量运行完成: 成功 {succeeded}/{len(results)}")
+    if report_path:
+        print(f"📝 报告: {report_path}")
+    return results
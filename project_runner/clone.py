@@ -0,0 +1,147 @@
+"""
+克隆策略模块
+
+- full: 完整克隆（全部历史和文件）
+- shallow: --depth 1，只取最新提交
+- blobless: --filter=blob:none，历史提交和目录树完整，文件内容按需下载
+- treeless: --filter=tree:0，历史提交完整，目录树和文件内容按需下载
+- sparse: 浅克隆 + blobless + sparse-checkout，只检出安装和运行需要的目录
+"""
+
+import fnmatch
+import re
+import shlex
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+
+CLONE_STRATEGIES = ('auto', 'full', 'shallow', 'blobless', 'treeless', 'sparse')
+
+# 超过该大小（KB，来自 GitHub API 的 size 字段）的仓库自动使用 sparse
+SPARSE_THRESHOLD_KB = 1024 * 1024
+
+# sparse 模式下不检出的目录（与安装、运行项目无关；工作区包所在的目录除外）
+SPARSE_EXCLUDES = {
+    '.github', 'docs', 'doc', 'documentation', 'website', 'site',
+    'examples', 'example', 'samples', 'demo', 'demos',
+    'test', 'tests', '__tests__', 'e2e', 'cypress', 'fixtures',
+    'benchmark', 'benchmarks', 'bench', 'screenshots', 'assets-raw',
+}
+
+_STRATEGY_FLAGS = {
+    'full': [],
+    'shallow': ['--depth', '1'],
+    'blobless': ['--filter=blob:none'],
+    'treeless': ['--filter=tree:0'],
+    'sparse': ['--depth', '1', '--filter=blob:none', '--sparse'],
+}
+
+_RECEIVED_PATTERN = re.compile(r'Receiving objects:\s+100% \([^)]*\),\s+([\d.]+)\s+(bytes|KiB|MiB|GiB)')
+_UNITS = {'bytes': 1, 'KiB': 1024, 'MiB': 1024 ** 2, 'GiB': 1024 ** 3}
+
+
+@dataclass
+class CloneStats:
+    """一次克隆的统计信息"""
+    strategy: str
+    seconds: float
+    bytes_received: Optional[int]
+
+    def describe(self) -> str:
+        size = format_bytes(self.bytes_received) if self.bytes_received is not None else '未知'
+        return f"策略 {self.strategy}, 耗时 {self.seconds:.1f}s, 传输 {size}"
+
+
+def choose_strategy(size_kb: Optional[int]) -> str:
+    """
+    根据仓库大小选择克隆策略
+
+    Args:
+        size_kb: 仓库大小（KB，GitHub 搜索结果中的 size 字段），未知时为 None
+
+    Returns:
+        克隆策略名称
+    """
+    if size_kb is not None and size_kb >= SPARSE_THRESHOLD_KB:
+        return 'sparse'
+    return 'shallow'
+
+
+def build_clone_command(strategy: str, url: str, dest: Path, ref: Optional[str] = None) -> str:
+    """生成 git clone 命令（--progress 保证非终端下也输出传输量，ref 为分支或标签）"""
+    branch = ['--branch', ref] if ref else []
+    args = ['git', 'clone', '--progress', *_STRATEGY_FLAGS[strategy], *branch, url, str(dest)]
+    return ' '.join(shlex.quote(arg) for arg in args)
+
+
+def _in_workspace(directory: str, patterns: Iterable[str]) -> bool:
+    """顶层目录是否可能包含工作区包（按每个 glob 的第一段匹配，忽略 ! 排除规则）"""
+    for pattern in patterns:
+        if pattern.startswith('!'):
+            continue
+        first = pattern.strip('/').split('/', 1)[0]
+        if first and fnmatch.fnmatchcase(directory, first):
+            return True
+    return False
+
+
+def sparse_directories(top_level_dirs: Iterable[str], extra_paths: Iterable[str] = (),
+                       workspace_patterns: Iterable[str] = ()) -> List[str]:
+    """
+    sparse 模式下需要检出的目录
+
+    Args:
+        top_level_dirs: 仓库根目录下的所有目录
+        extra_paths: 用户额外指定的路径
+        workspace_patterns: 工作区包的 glob（pnpm-workspace.yaml / package.json workspaces），
+            匹配到的目录即使在 SPARSE_EXCLUDES 中也会检出，否则安装时会缺少工作区依赖
+
+    Returns:
+        目录列表（根目录文件在 cone 模式下总会检出）
+    """
+    patterns = list(workspace_patterns)
+    dirs = [d for d in top_level_dirs
+            if d and (d.lower() not in SPARSE_EXCLUDES or _in_workspace(d, patterns))]
+    for path in extra_paths:
+        if path not in dirs:
+            dirs.append(path)
+    return dirs
+
+
+def parse_received_bytes(output: str) -> Optional[int]:
+    """
+    从 git 的进度输出中解析传输字节数（多次 fetch 的结果会累加）
+
+    Args:
+        output: git 的 stderr 输出
+
+    Returns:
+        传输字节数，没有进度信息时返回 None
+    """
+    matches = _RECEIVED_PATTERN.findall(output)
+    if not matches:
+        return None
+    return int(sum(float(value) * _UNITS[unit] for value, unit in matches))
+
+
+def dir_size(path: Path) -> int:
+    """目录占用的字节数（不跟随符号链接）"""
+    total = 0
+    for child in Path(path).rglob('*'):
+        try:
+            if child.is_file() and not child.is_symlink():
+                total += child.stat().st_size
+        except OSError:
+            continue
+    return total
+
+
+def format_bytes(size: int) -> str:
+    """格式化字节数"""
+    value = float(size)
+    for unit in ('B', 'KiB', 'MiB', 'GiB'):
+        if value < 1024 or unit == 'GiB':
+            return f"{value:.1f} {unit}" if unit != 'B' else f"{int(value)} B"
+        value /= 1024
+    return f"{value:.1f} GiB"
@@ -0,0 +1,172 @@
+"""
+按锁文件寻址的依赖缓存
+
+缓存键由锁文件指纹、包管理器、Node 版本和平台组成。命中时用硬链接把缓存的
+node_modules 恢复到项目中（跨文件系统时退化为复制），不访问网络；未命中时在
+安装成功后把 node_modules 放入缓存。缓存按大小做 LRU 淘汰，多进程通过文件锁互斥。
+
+注意：硬链接的文件与缓存共享内容，项目中原地修改 node_modules 里的文件会影响缓存。
+常见工具只会新建文件（例如 node_modules/.cache），这类目录不会放入缓存。
+"""
+
+import hashlib
+import os
+import platform
+import shutil
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Sequence
+
+from .fs_cache import DEFAULT_CACHE_ROOT, FileLock, evict_lru, lock_path, touch
+
+
+DEFAULT_DEP_CACHE_DIR = DEFAULT_CACHE_ROOT / 'deps'
+
+# 依赖缓存默认上限 20 GiB
+DEFAULT_MAX_BYTES = 20 * 1024 ** 3
+
+# 不放入缓存的目录（构建工具的本地缓存）
+IGNORED_NAMES = ('.cache', '.vite', '.turbo')
+
+
+@dataclass
+class RestoreResult:
+    """一次缓存恢复的结果"""
+    files: int
+    linked: int
+    seconds: float
+
+
+def _link_or_copy(src: str, dst: str, counters: dict):
+    """优先创建硬链接，失败时复制"""
+    try:
+        os.link(src, dst)
+        counters['linked'] += 1
+    except OSError:
+        shutil.copy2(src, dst)
+    counters['files'] += 1
+
+
+def link_tree(src: Path, dst: Path) -> dict:
+    """
+    用硬链接复制目录树（保留符号链接，pnpm 的 node_modules 依赖相对符号链接）
+
+    Args:
+        src: 源目录
+        dst: 目标目录（必须不存在）
+
+    Returns:
+        {'files': 文件数, 'linked': 硬链接数}
+    """
+    counters = {'files': 0, 'linked': 0}
+    shutil.copytree(
+        src, dst, symlinks=True,
+        ignore=shutil.ignore_patterns(*IGNORED_NAMES),
+        copy_function=lambda s, d: _link_or_copy(s, d, counters)
+    )
+    return counters
+
+
+class DependencyCache:
+    """node_modules 缓存"""
+
+    def __init__(self, root: Path = DEFAULT_DEP_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Args:
+            root: 缓存目录
+            max_bytes: 缓存总大小上限，超过时按最近使用时间淘汰
+        """
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def make_key(fingerprint: str, package_manager: str, node_version: Optional[str]) -> str:
+        """
+        生成缓存键
+
+        Args:
+            fingerprint: 锁文件指纹
+            package_manager: 包管理器（不同包管理器的 node_modules 布局不同）
+            node_version: Node.js 版本（原生模块与 Node ABI 绑定）
+
+        Returns:
+            缓存键
+        """
+        parts = [fingerprint, package_manager, node_version or 'unknown',
+                 platform.system(), platform.machine()]
+        return hashlib.sha256('\0'.join(parts).encode('utf-8')).hexdigest()[:32]
+
+    def entry_path(self, key: str) -> Path:
+        return self.root / key
+
+    def has(self, key: str) -> bool:
+        return (self.entry_path(key) / 'node_modules').is_dir()
+
+    def restore(self, key: str, project_path: Path, paths: Sequence[str] = ('.',)) -> Optional[RestoreResult]:
+        """
+        从缓存恢复 node_modules
+
+        Args:
+            key: 缓存键
+            project_path: 项目目录（已有的 node_modules 会被替换）
+            paths: 需要恢复 node_modules 的目录（相对项目目录，monorepo 中包括各工作区包）
+
+        Returns:
+            恢复结果，未命中时返回 None
+        """
+        entry = self.entry_path(key)
+        start = time.perf_counter()
+        files = linked = 0
+        # 共享锁：允许多个进程同时恢复，同时阻止淘汰和写入
+        with FileLock(lock_path(entry), shared=True):
+            if not (entry / 'node_modules').is_dir():
+                return None
+            for path in paths:
+                cached = entry / path / 'node_modules'
+                if not cached.is_dir():
+                    continue
+                target = Path(project_path) / path / 'node_modules'
+                if target.exists() or target.is_symlink():
+                    shutil.rmtree(target, ignore_errors=True)
+                counters = link_tree(cached, target)
+                files += counters['files']
+                linked += counters['linked']
+            touch(entry)
+        return RestoreResult(files, linked, time.perf_counter() - start)
+
+    def store(self, key: str, project_path: Path, paths: Sequence[str] = ('.',)) -> bool:
+        """
+        安装成功后把 node_modules 放入缓存
+
+        Args:
+            key: 缓存键
+            project_path: 项目目录
+            paths: 需要缓存 node_modules 的目录（相对项目目录）
+
+        Returns:
+            是否写入了缓存（已存在或没有 node_modules 时返回 False）
+        """
+        if not (Path(project_path) / 'node_modules').is_dir():
+            return False
+
+        entry = self.entry_path(key)
+        with FileLock(lock_path(entry)):
+            if (entry / 'node_modules').is_dir():
+                return False
+            tmp = entry.with_name(entry.name + '.tmp')
+            shutil.rmtree(tmp, ignore_errors=True)
+            tmp.mkdir(parents=True)
+            try:
+                for path in paths:
+                    source = Path(project_path) / path / 'node_modules'
+                    if source.is_dir():
+                        link_tree(source, tmp / path / 'node_modules')
+            except (OSError, shutil.Error):
+                shutil.rmtree(tmp, ignore_errors=True)
+                return False
+            shutil.rmtree(entry, ignore_errors=True)
+            tmp.rename(entry)
+
+        evict_lru(self.root, self.max_bytes, keep=[entry])
+        return True
@@ -0,0 +1,137 @@
+"""
+本地缓存目录的公共工具：文件锁、按大小的 LRU 淘汰
+
+多个 run_github_project.py 进程可能同时使用同一个缓存目录，
+每个缓存条目 <name> 旁边有一个 <name>.lock 锁文件。
+"""
+
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows 上没有 fcntl，锁退化为空操作
+    fcntl = None
+
+from .clone import dir_size
+
+
+# 默认缓存根目录，可通过环境变量覆盖
+DEFAULT_CACHE_ROOT = Path(
+    os.environ.get('RUN_GITHUB_PROJECT_CACHE', Path.home() / '.cache' / 'run-github-project')
+)
+
+
+class FileLock:
+    """基于 flock 的进程间文件锁（支持 with 语句）"""
+
+    def __init__(self, path: Path, shared: bool = False):
+        """
+        Args:
+            path: 锁文件路径（不存在时自动创建）
+            shared: 是否为共享锁（多个读者可同时持有）
+        """
+        self.path = Path(path)
+        self.shared = shared
+        self._fd: Optional[int] = None
+
+    def acquire(self, blocking: bool = True) -> bool:
+        """
+        获取锁
+
+        Args:
+            blocking: 是否等待其他进程释放锁
+
+        Returns:
+            是否成功获取（blocking=True 时总是 True）
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        if fcntl is None:
+            return True
+
+        flags = fcntl.LOCK_SH if self.shared else fcntl.LOCK_EX
+        if not blocking:
+            flags |= fcntl.LOCK_NB
+        try:
+            fcntl.flock(self._fd, flags)
+        except BlockingIOError:
+            os.close(self._fd)
+            self._fd = None
+            return False
+        return True
+
+    def release(self):
+        """释放锁"""
+        if self._fd is None:
+            return
+        if fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        os.close(self._fd)
+        self._fd = None
+
+    def __enter__(self) -> 'FileLock':
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+
+def lock_path(entry: Path) -> Path:
+    """缓存条目对应的锁文件"""
+    entry = Path(entry)
+    return entry.with_name(entry.name + '.lock')
+
+
+def touch(entry: Path):
+    """更新缓存条目的访问时间（LRU 依据）"""
+    now = time.time()
+    try:
+        os.utime(entry, (now, now))
+    except OSError:
+        pass
+
+
+def evict_lru(root: Path, max_bytes: int, keep: Iterable[Path] = ()) -> List[Path]:
+    """
+    按最近使用时间淘汰缓存条目，直到总大小不超过 max_bytes
+
+    正在被其他进程使用（锁被占用）的条目会被跳过。
+
+    Args:
+        root: 缓存目录，其中每个子目录是一个缓存条目
+        max_bytes: 缓存总大小上限
+        keep: 不允许淘汰的条目（例如刚刚使用的那个）
+
+    Returns:
+        被删除的条目
+    """
+    root = Path(root)
+    if not root.exists():
+        return []
+
+    keep = {Path(p).resolve() for p in keep}
+    entries = [p for p in root.iterdir() if p.is_dir() and not p.name.endswith('.tmp')]
+    sizes = {p: dir_size(p) for p in entries}
+    total = sum(sizes.values())
+
+    removed = []
+    for entry in sorted(entries, key=lambda p: p.stat().st_mtime):
+        if total <= max_bytes:
+            break
+        if entry.resolve() in keep:
+            continue
+        lock = FileLock(lock_path(entry))
+        if not lock.acquire(blocking=False):
+            continue
+        try:
+            shutil.rmtree(entry, ignore_errors=True)
+        finally:
+            lock.release()
+        total -= sizes[entry]
+        removed.append(entry)
+    return removed
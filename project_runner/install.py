@@ -0,0 +1,150 @@
+"""
+按包管理器区分的依赖安装策略
+
+- npm: npm ci --prefer-offline --no-audit --no-fund（有锁文件时，不会改写锁文件）
+- pnpm: pnpm install --frozen-lockfile --prefer-offline，使用共享的 store 目录
+- yarn 1.x: yarn install --frozen-lockfile --prefer-offline
+- yarn berry (2+): yarn install --immutable
+
+可以指定 registry 镜像。锁文件与 package.json 不一致导致冻结安装失败时，
+由调用方改用非冻结策略重试。
+
+monorepo 中可以只安装要运行的应用及其依赖的工作区包：pnpm 使用 --filter <app>...，
+npm 使用 --workspace。yarn 没有不依赖插件的等价参数，仍然安装整个工作区。
+"""
+
+import json
+import os
+import shlex
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+from .clone import dir_size, format_bytes
+from .fs_cache import DEFAULT_CACHE_ROOT
+
+
+# pnpm 共享 store（与依赖缓存放在同一个缓存根目录下，方便硬链接）
+DEFAULT_PNPM_STORE = DEFAULT_CACHE_ROOT / 'pnpm-store'
+
+_NPM_LOCKFILES = ('package-lock.json', 'npm-shrinkwrap.json')
+
+_FROZEN_FLAGS = ('--frozen-lockfile', '--immutable')
+
+
+@dataclass
+class InstallStrategy:
+    """一次安装使用的命令"""
+    package_manager: str
+    args: List[str]
+    frozen: bool
+    env: Dict[str, str] = field(default_factory=dict)
+    # 包管理器的下载缓存目录，安装前后的大小差近似为网络下载量
+    cache_dir: Optional[Path] = None
+
+    @property
+    def name(self) -> str:
+        """策略名称，例如 npm ci、pnpm install --frozen-lockfile"""
+        flags = [arg for arg in self.args[2:] if arg in _FROZEN_FLAGS]
+        return ' '.join(self.args[:2] + flags)
+
+    @property
+    def command(self) -> str:
+        return ' '.join(shlex.quote(arg) for arg in self.args)
+
+
+@dataclass
+class InstallReport:
+    """一次安装的统计"""
+    strategy: str
+    seconds: float
+    cache_growth: Optional[int] = None
+
+    def describe(self) -> str:
+        growth = f", 缓存增长 {format_bytes(self.cache_growth)}" if self.cache_growth is not None else ""
+        return f"策略 {self.strategy}, 耗时 {self.seconds:.1f}s{growth}"
+
+
+def is_yarn_berry(project_path: Path) -> bool:
+    """项目是否使用 Yarn 2+（.yarnrc.yml 或 packageManager 字段）"""
+    project_path = Path(project_path)
+    if (project_path / '.yarnrc.yml').exists():
+        return True
+    try:
+        data = json.loads((project_path / 'package.json').read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return False
+    manager = data.get('packageManager', '') if isinstance(data, dict) else ''
+    if manager.startswith('yarn@'):
+        return not manager[len('yarn@'):].startswith('1.')
+    return False
+
+
+def _yarn_classic_cache() -> Path:
+    if os.environ.get('YARN_CACHE_FOLDER'):
+        return Path(os.environ['YARN_CACHE_FOLDER'])
+    if sys.platform == 'darwin':
+        return Path.home() / 'Library' / 'Caches' / 'Yarn'
+    return Path(os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache') / 'yarn'
+
+
+def build_install_strategy(
+    package_manager: str,
+    project_path: Path,
+    registry: Optional[str] = None,
+    store_dir: Optional[Path] = DEFAULT_PNPM_STORE,
+    frozen: bool = True,
+    workspace_packages: Sequence[str] = ()
+) -> InstallStrategy:
+    """
+    生成安装命令
+
+    Args:
+        package_manager: npm / pnpm / yarn
+        project_path: 项目目录
+        registry: npm registry 镜像地址
+        store_dir: pnpm store 目录，None 表示使用 pnpm 默认位置
+        frozen: 有锁文件时是否严格按锁文件安装
+        workspace_packages: monorepo 中要安装的工作区包（第一个是应用，其余是它依赖的工作区包），
+            为空时安装整个项目
+
+    Returns:
+        安装策略
+    """
+    project_path = Path(project_path)
+    registry_args = [f'--registry={registry}'] if registry else []
+
+    if package_manager == 'pnpm':
+        frozen = frozen and (project_path / 'pnpm-lock.yaml').exists()
+        args = ['pnpm', 'install', *(['--frozen-lockfile'] if frozen else []), '--prefer-offline']
+        if store_dir:
+            args.append(f'--store-dir={store_dir}')
+        if workspace_packages:
+            # <app>... 表示应用本身及其依赖的工作区包
+            args.append(f'--filter={workspace_packages[0]}...')
+        return InstallStrategy('pnpm', args + registry_args, frozen, cache_dir=store_dir)
+
+    if package_manager == 'yarn':
+        frozen = frozen and (project_path / 'yarn.lock').exists()
+        if is_yarn_berry(project_path):
+            env = {'YARN_NPM_REGISTRY_SERVER': registry} if registry else {}
+            args = ['yarn', 'install', *(['--immutable'] if frozen else [])]
+            return InstallStrategy('yarn', args, frozen, env,
+                                   cache_dir=Path.home() / '.yarn' / 'berry' / 'cache')
+        args = ['yarn', 'install', *(['--frozen-lockfile'] if frozen else []),
+                '--prefer-offline', '--non-interactive']
+        return InstallStrategy('yarn', args + registry_args, frozen, cache_dir=_yarn_classic_cache())
+
+    npm_cache = Path(os.environ.get('npm_config_cache') or Path.home() / '.npm')
+    frozen = frozen and any((project_path / name).exists() for name in _NPM_LOCKFILES)
+    args = ['npm', 'ci' if frozen else 'install', '--prefer-offline', '--no-audit', '--no-fund']
+    args += [f'--workspace={name}' for name in workspace_packages]
+    return InstallStrategy('npm', args + registry_args, frozen, cache_dir=npm_cache)
+
+
+def cache_size(strategy: InstallStrategy) -> Optional[int]:
+    """包管理器下载缓存的大小（用于估算网络下载量）"""
+    if strategy.cache_dir is None:
+        return None
+    return dir_size(strategy.cache_dir) if strategy.cache_dir.exists() else 0
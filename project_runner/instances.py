@@ -0,0 +1,184 @@
+"""
+运行中项目的登记表
+
+开发服务器就绪后，把仓库、项目目录、应用、提交、锁文件指纹、进程号和地址写入
+<缓存根目录>/instances.json。再次运行同一个项目时，如果登记的进程仍然存活、地址
+能响应 HTTP 请求，并且提交和锁文件都没有变化，就直接返回它的地址，不再重复安装
+和启动。进程已经退出（或 PID 已被其他进程复用）的条目在每次读取时自动清理。
+"""
+
+import json
+import os
+import time
+import urllib.parse
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, fields
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional
+
+from .fs_cache import DEFAULT_CACHE_ROOT, FileLock, lock_path
+from .mirror_cache import normalize_url
+from .readiness import http_probe
+
+
+DEFAULT_REGISTRY_PATH = DEFAULT_CACHE_ROOT / 'instances.json'
+
+
+@dataclass
+class RunningInstance:
+    """一个正在运行的开发服务器"""
+    github_url: str
+    project_path: str
+    pid: int  # 开发服务器进程（也是进程组 ID）
+    url: str
+    app: Optional[str] = None
+    revision: Optional[str] = None
+    lockfile_hash: Optional[str] = None
+    started_at: float = 0.0
+    # 进程的启动时间（Linux 上 /proc/<pid>/stat 的 starttime），用于识别 PID 复用
+    process_start: Optional[int] = None
+
+    @property
+    def port(self) -> Optional[int]:
+        try:
+            return urllib.parse.urlsplit(self.url).port
+        except ValueError:
+            return None
+
+
+def process_start_time(pid: int, proc: Path = Path('/proc')) -> Optional[int]:
+    """进程的启动时间（时钟滴答数），没有 /proc 时返回 None"""
+    try:
+        stat = (proc / str(pid) / 'stat').read_text()
+        # comm 字段可能包含空格，从最后一个 ')' 之后开始数（第 3 个字段 state 为 fields[0]）
+        return int(stat[stat.rindex(')') + 2:].split()[19])
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def pid_alive(pid: int, process_start: Optional[int] = None) -> bool:
+    """
+    进程是否仍在运行
+
+    Args:
+        pid: 进程号
+        process_start: 登记时的启动时间，与当前进程不一致说明 PID 已被复用
+
+    Returns:
+        是否存活
+    """
+    if os.name == 'nt':
+        # Windows 上 os.kill 会直接结束进程，只依赖 HTTP 健康检查
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    except OSError:
+        return False
+    if process_start is not None:
+        current = process_start_time(pid)
+        if current is not None and current != process_start:
+            return False
+    return True
+
+
+class InstanceRegistry:
+    """运行中项目的登记表（多个进程共用，读写时持有文件锁）"""
+
+    def __init__(self, path: Path = DEFAULT_REGISTRY_PATH, probe: Callable[[str], bool] = http_probe):
+        """
+        Args:
+            path: 登记文件路径
+            probe: HTTP 健康检查函数
+        """
+        self.path = Path(path)
+        self.probe = probe
+
+    def _read(self) -> List[RunningInstance]:
+        try:
+            data = json.loads(self.path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return []
+        names = {f.name for f in fields(RunningInstance)}
+        instances = []
+        for item in data if isinstance(data, list) else []:
+            try:
+                instances.append(RunningInstance(**{k: v for k, v in item.items() if k in names}))
+            except (AttributeError, TypeError):
+                continue
+        return instances
+
+    def _write(self, instances: List[RunningInstance]):
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_name(self.path.name + '.tmp')
+            tmp.write_text(json.dumps([asdict(i) for i in instances], ensure_ascii=False, indent=2),
+                           encoding='utf-8')
+            tmp.replace(self.path)
+        except OSError:
+            pass
+
+    @contextmanager
+    def _edit(self) -> Iterator[List[RunningInstance]]:
+        """读取、清理已退出的进程并在修改后写回"""
+        with FileLock(lock_path(self.path)):
+            instances = self._read()
+            live = [i for i in instances if pid_alive(i.pid, i.process_start)]
+            yield live
+            if live != instances:
+                self._write(live)
+
+    def entries(self) -> List[RunningInstance]:
+        """仍在运行的实例（顺带清理已退出的条目）"""
+        with self._edit() as instances:
+            return list(instances)
+
+    def register(self, instance: RunningInstance):
+        """
+        登记实例（同一项目目录和应用只保留最新的一个）
+
+        Args:
+            instance: 运行中的实例，未填写的启动时间会自动补上
+        """
+        instance.started_at = instance.started_at or time.time()
+        if instance.process_start is None:
+            instance.process_start = process_start_time(instance.pid)
+        key = (str(Path(instance.project_path).resolve()), instance.app)
+        with self._edit() as instances:
+            instances[:] = [
+                i for i in instances
+                if i.pid != instance.pid and (str(Path(i.project_path).resolve()), i.app) != key
+            ]
+            instances.append(instance)
+
+    def unregister(self, pid: int):
+        with self._edit() as instances:
+            instances[:] = [i for i in instances if i.pid != pid]
+
+    def find(self, github_url: str, project_path: Path, app: Optional[str] = None,
+             revision: Optional[str] = None, lockfile_hash: Optional[str] = None) -> Optional[RunningInstance]:
+        """
+        查找同一项目、同一版本的健康实例
+
+        Args:
+            github_url: 仓库 URL（HTTPS 与 SSH 写法视为相同）
+            project_path: 项目目录
+            app: monorepo 中指定的应用
+            revision: 当前的提交，与登记时不同说明代码已更新
+            lockfile_hash: 当前的锁文件指纹，与登记时不同说明依赖已变化
+
+        Returns:
+            健康的实例；没有或版本不一致时返回 None
+        """
+        resolved = str(Path(project_path).resolve())
+        for instance in self.entries():
+            if (normalize_url(instance.github_url) != normalize_url(github_url)
+                    or str(Path(instance.project_path).resolve()) != resolved or instance.app != app):
+                continue
+            if instance.revision != revision or instance.lockfile_hash != lockfile_hash:
+                return None
+            return instance if self.probe(instance.url) else None
+        return None
@@ -0,0 +1,195 @@
+"""
+依赖锁文件指纹
+
+node_modules 中记录安装时锁文件的哈希，锁文件没有变化时可以跳过重新安装。
+"""
+
+import hashlib
+import json
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Optional
+
+from .archive import ArchiveError, build_opener, parse_github_repo
+
+
+# 按包管理器优先级排列
+LOCKFILES = ('pnpm-lock.yaml', 'yarn.lock', 'package-lock.json', 'npm-shrinkwrap.json', 'bun.lockb')
+
+DEPENDENCY_FIELDS = ('dependencies', 'devDependencies', 'optionalDependencies', 'peerDependencies')
+
+STAMP_NAME = '.run-github-project.json'
+
+
+def lockfile_hash(project_path: Path) -> Optional[str]:
+    """
+    计算依赖指纹
+
+    有锁文件时使用锁文件内容；没有锁文件时使用 package.json 中的依赖声明
+    （修改 scripts 等字段不会改变指纹）。
+
+    Args:
+        project_path: 项目目录
+
+    Returns:
+        sha256 十六进制字符串，没有 package.json 时返回 None
+    """
+    project_path = Path(project_path)
+    digest = hashlib.sha256()
+    found = False
+    for name in LOCKFILES:
+        path = project_path / name
+        if path.is_file():
+            digest.update(name.encode('utf-8') + b'\0')
+            digest.update(path.read_bytes())
+            found = True
+    if found:
+        return digest.hexdigest()
+
+    package_json = project_path / 'package.json'
+    if not package_json.is_file():
+        return None
+    try:
+        data = json.loads(package_json.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        data = {}
+    if not isinstance(data, dict):
+        data = {}
+    deps = {field: data.get(field) for field in DEPENDENCY_FIELDS}
+    digest.update(json.dumps(deps, sort_keys=True).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def stamp_path(project_path: Path) -> Path:
+    """安装指纹文件位置（放在 node_modules 中，删除 node_modules 时一并失效）"""
+    return Path(project_path) / 'node_modules' / STAMP_NAME
+
+
+def read_stamp(project_path: Path) -> Optional[dict]:
+    """读取上次安装的指纹"""
+    try:
+        return json.loads(stamp_path(project_path).read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+
+
+def write_stamp(project_path: Path, fingerprint: str, package_manager: str):
+    """记录本次安装的指纹"""
+    path = stamp_path(project_path)
+    if not path.parent.is_dir():
+        return
+    # node_modules 可能是从依赖缓存硬链接恢复的，先删除再写，避免改到缓存中的文件
+    path.unlink(missing_ok=True)
+    path.write_text(
+        json.dumps({'lockfile_hash': fingerprint, 'package_manager': package_manager}),
+        encoding='utf-8'
+    )
+
+
+def is_install_fresh(project_path: Path, fingerprint: Optional[str] = None) -> bool:
+    """
+    node_modules 是否与当前锁文件一致
+
+    Args:
+        project_path: 项目目录
+        fingerprint: 当前依赖指纹，为空时重新计算
+
+    Returns:
+        已安装且指纹一致时返回 True
+    """
+    stamp = read_stamp(project_path)
+    if not stamp:
+        return False
+    fingerprint = fingerprint or lockfile_hash(project_path)
+    return fingerprint is not None and stamp.get('lockfile_hash') == fingerprint
+
+
+# 锁文件对应的包管理器
+LOCKFILE_MANAGERS = {
+    'pnpm-lock.yaml': 'pnpm',
+    'yarn.lock': 'yarn',
+    'package-lock.json': 'npm',
+    'npm-shrinkwrap.json': 'npm',
+    'bun.lockb': 'bun',
+}
+
+# GitHub 语言字段属于这些语言时，项目大概率需要 Node.js
+NODE_LANGUAGES = {'JavaScript', 'TypeScript', 'Vue', 'Svelte', 'Astro', 'CoffeeScript'}
+
+RAW_URL = 'https://raw.githubusercontent.com/{owner}/{repo}/{ref}/{path}'
+
+
+def probe_remote_lockfiles(
+    github_url: str,
+    ref: Optional[str] = None,
+    proxy: Optional[str] = None,
+    timeout: float = 5
+) -> Optional[List[str]]:
+    """
+    在克隆之前并发探测远程仓库根目录下有哪些锁文件（HEAD 请求，不下载内容）
+
+    Args:
+        github_url: 仓库 URL
+        ref: 分支或标签，为空时使用默认分支
+        proxy: 代理地址
+        timeout: 单个请求超时（秒）
+
+    Returns:
+        存在的锁文件和 package.json 列表；无法访问时返回 None
+    """
+    try:
+        owner, repo = parse_github_repo(github_url)
+    except ArchiveError:
+        return None
+    opener = build_opener(proxy)
+    names = ['package.json', *LOCKFILES]
+
+    def exists(name: str) -> Optional[bool]:
+        url = RAW_URL.format(owner=owner, repo=repo, ref=ref or 'HEAD', path=name)
+        request = urllib.request.Request(url, method='HEAD', headers={'User-Agent': 'run-github-project'})
+        try:
+            with opener.open(request, timeout=timeout):
+                return True
+        except urllib.error.HTTPError as e:
+            return False if e.code == 404 else None
+        except OSError:
+            return None
+
+    with ThreadPoolExecutor(max_workers=len(names)) as pool:
+        results = dict(zip(names, pool.map(exists, names)))
+    if all(found is None for found in results.values()):
+        return None
+    return [name for name, found in results.items() if found]
+
+
+def predict_package_manager(language: Optional[str], remote_files: Optional[List[str]]) -> Optional[str]:
+    """
+    克隆完成之前预测项目的包管理器，用于提前准备工具链
+
+    Args:
+        language: GitHub 仓库的主要语言
+        remote_files: probe_remote_lockfiles 的结果
+
+    Returns:
+        pnpm / yarn / npm / bun，判断不是 Node.js 项目或无法判断时返回 None
+    """
+    if remote_files:
+        for name in LOCKFILES:
+            if name in remote_files:
+                return LOCKFILE_MANAGERS[name]
+        if 'package.json' in remote_files:
+            return 'npm'
+        return None
+    if remote_files is None and language in NODE_LANGUAGES:
+        return 'npm'
+    return None
+
+
+def find_lockfile(project_path: Path) -> Optional[str]:
+    """项目根目录下的锁文件名（按包管理器优先级），没有时返回 None"""
+    for name in LOCKFILES:
+        if (Path(project_path) / name).is_file():
+            return name
+    return None
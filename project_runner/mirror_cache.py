@@ -0,0 +1,185 @@
+"""
+本地 bare 镜像缓存
+
+同一个仓库第一次运行时在缓存目录中创建 bare 镜像，之后每次只用
+`git fetch` 增量更新镜像，再从镜像本地克隆出工作目录。本地克隆会对对象文件
+建立硬链接（不同文件系统时退化为复制），几乎不走网络。
+"""
+
+import hashlib
+import re
+import shutil
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .clone import dir_size, parse_received_bytes
+from .fs_cache import DEFAULT_CACHE_ROOT, FileLock, evict_lru, lock_path, touch
+from .process import run_streaming
+
+
+DEFAULT_MIRROR_DIR = DEFAULT_CACHE_ROOT / 'mirrors'
+
+# 镜像缓存默认上限 10 GiB
+DEFAULT_MAX_BYTES = 10 * 1024 ** 3
+
+# 镜像只保存分支和标签
+MIRROR_REFSPECS = ('+refs/heads/*:refs/heads/*', '+refs/tags/*:refs/tags/*')
+
+# 只查询远程 ref 的命令（ls-remote）的超时秒数
+LS_REMOTE_TIMEOUT = 30.0
+
+_SSH_PATTERN = re.compile(r'^git@([^:]+):(.+)$')
+
+
+def normalize_url(url: str) -> str:
+    """
+    统一仓库 URL，使 HTTPS / SSH / 带不带 .git 的写法指向同一个镜像
+
+    Args:
+        url: 仓库 URL
+
+    Returns:
+        形如 github.com/user/repo 的标识
+    """
+    url = url.strip().rstrip('/')
+    match = _SSH_PATTERN.match(url)
+    if match:
+        url = f"{match.group(1)}/{match.group(2)}"
+    url = re.sub(r'^[a-z+]+://', '', url)
+    url = re.sub(r'^[^@/]+@', '', url)
+    if url.endswith('.git'):
+        url = url[:-4]
+    host, _, path = url.partition('/')
+    return f"{host.lower()}/{path}"
+
+
+def mirror_name(url: str) -> str:
+    """镜像目录名：<repo>-<hash>.git"""
+    normalized = normalize_url(url)
+    digest = hashlib.sha1(normalized.encode('utf-8')).hexdigest()[:12]
+    repo = re.sub(r'[^A-Za-z0-9._-]', '_', normalized.rsplit('/', 1)[-1]) or 'repo'
+    return f"{repo}-{digest}.git"
+
+
+@dataclass
+class MirrorResult:
+    """一次镜像克隆的结果"""
+    success: bool
+    mirror_path: Path
+    created: bool = False
+    bytes_fetched: Optional[int] = None
+    seconds: float = 0.0
+    error: str = ''
+
+
+def _git(args: List[str], env: Optional[Dict[str, str]] = None, timeout: Optional[float] = None,
+         log_path: Optional[Path] = None) -> Tuple[int, str, str]:
+    """执行 git 命令并返回 (返回码, stdout, stderr)，超时后终止 git 及其子进程"""
+    result = run_streaming(['git', *args], shell=False, env=env, timeout=timeout, log_path=log_path)
+    return result.returncode, result.stdout, result.stderr
+
+
+class MirrorCache:
+    """bare 镜像缓存"""
+
+    def __init__(self, root: Path = DEFAULT_MIRROR_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Args:
+            root: 镜像目录
+            max_bytes: 镜像总大小上限，超过时按最近使用时间淘汰
+        """
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+
+    def mirror_path(self, url: str) -> Path:
+        """仓库对应的镜像路径"""
+        return self.root / mirror_name(url)
+
+    def _update_mirror(self, url: str, mirror: Path, env: Optional[Dict[str, str]] = None,
+                       timeout: Optional[float] = None,
+                       log_path: Optional[Path] = None) -> Tuple[int, str, bool]:
+        """创建或增量更新镜像，返回 (返回码, stderr, 是否新建)"""
+        if mirror.exists():
+            # 同一镜像可能先后用 HTTPS 和 SSH 访问，以本次的 URL 为准
+            _git(['--git-dir', str(mirror), 'remote', 'set-url', 'origin', url])
+            returncode, _, stderr = _git(
+                ['--git-dir', str(mirror), 'fetch', '--progress', '--prune', 'origin'], env, timeout, log_path
+            )
+            return returncode, stderr, False
+
+        # 不用 clone --mirror：它会把 GitHub 的 refs/pull/* 也拉下来
+        tmp = mirror.with_name(mirror.name + '.tmp')
+        shutil.rmtree(tmp, ignore_errors=True)
+        git_dir = ['--git-dir', str(tmp)]
+        steps = [
+            ['init', '--bare', '--quiet', str(tmp)],
+            [*git_dir, 'remote', 'add', 'origin', url],
+            [*git_dir, 'config', '--replace-all', 'remote.origin.fetch', MIRROR_REFSPECS[0]],
+            [*git_dir, 'config', '--add', 'remote.origin.fetch', MIRROR_REFSPECS[1]],
+            [*git_dir, 'fetch', '--progress', 'origin'],
+        ]
+        stderr = ''
+        for args in steps:
+            returncode, _, step_stderr = _git(args, env, timeout, log_path)
+            stderr += step_stderr
+            if returncode != 0:
+                shutil.rmtree(tmp, ignore_errors=True)
+                return returncode, stderr, True
+
+        # 镜像的 HEAD 指向远程默认分支，本地克隆时才会检出正确的分支
+        returncode, stdout, _ = _git(['ls-remote', '--symref', url, 'HEAD'], env,
+                                     min(timeout or LS_REMOTE_TIMEOUT, LS_REMOTE_TIMEOUT), log_path)
+        match = re.search(r'^ref: (refs/heads/\S+)\s+HEAD', stdout, re.MULTILINE)
+        if returncode == 0 and match:
+            _git([*git_dir, 'symbolic-ref', 'HEAD', match.group(1)])
+
+        tmp.rename(mirror)
+        return 0, stderr, True
+
+    def clone(self, url: str, dest: Path, sparse: bool = False,
+              ref: Optional[str] = None, env: Optional[Dict[str, str]] = None,
+              timeout: Optional[float] = None, log_path: Optional[Path] = None) -> MirrorResult:
+        """
+        通过镜像克隆仓库到 dest
+
+        Args:
+            url: 远程仓库 URL
+            dest: 工作目录路径（必须不存在）
+            sparse: 是否以 sparse-checkout 方式检出（只检出根目录文件）
+            ref: 要检出的分支或标签，为空时使用默认分支
+            env: git 的环境变量（例如代理设置），为 None 时继承当前进程
+            timeout: 每个 git 命令的超时（秒），为 None 时不限制
+            log_path: 日志文件，git 的输出原样追加写入
+
+        Returns:
+            克隆结果
+        """
+        start = time.perf_counter()
+        mirror = self.mirror_path(url)
+
+        with FileLock(lock_path(mirror)):
+            returncode, stderr, created = self._update_mirror(url, mirror, env, timeout, log_path)
+            if returncode != 0:
+                return MirrorResult(False, mirror, created, error=stderr)
+            touch(mirror)
+            bytes_fetched = parse_received_bytes(stderr)
+            if bytes_fetched is None:
+                # 没有进度输出：新建时整个镜像都是下载的，更新时说明没有新对象
+                bytes_fetched = dir_size(mirror) if created else 0
+
+            args = ['clone', '--local']
+            if sparse:
+                args.append('--sparse')
+            if ref:
+                args += ['--branch', ref]
+            returncode, _, stderr = _git([*args, str(mirror), str(dest)], timeout=timeout, log_path=log_path)
+            if returncode != 0:
+                return MirrorResult(False, mirror, created, bytes_fetched, error=stderr)
+
+        # 工作目录的 origin 指回真实远程，而不是本地镜像
+        _git(['-C', str(dest), 'remote', 'set-url', 'origin', url])
+
+        evict_lru(self.root, self.max_bytes, keep=[mirror])
+        return MirrorResult(True, mirror, created, bytes_fetched, time.perf_counter() - start)
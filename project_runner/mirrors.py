@@ -0,0 +1,324 @@
+"""
+自动选择最快的 git 镜像和 npm registry 镜像
+
+对每个候选发一个小的 Range 请求（git 镜像请求仓库的 info/refs，registry 请求一个
+常用包的元数据），按首字节时间和下载速度估算下载同样大小数据的耗时并排序。排名
+按候选列表缓存在 <缓存根目录>/mirror-rankings.json 中，过期（默认 1 小时）后重新
+探测。克隆或安装失败时把该镜像标记为不可用，调用方按顺序改用下一个。
+
+与 mirror_cache（本地 bare 镜像缓存）无关：这里的镜像是远程的 GitHub / npm 镜像站。
+"""
+
+import hashlib
+import json
+import re
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .archive import ArchiveError, build_opener, parse_github_repo
+from .fs_cache import DEFAULT_CACHE_ROOT
+
+
+# 源站本身总是候选之一
+GITHUB_ORIGIN = 'https://github.com'
+NPM_ORIGIN = 'https://registry.npmjs.org'
+DEFAULT_NPM_MIRRORS = ('https://registry.npmmirror.com',)
+
+DEFAULT_RANKING_PATH = DEFAULT_CACHE_ROOT / 'mirror-rankings.json'
+
+# 排名的有效期（秒）
+DEFAULT_TTL = 3600
+
+# 每次探测最多下载的字节数
+PROBE_BYTES = 64 * 1024
+
+# 按下载这么多数据的预计耗时排序（兼顾首字节延迟和带宽）
+REFERENCE_BYTES = 1024 * 1024
+
+# 探测 registry 时请求的包（元数据足够大，能测出带宽）
+PROBE_PACKAGE = 'react'
+
+_NETWORK_ERRORS = re.compile(
+    r'ETIMEDOUT|ECONNRESET|ECONNREFUSED|ENOTFOUND|EAI_AGAIN|ENETUNREACH|socket hang up|network|'
+    r'Could not resolve host|Failed to connect|Operation timed out|Connection (timed out|reset|refused)|'
+    r'early EOF|RPC failed|returned error: 5\d\d',
+    re.IGNORECASE
+)
+
+
+@dataclass
+class MirrorProbe:
+    """一个候选的探测结果"""
+    mirror: str
+    ok: bool
+    ttfb: float = 0.0
+    bytes: int = 0
+    seconds: float = 0.0
+    error: Optional[str] = None
+
+    @property
+    def throughput(self) -> float:
+        """下载速度（字节/秒）"""
+        return self.bytes / max(self.seconds, 1e-3)
+
+    @property
+    def score(self) -> float:
+        """下载 REFERENCE_BYTES 的预计耗时（秒），不可用时为无穷大"""
+        if not self.ok:
+            return float('inf')
+        return self.ttfb + REFERENCE_BYTES / max(self.throughput, 1.0)
+
+    def describe(self) -> str:
+        if not self.ok:
+            return f"{self.mirror} ❌ {self.error}"
+        return f"{self.mirror} 首字节 {self.ttfb * 1000:.0f}ms, {self.throughput / 1024:.0f} KB/s"
+
+
+def looks_like_network_error(output: str) -> bool:
+    """命令输出是否像网络问题（这类失败换一个镜像可能成功）"""
+    return bool(_NETWORK_ERRORS.search(output or ''))
+
+
+def git_mirror_url(mirror: str, github_url: str) -> str:
+    """
+    仓库在镜像上的克隆地址
+
+    Args:
+        mirror: 镜像地址，例如 https://github.com、https://gh.example.com/https://github.com，
+            或包含 {owner} / {repo} 的模板
+        github_url: GitHub 仓库地址
+
+    Returns:
+        克隆地址
+
+    Raises:
+        ArchiveError: 不是 GitHub 仓库地址
+    """
+    owner, repo = parse_github_repo(github_url)
+    if '{owner}' in mirror or '{repo}' in mirror:
+        return mirror.format(owner=owner, repo=repo)
+    return f"{mirror.rstrip('/')}/{owner}/{repo}.git"
+
+
+def git_probe_url(clone_url: str) -> str:
+    """git 智能 HTTP 协议的引用列表地址"""
+    return f"{clone_url}/info/refs?service=git-upload-pack"
+
+
+def npm_probe_url(registry: str, package: str = PROBE_PACKAGE) -> str:
+    return f"{registry.rstrip('/')}/{package}"
+
+
+def probe_throughput(mirror: str, url: str, opener: urllib.request.OpenerDirector,
+                     max_bytes: int = PROBE_BYTES, timeout: float = 5.0) -> MirrorProbe:
+    """
+    用 Range 请求下载最多 max_bytes 字节，测量首字节时间和下载速度
+
+    Args:
+        mirror: 镜像地址（写入结果）
+        url: 探测地址
+        opener: urllib opener（决定是否走代理）
+        max_bytes: 最多下载的字节数（服务器不支持 Range 时读到这么多就断开）
+        timeout: 超时（秒）
+
+    Returns:
+        探测结果
+    """
+    start = time.perf_counter()
+    try:
+        request = urllib.request.Request(url, headers={
+            'Range': f'bytes=0-{max_bytes - 1}',
+            'User-Agent': 'run-github-project',
+        })
+        with opener.open(request, timeout=timeout) as response:
+            ttfb = time.perf_counter() - start
+            received = 0
+            while received < max_bytes:
+                chunk = response.read(min(16384, max_bytes - received))
+                if not chunk:
+                    break
+                received += len(chunk)
+    except urllib.error.HTTPError as e:
+        return MirrorProbe(mirror, False, error=f"HTTP {e.code}")
+    except (OSError, ValueError) as e:
+        return MirrorProbe(mirror, False, error=str(getattr(e, 'reason', e)))
+    if received == 0:
+        return MirrorProbe(mirror, False, ttfb, error='空响应')
+    return MirrorProbe(mirror, True, ttfb, received, time.perf_counter() - start - ttfb)
+
+
+class MirrorManager:
+    """按探测结果排序 git 镜像和 npm registry，并缓存排名"""
+
+    def __init__(
+        self,
+        git_mirrors: Sequence[str] = (),
+        npm_mirrors: Sequence[str] = DEFAULT_NPM_MIRRORS,
+        ttl: float = DEFAULT_TTL,
+        cache_path: Optional[Path] = DEFAULT_RANKING_PATH,
+        proxy: Optional[str] = None,
+        probe_bytes: int = PROBE_BYTES,
+        timeout: float = 5.0,
+        git_origin: str = GITHUB_ORIGIN,
+        npm_origin: str = NPM_ORIGIN
+    ):
+        """
+        Args:
+            git_mirrors: git 镜像（源站之外的候选）
+            npm_mirrors: npm registry 镜像（源站之外的候选）
+            ttl: 排名有效期（秒）
+            cache_path: 排名缓存文件，None 表示不缓存
+            proxy: 探测使用的代理
+            probe_bytes: 每次探测最多下载的字节数
+            timeout: 单次探测超时（秒）
+            git_origin / npm_origin: 源站地址
+        """
+        self.candidates = {
+            'git': _unique([git_origin, *git_mirrors]),
+            'npm': _unique([npm_origin, *npm_mirrors]),
+        }
+        self.ttl = ttl
+        self.cache_path = Path(cache_path) if cache_path else None
+        self.proxy = proxy
+        self.probe_bytes = probe_bytes
+        self.timeout = timeout
+        self._rankings: Dict[str, List[MirrorProbe]] = {}
+        self._measured_at: Dict[str, float] = {}
+        # 批量模式中多个运行器共用一个实例，同一类镜像只探测一次
+        self._lock = threading.Lock()
+
+    def _cache_key(self, kind: str) -> str:
+        joined = '\n'.join(self.candidates[kind])
+        return f"{kind}:{hashlib.sha256(joined.encode('utf-8')).hexdigest()[:16]}"
+
+    def _load(self) -> dict:
+        if self.cache_path is None:
+            return {}
+        try:
+            data = json.loads(self.cache_path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def _save(self, kind: str, ranking: List[MirrorProbe], measured_at: Optional[float] = None):
+        self._rankings[kind] = ranking
+        self._measured_at[kind] = measured_at or time.time()
+        if self.cache_path is None:
+            return
+        data = self._load()
+        data[self._cache_key(kind)] = {'measured_at': self._measured_at[kind],
+                                       'results': [asdict(p) for p in ranking]}
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.cache_path.with_name(self.cache_path.name + '.tmp')
+            tmp.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding='utf-8')
+            tmp.replace(self.cache_path)
+        except OSError:
+            pass
+
+    def _cached(self, kind: str) -> Optional[List[MirrorProbe]]:
+        if kind in self._rankings:
+            return self._rankings[kind]
+        entry = self._load().get(self._cache_key(kind))
+        if not isinstance(entry, dict) or time.time() - entry.get('measured_at', 0) > self.ttl:
+            return None
+        try:
+            ranking = [MirrorProbe(**item) for item in entry['results']]
+        except (KeyError, TypeError):
+            return None
+        self._rankings[kind] = ranking
+        self._measured_at[kind] = entry['measured_at']
+        return ranking
+
+    def rank(self, kind: str, probe_urls: Dict[str, str], refresh: bool = False) -> List[MirrorProbe]:
+        """
+        并发探测并排序（有未过期的缓存时直接使用缓存）
+
+        Args:
+            kind: git / npm
+            probe_urls: {镜像: 探测地址}
+            refresh: 忽略缓存重新探测
+
+        Returns:
+            按预计耗时排序的探测结果，不可用的排在最后
+        """
+        with self._lock:
+            if not refresh:
+                cached = self._cached(kind)
+                if cached is not None:
+                    return cached
+            opener = build_opener(self.proxy)
+            with ThreadPoolExecutor(max_workers=len(probe_urls)) as pool:
+                probes = list(pool.map(
+                    lambda item: probe_throughput(item[0], item[1], opener, self.probe_bytes, self.timeout),
+                    probe_urls.items()
+                ))
+            ranking = sorted(probes, key=lambda probe: probe.score)
+            self._save(kind, ranking)
+            return ranking
+
+    def _ordered(self, kind: str, probe_urls: Dict[str, str]) -> List[str]:
+        if len(probe_urls) == 1:
+            # 只有源站时不需要探测
+            return list(probe_urls)
+        ranking = self.rank(kind, probe_urls)
+        ranked = [probe.mirror for probe in ranking if probe.mirror in probe_urls]
+        # 排名之后新加的候选放在最后
+        return ranked + [mirror for mirror in probe_urls if mirror not in ranked]
+
+    def git_candidates(self, github_url: str) -> List[Tuple[str, str]]:
+        """
+        仓库的克隆地址，最快的在前（失败时按顺序改用下一个）
+
+        Args:
+            github_url: GitHub 仓库地址
+
+        Returns:
+            [(镜像, 克隆地址)]；不是 GitHub 仓库时只返回原地址
+        """
+        try:
+            urls = {mirror: git_mirror_url(mirror, github_url) for mirror in self.candidates['git']}
+        except ArchiveError:
+            return [(github_url, github_url)]
+        order = self._ordered('git', {mirror: git_probe_url(url) for mirror, url in urls.items()})
+        return [(mirror, urls[mirror]) for mirror in order]
+
+    def npm_registries(self) -> List[str]:
+        """npm registry 地址，最快的在前"""
+        return self._ordered('npm', {registry: npm_probe_url(registry) for registry in self.candidates['npm']})
+
+    def report_failure(self, kind: str, mirror: str, error: str = '使用失败'):
+        """
+        把镜像标记为不可用（写入排名缓存，有效期内的后续运行也会把它排在最后）
+
+        Args:
+            kind: git / npm
+            mirror: 镜像地址
+            error: 失败原因
+        """
+        with self._lock:
+            ranking = self._cached(kind)
+            if ranking is None:
+                return
+            updated = []
+            for probe in ranking:
+                if probe.mirror == mirror:
+                    probe = MirrorProbe(probe.mirror, False, error=error)
+                updated.append(probe)
+            # 不延长原排名的有效期
+            self._save(kind, sorted(updated, key=lambda probe: probe.score), self._measured_at.get(kind))
+
+
+def _unique(items: Sequence[str]) -> List[str]:
+    seen = []
+    for item in items:
+        item = item.strip()
+        if item and item not in seen:
+            seen.append(item)
+    return seen
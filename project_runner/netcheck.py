@@ -0,0 +1,333 @@
+"""
+并发网络诊断
+
+同时探测 github.com、api.github.com、codeload.github.com、npm registry 和 LLM 接口，
+分别测量 DNS 解析、TCP 连接、TLS 握手和 HTTP 首字节时间（TTFB）。指定了代理
+（或环境变量中有代理）时通过 HTTP CONNECT 隧道探测，同时直连探测 github.com，
+并检查 github.com:22 是否可达。所有探测并发执行，总耗时约等于最慢的一个。
+
+诊断结果用于选择克隆方式：HTTPS 不通而 SSH 端口可达时建议改用 SSH；代理不通
+而直连正常时建议不使用代理。
+"""
+
+import asyncio
+import base64
+import socket
+import ssl
+import time
+import urllib.parse
+import urllib.request
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+
+# 单个探测的默认超时（秒）
+DEFAULT_TIMEOUT = 2.0
+
+DEFAULT_REGISTRY = 'https://registry.npmjs.org/'
+
+GITHUB_SSH = ('github.com', 22)
+
+
+@dataclass
+class Endpoint:
+    """一个探测目标"""
+    name: str
+    url: str
+    # 为 False 时始终直连（用于通过代理探测时对照直连情况）
+    use_proxy: bool = True
+
+
+@dataclass
+class ProbeResult:
+    """一次探测的结果（各阶段耗时单位为毫秒，没有执行到的阶段为 None）"""
+    name: str
+    url: str
+    proxy: Optional[str] = None
+    dns_ms: Optional[float] = None
+    connect_ms: Optional[float] = None
+    # 通过代理时 CONNECT 隧道建立的耗时
+    tunnel_ms: Optional[float] = None
+    tls_ms: Optional[float] = None
+    ttfb_ms: Optional[float] = None
+    status: Optional[int] = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        """收到了 HTTP 响应（任何状态码都说明网络可达）"""
+        return self.status is not None
+
+    @property
+    def total_ms(self) -> float:
+        return sum(value or 0 for value in (self.dns_ms, self.connect_ms, self.tunnel_ms, self.tls_ms, self.ttfb_ms))
+
+
+def default_endpoints(registry: Optional[str] = None, llm_base: Optional[str] = None) -> List[Endpoint]:
+    """
+    默认探测目标
+
+    Args:
+        registry: npm registry 地址
+        llm_base: LLM 接口地址（scheme + host），为空时不探测
+
+    Returns:
+        探测目标列表
+    """
+    endpoints = [
+        Endpoint('github', 'https://github.com/'),
+        Endpoint('api', 'https://api.github.com/'),
+        Endpoint('codeload', 'https://codeload.github.com/'),
+        Endpoint('registry', registry or DEFAULT_REGISTRY),
+    ]
+    if llm_base:
+        endpoints.append(Endpoint('llm', llm_base))
+    return endpoints
+
+
+def resolve_proxy(url: str, proxy: Optional[str] = None) -> Optional[str]:
+    """
+    访问 url 使用的代理：显式指定的代理优先，否则沿用环境变量（遵守 no_proxy）
+
+    Args:
+        url: 目标地址
+        proxy: 显式指定的代理
+
+    Returns:
+        代理地址，直连时返回 None
+    """
+    host = urllib.parse.urlsplit(url).hostname or ''
+    if host in ('localhost', '127.0.0.1', '::1'):
+        return None
+    if proxy:
+        return proxy
+    if urllib.request.proxy_bypass(host):
+        return None
+    scheme = urllib.parse.urlsplit(url).scheme
+    return urllib.request.getproxies().get(scheme)
+
+
+def _elapsed(start: float) -> float:
+    return (time.perf_counter() - start) * 1000
+
+
+def _proxy_auth(proxy: urllib.parse.SplitResult) -> str:
+    if proxy.username is None:
+        return ''
+    credentials = f"{urllib.parse.unquote(proxy.username)}:{urllib.parse.unquote(proxy.password or '')}"
+    return f"Proxy-Authorization: Basic {base64.b64encode(credentials.encode()).decode()}\r\n"
+
+
+async def _read_status(reader: asyncio.StreamReader) -> int:
+    """读取响应行和响应头，返回状态码"""
+    line = await reader.readline()
+    parts = line.decode('latin-1').split()
+    if len(parts) < 2 or not parts[0].startswith('HTTP/') or not parts[1].isdigit():
+        raise ConnectionError(f"无效的 HTTP 响应: {line[:60]!r}")
+    while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+        pass
+    return int(parts[1])
+
+
+async def _connect(host: str, port: int, result: ProbeResult) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+    addresses = await loop.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    result.dns_ms = _elapsed(start)
+    address = addresses[0][4]
+    start = time.perf_counter()
+    reader, writer = await asyncio.open_connection(address[0], address[1])
+    result.connect_ms = _elapsed(start)
+    return reader, writer
+
+
+async def _start_tls(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, context: ssl.SSLContext,
+                     host: str) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+    """在已建立的连接（或代理隧道）上进行 TLS 握手"""
+    if hasattr(writer, 'start_tls'):  # Python 3.11+
+        await writer.start_tls(context, server_hostname=host)
+        return reader, writer
+    loop = asyncio.get_running_loop()
+    protocol = writer.transport.get_protocol()
+    transport = await loop.start_tls(writer.transport, protocol, context, server_hostname=host)
+    return reader, asyncio.StreamWriter(transport, protocol, reader, loop)
+
+
+async def _probe(endpoint: Endpoint, proxy: Optional[str], result: ProbeResult, context: ssl.SSLContext):
+    target = urllib.parse.urlsplit(endpoint.url)
+    secure = target.scheme == 'https'
+    host = target.hostname
+    port = target.port or (443 if secure else 80)
+    path = target.path or '/'
+    via = None
+    writer = None
+    try:
+        if proxy:
+            via = urllib.parse.urlsplit(proxy if '://' in proxy else f'http://{proxy}')
+            if via.scheme not in ('http', 'https'):
+                raise ConnectionError(f"不支持的代理类型: {via.scheme}")
+            reader, writer = await _connect(via.hostname, via.port or 80, result)
+            if secure:
+                start = time.perf_counter()
+                writer.write(f"CONNECT {host}:{port} HTTP/1.1\r\nHost: {host}:{port}\r\n{_proxy_auth(via)}\r\n"
+                             .encode())
+                status = await _read_status(reader)
+                if status != 200:
+                    raise ConnectionError(f"代理拒绝 CONNECT（{status}）")
+                result.tunnel_ms = _elapsed(start)
+            else:
+                # 明文 HTTP 通过代理时使用绝对 URI
+                path = endpoint.url
+        else:
+            reader, writer = await _connect(host, port, result)
+
+        if secure:
+            start = time.perf_counter()
+            reader, writer = await _start_tls(reader, writer, context, host)
+            result.tls_ms = _elapsed(start)
+
+        start = time.perf_counter()
+        auth = _proxy_auth(via) if via is not None and not secure else ''
+        writer.write(f"HEAD {path} HTTP/1.1\r\nHost: {target.netloc}\r\nUser-Agent: run-github-project\r\n"
+                     f"{auth}Connection: close\r\n\r\n".encode())
+        result.status = await _read_status(reader)
+        result.ttfb_ms = _elapsed(start)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+async def probe_endpoint(endpoint: Endpoint, proxy: Optional[str] = None, timeout: float = DEFAULT_TIMEOUT,
+                         context: Optional[ssl.SSLContext] = None) -> ProbeResult:
+    """
+    探测一个目标
+
+    Args:
+        endpoint: 探测目标
+        proxy: HTTP 代理，为 None 时直连
+        timeout: 超时（秒）
+        context: TLS 上下文，为 None 时使用系统默认证书
+
+    Returns:
+        探测结果（失败时 error 为原因，已完成阶段的耗时仍然保留）
+    """
+    result = ProbeResult(endpoint.name, endpoint.url, proxy)
+    try:
+        await asyncio.wait_for(_probe(endpoint, proxy, result, context or ssl.create_default_context()), timeout)
+    except asyncio.TimeoutError:
+        result.error = f"超时（{timeout:g}s）"
+    except (OSError, ssl.SSLError, ConnectionError, ValueError) as e:
+        result.error = str(e) or type(e).__name__
+    return result
+
+
+async def probe_tcp(host: str, port: int, timeout: float = DEFAULT_TIMEOUT) -> Optional[float]:
+    """TCP 端口是否可达，返回连接耗时（毫秒），不可达时返回 None"""
+    start = time.perf_counter()
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    except (OSError, asyncio.TimeoutError):
+        return None
+    writer.close()
+    return _elapsed(start)
+
+
+@dataclass
+class NetworkReport:
+    """一次网络诊断的结果"""
+    results: List[ProbeResult]
+    # github.com:22 的 TCP 连接耗时（毫秒），不可达时为 None
+    ssh_ms: Optional[float] = None
+    seconds: float = 0.0
+
+    def get(self, name: str) -> Optional[ProbeResult]:
+        return next((result for result in self.results if result.name == name), None)
+
+    @property
+    def github_ok(self) -> bool:
+        """github.com 可以通过 HTTPS 访问（代理或直连任一可用）"""
+        return any(result.ok for result in self.results if result.name in ('github', 'github-direct'))
+
+    def recommend_transport(self) -> str:
+        """HTTPS 不通而 SSH 端口可达时建议使用 SSH，否则使用 HTTPS"""
+        return 'ssh' if not self.github_ok and self.ssh_ms is not None else 'https'
+
+    def proxy_usable(self) -> Optional[bool]:
+        """
+        代理是否应该继续使用
+
+        Returns:
+            True: 通过代理可以访问 github.com；False: 代理不通但直连正常；None: 没有使用代理或无法判断
+        """
+        proxied, direct = self.get('github'), self.get('github-direct')
+        if proxied is None or proxied.proxy is None or direct is None:
+            return None
+        if proxied.ok:
+            return True
+        return False if direct.ok else None
+
+    def format_table(self) -> str:
+        """
+        延迟表
+
+        Returns:
+            多行文本，每个目标一行
+        """
+        def ms(value: Optional[float]) -> str:
+            return f"{value:6.0f}" if value is not None else '     -'
+
+        name_width = max((len(result.name) for result in self.results), default=0)
+        lines = [f"   {'':<{name_width}}  {'DNS':>6} {'TCP':>6} {'隧道':>5} {'TLS':>6} {'TTFB':>6}  (ms)"]
+        for result in self.results:
+            line = (f"   {result.name:<{name_width}} {ms(result.dns_ms)} {ms(result.connect_ms)} "
+                    f"{ms(result.tunnel_ms)} {ms(result.tls_ms)} {ms(result.ttfb_ms)}  ")
+            line += f"✅ {result.status}" if result.ok else f"❌ {result.error}"
+            lines.append(line)
+        ssh = f"✅ {self.ssh_ms:.0f} ms" if self.ssh_ms is not None else '❌ 不可达'
+        lines.append(f"   {'ssh':<{name_width}} github.com:22 {ssh}")
+        lines.append(f"   总耗时 {self.seconds * 1000:.0f} ms")
+        return '\n'.join(lines)
+
+
+async def check_network(
+    endpoints: Optional[List[Endpoint]] = None,
+    proxy: Optional[str] = None,
+    timeout: float = DEFAULT_TIMEOUT,
+    ssh: Optional[Tuple[str, int]] = GITHUB_SSH,
+    context: Optional[ssl.SSLContext] = None
+) -> NetworkReport:
+    """
+    并发探测所有目标
+
+    Args:
+        endpoints: 探测目标，为 None 时使用 default_endpoints()
+        proxy: 显式指定的代理（为 None 时沿用环境变量中的代理）
+        timeout: 单个探测的超时（秒）
+        ssh: 额外检查 TCP 可达性的 SSH 地址，为 None 时不检查
+        context: TLS 上下文
+
+    Returns:
+        诊断结果
+    """
+    start = time.perf_counter()
+    endpoints = list(endpoints if endpoints is not None else default_endpoints())
+    github = next((endpoint for endpoint in endpoints if endpoint.name == 'github'), None)
+    if github is not None and resolve_proxy(github.url, proxy):
+        # 通过代理访问时同时直连探测，判断代理本身是否可用
+        endpoints.append(Endpoint('github-direct', github.url, use_proxy=False))
+
+    # 加载系统证书较慢，所有探测共用一个 TLS 上下文
+    context = context or ssl.create_default_context()
+    probes = [
+        probe_endpoint(endpoint, resolve_proxy(endpoint.url, proxy) if endpoint.use_proxy else None,
+                       timeout, context)
+        for endpoint in endpoints
+    ]
+    if ssh is not None:
+        probes.append(probe_tcp(*ssh, timeout=timeout))
+    outcomes = await asyncio.gather(*probes)
+    return NetworkReport(
+        list(outcomes[:len(endpoints)]),
+        outcomes[-1] if ssh is not None else None,
+        time.perf_counter() - start
+    )
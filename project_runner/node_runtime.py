@@ -0,0 +1,476 @@
+"""
+Node.js 运行时选择
+
+按项目的 .nvmrc、.node-version、package.json 的 volta.node 和 engines.node（依次
+优先）确定需要的 Node 版本，先在已安装的版本中挑选：PATH 中的 node、nvm 的
+versions 目录（直接读取目录，不 source nvm.sh）以及本工具的运行时缓存
+（<缓存根目录>/node/<版本>）。都不满足时才从 nodejs.org（或环境变量
+NVM_NODEJS_ORG_MIRROR 指定的镜像）下载官方二进制包，校验 SHASUMS256.txt 后解压到
+运行时缓存。命令直接把选中版本的 bin 目录放在 PATH 最前面执行。
+
+版本范围支持 semver 的常用子集：精确版本、前缀（18、18.x）、^ / ~、比较运算符、
+连字符范围、|| 以及 node / lts/* / lts/<代号> 等 nvm 别名。
+"""
+
+import hashlib
+import json
+import os
+import platform
+import re
+import shutil
+import sys
+import tarfile
+import tempfile
+import urllib.error
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .archive import ArchiveError, build_opener, extract_stream
+from .fs_cache import DEFAULT_CACHE_ROOT, FileLock, lock_path
+from .prefetch import download_manifests
+from .toolchain import _version_key, installed_node_versions, nvm_dir
+
+
+DEFAULT_RUNTIME_ROOT = DEFAULT_CACHE_ROOT / 'node'
+
+DEFAULT_NODE_MIRROR = 'https://nodejs.org/dist'
+
+# 按优先级排列的版本文件
+VERSION_FILES = ('.nvmrc', '.node-version')
+
+# LTS 代号对应的大版本（离线时解析 lts/<代号>）
+LTS_CODENAMES = {
+    'argon': 4, 'boron': 6, 'carbon': 8, 'dubnium': 10, 'erbium': 12, 'fermium': 14,
+    'gallium': 16, 'hydrogen': 18, 'iron': 20, 'jod': 22, 'krypton': 24,
+}
+
+_ANY_ALIASES = ('', '*', 'x', 'node', 'latest', 'current', 'stable')
+_COMPARATOR = re.compile(r'^(>=|<=|>|<|=|\^|~)?\s*v?((?:\d+|[xX*])(?:\.(?:\d+|[xX*])){0,2})(?:[-+][0-9A-Za-z.-]*)?$')
+_RELEASE = re.compile(r'^v\d+\.\d+\.\d+$')
+
+Version = Tuple[int, int, int]
+
+
+class NodeRuntimeError(Exception):
+    """版本范围无法解析，或 Node.js 下载安装失败"""
+
+
+def _pad(parts: Sequence[int]) -> Version:
+    return tuple((list(parts) + [0, 0, 0])[:3])
+
+
+def _bump(parts: Sequence[int]) -> Version:
+    """部分版本的上界（不含），例如 18 -> 19.0.0，18.2 -> 18.3.0"""
+    parts = list(parts)
+    parts[-1] += 1
+    return _pad(parts)
+
+
+def _comparators(token: str) -> List[Tuple[str, Version]]:
+    """把单个比较式转换为 >= / < 约束，例如 ^18.2 -> [>=18.2.0, <19.0.0]"""
+    match = _COMPARATOR.match(token)
+    if not match:
+        raise NodeRuntimeError(f"无法解析的 Node 版本范围: {token}")
+    op = match.group(1) or '='
+    parts = []
+    for part in match.group(2).split('.'):
+        if part in ('x', 'X', '*'):
+            break
+        parts.append(int(part))
+
+    if not parts:
+        # 通配符: >* / <* 不匹配任何版本，其余匹配所有版本
+        return [('<', (0, 0, 0))] if op in ('>', '<') else []
+    if op == '=':
+        # 部分版本匹配该前缀下的所有版本（18 -> >=18.0.0 <19.0.0），完整版本只匹配自身
+        return [('>=', _pad(parts)), ('<', _bump(parts))]
+    if op == '^':
+        if parts[0] != 0 or len(parts) == 1:
+            upper = _bump(parts[:1])
+        elif len(parts) == 2 or parts[1] != 0:
+            upper = _bump(parts[:2])
+        else:
+            upper = _bump(parts)
+        return [('>=', _pad(parts)), ('<', upper)]
+    if op == '~':
+        return [('>=', _pad(parts)), ('<', _bump(parts[:2]))]
+    if op == '>=':
+        return [('>=', _pad(parts))]
+    if op == '>':
+        return [('>=', _bump(parts))]
+    if op == '<':
+        return [('<', _pad(parts))]
+    return [('<', _bump(parts))]  # <=
+
+
+@dataclass
+class NodeRange:
+    """Node 版本范围"""
+    raw: str
+    # 满足任一组约束即匹配；每组约束是 (>= / <, 版本) 的列表
+    alternatives: List[List[Tuple[str, Version]]] = field(default_factory=list)
+    # 只接受 LTS 版本：'*' 表示任意 LTS，否则为小写代号
+    lts: Optional[str] = None
+
+    def matches(self, version: str, lts_name: Optional[str] = None) -> bool:
+        """
+        版本是否满足范围
+
+        Args:
+            version: 版本号，例如 v20.11.0 或 20.11.0
+            lts_name: 该版本的 LTS 代号（来自 nodejs.org 的发布列表），
+                为空时按偶数大版本近似判断是否为 LTS
+
+        Returns:
+            是否匹配
+        """
+        if not _version_key(version):
+            return False
+        key = _pad(_version_key(version))
+        if self.lts is not None:
+            if lts_name is not None:
+                return bool(lts_name) and self.lts in ('*', str(lts_name).lower())
+            if self.lts != '*':
+                return key[0] == LTS_CODENAMES.get(self.lts)
+            return key[0] % 2 == 0 and key[0] >= 4
+        return any(
+            all(key >= bound if op == '>=' else key < bound for op, bound in constraints)
+            for constraints in self.alternatives
+        )
+
+
+def parse_node_range(spec: str) -> NodeRange:
+    """
+    解析版本范围
+
+    Args:
+        spec: 例如 18、v20.11.0、^18.17 || >=20、>=16 <21、16 - 18、lts/*、lts/hydrogen
+
+    Returns:
+        版本范围
+
+    Raises:
+        NodeRuntimeError: 无法解析
+    """
+    raw = spec.strip()
+    text = raw.lower()
+    if text in _ANY_ALIASES:
+        return NodeRange(raw, [[]])
+    if text.startswith('lts/') or text == 'lts':
+        codename = text[4:] or '*'
+        if codename != '*' and codename not in LTS_CODENAMES:
+            raise NodeRuntimeError(f"未知的 LTS 代号: {raw}")
+        return NodeRange(raw, lts=codename)
+
+    alternatives = []
+    for alternative in text.split('||'):
+        alternative = alternative.strip()
+        hyphen = re.match(r'^(\S+)\s+-\s+(\S+)$', alternative)
+        if hyphen:
+            lower = _comparators('>=' + hyphen.group(1))
+            upper = _comparators('<=' + hyphen.group(2))
+            alternatives.append(lower + upper)
+            continue
+        # 运算符和版本之间允许有空格（>= 18）
+        tokens = re.sub(r'(>=|<=|>|<|=|\^|~)\s+', r'\1', alternative).split()
+        constraints = []
+        for token in tokens or ['*']:
+            constraints.extend(_comparators(token))
+        alternatives.append(constraints)
+    return NodeRange(raw, alternatives)
+
+
+@dataclass
+class NodeRequirement:
+    """项目声明的 Node 版本要求"""
+    spec: str
+    source: str  # .nvmrc / .node-version / package.json volta.node / package.json engines.node
+
+    @property
+    def range(self) -> NodeRange:
+        return parse_node_range(self.spec)
+
+    def describe(self) -> str:
+        return f"{self.source} 中的 {self.spec}"
+
+
+def _first_line(text: str) -> Optional[str]:
+    """版本文件中第一个非空、非注释的行"""
+    for line in text.splitlines():
+        line = line.split('#', 1)[0].strip()
+        if line:
+            return line
+    return None
+
+
+def read_node_requirement(project_path: Path) -> Optional[NodeRequirement]:
+    """
+    读取项目的 Node 版本要求
+
+    Args:
+        project_path: 项目目录
+
+    Returns:
+        版本要求，项目没有声明时返回 None
+    """
+    project_path = Path(project_path)
+    for name in VERSION_FILES:
+        try:
+            spec = _first_line((project_path / name).read_text(encoding='utf-8'))
+        except (OSError, UnicodeDecodeError):
+            continue
+        if spec:
+            return NodeRequirement(spec, name)
+
+    try:
+        package = json.loads((project_path / 'package.json').read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+    if not isinstance(package, dict):
+        return None
+    for section in ('volta', 'engines'):
+        value = package.get(section)
+        spec = value.get('node') if isinstance(value, dict) else None
+        if isinstance(spec, str) and spec.strip():
+            return NodeRequirement(spec.strip(), f"package.json {section}.node")
+    return None
+
+
+def fetch_node_requirement(github_url: str, ref: Optional[str] = None, proxy: Optional[str] = None,
+                           timeout: float = 5) -> Optional[NodeRequirement]:
+    """
+    克隆之前从 raw.githubusercontent.com 下载版本文件读取 Node 版本要求
+
+    Args:
+        github_url: 仓库 URL
+        ref: 分支或标签，为空时使用默认分支
+        proxy: 代理地址
+        timeout: 单个请求超时（秒）
+
+    Returns:
+        版本要求；没有声明或无法访问时返回 None
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        try:
+            download_manifests(github_url, [*VERSION_FILES, 'package.json'], Path(tmp), ref, proxy, timeout)
+        except (ArchiveError, OSError):
+            return None
+        return read_node_requirement(Path(tmp))
+
+
+@dataclass
+class NodeRuntime:
+    """一个可用的 Node.js 运行时"""
+    version: str  # v20.11.0
+    bin_dir: str
+    source: str  # path / nvm / cache
+
+    def has(self, name: str) -> bool:
+        return (Path(self.bin_dir) / name).exists()
+
+    def env(self, base: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+        """
+        运行命令用的环境变量：运行时的 bin 目录放在 PATH 最前面（PATH 中的 node 保持不变）
+
+        Args:
+            base: 基础环境变量，默认为当前进程的环境变量
+
+        Returns:
+            新的环境变量字典
+        """
+        env = dict(os.environ if base is None else base)
+        if self.source != 'path':
+            paths = [p for p in env.get('PATH', '').split(os.pathsep) if p and p != self.bin_dir]
+            env['PATH'] = os.pathsep.join([self.bin_dir, *paths])
+        return env
+
+    def describe(self) -> str:
+        labels = {'path': 'PATH', 'nvm': 'nvm', 'cache': '运行时缓存'}
+        return f"{self.version}（{labels.get(self.source, self.source)}）"
+
+
+def installed_runtimes(nvm_root: Optional[Path] = None,
+                       cache_root: Optional[Path] = DEFAULT_RUNTIME_ROOT) -> List[NodeRuntime]:
+    """
+    nvm 和运行时缓存中已安装的 Node.js（从新到旧，同一版本优先使用 nvm 的）
+
+    Args:
+        nvm_root: nvm 目录
+        cache_root: 运行时缓存目录，None 表示不查找
+
+    Returns:
+        运行时列表
+    """
+    nvm_root = nvm_root or nvm_dir()
+    runtimes = {}
+    for version in installed_node_versions(nvm_root):
+        runtimes[version] = NodeRuntime(version, str(nvm_root / 'versions' / 'node' / version / 'bin'), 'nvm')
+    if cache_root and Path(cache_root).is_dir():
+        for entry in Path(cache_root).iterdir():
+            if _RELEASE.match(entry.name) and (entry / 'bin' / 'node').exists():
+                runtimes.setdefault(entry.name, NodeRuntime(entry.name, str(entry / 'bin'), 'cache'))
+    return sorted(runtimes.values(), key=lambda runtime: _version_key(runtime.version), reverse=True)
+
+
+def select_runtime(node_range: Optional[NodeRange], runtimes: Sequence[NodeRuntime],
+                   current: Optional[NodeRuntime] = None) -> Optional[NodeRuntime]:
+    """
+    从已安装的运行时中选择
+
+    Args:
+        node_range: 项目要求的版本范围，None 表示没有要求
+        runtimes: 已安装的运行时（从新到旧）
+        current: PATH 中的 node（满足要求时优先使用，不需要改动 PATH）
+
+    Returns:
+        选中的运行时；没有满足要求的版本时返回 None
+    """
+    if node_range is None:
+        if current:
+            return current
+        # 没有要求时优先使用 LTS 版本，其次是最新安装的版本
+        lts = parse_node_range('lts/*')
+        return next((r for r in runtimes if lts.matches(r.version)), runtimes[0] if runtimes else None)
+    if current and node_range.matches(current.version):
+        return current
+    return next((r for r in runtimes if node_range.matches(r.version)), None)
+
+
+def node_mirror() -> str:
+    """Node.js 二进制包的下载地址（与 nvm 一样读取 NVM_NODEJS_ORG_MIRROR）"""
+    return (os.environ.get('NVM_NODEJS_ORG_MIRROR') or DEFAULT_NODE_MIRROR).rstrip('/')
+
+
+def node_platform() -> Tuple[str, str]:
+    """
+    当前平台在 nodejs.org 上的名称
+
+    Returns:
+        (二进制包名中的平台, index.json 中 files 字段的名称)，例如 ('linux-x64', 'linux-x64')
+
+    Raises:
+        NodeRuntimeError: 没有官方二进制包的平台
+    """
+    machine = platform.machine().lower()
+    arch = {'x86_64': 'x64', 'amd64': 'x64', 'aarch64': 'arm64', 'arm64': 'arm64',
+            'armv7l': 'armv7l', 'ppc64le': 'ppc64le', 's390x': 's390x'}.get(machine)
+    if sys.platform.startswith('linux') and arch:
+        return f"linux-{arch}", f"linux-{arch}"
+    if sys.platform == 'darwin' and arch in ('x64', 'arm64'):
+        return f"darwin-{arch}", f"osx-{arch}-tar"
+    raise NodeRuntimeError(f"没有适用于 {sys.platform} / {machine} 的 Node.js 二进制包")
+
+
+def pick_release(releases: List[dict], node_range: Optional[NodeRange], files_key: str) -> Optional[str]:
+    """
+    从 nodejs.org 的发布列表（index.json）中选择满足范围的最新版本
+
+    Args:
+        releases: 发布列表
+        node_range: 版本范围，None 时选择最新的 LTS
+        files_key: 当前平台在 files 字段中的名称
+
+    Returns:
+        版本号，例如 v20.11.0
+    """
+    node_range = node_range or parse_node_range('lts/*')
+    candidates = [
+        release['version'] for release in releases
+        if _RELEASE.match(str(release.get('version', ''))) and files_key in release.get('files', [])
+        and node_range.matches(release['version'], release.get('lts') or '')
+    ]
+    return max(candidates, key=_version_key, default=None)
+
+
+def _fetch(opener, url: str, timeout: float) -> bytes:
+    try:
+        with opener.open(url, timeout=timeout) as response:
+            return response.read()
+    except urllib.error.HTTPError as e:
+        raise NodeRuntimeError(f"下载 {url} 失败: HTTP {e.code}") from e
+    except (OSError, ValueError) as e:
+        raise NodeRuntimeError(f"下载 {url} 失败: {getattr(e, 'reason', e)}") from e
+
+
+def download_node(
+    node_range: Optional[NodeRange],
+    root: Path = DEFAULT_RUNTIME_ROOT,
+    mirror: Optional[str] = None,
+    proxy: Optional[str] = None,
+    timeout: float = 30
+) -> NodeRuntime:
+    """
+    下载满足范围的最新 Node.js 到运行时缓存（已经下载过时直接返回）
+
+    先写入临时文件并校验 SHA-256，再解压到同级的临时目录，成功后改名，
+    多个进程同时下载同一版本时由文件锁保证只下载一次。
+
+    Args:
+        node_range: 版本范围，None 时下载最新的 LTS
+        root: 运行时缓存目录
+        mirror: 下载地址，默认为 node_mirror()
+        proxy: 代理地址
+        timeout: 单个请求超时（秒）
+
+    Returns:
+        下载的运行时
+
+    Raises:
+        NodeRuntimeError: 没有满足范围的版本、下载或校验失败
+    """
+    mirror = (mirror or node_mirror()).rstrip('/')
+    archive_platform, files_key = node_platform()
+    opener = build_opener(proxy)
+    try:
+        releases = json.loads(_fetch(opener, f"{mirror}/index.json", timeout))
+    except ValueError as e:
+        raise NodeRuntimeError(f"无法解析 {mirror}/index.json: {e}") from e
+    version = pick_release(releases, node_range, files_key)
+    if version is None:
+        wanted = node_range.raw if node_range else 'LTS'
+        raise NodeRuntimeError(f"{mirror} 上没有满足 {wanted} 的 Node.js 版本")
+
+    root = Path(root)
+    dest = root / version
+    with FileLock(lock_path(dest)):
+        if (dest / 'bin' / 'node').exists():
+            return NodeRuntime(version, str(dest / 'bin'), 'cache')
+
+        filename = f"node-{version}-{archive_platform}.tar.gz"
+        checksums = _fetch(opener, f"{mirror}/{version}/SHASUMS256.txt", timeout).decode('utf-8', 'replace')
+        expected = next((line.split()[0] for line in checksums.splitlines()
+                         if line.split()[1:] == [filename]), None)
+        if expected is None:
+            raise NodeRuntimeError(f"SHASUMS256.txt 中没有 {filename}")
+
+        partial = dest.with_name(dest.name + '.partial')
+        shutil.rmtree(partial, ignore_errors=True)
+        partial.mkdir(parents=True)
+        try:
+            with tempfile.TemporaryFile(dir=root) as archive:
+                digest = hashlib.sha256()
+                try:
+                    with opener.open(f"{mirror}/{version}/{filename}", timeout=timeout) as response:
+                        while True:
+                            chunk = response.read(1024 * 1024)
+                            if not chunk:
+                                break
+                            digest.update(chunk)
+                            archive.write(chunk)
+                except (OSError, ValueError) as e:
+                    raise NodeRuntimeError(f"下载 {filename} 失败: {getattr(e, 'reason', e)}") from e
+                if digest.hexdigest() != expected:
+                    raise NodeRuntimeError(f"{filename} 校验失败（SHA-256 不匹配）")
+                archive.seek(0)
+                extract_stream(archive, partial)
+            if not (partial / 'bin' / 'node').exists():
+                raise NodeRuntimeError(f"{filename} 中没有 bin/node")
+            partial.rename(dest)
+        except (ArchiveError, tarfile.TarError, EOFError) as e:
+            shutil.rmtree(partial, ignore_errors=True)
+            raise NodeRuntimeError(f"解压 {filename} 失败: {e}") from e
+        except BaseException:
+            shutil.rmtree(partial, ignore_errors=True)
+            raise
+    return NodeRuntime(version, str(dest / 'bin'), 'cache')
@@ -0,0 +1,69 @@
+"""
+项目运行器的选项
+
+按阶段分组：CloneOptions 决定如何获取源码，InstallOptions 决定如何安装依赖，
+RunOptions 决定命令如何执行以及开发服务器如何启动。命令行、批量模式和搜索 Agent
+各自构造这些对象后传给运行器，批量模式在此基础上按项目覆盖个别字段。
+"""
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+from .dep_cache import DependencyCache
+from .instances import InstanceRegistry
+from .mirror_cache import MirrorCache
+
+
+@dataclass
+class CloneOptions:
+    """获取源码"""
+    # 使用 SSH 克隆（网络诊断可能改写该值）
+    use_ssh: bool = False
+    # full / shallow / blobless / treeless / sparse，auto 根据仓库大小选择
+    strategy: str = 'auto'
+    # sparse 策略下额外检出的路径
+    sparse_paths: List[str] = field(default_factory=list)
+    # 本地 bare 镜像缓存，为 None 时直接从远程克隆
+    mirror_cache: Optional[MirrorCache] = None
+    # 源码包模式：下载 tar.gz 代替 git clone（不需要 git）
+    use_archive: bool = False
+    # 分支 / 标签（源码包模式下也可以是提交 SHA），为空时使用默认分支
+    ref: Optional[str] = None
+    # 项目目录已存在时增量更新（不询问、不删除重克隆）
+    update: bool = False
+    # 项目克隆到 work_dir 下，为 None 时使用当前目录
+    work_dir: Optional[Union[str, Path]] = None
+
+
+@dataclass
+class InstallOptions:
+    """安装依赖"""
+    # 按锁文件寻址的 node_modules 缓存，为 None 时每次都完整安装
+    dep_cache: Optional[DependencyCache] = None
+    # npm registry 镜像地址
+    registry: Optional[str] = None
+    # 统计安装前后包管理器缓存的增长（需要遍历缓存目录）
+    install_stats: bool = False
+    # 克隆的同时预取依赖（下载锁文件后预热包管理器缓存）
+    prefetch: bool = True
+    # monorepo 中要运行的应用（包名或相对路径），为空时自动选择
+    app: Optional[str] = None
+
+
+@dataclass
+class RunOptions:
+    """执行命令和启动开发服务器"""
+    # 克隆与工具链准备并行执行
+    overlap: bool = True
+    # 所有命令的完整输出追加到该文件（内存中只保留最后一部分）
+    log_file: Optional[str] = None
+    # 单个命令的超时（秒），超时后终止整个进程组
+    command_timeout: Optional[float] = None
+    # 额外传给所有命令的环境变量（例如批量模式分配的 PORT）
+    extra_env: Dict[str, str] = field(default_factory=dict)
+    # 等待开发服务器就绪的最长时间；exit_when_ready 时就绪后立即停止（用于 CI）
+    ready_timeout: float = 120.0
+    exit_when_ready: bool = False
+    # 运行中项目的登记表：同一项目、同一版本已在运行时直接返回它的地址，为 None 时总是重新启动
+    instances: Optional[InstanceRegistry] = None
@@ -0,0 +1,171 @@
+"""
+按依赖关系并发执行的步骤流水线
+
+每个步骤声明它依赖的步骤，依赖全部成功后立即开始执行；依赖失败或被跳过时，
+该步骤也会被跳过。执行结束后可以输出各步骤的时间线。
+
+调度在 asyncio 事件循环中进行：协程步骤直接在循环中执行，普通函数步骤放到
+线程池中执行。run() 是 run_async() 的同步版本。
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Union
+
+
+STATUS_ICONS = {'ok': '✅', 'failed': '❌', 'skipped': '⏭️'}
+
+
+@dataclass
+class Step:
+    """流水线中的一个步骤"""
+    name: str
+    fn: Callable[[], Union[bool, Awaitable[bool]]]
+    deps: Sequence[str] = ()
+
+
+@dataclass
+class StepResult:
+    """步骤的执行结果（start / end 为相对流水线开始的秒数）"""
+    name: str
+    status: str
+    start: float = 0.0
+    end: float = 0.0
+    error: Optional[str] = None
+
+    @property
+    def seconds(self) -> float:
+        return self.end - self.start
+
+
+class Pipeline:
+    """依赖图执行器"""
+
+    def __init__(self, max_workers: int = 4):
+        """
+        Args:
+            max_workers: 最多同时执行的普通函数步骤数（线程池大小）
+        """
+        self.max_workers = max_workers
+        self.steps: Dict[str, Step] = {}
+        self.results: Dict[str, StepResult] = {}
+        self.total_seconds = 0.0
+
+    def add(self, name: str, fn: Callable[[], Union[bool, Awaitable[bool]]],
+            deps: Sequence[str] = ()) -> 'Pipeline':
+        """
+        添加步骤
+
+        Args:
+            name: 步骤名称
+            fn: 步骤函数或协程函数，返回 False 或抛出异常表示失败
+            deps: 依赖的步骤名称（必须已经添加）
+
+        Returns:
+            流水线本身，便于链式调用
+        """
+        if name in self.steps:
+            raise ValueError(f"重复的步骤: {name}")
+        missing = [dep for dep in deps if dep not in self.steps]
+        if missing:
+            raise ValueError(f"步骤 {name} 依赖未定义的步骤: {', '.join(missing)}")
+        self.steps[name] = Step(name, fn, tuple(deps))
+        return self
+
+    def _ready(self, step: Step) -> Optional[bool]:
+        """依赖全部成功返回 True，有依赖失败或跳过返回 False，仍需等待返回 None"""
+        results = [self.results.get(dep) for dep in step.deps]
+        if any(r is not None and r.status != 'ok' for r in results):
+            return False
+        if all(r is not None for r in results):
+            return True
+        return None
+
+    def run(self) -> bool:
+        """
+        执行所有步骤（同步版本，不能在事件循环内调用）
+
+        Returns:
+            是否所有步骤都成功
+        """
+        return asyncio.run(self.run_async())
+
+    async def run_async(self) -> bool:
+        """
+        执行所有步骤
+
+        Returns:
+            是否所有步骤都成功
+        """
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        pending: List[Step] = list(self.steps.values())
+        running: Dict[asyncio.Future, Step] = {}
+
+        async def execute(step: Step, pool: ThreadPoolExecutor) -> StepResult:
+            step_start = time.perf_counter() - start
+            try:
+                if asyncio.iscoroutinefunction(step.fn):
+                    value = await step.fn()
+                else:
+                    value = await loop.run_in_executor(pool, step.fn)
+                ok = value is not False
+                error = None
+            except Exception as e:
+                ok, error = False, str(e)
+            return StepResult(step.name, 'ok' if ok else 'failed', step_start,
+                              time.perf_counter() - start, error)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while pending or running:
+                for step in list(pending):
+                    ready = self._ready(step)
+                    if ready is None:
+                        continue
+                    pending.remove(step)
+                    if ready:
+                        running[asyncio.ensure_future(execute(step, pool))] = step
+                    else:
+                        now = time.perf_counter() - start
+                        self.results[step.name] = StepResult(step.name, 'skipped', now, now)
+
+                if not running:
+                    # 所有剩余步骤都在等待被跳过的步骤，下一轮会继续标记为跳过
+                    continue
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    step = running.pop(future)
+                    self.results[step.name] = future.result()
+
+        self.total_seconds = time.perf_counter() - start
+        return all(result.status == 'ok' for result in self.results.values())
+
+    def format_timeline(self, width: int = 40) -> str:
+        """
+        格式化时间线
+
+        Args:
+            width: 时间条宽度（字符数）
+
+        Returns:
+            多行文本，每个步骤一行
+        """
+        total = max(self.total_seconds, 1e-6)
+        name_width = max((len(name) for name in self.steps), default=0)
+        lines = [f"⏱️  流水线时间线（总耗时 {self.total_seconds:.1f}s）:"]
+        for name in self.steps:
+            result = self.results.get(name)
+            if result is None:
+                continue
+            begin = min(int(result.start / total * width), width - 1)
+            end = max(begin + 1, int(round(result.end / total * width)))
+            bar = ' ' * begin + '█' * (end - begin) if result.status != 'skipped' else ''
+            lines.append(
+                f"   {name:<{name_width}} |{bar:<{width}}| "
+                f"{result.start:5.1f}s → {result.end:5.1f}s {STATUS_ICONS[result.status]}"
+            )
+            if result.error:
+                lines.append(f"   {'':<{name_width}}  {result.error}")
+        return '\n'.join(lines)
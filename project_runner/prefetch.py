@@ -0,0 +1,216 @@
+"""
+依赖预取
+
+在完整克隆结束之前，只下载 package.json 和锁文件到临时目录，提前把依赖下载到
+包管理器的缓存 / store 中：
+
+- pnpm: pnpm fetch（只需要 pnpm-lock.yaml，直接写入 store）
+- npm: 从 package-lock.json 读出每个包的 resolved 地址，npm cache add 只下载 tarball 到
+  ~/.npm 缓存（不在临时目录里生成一份完整的 node_modules）
+- yarn 1.x: 在临时目录执行 yarn install --frozen-lockfile --ignore-scripts，预热 yarn 缓存
+
+之后正式安装以 --prefer-offline 从缓存完成。bun 没有只下载不安装的命令，不做预取。
+"""
+
+import json
+import shutil
+import tempfile
+import time
+import urllib.error
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .archive import ArchiveError, build_opener, parse_github_repo
+from .install import DEFAULT_PNPM_STORE, is_yarn_berry
+from .lockfile import RAW_URL
+
+
+# npm 锁文件中 resolved 地址的默认 registry（指定镜像时替换为镜像地址）
+NPM_DEFAULT_REGISTRY = 'https://registry.npmjs.org/'
+
+# 各包管理器预取需要的文件（第一个必须存在）
+PREFETCH_FILES: Dict[str, List[str]] = {
+    'pnpm': ['pnpm-lock.yaml', 'package.json', 'pnpm-workspace.yaml', '.npmrc'],
+    'npm': ['package-lock.json', 'package.json', '.npmrc'],
+    'yarn': ['yarn.lock', 'package.json', '.yarnrc', '.yarnrc.yml', '.npmrc'],
+}
+
+
+@dataclass
+class PrefetchResult:
+    """一次预取的结果"""
+    success: bool
+    seconds: float = 0.0
+    message: str = ''
+
+
+def download_manifests(
+    github_url: str,
+    names: List[str],
+    dest: Path,
+    ref: Optional[str] = None,
+    proxy: Optional[str] = None,
+    timeout: float = 15
+) -> List[str]:
+    """
+    从 raw.githubusercontent.com 下载仓库根目录下的文件
+
+    Args:
+        github_url: 仓库 URL
+        names: 文件名列表（不存在的文件会被忽略）
+        dest: 保存目录
+        ref: 分支或标签，为空时使用默认分支
+        proxy: 代理地址
+        timeout: 单个请求超时（秒）
+
+    Returns:
+        成功下载的文件名
+    """
+    owner, repo = parse_github_repo(github_url)
+    opener = build_opener(proxy)
+    downloaded = []
+    for name in names:
+        url = RAW_URL.format(owner=owner, repo=repo, ref=ref or 'HEAD', path=name)
+        try:
+            with opener.open(url, timeout=timeout) as response:
+                (Path(dest) / name).write_bytes(response.read())
+            downloaded.append(name)
+        except urllib.error.HTTPError as e:
+            if e.code != 404:
+                raise
+    return downloaded
+
+
+def npm_tarball_urls(lockfile: Path, registry: Optional[str] = None) -> List[str]:
+    """
+    package-lock.json 中所有从 registry 下载的 tarball 地址
+
+    lockfileVersion 2 / 3 读取 packages[*].resolved，v1 递归读取 dependencies；
+    工作区链接（link）、打包在父包中的依赖（inBundle）和 git / file 依赖没有 tarball，跳过。
+
+    Args:
+        lockfile: package-lock.json 路径
+        registry: registry 镜像地址，默认 registry 的地址会替换为镜像
+
+    Returns:
+        去重后的 tarball 地址
+    """
+    try:
+        data = json.loads(Path(lockfile).read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return []
+
+    entries = []
+    if isinstance(data.get('packages'), dict):
+        entries = [entry for path, entry in data['packages'].items() if path]
+    else:
+        stack = [data.get('dependencies')]
+        while stack:
+            dependencies = stack.pop()
+            if isinstance(dependencies, dict):
+                entries.extend(dependencies.values())
+                stack.extend(entry.get('dependencies') for entry in dependencies.values() if isinstance(entry, dict))
+
+    mirror = registry.rstrip('/') + '/' if registry else None
+    urls = {}
+    for entry in entries:
+        if not isinstance(entry, dict) or entry.get('link') or entry.get('inBundle') or entry.get('bundled'):
+            continue
+        resolved = entry.get('resolved')
+        if not isinstance(resolved, str) or not resolved.startswith(('https://', 'http://')):
+            continue
+        if mirror and resolved.startswith(NPM_DEFAULT_REGISTRY):
+            resolved = mirror + resolved[len(NPM_DEFAULT_REGISTRY):]
+        urls[resolved] = None
+    return list(urls)
+
+
+def build_prefetch_command(
+    package_manager: str,
+    work_dir: Path,
+    registry: Optional[str] = None,
+    store_dir: Optional[Path] = DEFAULT_PNPM_STORE
+) -> Optional[List[str]]:
+    """
+    预取命令（bun、Yarn 2+ 等不支持的包管理器，或 npm 锁文件中没有 tarball 时返回 None）
+
+    Args:
+        package_manager: npm / pnpm / yarn / bun
+        work_dir: 放有 package.json 和锁文件的临时目录
+        registry: npm registry 镜像地址
+        store_dir: pnpm store 目录（必须与正式安装一致）
+
+    Returns:
+        命令参数列表
+    """
+    registry_args = [f'--registry={registry}'] if registry else []
+    if package_manager == 'pnpm':
+        store_args = [f'--store-dir={store_dir}'] if store_dir else []
+        return ['pnpm', 'fetch', *store_args, *registry_args]
+    if package_manager == 'npm':
+        urls = npm_tarball_urls(Path(work_dir) / 'package-lock.json', registry)
+        return ['npm', 'cache', 'add', *urls] if urls else None
+    if package_manager == 'yarn' and not is_yarn_berry(work_dir):
+        return ['yarn', 'install', '--frozen-lockfile', '--ignore-scripts', '--prefer-offline',
+                '--non-interactive', *registry_args]
+    return None
+
+
+class Prefetcher:
+    """依赖预取器"""
+
+    def __init__(self, github_url: str, ref: Optional[str] = None, proxy: Optional[str] = None,
+                 registry: Optional[str] = None):
+        self.github_url = github_url
+        self.ref = ref
+        self.proxy = proxy
+        self.registry = registry
+        self.work_dir: Optional[Path] = None
+
+    def download(self, package_manager: str) -> bool:
+        """
+        下载预取需要的文件到临时目录
+
+        Returns:
+            锁文件是否下载成功
+        """
+        names = PREFETCH_FILES.get(package_manager)
+        if not names:
+            return False
+        self.work_dir = Path(tempfile.mkdtemp(prefix='run-github-project-prefetch-'))
+        try:
+            downloaded = download_manifests(self.github_url, names, self.work_dir, self.ref, self.proxy)
+        except (ArchiveError, OSError):
+            return False
+        return names[0] in downloaded and 'package.json' in downloaded
+
+    def run(self, package_manager: str, run_command) -> PrefetchResult:
+        """
+        执行预取
+
+        Args:
+            package_manager: 预测的包管理器
+            run_command: 执行命令的函数 (命令参数列表, 工作目录) -> (返回码, stderr)
+
+        Returns:
+            预取结果
+        """
+        start = time.perf_counter()
+        if self.work_dir is None and not self.download(package_manager):
+            return PrefetchResult(False, time.perf_counter() - start, '没有找到锁文件')
+
+        command = build_prefetch_command(package_manager, self.work_dir, self.registry)
+        if command is None:
+            return PrefetchResult(False, time.perf_counter() - start, f'{package_manager} 不支持预取')
+
+        returncode, stderr = run_command(command, self.work_dir)
+        lines = stderr.strip().splitlines()
+        message = lines[-1] if returncode != 0 and lines else ''
+        return PrefetchResult(returncode == 0, time.perf_counter() - start, message)
+
+    def cleanup(self):
+        """删除临时目录"""
+        if self.work_dir is not None:
+            shutil.rmtree(self.work_dir, ignore_errors=True)
+            self.work_dir = None
@@ -0,0 +1,290 @@
+"""
+流式执行子进程
+
+基于 asyncio.create_subprocess_exec：每个命令显式指定工作目录和环境变量，
+同一事件循环中可以并发执行多个命令。输出按行实时转发到控制台（可选），同时
+原样追加到日志文件；内存中只保留最后一部分输出用于错误诊断，长时间安装时
+内存占用保持不变。支持超时和取消，超时或取消时终止整个进程组（shell 启动的
+npm / git 等子进程也会被终止）。
+
+同步代码使用 run_streaming，它在当前线程中创建事件循环执行 run_async。
+"""
+
+import asyncio
+import codecs
+import os
+import shlex
+import signal
+import sys
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, List, Optional, TextIO
+
+# 每个输出流在内存中默认保留的字符数
+DEFAULT_BUFFER_CHARS = 64 * 1024
+
+# 发送 SIGTERM 后等待进程退出的时间，超过后发送 SIGKILL
+KILL_GRACE_SECONDS = 5.0
+
+# 以 \r 结尾的进度行（git / npm 的进度条）最多每隔这么久转发一次
+PROGRESS_INTERVAL = 0.5
+
+_READ_SIZE = 8192
+
+
+class RingBuffer:
+    """只保留最后 max_chars 个字符的文本缓冲区"""
+
+    def __init__(self, max_chars: int = DEFAULT_BUFFER_CHARS):
+        self.max_chars = max_chars
+        self.size = 0
+        self.dropped = 0
+        # 丢弃的内容是否在一行的中间截断
+        self._partial = False
+        self._chunks = deque()
+
+    def append(self, text: str):
+        if not text:
+            return
+        self._chunks.append(text)
+        self.size += len(text)
+        while self.size > self.max_chars and len(self._chunks) > 1:
+            removed = self._chunks.popleft()
+            self.size -= len(removed)
+            self.dropped += len(removed)
+            self._partial = not removed.endswith('\n')
+        if self.size > self.max_chars:
+            # 单个块超过上限时只保留它的末尾
+            extra = self.size - self.max_chars
+            self._partial = self._chunks[0][extra - 1] != '\n'
+            self._chunks[0] = self._chunks[0][extra:]
+            self.size -= extra
+            self.dropped += extra
+
+    def text(self) -> str:
+        text = ''.join(self._chunks)
+        if self._partial:
+            # 丢弃的内容截断了一行，去掉不完整的第一行
+            newline = text.find('\n')
+            text = text[newline + 1:] if newline >= 0 else text
+        return text
+
+
+@dataclass
+class ProcessResult:
+    """一次执行的结果（stdout / stderr 只包含最后一部分输出）"""
+    returncode: int
+    stdout: str
+    stderr: str
+    seconds: float
+    timed_out: bool = False
+    cancelled: bool = False
+    truncated: bool = False
+
+
+class _LineEcho:
+    """把输出块拆成行转发到控制台，进度行限速"""
+
+    def __init__(self, target: TextIO, prefix: str):
+        self.target = target
+        self.prefix = prefix
+        self.pending = ''
+        self.last_progress = 0.0
+
+    def feed(self, text: str):
+        self.pending += text
+        while True:
+            cut = min((i for i in (self.pending.find('\n'), self.pending.find('\r')) if i >= 0), default=-1)
+            if cut < 0:
+                return
+            line, terminator = self.pending[:cut], self.pending[cut]
+            self.pending = self.pending[cut + 1:]
+            if terminator == '\r':
+                now = time.monotonic()
+                if now - self.last_progress < PROGRESS_INTERVAL:
+                    continue
+                self.last_progress = now
+            if line.strip():
+                self._write(line)
+
+    def flush(self):
+        if self.pending.strip():
+            self._write(self.pending)
+        self.pending = ''
+
+    def _write(self, line: str):
+        try:
+            self.target.write(f"{self.prefix}{line.rstrip()}\n")
+            self.target.flush()
+        except (OSError, ValueError):
+            pass
+
+
+async def _pump(stream: asyncio.StreamReader, buffer: RingBuffer, echo: Optional[_LineEcho], log,
+                on_output: Optional[Callable[[str], None]] = None):
+    """读取一个输出流直到 EOF"""
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    while True:
+        chunk = await stream.read(_READ_SIZE)
+        if not chunk:
+            break
+        if log is not None:
+            log.write(chunk)
+            log.flush()
+        text = decoder.decode(chunk)
+        buffer.append(text)
+        if echo is not None:
+            echo.feed(text)
+        if on_output is not None:
+            on_output(text)
+    tail = decoder.decode(b'', final=True)
+    buffer.append(tail)
+    if echo is not None:
+        echo.feed(tail)
+        echo.flush()
+
+
+async def kill_process_group(process: asyncio.subprocess.Process, grace: float = KILL_GRACE_SECONDS):
+    """先 SIGTERM 再 SIGKILL 终止进程所在的整个进程组"""
+    if process.returncode is not None:
+        return
+    try:
+        pgid = os.getpgid(process.pid)
+    except ProcessLookupError:
+        return
+    for sig, wait in ((signal.SIGTERM, grace), (signal.SIGKILL, None)):
+        try:
+            os.killpg(pgid, sig)
+        except ProcessLookupError:
+            return
+        try:
+            await asyncio.wait_for(process.wait(), wait)
+            return
+        except asyncio.TimeoutError:
+            continue
+
+
+def _command_args(command, shell: bool) -> List[str]:
+    if isinstance(command, str):
+        return ['/bin/sh', '-c', command] if shell else shlex.split(command)
+    return [str(arg) for arg in command]
+
+
+async def run_async(
+    command,
+    shell: bool = True,
+    env: Optional[dict] = None,
+    cwd: Optional[Path] = None,
+    timeout: Optional[float] = None,
+    echo: bool = False,
+    prefix: str = '   ',
+    log_path: Optional[Path] = None,
+    buffer_chars: int = DEFAULT_BUFFER_CHARS,
+    cancel: Optional[threading.Event] = None,
+    on_start: Optional[Callable[[int], None]] = None,
+    on_output: Optional[Callable[[str], None]] = None
+) -> ProcessResult:
+    """
+    执行命令，流式处理输出
+
+    Args:
+        command: 命令字符串（shell=True 时由 /bin/sh -c 执行）或参数列表
+        shell: 字符串命令是否通过 shell 执行
+        env: 环境变量，为 None 时继承当前进程
+        cwd: 工作目录，为 None 时使用当前目录
+        timeout: 超时（秒），超时后终止整个进程组
+        echo: 是否把输出实时转发到控制台（stdout → stdout，stderr → stderr）
+        prefix: 转发到控制台时每行的前缀
+        log_path: 日志文件，输出原样追加写入
+        buffer_chars: 每个输出流在内存中保留的最大字符数
+        cancel: 取消事件（可以在其他线程中设置），被设置后终止整个进程组；
+            任务本身被取消时同样会终止进程组
+        on_start: 进程启动后以 pid 调用（pid 同时也是进程组 ID）
+        on_output: 每读到一段输出（stdout 或 stderr）时以解码后的文本调用
+
+    Returns:
+        执行结果
+    """
+    start = time.perf_counter()
+    try:
+        process = await asyncio.create_subprocess_exec(
+            *_command_args(command, shell), env=env, cwd=cwd,
+            stdin=asyncio.subprocess.DEVNULL, stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE, start_new_session=True
+        )
+    except (OSError, ValueError) as e:
+        return ProcessResult(-1, '', str(e), time.perf_counter() - start)
+    if on_start is not None:
+        on_start(process.pid)
+
+    log = None
+    if log_path is not None:
+        log = open(log_path, 'ab')
+        shown = command if isinstance(command, str) else ' '.join(map(str, command))
+        log.write(f"\n$ {shown}\n".encode('utf-8'))
+        log.flush()
+
+    buffers = (RingBuffer(buffer_chars), RingBuffer(buffer_chars))
+    pumps = [
+        asyncio.ensure_future(_pump(stream, buffer, _LineEcho(target, prefix) if echo else None, log, on_output))
+        for stream, buffer, target in zip((process.stdout, process.stderr), buffers, (sys.stdout, sys.stderr))
+    ]
+    waiter = asyncio.ensure_future(process.wait())
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout if timeout else None
+    timed_out = cancelled = False
+    try:
+        while not waiter.done():
+            if cancel is not None and cancel.is_set():
+                cancelled = True
+                break
+            remaining = None if deadline is None else deadline - loop.time()
+            if remaining is not None and remaining <= 0:
+                timed_out = True
+                break
+            # 有取消事件时需要轮询；否则一直等到进程退出或超时
+            interval = 0.1 if cancel is not None else remaining
+            if interval is not None and remaining is not None:
+                interval = min(interval, remaining)
+            await asyncio.wait({waiter}, timeout=interval)
+        if timed_out or cancelled:
+            await kill_process_group(process)
+        await waiter
+        await asyncio.gather(*pumps)
+    except asyncio.CancelledError:
+        await kill_process_group(process)
+        for task in (*pumps, waiter):
+            task.cancel()
+        raise
+    finally:
+        if log is not None:
+            log.close()
+
+    stdout, stderr = (buffer.text() for buffer in buffers)
+    if timed_out:
+        stderr += f"\n命令超时（{timeout:g}s），已终止"
+    elif cancelled:
+        stderr += "\n命令已取消"
+    return ProcessResult(
+        process.returncode, stdout, stderr, time.perf_counter() - start,
+        timed_out=timed_out, cancelled=cancelled,
+        truncated=any(buffer.dropped for buffer in buffers)
+    )
+
+
+def run_streaming(command, **kwargs) -> ProcessResult:
+    """
+    run_async 的同步版本（在当前线程中新建事件循环，不能在事件循环内调用）
+
+    Args:
+        command: 命令字符串或参数列表
+        **kwargs: 与 run_async 相同
+
+    Returns:
+        执行结果
+    """
+    return asyncio.run(run_async(command, **kwargs))
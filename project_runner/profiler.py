@@ -0,0 +1,507 @@
+"""
+按阶段统计耗时和资源占用
+
+每个阶段（网络检查、工具链探测 / 安装、克隆、安装依赖、启动）记录：
+
+- 墙钟时间
+- CPU 时间：执行阶段的线程本身 + 该阶段启动的子进程树
+- 峰值内存：当前进程 RSS + 子进程树 RSS 之和的最大采样值
+- 磁盘读写：线程本身（/proc/thread-self/io）+ 子进程树（/proc/<pid>/io）
+- 网络收发：阶段期间整个主机的网卡流量（/proc/net/dev，不含 lo）；并行阶段之间无法区分
+
+子进程树通过进程组识别（process.run_async 以新会话启动命令，进程组 ID 等于 pid），
+后台线程定期扫描 /proc 采样。已退出的子进程的 CPU 时间由父进程的 cutime / cstime
+继承，不会重复计算；两次采样之间退出的进程的磁盘读写可能漏计。不经过 run_async
+直接启动的短命令（例如探测工具版本）只计入报告汇总中的 cpu_seconds_children。
+非 Linux 系统上只记录墙钟时间和本进程的 CPU 时间。
+
+阶段可以嵌套，统计值包含嵌套阶段的部分。结果可以输出为文本摘要、JSON 报告和
+Chrome trace（chrome://tracing 或 https://ui.perfetto.dev 打开）。
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+try:
+    import resource
+except ImportError:  # Windows 上没有 resource，不统计进程级汇总
+    resource = None
+
+from .clone import format_bytes
+
+
+# 子进程采样间隔（秒）
+DEFAULT_INTERVAL = 0.2
+
+# Chrome trace 中每个阶段最多保留的内存采样点
+MAX_COUNTER_SAMPLES = 2000
+
+_PROC = Path('/proc')
+
+
+@dataclass
+class _ProcSample:
+    """一个进程的采样值（cpu 包含已回收子进程的 cutime / cstime，单位秒）"""
+    ppid: int
+    pgrp: int
+    cpu: float
+    rss: int
+    read_bytes: int = 0
+    write_bytes: int = 0
+
+
+def _read_io(path: Path) -> Dict[str, int]:
+    try:
+        lines = path.read_text().splitlines()
+    except OSError:
+        return {}
+    values = {}
+    for line in lines:
+        key, _, value = line.partition(':')
+        if value.strip().isdigit():
+            values[key] = int(value)
+    return values
+
+
+def scan_processes(pgids: Set[int], proc: Path = _PROC) -> Dict[int, _ProcSample]:
+    """
+    采样属于指定进程组的所有进程
+
+    Args:
+        pgids: 进程组 ID
+        proc: procfs 挂载点
+
+    Returns:
+        {pid: 采样值}，没有 procfs 时返回空字典
+    """
+    samples = {}
+    if not pgids or not proc.is_dir():
+        return samples
+    ticks = os.sysconf('SC_CLK_TCK')
+    page = os.sysconf('SC_PAGE_SIZE')
+    for entry in proc.iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            # 进程名可能包含空格，从最后一个右括号之后按字段解析（下标 0 是第 3 个字段 state）
+            fields = (entry / 'stat').read_text().rsplit(')', 1)[1].split()
+            pgrp = int(fields[2])
+            if pgrp not in pgids:
+                continue
+            cpu = sum(int(value) for value in fields[11:15]) / ticks
+            sample = _ProcSample(int(fields[1]), pgrp, cpu, int(fields[21]) * page)
+        except (OSError, IndexError, ValueError):
+            continue
+        io = _read_io(entry / 'io')
+        sample.read_bytes = io.get('read_bytes', 0)
+        sample.write_bytes = io.get('write_bytes', 0)
+        samples[int(entry.name)] = sample
+    return samples
+
+
+def _self_rss(proc: Path = _PROC) -> int:
+    try:
+        return int((proc / 'self' / 'statm').read_text().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, IndexError, ValueError):
+        return 0
+
+
+def _thread_io(proc: Path = _PROC) -> Dict[str, int]:
+    return _read_io(proc / 'thread-self' / 'io')
+
+
+def network_bytes(proc: Path = _PROC) -> Optional[Dict[str, int]]:
+    """主机所有网卡（不含 lo）累计收发的字节数，没有 procfs 时返回 None"""
+    try:
+        lines = (proc / 'net' / 'dev').read_text().splitlines()[2:]
+    except OSError:
+        return None
+    rx = tx = 0
+    for line in lines:
+        name, _, values = line.partition(':')
+        fields = values.split()
+        if name.strip() == 'lo' or len(fields) < 9:
+            continue
+        rx += int(fields[0])
+        tx += int(fields[8])
+    return {'rx': rx, 'tx': tx}
+
+
+class _TreeUsage:
+    """一组进程组的累计资源占用"""
+
+    def __init__(self):
+        self.live: Dict[int, _ProcSample] = {}
+        self.finished_cpu = 0.0
+        self.finished_read = 0
+        self.finished_write = 0
+        self.processes: Set[int] = set()
+
+    def update(self, samples: Dict[int, _ProcSample]):
+        for pid, last in self.live.items():
+            if pid in samples:
+                continue
+            # 父进程仍在组内时，退出的进程的 CPU 时间已经计入父进程的 cutime
+            if last.ppid not in samples:
+                self.finished_cpu += last.cpu
+            self.finished_read += last.read_bytes
+            self.finished_write += last.write_bytes
+        self.live = dict(samples)
+        self.processes.update(samples)
+
+    @property
+    def cpu(self) -> float:
+        return self.finished_cpu + sum(sample.cpu for sample in self.live.values())
+
+    @property
+    def rss(self) -> int:
+        return sum(sample.rss for sample in self.live.values())
+
+    @property
+    def read_bytes(self) -> int:
+        return self.finished_read + sum(sample.read_bytes for sample in self.live.values())
+
+    @property
+    def write_bytes(self) -> int:
+        return self.finished_write + sum(sample.write_bytes for sample in self.live.values())
+
+
+@dataclass
+class PhaseRecord:
+    """一个阶段的统计（start / end 为相对分析开始的秒数，字节数在无法统计时为 None）"""
+    name: str
+    parent: Optional[str]
+    thread: int
+    start: float
+    # 阶段所属的项目（批量模式下区分不同仓库）
+    scope: Optional[str] = None
+    end: Optional[float] = None
+    cpu_seconds: float = 0.0
+    children_cpu_seconds: float = 0.0
+    peak_rss_bytes: Optional[int] = None
+    disk_read_bytes: Optional[int] = None
+    disk_write_bytes: Optional[int] = None
+    net_rx_bytes: Optional[int] = None
+    net_tx_bytes: Optional[int] = None
+    processes: int = 0
+    depth: int = 0
+    rss_samples: List[tuple] = field(default_factory=list, repr=False)
+
+    @property
+    def wall_seconds(self) -> float:
+        return (self.end if self.end is not None else self.start) - self.start
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        del data['rss_samples'], data['thread']
+        data['wall_seconds'] = self.wall_seconds
+        return data
+
+
+class _ActivePhase:
+    """进行中的阶段：起点读数和子进程树"""
+
+    def __init__(self, record: PhaseRecord, proc: Path):
+        self.record = record
+        self.pgids: Set[int] = set()
+        self.tree = _TreeUsage()
+        self.thread_cpu = time.thread_time()
+        self.thread_io = _thread_io(proc)
+        self.net = network_bytes(proc)
+
+
+def _format_size(value: Optional[int]) -> str:
+    """格式化字节数（clone.format_bytes），没有采样数据（None）时显示 -"""
+    return '-' if value is None else format_bytes(value)
+
+
+class Profiler:
+    """阶段分析器（线程安全；每个线程有自己的阶段栈，批量 / 并行执行的阶段互不干扰）"""
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL, proc: Path = _PROC):
+        """
+        Args:
+            interval: 子进程采样间隔（秒）
+            proc: procfs 挂载点
+        """
+        self.interval = interval
+        self.proc = Path(proc)
+        self.supported = (self.proc / 'self' / 'stat').exists()
+        self.records: List[PhaseRecord] = []
+        self.origin = time.perf_counter()
+        self.started_at = time.time()
+        self._usage_start = self._rusage()
+        self._active: List[_ActivePhase] = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # 采样串行执行，避免较早的扫描结果覆盖较新的结果
+        self._sample_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+        self._closed = False
+
+    def _stack(self) -> List[_ActivePhase]:
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    def _now(self) -> float:
+        return time.perf_counter() - self.origin
+
+    @staticmethod
+    def _rusage() -> Optional[dict]:
+        if resource is None:
+            return None
+        own, children = resource.getrusage(resource.RUSAGE_SELF), resource.getrusage(resource.RUSAGE_CHILDREN)
+        return {
+            'cpu_seconds_self': own.ru_utime + own.ru_stime,
+            'cpu_seconds_children': children.ru_utime + children.ru_stime,
+            # Linux 上 ru_maxrss 的单位是 KB
+            'max_rss_self_bytes': own.ru_maxrss * 1024,
+            'max_rss_children_bytes': children.ru_maxrss * 1024,
+        }
+
+    def start(self, name: str, scope: Optional[str] = None) -> PhaseRecord:
+        """
+        在当前线程开始一个阶段（通常使用 phase()）
+
+        Args:
+            name: 阶段名
+            scope: 所属项目
+
+        Returns:
+            阶段记录，传给 stop() 结束阶段
+        """
+        stack = self._stack()
+        parent = stack[-1].record.name if stack else None
+        record = PhaseRecord(name, parent, threading.get_ident(), self._now(), scope, depth=len(stack))
+        active = _ActivePhase(record, self.proc)
+        stack.append(active)
+        with self._lock:
+            self.records.append(record)
+            self._active.append(active)
+            if self.supported and self._sampler is None and not self._closed:
+                self._sampler = threading.Thread(target=self._sample_loop, name='profiler', daemon=True)
+                self._sampler.start()
+        return record
+
+    def stop(self, record: PhaseRecord):
+        """结束阶段（重复调用无效；必须在开始该阶段的线程中调用）"""
+        stack = self._stack()
+        active = next((item for item in stack if item.record is record), None)
+        if active is None or record.end is not None:
+            return
+        # 嵌套阶段先于外层阶段结束
+        while stack:
+            top = stack.pop()
+            if top is not active:
+                self._finish(top)
+            else:
+                break
+        self._finish(active)
+
+    def _finish(self, active: _ActivePhase):
+        record = active.record
+        if record.end is not None:
+            return
+        self._sample([active])
+        with self._lock:
+            if active in self._active:
+                self._active.remove(active)
+        record.end = self._now()
+        record.children_cpu_seconds = active.tree.cpu
+        record.cpu_seconds = time.thread_time() - active.thread_cpu + active.tree.cpu
+        record.processes = len(active.tree.processes)
+        if not self.supported:
+            return
+        thread_io = _thread_io(self.proc)
+        record.disk_read_bytes = (thread_io.get('read_bytes', 0) - active.thread_io.get('read_bytes', 0)
+                                  + active.tree.read_bytes)
+        record.disk_write_bytes = (thread_io.get('write_bytes', 0) - active.thread_io.get('write_bytes', 0)
+                                   + active.tree.write_bytes)
+        net = network_bytes(self.proc)
+        if net is not None and active.net is not None:
+            record.net_rx_bytes = net['rx'] - active.net['rx']
+            record.net_tx_bytes = net['tx'] - active.net['tx']
+
+    @contextmanager
+    def phase(self, name: str, scope: Optional[str] = None):
+        """
+        统计 with 块中的阶段
+
+        Args:
+            name: 阶段名
+            scope: 所属项目
+        """
+        record = self.start(name, scope)
+        try:
+            yield record
+        finally:
+            self.stop(record)
+
+    def attach(self, pid: int):
+        """把进程组（run_async 的 on_start 回调）计入当前线程所有进行中的阶段"""
+        stack = self._stack()
+        with self._lock:
+            for active in stack:
+                active.pgids.add(pid)
+        if stack:
+            self._sample(stack)
+
+    def _sample(self, phases: List[_ActivePhase]):
+        if not self.supported:
+            return
+        with self._sample_lock:
+            self._sample_locked(phases)
+
+    def _sample_locked(self, phases: List[_ActivePhase]):
+        with self._lock:
+            pgids = set().union(*(active.pgids for active in phases))
+        samples = scan_processes(pgids, self.proc)
+        rss = _self_rss(self.proc)
+        now = self._now()
+        with self._lock:
+            for active in phases:
+                if active.record.end is not None:
+                    continue
+                active.tree.update({pid: s for pid, s in samples.items() if s.pgrp in active.pgids})
+                total = rss + active.tree.rss
+                record = active.record
+                if record.peak_rss_bytes is None or total > record.peak_rss_bytes:
+                    record.peak_rss_bytes = total
+                if len(record.rss_samples) < MAX_COUNTER_SAMPLES:
+                    record.rss_samples.append((now, total))
+
+    def _sample_loop(self):
+        while not self._wakeup.wait(self.interval):
+            with self._lock:
+                phases = list(self._active)
+            if phases:
+                self._sample(phases)
+
+    def close(self):
+        """停止后台采样线程"""
+        with self._lock:
+            self._closed = True
+            sampler = self._sampler
+        self._wakeup.set()
+        if sampler is not None:
+            sampler.join()
+
+    def report(self, **metadata) -> dict:
+        """
+        JSON 报告
+
+        Args:
+            **metadata: 附加信息（仓库地址等）
+
+        Returns:
+            报告字典
+        """
+        totals = {'wall_seconds': self._now()}
+        usage = self._rusage()
+        if usage is not None and self._usage_start is not None:
+            for key in ('cpu_seconds_self', 'cpu_seconds_children'):
+                totals[key] = usage[key] - self._usage_start[key]
+            totals['max_rss_self_bytes'] = usage['max_rss_self_bytes']
+            totals['max_rss_children_bytes'] = usage['max_rss_children_bytes']
+        return {
+            **metadata,
+            'started_at': self.started_at,
+            'sampled': self.supported,
+            'totals': totals,
+            'phases': [record.to_dict() for record in self.records],
+        }
+
+    def trace_events(self) -> List[dict]:
+        """
+        Chrome trace 事件：每个阶段一个完整事件（ph=X），峰值内存采样为计数器事件（ph=C）
+
+        Returns:
+            事件列表（时间单位为微秒）
+        """
+        pid = os.getpid()
+        # 每个 (线程, 项目) 一条轨道；批量模式的线程池线程会先后处理多个项目
+        lanes: Dict[tuple, int] = {}
+        events = []
+        for record in self.records:
+            tid = lanes.setdefault((record.thread, record.scope), len(lanes) + 1)
+            args = {key: value for key, value in record.to_dict().items()
+                    if key not in ('name', 'parent', 'scope', 'start', 'end', 'depth') and value is not None}
+            events.append({
+                'name': record.name, 'cat': 'phase', 'ph': 'X', 'pid': pid, 'tid': tid,
+                'ts': round(record.start * 1e6), 'dur': round(record.wall_seconds * 1e6), 'args': args,
+            })
+            for timestamp, rss in record.rss_samples:
+                events.append({
+                    'name': f"rss {record.name}", 'ph': 'C', 'pid': pid, 'tid': tid,
+                    'ts': round(timestamp * 1e6), 'args': {'bytes': rss},
+                })
+        for (_, scope), tid in lanes.items():
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid,
+                           'args': {'name': scope or f"thread-{tid}"}})
+        return events
+
+    def write_report(self, path: Path, **metadata):
+        """写入 JSON 报告"""
+        Path(path).write_text(json.dumps(self.report(**metadata), ensure_ascii=False, indent=2), encoding='utf-8')
+
+    def write_trace(self, path: Path):
+        """写入 Chrome trace 文件"""
+        data = {'traceEvents': self.trace_events(), 'displayTimeUnit': 'ms'}
+        Path(path).write_text(json.dumps(data), encoding='utf-8')
+
+    def format_summary(self) -> str:
+        """
+        文本摘要，每个阶段一行（嵌套阶段缩进）
+
+        Returns:
+            多行文本
+        """
+        finished = [record for record in self.records if record.end is not None]
+        name_width = max((len(r.name) + 2 * r.depth for r in finished), default=0)
+        scopes = {record.scope for record in finished}
+        lines = [f"📊 阶段耗时与资源（总耗时 {self._now():.1f}s）:"]
+        scope = None
+        for record in sorted(finished, key=lambda r: (r.scope or '', r.start)) if len(scopes) > 1 else finished:
+            if len(scopes) > 1 and record.scope != scope:
+                scope = record.scope
+                lines.append(f"   [{scope}]")
+            name = '  ' * record.depth + record.name
+            line = (f"   {name:<{name_width}} {record.wall_seconds:7.1f}s | CPU {record.cpu_seconds:6.1f}s"
+                    f" | 峰值内存 {_format_size(record.peak_rss_bytes):>9}"
+                    f" | 磁盘写入 {_format_size(record.disk_write_bytes):>9}")
+            if record.net_rx_bytes is not None:
+                line += f" | 网络 ↓{_format_size(record.net_rx_bytes)} ↑{_format_size(record.net_tx_bytes)}"
+            lines.append(line)
+        if not self.supported:
+            lines.append("   （当前系统没有 /proc，只统计墙钟时间和本进程的 CPU 时间）")
+        return '\n'.join(lines)
+
+
+def write_profile(profiler: Profiler, profile_path: Optional[str] = None, trace_path: Optional[str] = None,
+                  **metadata):
+    """
+    输出阶段统计摘要，并写入 JSON 报告和 Chrome trace
+
+    Args:
+        profiler: 阶段分析器
+        profile_path: JSON 报告路径
+        trace_path: Chrome trace 路径
+        **metadata: 写入报告的附加信息
+    """
+    profiler.close()
+    print()
+    print(profiler.format_summary())
+    if profile_path:
+        profiler.write_report(profile_path, **metadata)
+        print(f"📝 性能报告: {profile_path}")
+    if trace_path:
+        profiler.write_trace(trace_path)
+        print(f"📝 Chrome trace: {trace_path}（在 chrome://tracing 或 https://ui.perfetto.dev 中打开）")
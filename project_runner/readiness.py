@@ -0,0 +1,278 @@
+"""
+开发服务器的启动脚本选择和就绪检测
+
+- 按 package.json 的 scripts 直接选出启动脚本（dev / start / serve / 框架命令），
+  不再先尝试 dev 失败后再尝试 start
+- 就绪检测：从输出中识别 http://localhost:5173 之类的地址，并在 Linux 上通过
+  /proc/net/tcp 找出进程组监听的端口，再用 HTTP 请求确认服务已经响应
+- 记录从启动到就绪的耗时
+"""
+
+import asyncio
+import os
+import re
+import threading
+import time
+import urllib.error
+import urllib.request
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set
+
+from .process import ProcessResult, run_async
+
+
+# 按优先级排列的启动脚本名
+PREFERRED_SCRIPTS = ('dev', 'start', 'serve', 'develop')
+
+# 启动开发服务器的常见命令（用于识别 dev:web、start:client 之类的脚本）
+_SERVER_COMMAND = re.compile(
+    r'\b(vite(?!\s+build)|next\s+(dev|start)|nuxi?\s+dev|react-scripts\s+start|vue-cli-service\s+serve|'
+    r'ng\s+serve|astro\s+dev|gatsby\s+develop|remix\s+dev|webpack(-dev-server|\s+serve)|parcel(?!\s+build)|'
+    r'svelte-kit\s+dev|umi\s+dev|docusaurus\s+start|vitepress\s+dev|http-server|live-server|nodemon)\b'
+)
+_NON_SERVER_NAMES = re.compile(r'(build|test|lint|format|type|check|clean|release|deploy|prepare)', re.IGNORECASE)
+
+_ANSI = re.compile(r'\x1b\[[0-9;?]*[A-Za-z]')
+_URL = re.compile(r'https?://(localhost|127\.0\.0\.1|0\.0\.0\.0|\[::1?\]|[\w.-]+):(\d{2,5})(/[^\s\'"]*)?')
+_LOCAL_HOSTS = ('localhost', '127.0.0.1', '0.0.0.0', '[::]', '[::1]')
+
+# /proc/net/tcp 中 LISTEN 状态的编码
+_TCP_LISTEN = '0A'
+
+
+def select_script(scripts: Dict[str, str]) -> Optional[str]:
+    """
+    选择启动脚本
+
+    Args:
+        scripts: package.json 的 scripts
+
+    Returns:
+        脚本名，没有可用于启动的脚本时返回 None
+    """
+    for name in PREFERRED_SCRIPTS:
+        if name in scripts:
+            return name
+    candidates = [name for name, command in scripts.items()
+                  if isinstance(command, str) and not _NON_SERVER_NAMES.search(name)]
+    # dev:web、start:client 这类变体优先，其次是命令本身启动开发服务器的脚本
+    for name in candidates:
+        if re.match(r'(dev|start|serve)\b', name):
+            return name
+    for name in candidates:
+        if _SERVER_COMMAND.search(scripts[name]):
+            return name
+    return None
+
+
+def build_script_command(package_manager: str, script: str) -> List[str]:
+    """运行 package.json 脚本的命令"""
+    return [package_manager or 'npm', 'run', script]
+
+
+def find_urls(text: str) -> List[str]:
+    """从输出中找出本地服务地址（0.0.0.0 / [::] 换成 localhost）"""
+    urls = []
+    for match in _URL.finditer(_ANSI.sub('', text)):
+        # 地址后面常跟着括号或句号，例如 python -m http.server 的 (http://0.0.0.0:8000/)
+        host, port, path = match.group(1), match.group(2), (match.group(3) or '').rstrip(').,;:!?]>') or '/'
+        if host not in _LOCAL_HOSTS:
+            continue
+        if host in ('0.0.0.0', '[::]'):
+            host = 'localhost'
+        url = f"http://{host}:{port}{path}"
+        if url not in urls:
+            urls.append(url)
+    return urls
+
+
+def _group_socket_inodes(pgid: int, proc: Path) -> Set[str]:
+    inodes = set()
+    for entry in proc.iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            # 第 5 个字段是进程组 ID（进程名可能包含空格，从最后一个右括号之后解析）
+            stat = (entry / 'stat').read_text()
+            if int(stat.rsplit(')', 1)[1].split()[2]) != pgid:
+                continue
+            for fd in (entry / 'fd').iterdir():
+                target = os.readlink(fd)
+                if target.startswith('socket:['):
+                    inodes.add(target[8:-1])
+        except (OSError, IndexError, ValueError):
+            continue
+    return inodes
+
+
+def listening_ports(pgid: int, proc: Path = Path('/proc')) -> List[int]:
+    """
+    进程组中的进程正在监听的 TCP 端口（只支持 Linux，其他系统返回空列表）
+
+    Args:
+        pgid: 进程组 ID
+        proc: procfs 挂载点
+
+    Returns:
+        端口列表
+    """
+    if not (proc / 'net' / 'tcp').exists():
+        return []
+    inodes = _group_socket_inodes(pgid, proc)
+    ports = []
+    for name in ('tcp', 'tcp6'):
+        try:
+            lines = (proc / 'net' / name).read_text().splitlines()[1:]
+        except OSError:
+            continue
+        for line in lines:
+            fields = line.split()
+            if len(fields) > 9 and fields[3] == _TCP_LISTEN and fields[9] in inodes:
+                port = int(fields[1].rsplit(':', 1)[1], 16)
+                if port not in ports:
+                    ports.append(port)
+    return ports
+
+
+def http_probe(url: str, timeout: float = 2.0) -> bool:
+    """服务是否已经响应 HTTP 请求（任何非 5xx 响应都算就绪，不经过代理）"""
+    opener = urllib.request.build_opener(urllib.request.ProxyHandler({}))
+    try:
+        with opener.open(url, timeout=timeout):
+            return True
+    except urllib.error.HTTPError as e:
+        return e.code < 500
+    except (OSError, ValueError):
+        return False
+
+
+class ReadinessWatcher:
+    """收集候选地址并探测服务是否就绪"""
+
+    def __init__(self, expected_port: Optional[int] = None, probe: Callable[[str], bool] = http_probe):
+        """
+        Args:
+            expected_port: 预期的端口（例如通过 PORT 环境变量指定的端口）
+            probe: HTTP 探测函数
+        """
+        self.expected_port = expected_port
+        self.probe = probe
+        self.pid: Optional[int] = None
+        self.urls: List[str] = []
+        self._pending = ''
+        self._lock = threading.Lock()
+
+    def attach(self, pid: int):
+        self.pid = pid
+
+    def feed(self, text: str):
+        """处理一段输出（地址可能被拆在两段输出之间，按行处理）"""
+        with self._lock:
+            self._pending += text
+            lines = self._pending.split('\n')
+            self._pending = lines.pop()[-1024:]
+            for url in find_urls('\n'.join(lines)):
+                if url not in self.urls:
+                    self.urls.append(url)
+
+    def candidates(self) -> List[str]:
+        with self._lock:
+            urls = list(self.urls)
+        ports = {int(url.rsplit(':', 1)[1].split('/')[0]) for url in urls}
+        extra = listening_ports(self.pid) if self.pid else []
+        if self.expected_port:
+            extra.append(self.expected_port)
+        for port in extra:
+            if port not in ports:
+                ports.add(port)
+                urls.append(f"http://localhost:{port}/")
+        return urls
+
+    def check(self) -> Optional[str]:
+        """返回第一个已经响应的地址，都没有响应时返回 None"""
+        for url in self.candidates():
+            if self.probe(url):
+                return url
+        return None
+
+
+@dataclass
+class ServeResult:
+    """一次启动的结果"""
+    ready: bool
+    url: Optional[str]
+    seconds_to_ready: Optional[float]
+    process: ProcessResult
+
+
+async def serve(
+    command,
+    cwd: Optional[Path] = None,
+    env: Optional[dict] = None,
+    ready_timeout: float = 120.0,
+    keep_running: bool = True,
+    expected_port: Optional[int] = None,
+    on_ready: Optional[Callable[[str, float], None]] = None,
+    on_timeout: Optional[Callable[[], None]] = None,
+    on_start: Optional[Callable[[int], None]] = None,
+    poll_interval: float = 0.25,
+    **run_options
+) -> ServeResult:
+    """
+    启动开发服务器并等待就绪
+
+    Args:
+        command: 启动命令
+        cwd: 工作目录
+        env: 环境变量
+        ready_timeout: 等待就绪的最长时间（秒）
+        keep_running: 就绪（或超时）后是否继续运行直到进程退出；为 False 时立即终止进程组
+        expected_port: 预期的端口
+        on_ready: 就绪时以 (地址, 启动耗时) 调用
+        on_timeout: 超过 ready_timeout 仍未就绪、进程也没有退出时调用
+        on_start: 进程启动后以 pid 调用
+        poll_interval: 探测间隔（秒）
+        **run_options: 传给 run_async 的其他参数（echo、prefix、log_path 等）
+
+    Returns:
+        启动结果
+    """
+    loop = asyncio.get_running_loop()
+    watcher = ReadinessWatcher(expected_port)
+    stop = threading.Event()
+    start = time.perf_counter()
+
+    def started(pid: int):
+        watcher.attach(pid)
+        if on_start is not None:
+            on_start(pid)
+
+    task = asyncio.ensure_future(run_async(
+        command, cwd=cwd, env=env, cancel=stop,
+        on_start=started, on_output=watcher.feed, **run_options
+    ))
+
+    url = None
+    seconds = None
+    try:
+        while not task.done() and time.perf_counter() - start < ready_timeout:
+            await asyncio.wait({task}, timeout=poll_interval)
+            if task.done():
+                break
+            url = await loop.run_in_executor(None, watcher.check)
+            if url:
+                seconds = time.perf_counter() - start
+                if on_ready is not None:
+                    on_ready(url, seconds)
+                break
+        if url is None and not task.done() and on_timeout is not None:
+            on_timeout()
+        if not keep_running:
+            stop.set()
+        process = await task
+    except asyncio.CancelledError:
+        stop.set()
+        task.cancel()
+        raise
+    return ServeResult(url is not None, url, seconds, process)
@@ -0,0 +1,49 @@
+"""
+project_runner 测试共用的 fixture
+"""
+
+import functools
+import http.server
+import threading
+
+import pytest
+
+
+def _quiet(handler):
+    """去掉请求日志（BaseHTTPRequestHandler 默认逐条写到 stderr）"""
+    if isinstance(handler, functools.partial):
+        return functools.partial(_quiet(handler.func), *handler.args, **handler.keywords)
+    if isinstance(handler, type) and issubclass(handler, http.server.BaseHTTPRequestHandler):
+        # 子类只覆盖 log_message，测试对原类属性（payload、requests 等）的修改仍然生效
+        return type(handler.__name__, (handler,), {'log_message': lambda self, *args: None})
+    return handler
+
+
+@pytest.fixture
+def serve_http():
+    """
+    在后台线程中启动本地服务（随机端口），测试结束后自动关闭
+
+    返回启动函数 serve_http(handler=None, directory=None, server_class=ThreadingHTTPServer, ssl_context=None)：
+    指定 directory 时用 SimpleHTTPRequestHandler 提供该目录的静态文件；指定 ssl_context 时
+    以 HTTPS 提供服务。返回的 server 带有 url 属性（http://127.0.0.1:<port>，HTTPS 时为
+    https://localhost:<port>），末尾没有斜杠。
+    """
+    servers = []
+
+    def start(handler=None, directory=None, server_class=http.server.ThreadingHTTPServer, ssl_context=None):
+        if directory is not None:
+            handler = functools.partial(handler or http.server.SimpleHTTPRequestHandler, directory=str(directory))
+        server = server_class(('127.0.0.1', 0), _quiet(handler))
+        if ssl_context is not None:
+            server.socket = ssl_context.wrap_socket(server.socket, server_side=True)
+        threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True).start()
+        servers.append(server)
+        port = server.server_address[1]
+        server.url = f"https://localhost:{port}" if ssl_context is not None else f"http://127.0.0.1:{port}"
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,130 @@
+"""
+源码包下载模式测试（本地 HTTP 服务器模拟 codeload）
+"""
+
+import io
+import re
+import tarfile
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+from project_runner import archive
+from project_runner.archive import ArchiveError, archive_url, download_archive, extract_stream
+
+
+def _make_tarball(members, commit='abc123'):
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode='w:gz', format=tarfile.PAX_FORMAT,
+                      pax_headers={'comment': commit}) as tar:
+        for name, data in members.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+    return buffer.getvalue()
+
+
+class _FlakyHandler(BaseHTTPRequestHandler):
+    """第一次请求只发送一半数据就断开，之后按 Range 返回剩余部分"""
+    payload = b''
+    requests = []
+
+    def do_GET(self):
+        self.requests.append(self.headers.get('Range'))
+        match = re.match(r'bytes=(\d+)-', self.headers.get('Range') or '')
+        start = int(match.group(1)) if match else 0
+        body = self.payload[start:]
+
+        self.send_response(206 if start else 200)
+        self.send_header('Content-Length', str(len(body)))
+        if start:
+            self.send_header('Content-Range', f'bytes {start}-{len(self.payload) - 1}/{len(self.payload)}')
+        self.end_headers()
+        if len(self.requests) == 1:
+            self.wfile.write(body[:len(body) // 2])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+
+class _ChangingHandler(BaseHTTPRequestHandler):
+    """第一次请求发送一半就断开；之后 ETag 变化，忽略 Range 返回新的源码包"""
+    payloads = (b'', b'')
+    requests = []
+
+    def do_GET(self):
+        self.requests.append(self.headers.get('Range'))
+        first = len(self.requests) == 1
+        body = self.payloads[0 if first else 1]
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', '"old"' if first else '"new"')
+        self.end_headers()
+        if first:
+            self.wfile.write(body[:len(body) // 2])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def codeload(serve_http, monkeypatch):
+    """用指定的 handler 启动本地 codeload，重试不等待"""
+    def start(handler):
+        handler.requests = []
+        server = serve_http(handler)
+        monkeypatch.setattr(archive, 'CODELOAD_URL', server.url + '/{owner}/{repo}/tar.gz/{ref}')
+        monkeypatch.setattr(archive.time, 'sleep', lambda _: None)
+        return server
+    return start
+
+
+@pytest.fixture
+def server(codeload):
+    return codeload(_FlakyHandler)
+
+
+def test_archive_url_from_ssh_and_https():
+    assert archive_url('git@github.com:a/b.git') == 'https://codeload.github.com/a/b/tar.gz/HEAD'
+    assert archive_url('https://github.com/a/b/', 'v1.0').endswith('/a/b/tar.gz/v1.0')
+
+
+def test_download_resumes_with_range(tmp_path, server):
+    _FlakyHandler.payload = _make_tarball({
+        'b-abc123/package.json': b'{}' * 5000,
+        'b-abc123/src/index.js': b'console.log(1)\n' * 2000,
+    })
+
+    result = download_archive('https://github.com/a/b', tmp_path / 'b', proxy=None)
+
+    assert result.resumes == 1
+    assert result.bytes_received == len(_FlakyHandler.payload)
+    assert result.commit == 'abc123'
+    assert result.files == 2
+    assert (tmp_path / 'b' / 'src' / 'index.js').exists()
+    assert _FlakyHandler.requests[0] is None and _FlakyHandler.requests[1].startswith('bytes=')
+    assert not (tmp_path / 'b.partial').exists()
+
+
+def test_extract_rejects_path_traversal(tmp_path):
+    data = _make_tarball({'b-abc/../../evil': b'x'})
+    with pytest.raises(ArchiveError):
+        extract_stream(io.BytesIO(data), tmp_path)
+
+
+def test_download_restarts_when_archive_changes(tmp_path, codeload):
+    _ChangingHandler.payloads = (
+        _make_tarball({'b-old/index.js': b'old\n' * 20000, 'b-old/stale.js': b'x' * 50000}, 'old'),
+        _make_tarball({'b-new/index.js': b'new\n' * 20000}, 'new'),
+    )
+    codeload(_ChangingHandler)
+    result = download_archive('https://github.com/a/b', tmp_path / 'b')
+
+    # 第二次请求带 Range 但 ETag 变了：丢弃已解压的部分，第三次从头下载新源码包
+    assert _ChangingHandler.requests[0] is None and _ChangingHandler.requests[1].startswith('bytes=')
+    assert _ChangingHandler.requests[2] is None
+    assert result.commit == 'new'
+    assert (tmp_path / 'b' / 'index.js').read_text().startswith('new')
+    assert not (tmp_path / 'b' / 'stale.js').exists()
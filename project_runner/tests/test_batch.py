@@ -0,0 +1,114 @@
+"""
+批量运行测试
+"""
+
+import json
+import socket
+import threading
+import time
+
+from project_runner.batch import BatchItem, BatchRunner, PortAllocator, read_urls, run_batch
+from project_runner.options import CloneOptions, RunOptions
+from project_runner.process import ProcessResult
+from project_runner.readiness import ServeResult
+
+
+def test_read_urls_skips_comments_and_duplicates():
+    lines = ['# candidates', 'https://github.com/a/one', '', 'https://github.com/b/two  # maybe',
+             'https://github.com/a/one']
+    assert read_urls(lines) == ['https://github.com/a/one', 'https://github.com/b/two']
+
+
+def test_port_allocator_skips_busy_ports():
+    with socket.socket() as busy:
+        busy.bind(('127.0.0.1', 0))
+        busy.listen()
+        port = busy.getsockname()[1]
+        ports = PortAllocator(start=port, count=3)
+        first = ports.allocate()
+        second = ports.allocate()
+        assert port not in (first, second) and first != second
+        ports.release(first)
+        assert first not in ports.assigned
+
+
+class FakeRunner:
+    active = {'install': 0}
+    peak = {'install': 0}
+    lock = threading.Lock()
+
+    def __init__(self, item, project_dir, extra_env):
+        self.item = item
+        self.project_path = project_dir / item.url.rsplit('/', 1)[-1]
+        self.env = extra_env
+
+    def clone_repository(self):
+        print(f"cloning {self.item.url}")
+        return 'broken' not in self.item.url
+
+    def install_dependencies(self):
+        with self.lock:
+            self.active['install'] += 1
+            self.peak['install'] = max(self.peak['install'], self.active['install'])
+        time.sleep(0.05)
+        with self.lock:
+            self.active['install'] -= 1
+        return True
+
+    def launch(self, ready_timeout):
+        port = self.env['PORT']
+        return ServeResult(True, f'http://localhost:{port}/', 0.5, ProcessResult(-15, '', '', 0.5, cancelled=True))
+
+
+def test_batch_limits_phases_and_writes_report(tmp_path):
+    urls = [f'https://github.com/owner/repo{i}' for i in range(5)] + ['https://github.com/owner/broken']
+    report = tmp_path / 'report.jsonl'
+    batch = BatchRunner(FakeRunner, tmp_path / 'work', report, clone_jobs=3, install_jobs=1, run_jobs=2,
+                        ready_timeout=1, ports=PortAllocator(start=41000, count=100))
+    results = batch.run([BatchItem(url) for url in urls])
+
+    assert [r.url for r in results] == urls
+    assert FakeRunner.peak['install'] == 1
+    assert sum(r.success for r in results) == 5
+    broken = results[-1]
+    assert broken.phases['clone'].status == 'failed' and broken.phases['run'].status == 'skipped'
+    assert len({r.port for r in results}) == len(urls)
+    assert results[0].ready_url == f'http://localhost:{results[0].port}/' and results[0].time_to_ready == 0.5
+
+    lines = [json.loads(line) for line in report.read_text().splitlines()]
+    assert len(lines) == len(urls)
+    assert set(lines[0]['phases']) == {'clone', 'install', 'run'}
+    assert 'cloning https://github.com/owner/repo0' in (tmp_path / 'work' / 'owner__repo0.log').read_text()
+
+
+class OptionsRunner(FakeRunner):
+    created = []
+
+    def __init__(self, url, clone_options, run_options, repo_size_kb=None, repo_language=None, **options):
+        super().__init__(BatchItem(url, repo_size_kb, repo_language), clone_options.work_dir, run_options.extra_env)
+        self.clone_options = clone_options
+        self.run_options = run_options
+        self.options = options
+        self.created.append(self)
+
+
+def test_run_batch_derives_per_project_options(tmp_path):
+    shared_clone = CloneOptions(strategy='blobless')
+    shared_run = RunOptions(ready_timeout=1, extra_env={'NODE_ENV': 'development'})
+    items = [BatchItem('https://github.com/owner/one', 120, 'TypeScript'), BatchItem('https://github.com/other/two')]
+
+    results = run_batch(items, OptionsRunner, tmp_path / 'work', clone_jobs=2, base_port=42000,
+                        clone_options=shared_clone, run_options=shared_run, use_proxy='http://proxy:8080')
+
+    assert all(r.success for r in results)
+    runners = {runner.item.url: runner for runner in OptionsRunner.created}
+    first, second = (runners[item.url] for item in items)
+    assert first.clone_options.work_dir == tmp_path / 'work' / 'owner'
+    assert first.clone_options.update and first.clone_options.strategy == 'blobless'
+    assert not first.run_options.overlap
+    assert first.run_options.extra_env['NODE_ENV'] == 'development'
+    assert first.run_options.extra_env['PORT'] != second.run_options.extra_env['PORT']
+    assert first.item.size_kb == 120 and first.item.language == 'TypeScript'
+    assert first.options == {'use_proxy': 'http://proxy:8080'}
+    # 共用的选项对象不被修改
+    assert not shared_clone.update and shared_clone.work_dir is None and 'PORT' not in shared_run.extra_env
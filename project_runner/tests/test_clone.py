@@ -0,0 +1,45 @@
+"""
+克隆策略模块测试
+"""
+
+from project_runner.clone import (
+    SPARSE_THRESHOLD_KB, build_clone_command, choose_strategy,
+    parse_received_bytes, sparse_directories
+)
+
+
+def test_choose_strategy_by_size():
+    assert choose_strategy(None) == 'shallow'
+    assert choose_strategy(2048) == 'shallow'
+    assert choose_strategy(SPARSE_THRESHOLD_KB) == 'sparse'
+
+
+def test_build_clone_command_flags():
+    cmd = build_clone_command('blobless', 'https://github.com/a/b.git', '/tmp/my dir')
+    assert cmd.startswith('git clone --progress --filter=blob:none ')
+    assert cmd.endswith("'/tmp/my dir'")
+
+
+def test_parse_received_bytes_sums_progress_lines():
+    output = (
+        "Receiving objects:  50% (5/10)\r"
+        "Receiving objects: 100% (10/10), 1.50 MiB | 2.00 MiB/s, done.\n"
+        "Receiving objects: 100% (3/3), 512 bytes | 512.00 KiB/s, done.\n"
+    )
+    assert parse_received_bytes(output) == int(1.5 * 1024 ** 2) + 512
+    assert parse_received_bytes("Cloning into 'x'...") is None
+
+
+def test_sparse_directories_skips_docs_and_tests():
+    dirs = sparse_directories(['src', 'docs', 'Tests', 'packages'], ['docs/api'])
+    assert dirs == ['src', 'packages', 'docs/api']
+
+
+def test_sparse_directories_keeps_workspace_packages():
+    top = ['packages', 'examples', 'docs', 'test']
+    assert sparse_directories(top, workspace_patterns=['packages/*', 'examples/*', '!examples/old']) == [
+        'packages', 'examples'
+    ]
+    assert sparse_directories(top, workspace_patterns=['docs']) == ['packages', 'docs']
+    # 第一段是通配符时所有目录都可能是工作区包
+    assert sparse_directories(top, workspace_patterns=['*']) == top
@@ -0,0 +1,64 @@
+"""
+依赖缓存测试
+"""
+
+import os
+
+from project_runner.dep_cache import DependencyCache
+
+
+def _make_project(path, lock='{"v": 1}'):
+    modules = path / 'node_modules'
+    (modules / 'left-pad').mkdir(parents=True)
+    (modules / 'left-pad' / 'index.js').write_text('module.exports = 1')
+    (modules / '.cache').mkdir()
+    (modules / '.cache' / 'build').write_text('tmp')
+    os.symlink('left-pad', modules / 'alias')
+    (path / 'package-lock.json').write_text(lock)
+
+
+def test_store_then_restore_with_hardlinks(tmp_path):
+    cache = DependencyCache(tmp_path / 'cache')
+    key = cache.make_key('abc', 'npm', '20.11.0')
+    assert key != cache.make_key('abc', 'npm', '18.19.0')
+
+    source = tmp_path / 'a'
+    _make_project(source)
+    assert cache.restore(key, source) is None
+    assert cache.store(key, source)
+    assert not cache.store(key, source)
+
+    target = tmp_path / 'b'
+    target.mkdir()
+    result = cache.restore(key, target)
+    restored = target / 'node_modules'
+    assert result.files == 1 and result.linked == 1
+    assert (restored / 'left-pad' / 'index.js').read_text() == 'module.exports = 1'
+    assert os.readlink(restored / 'alias') == 'left-pad'
+    assert not (restored / '.cache').exists()
+
+
+def test_store_evicts_least_recently_used(tmp_path):
+    cache = DependencyCache(tmp_path / 'cache', max_bytes=1)
+    first, second = cache.make_key('1', 'npm', None), cache.make_key('2', 'npm', None)
+    _make_project(tmp_path / 'p')
+
+    cache.store(first, tmp_path / 'p')
+    cache.store(second, tmp_path / 'p')
+    assert cache.has(second) and not cache.has(first)
+
+
+def test_store_and_restore_workspace_packages(tmp_path):
+    project = tmp_path / 'project'
+    for path in ('.', 'apps/web'):
+        (project / path / 'node_modules' / 'dep').mkdir(parents=True)
+        (project / path / 'node_modules' / 'dep' / 'index.js').write_text(path)
+    cache = DependencyCache(tmp_path / 'cache')
+    key = cache.make_key('abc:web', 'pnpm', 'v20.0.0')
+    assert cache.store(key, project, ['.', 'apps/web'])
+
+    target = tmp_path / 'target'
+    (target / 'apps' / 'web').mkdir(parents=True)
+    restored = cache.restore(key, target, ['.', 'apps/web'])
+    assert restored.files == 2
+    assert (target / 'apps' / 'web' / 'node_modules' / 'dep' / 'index.js').read_text() == 'apps/web'
@@ -0,0 +1,35 @@
+"""
+安装策略测试
+"""
+
+from project_runner.install import build_install_strategy, is_yarn_berry
+
+
+def test_npm_uses_ci_only_with_lockfile(tmp_path):
+    (tmp_path / 'package.json').write_text('{}')
+    assert build_install_strategy('npm', tmp_path).name == 'npm install'
+
+    (tmp_path / 'package-lock.json').write_text('{}')
+    strategy = build_install_strategy('npm', tmp_path, registry='https://registry.npmmirror.com')
+    assert strategy.frozen and strategy.name == 'npm ci'
+    assert '--registry=https://registry.npmmirror.com' in strategy.args
+    assert build_install_strategy('npm', tmp_path, frozen=False).name == 'npm install'
+
+
+def test_pnpm_uses_shared_store(tmp_path):
+    (tmp_path / 'pnpm-lock.yaml').write_text('')
+    strategy = build_install_strategy('pnpm', tmp_path, store_dir=tmp_path / 'store')
+    assert strategy.name == 'pnpm install --frozen-lockfile'
+    assert f'--store-dir={tmp_path / "store"}' in strategy.args
+
+
+def test_yarn_classic_and_berry(tmp_path):
+    (tmp_path / 'yarn.lock').write_text('')
+    (tmp_path / 'package.json').write_text('{"packageManager": "yarn@1.22.19"}')
+    assert not is_yarn_berry(tmp_path)
+    assert build_install_strategy('yarn', tmp_path).name == 'yarn install --frozen-lockfile'
+
+    (tmp_path / 'package.json').write_text('{"packageManager": "yarn@4.1.0"}')
+    strategy = build_install_strategy('yarn', tmp_path, registry='https://r.example')
+    assert strategy.name == 'yarn install --immutable'
+    assert strategy.env == {'YARN_NPM_REGISTRY_SERVER': 'https://r.example'}
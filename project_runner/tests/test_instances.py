@@ -0,0 +1,71 @@
+"""
+运行中项目登记表测试（用 sleep 子进程模拟开发服务器，健康检查用桩函数）
+"""
+
+import subprocess
+import sys
+
+import pytest
+
+from project_runner.instances import InstanceRegistry, RunningInstance, pid_alive, process_start_time
+
+pytestmark = pytest.mark.skipif(sys.platform == 'win32', reason='依赖 POSIX 进程信号')
+
+URL = 'https://github.com/user/repo'
+
+
+@pytest.fixture
+def server():
+    process = subprocess.Popen(['sleep', '30'])
+    yield process
+    process.kill()
+    process.wait()
+
+
+def _instance(project, pid, **options):
+    return RunningInstance(URL, str(project), pid, 'http://localhost:5173/', revision='abc', lockfile_hash='h1',
+                           **options)
+
+
+def test_find_returns_healthy_instance_of_same_version(tmp_path, server):
+    healthy = {'http://localhost:5173/': True}
+    registry = InstanceRegistry(tmp_path / 'instances.json', probe=lambda url: healthy.get(url, False))
+    project = tmp_path / 'repo'
+    registry.register(_instance(project, server.pid))
+
+    found = registry.find('git@github.com:user/repo.git', project, revision='abc', lockfile_hash='h1')
+    assert found is not None and found.pid == server.pid and found.port == 5173
+    assert found.started_at > 0
+    # 提交、锁文件或应用不同时都不复用
+    assert registry.find(URL, project, revision='def', lockfile_hash='h1') is None
+    assert registry.find(URL, project, revision='abc', lockfile_hash='h2') is None
+    assert registry.find(URL, project, app='web', revision='abc', lockfile_hash='h1') is None
+    assert registry.find(URL, tmp_path / 'other', revision='abc', lockfile_hash='h1') is None
+
+    # 进程还在但不响应 HTTP
+    healthy.clear()
+    assert registry.find(URL, project, revision='abc', lockfile_hash='h1') is None
+    assert len(registry.entries()) == 1
+
+    registry.unregister(server.pid)
+    assert registry.entries() == []
+
+
+def test_stale_entries_are_pruned(tmp_path, server):
+    registry = InstanceRegistry(tmp_path / 'instances.json', probe=lambda url: True)
+    exited = subprocess.Popen(['true'])
+    exited.wait()
+    registry.register(_instance(tmp_path / 'a', exited.pid))
+    registry.register(_instance(tmp_path / 'b', server.pid))
+    # 同一项目目录只保留最新登记的实例
+    registry.register(_instance(tmp_path / 'b', server.pid, app=None))
+
+    assert [i.project_path for i in registry.entries()] == [str(tmp_path / 'b')]
+    assert str(tmp_path / 'a') not in (tmp_path / 'instances.json').read_text()
+
+    assert pid_alive(server.pid)
+    start = process_start_time(server.pid)
+    if start is not None:
+        # PID 被复用（启动时间不一致）视为原进程已退出
+        assert not pid_alive(server.pid, start + 1)
+        assert pid_alive(server.pid, start)
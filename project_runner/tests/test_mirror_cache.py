@@ -0,0 +1,76 @@
+"""
+镜像缓存和缓存淘汰测试（需要本机安装 git）
+"""
+
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from project_runner.fs_cache import FileLock, evict_lru, lock_path
+from project_runner.mirror_cache import MirrorCache, mirror_name, normalize_url
+
+pytestmark = pytest.mark.skipif(shutil.which('git') is None, reason='git 未安装')
+
+
+def _git(*args, cwd=None):
+    subprocess.run(
+        ['git', '-c', 'user.name=t', '-c', 'user.email=t@t', *args],
+        cwd=cwd, check=True, capture_output=True
+    )
+
+
+@pytest.fixture
+def upstream(tmp_path):
+    repo = tmp_path / 'upstream'
+    repo.mkdir()
+    _git('init', '-q', '-b', 'main', cwd=repo)
+    (repo / 'README.md').write_text('hello')
+    _git('add', '.', cwd=repo)
+    _git('commit', '-qm', 'init', cwd=repo)
+    return repo
+
+
+def test_normalize_url_variants():
+    assert normalize_url('https://GitHub.com/a/b.git') == 'github.com/a/b'
+    assert normalize_url('git@github.com:a/b.git') == 'github.com/a/b'
+    assert mirror_name('https://github.com/a/b/') == mirror_name('git@github.com:a/b')
+
+
+def test_clone_reuses_mirror(tmp_path, upstream):
+    cache = MirrorCache(tmp_path / 'mirrors')
+    url = upstream.as_uri()
+
+    first = cache.clone(url, tmp_path / 'one')
+    assert first.success and first.created
+    assert (tmp_path / 'one' / 'README.md').read_text() == 'hello'
+
+    (upstream / 'NEW.md').write_text('new')
+    _git('add', '.', cwd=upstream)
+    _git('commit', '-qm', 'second', cwd=upstream)
+
+    second = cache.clone(url, tmp_path / 'two')
+    assert second.success and not second.created
+    assert (tmp_path / 'two' / 'NEW.md').exists()
+
+    origin = subprocess.run(
+        ['git', '-C', str(tmp_path / 'two'), 'remote', 'get-url', 'origin'],
+        capture_output=True, text=True
+    ).stdout.strip()
+    assert origin == url
+
+
+def test_evict_lru_skips_kept_and_locked(tmp_path):
+    root = tmp_path / 'cache'
+    for i, name in enumerate(['old', 'locked', 'new']):
+        entry = root / name
+        entry.mkdir(parents=True)
+        (entry / 'data').write_bytes(b'x' * 100)
+        os.utime(entry, (1000 + i, 1000 + i))
+
+    with FileLock(lock_path(root / 'locked')):
+        removed = evict_lru(root, max_bytes=100, keep=[root / 'new'])
+
+    assert [p.name for p in removed] == ['old']
+    assert (root / 'locked').exists() and (root / 'new').exists()
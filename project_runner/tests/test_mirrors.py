@@ -0,0 +1,110 @@
+"""
+镜像测速和排名测试（使用本地桩服务）
+"""
+
+import http.server
+import json
+import time
+
+import pytest
+
+from project_runner.mirrors import MirrorManager, git_mirror_url, looks_like_network_error
+
+
+BODY = b'x' * (256 * 1024)
+
+
+def _make_handler(requests: list, delay: float = 0.0, status: int = 206):
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            requests.append((self.path, self.headers.get('Range')))
+            if status >= 400:
+                self.send_error(status)
+                return
+            end = int(self.headers['Range'].split('-')[1]) + 1 if self.headers.get('Range') else len(BODY)
+            self.send_response(status)
+            self.send_header('Content-Length', str(end))
+            self.end_headers()
+            # 分 8 段发送，每段之间等待 delay 模拟慢速链路
+            step = end // 8
+            for offset in range(0, end, step):
+                self.wfile.write(BODY[offset:offset + step])
+                self.wfile.flush()
+                time.sleep(delay)
+
+    return Handler
+
+
+@pytest.fixture
+def stubs(serve_http):
+    stubs = {}
+    for name, options in {'fast': {}, 'slow': {'delay': 0.05}, 'broken': {'status': 500}}.items():
+        requests = []
+        stubs[name] = (serve_http(_make_handler(requests, **options)).url, requests)
+    return stubs
+
+
+def test_npm_registries_ranked_by_throughput(stubs, tmp_path):
+    (fast, fast_requests), (slow, _), (broken, _) = stubs['fast'], stubs['slow'], stubs['broken']
+    manager = MirrorManager(npm_mirrors=[broken, fast], npm_origin=slow, cache_path=tmp_path / 'rankings.json',
+                            probe_bytes=32 * 1024)
+    assert manager.npm_registries() == [fast, slow, broken]
+    # 小的 Range 请求，只下载 probe_bytes
+    assert fast_requests == [('/react', 'bytes=0-32767')]
+
+    ranking = manager.rank('npm', {})
+    assert [probe.ok for probe in ranking] == [True, True, False]
+    assert ranking[0].bytes == 32 * 1024 and ranking[2].error == 'HTTP 500'
+
+
+def test_rankings_cached_with_ttl(stubs, tmp_path):
+    (fast, fast_requests), (slow, _) = stubs['fast'], stubs['slow']
+    cache = tmp_path / 'rankings.json'
+    MirrorManager(npm_mirrors=[fast], npm_origin=slow, cache_path=cache).npm_registries()
+    assert len(fast_requests) == 1
+
+    # 新实例（下一次运行）在有效期内直接使用缓存
+    assert MirrorManager(npm_mirrors=[fast], npm_origin=slow, cache_path=cache).npm_registries() == [fast, slow]
+    assert len(fast_requests) == 1
+
+    # 过期后重新探测
+    MirrorManager(npm_mirrors=[fast], npm_origin=slow, cache_path=cache, ttl=0).npm_registries()
+    assert len(fast_requests) == 2
+
+
+def test_report_failure_falls_back(stubs, tmp_path):
+    (fast, _), (slow, _) = stubs['fast'], stubs['slow']
+    cache = tmp_path / 'rankings.json'
+    manager = MirrorManager(npm_mirrors=[fast], npm_origin=slow, cache_path=cache)
+    assert manager.npm_registries()[0] == fast
+    measured_at = next(iter(json.loads(cache.read_text()).values()))['measured_at']
+
+    manager.report_failure('npm', fast, 'ETIMEDOUT')
+    assert manager.npm_registries() == [slow, fast]
+    # 失败标记写入缓存，但不延长原排名的有效期
+    entry = next(iter(json.loads(cache.read_text()).values()))
+    assert entry['measured_at'] == measured_at
+    assert MirrorManager(npm_mirrors=[fast], npm_origin=slow, cache_path=cache).npm_registries() == [slow, fast]
+
+
+def test_git_candidates(stubs, tmp_path):
+    (fast, fast_requests), (slow, _) = stubs['fast'], stubs['slow']
+    manager = MirrorManager(git_mirrors=[f"{fast}/{{owner}}-{{repo}}.git"], git_origin=slow,
+                            cache_path=tmp_path / 'rankings.json')
+    candidates = manager.git_candidates('https://github.com/user/repo')
+    assert candidates == [(f"{fast}/{{owner}}-{{repo}}.git", f"{fast}/user-repo.git"),
+                          (slow, f"{slow}/user/repo.git")]
+    assert fast_requests[0][0] == '/user-repo.git/info/refs?service=git-upload-pack'
+
+    # 只有源站时不探测
+    only_origin = MirrorManager(git_origin=slow, cache_path=None)
+    assert only_origin.git_candidates('https://github.com/user/repo') == [(slow, f"{slow}/user/repo.git")]
+
+
+def test_git_mirror_url_and_errors():
+    assert git_mirror_url('https://gh.example.com/https://github.com/', 'git@github.com:a/b.git') == \
+        'https://gh.example.com/https://github.com/a/b.git'
+    assert looks_like_network_error('npm ERR! code ETIMEDOUT')
+    assert looks_like_network_error("fatal: unable to access 'https://github.com/a/b/': Could not resolve host")
+    assert not looks_like_network_error('npm ERR! `npm ci` can only install packages when your package.json '
+                                        'and package-lock.json are in sync')
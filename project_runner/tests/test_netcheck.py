@@ -0,0 +1,119 @@
+"""
+网络诊断测试（使用本地 HTTP / HTTPS 服务和 CONNECT 代理）
+"""
+
+import asyncio
+import http.server
+import select
+import shutil
+import socket
+import socketserver
+import ssl
+import subprocess
+import time
+
+import pytest
+
+from project_runner.netcheck import Endpoint, NetworkReport, ProbeResult, check_network, probe_endpoint
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    delay = 0.0
+
+    def do_HEAD(self):
+        time.sleep(self.delay)
+        self.send_response(204)
+        self.end_headers()
+
+
+class _SlowHandler(_Handler):
+    delay = 0.3
+
+
+class _ConnectProxy(socketserver.BaseRequestHandler):
+    """只支持 CONNECT 的最小 HTTP 代理"""
+
+    def handle(self):
+        request = b''
+        while b'\r\n\r\n' not in request:
+            request += self.request.recv(1024)
+        host, port = request.split()[1].decode().rsplit(':', 1)
+        with socket.create_connection((host, int(port))) as upstream:
+            self.request.sendall(b'HTTP/1.1 200 Connection established\r\n\r\n')
+            sockets = [self.request, upstream]
+            while True:
+                readable, _, _ = select.select(sockets, [], [], 5)
+                if not readable:
+                    return
+                for sock in readable:
+                    data = sock.recv(65536)
+                    if not data:
+                        return
+                    (upstream if sock is self.request else self.request).sendall(data)
+
+
+@pytest.fixture
+def http_server(serve_http):
+    return serve_http(_Handler).url + '/'
+
+
+@pytest.fixture
+def https_server(tmp_path, serve_http):
+    if shutil.which('openssl') is None:
+        pytest.skip('需要 openssl 生成自签名证书')
+    cert, key = tmp_path / 'cert.pem', tmp_path / 'key.pem'
+    subprocess.run(['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1',
+                    '-subj', '/CN=localhost', '-addext', 'subjectAltName=DNS:localhost',
+                    '-keyout', str(key), '-out', str(cert)], check=True, capture_output=True)
+    server_context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    server_context.load_cert_chain(cert, key)
+    server = serve_http(_Handler, ssl_context=server_context)
+    return server.url + '/', ssl.create_default_context(cafile=str(cert))
+
+
+def test_probe_http(http_server):
+    result = asyncio.run(probe_endpoint(Endpoint('local', http_server)))
+    assert result.ok and result.status == 204
+    assert result.dns_ms is not None and result.connect_ms is not None and result.ttfb_ms is not None
+    assert result.tls_ms is None and result.tunnel_ms is None
+
+
+def test_probe_https_direct_and_through_proxy(https_server, serve_http):
+    url, context = https_server
+    direct = asyncio.run(probe_endpoint(Endpoint('local', url), context=context))
+    assert direct.ok and direct.tls_ms is not None and direct.tunnel_ms is None
+
+    proxy = serve_http(_ConnectProxy, server_class=socketserver.ThreadingTCPServer)
+    proxied = asyncio.run(probe_endpoint(Endpoint('local', url), proxy=proxy.url, context=context))
+    assert proxied.ok and proxied.tunnel_ms is not None and proxied.tls_ms is not None
+
+
+def test_probe_failure_keeps_completed_phases():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    result = asyncio.run(probe_endpoint(Endpoint('closed', f"http://127.0.0.1:{port}/")))
+    assert not result.ok and result.error
+    assert result.dns_ms is not None and result.connect_ms is None
+
+
+def test_probes_run_concurrently(serve_http):
+    endpoints = [Endpoint(f"slow{i}", serve_http(_SlowHandler).url + '/') for i in range(3)]
+    report = asyncio.run(check_network(endpoints, ssh=None))
+    assert all(result.ok for result in report.results)
+    # 三个各需 0.3s 的探测并发执行
+    assert report.seconds < 0.8
+    assert 'slow0' in report.format_table()
+
+
+def test_recommendations():
+    ok = ProbeResult('github', 'https://github.com/', status=200)
+    failed = ProbeResult('github', 'https://github.com/', error='超时')
+    assert NetworkReport([ok], ssh_ms=30).recommend_transport() == 'https'
+    assert NetworkReport([failed], ssh_ms=30).recommend_transport() == 'ssh'
+    assert NetworkReport([failed], ssh_ms=None).recommend_transport() == 'https'
+
+    proxied_failed = ProbeResult('github', 'https://github.com/', proxy='http://127.0.0.1:1', error='拒绝连接')
+    direct_ok = ProbeResult('github-direct', 'https://github.com/', status=200)
+    assert NetworkReport([proxied_failed, direct_ok]).proxy_usable() is False
+    assert NetworkReport([ok]).proxy_usable() is None
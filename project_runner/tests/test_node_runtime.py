@@ -0,0 +1,165 @@
+"""
+Node.js 运行时选择测试（用临时目录模拟 nvm 和运行时缓存，本地 HTTP 服务模拟 nodejs.org）
+"""
+
+import hashlib
+import io
+import json
+import tarfile
+
+import pytest
+
+from project_runner.node_runtime import (
+    NodeRuntime, NodeRuntimeError, download_node, installed_runtimes, node_platform,
+    parse_node_range, read_node_requirement, select_runtime
+)
+
+
+def _fake_node(bin_dir):
+    bin_dir.mkdir(parents=True)
+    (bin_dir / 'node').write_text('#!/bin/sh\n')
+    (bin_dir / 'node').chmod(0o755)
+    return bin_dir
+
+
+@pytest.mark.parametrize('spec, matched, unmatched', [
+    ('18', ['v18.0.0', '18.19.1'], ['v17.9.9', 'v19.0.0']),
+    ('v20.11.0', ['v20.11.0'], ['v20.11.1']),
+    ('18.x', ['v18.3.0'], ['v20.0.0']),
+    ('^18.17', ['v18.17.0', 'v18.20.4'], ['v18.16.9', 'v19.0.0']),
+    ('~18.17.1', ['v18.17.5'], ['v18.18.0', 'v18.17.0']),
+    ('>= 16 <20', ['v16.0.0', 'v19.9.0'], ['v15.14.0', 'v20.0.0']),
+    ('>18', ['v19.0.0'], ['v18.20.0']),
+    ('<=18', ['v18.20.0'], ['v19.0.0']),
+    ('16 - 18', ['v16.1.0', 'v18.20.0'], ['v19.0.0']),
+    ('^16.14 || >=18', ['v16.20.0', 'v22.1.0'], ['v17.0.0', 'v16.13.0']),
+    ('*', ['v4.0.0', 'v23.0.0'], []),
+    ('lts/*', ['v20.11.0', 'v18.0.0'], ['v21.1.0']),
+    ('lts/hydrogen', ['v18.19.0'], ['v20.11.0']),
+])
+def test_parse_node_range(spec, matched, unmatched):
+    node_range = parse_node_range(spec)
+    assert all(node_range.matches(version) for version in matched)
+    assert not any(node_range.matches(version) for version in unmatched)
+
+
+def test_parse_node_range_rejects_unknown():
+    with pytest.raises(NodeRuntimeError):
+        parse_node_range('my-custom-alias')
+    with pytest.raises(NodeRuntimeError):
+        parse_node_range('lts/unknown')
+    # 发布列表中的 LTS 代号优先于偶数大版本的近似判断
+    assert not parse_node_range('lts/*').matches('v22.0.0', lts_name='')
+    assert parse_node_range('lts/iron').matches('v20.11.0', lts_name='Iron')
+
+
+def test_read_node_requirement_precedence(tmp_path):
+    (tmp_path / 'package.json').write_text(json.dumps({'engines': {'node': '>=18'}}))
+    requirement = read_node_requirement(tmp_path)
+    assert (requirement.spec, requirement.source) == ('>=18', 'package.json engines.node')
+
+    (tmp_path / 'package.json').write_text(json.dumps({'engines': {'node': '>=18'}, 'volta': {'node': '20.11.0'}}))
+    assert read_node_requirement(tmp_path).source == 'package.json volta.node'
+
+    (tmp_path / '.node-version').write_text('19\n')
+    assert read_node_requirement(tmp_path).spec == '19'
+
+    (tmp_path / '.nvmrc').write_text('# 项目使用的版本\nlts/hydrogen # 注释\n')
+    requirement = read_node_requirement(tmp_path)
+    assert (requirement.spec, requirement.source) == ('lts/hydrogen', '.nvmrc')
+
+    assert read_node_requirement(tmp_path / 'missing') is None
+
+
+def test_select_runtime_prefers_installed(tmp_path):
+    nvm = tmp_path / 'nvm'
+    cache = tmp_path / 'cache'
+    _fake_node(nvm / 'versions' / 'node' / 'v18.19.0' / 'bin')
+    _fake_node(nvm / 'versions' / 'node' / 'v21.1.0' / 'bin')
+    _fake_node(cache / 'v20.11.0' / 'bin')
+    _fake_node(cache / 'v18.19.0' / 'bin')
+    (cache / 'v22.0.0.partial').mkdir()
+
+    runtimes = installed_runtimes(nvm, cache)
+    assert [(r.version, r.source) for r in runtimes] == [
+        ('v21.1.0', 'nvm'), ('v20.11.0', 'cache'), ('v18.19.0', 'nvm')
+    ]
+
+    current = NodeRuntime('v16.20.0', '/usr/bin', 'path')
+    assert select_runtime(parse_node_range('>=20'), runtimes, current).version == 'v21.1.0'
+    assert select_runtime(parse_node_range('^20.10'), runtimes, current).source == 'cache'
+    assert select_runtime(parse_node_range('16'), runtimes, current) is current
+    assert select_runtime(parse_node_range('14'), runtimes, current) is None
+    # 没有要求时沿用 PATH 中的 node；没有 node 时优先 LTS
+    assert select_runtime(None, runtimes, current) is current
+    assert select_runtime(None, runtimes).version == 'v20.11.0'
+
+    env = runtimes[1].env({'PATH': '/usr/bin'})
+    assert env['PATH'] == f"{cache / 'v20.11.0' / 'bin'}:/usr/bin"
+    assert current.env({'PATH': '/usr/bin'})['PATH'] == '/usr/bin'
+
+
+def _node_tarball(version: str, platform_name: str) -> bytes:
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode='w:gz') as tar:
+        top = f"node-{version}-{platform_name}"
+        script = b'#!/bin/sh\necho ' + version.encode() + b'\n'
+        info = tarfile.TarInfo(f"{top}/bin/node")
+        info.size, info.mode = len(script), 0o755
+        tar.addfile(info, io.BytesIO(script))
+        link = tarfile.TarInfo(f"{top}/bin/npm")
+        link.type, link.linkname = tarfile.SYMTYPE, '../lib/node_modules/npm/bin/npm-cli.js'
+        tar.addfile(link)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def dist(tmp_path, serve_http):
+    """本地的 nodejs.org/dist"""
+    platform_name, files_key = node_platform()
+    root = tmp_path / 'dist'
+    releases = [
+        {'version': 'v21.1.0', 'lts': False, 'files': [files_key]},
+        {'version': 'v20.11.0', 'lts': 'Iron', 'files': [files_key]},
+        {'version': 'v20.12.0', 'lts': 'Iron', 'files': ['win-x64-zip']},
+        {'version': 'v18.19.0', 'lts': 'Hydrogen', 'files': [files_key]},
+    ]
+    root.mkdir()
+    (root / 'index.json').write_text(json.dumps(releases))
+    for release in releases:
+        version = release['version']
+        filename = f"node-{version}-{platform_name}.tar.gz"
+        data = _node_tarball(version, platform_name)
+        (root / version).mkdir()
+        (root / version / filename).write_bytes(data)
+        (root / version / 'SHASUMS256.txt').write_text(f"{hashlib.sha256(data).hexdigest()}  {filename}\n")
+
+    return root, serve_http(directory=root).url
+
+
+def test_download_node_picks_matching_release(dist, tmp_path):
+    root, mirror = dist
+    cache = tmp_path / 'runtimes'
+
+    runtime = download_node(None, cache, mirror)
+    # 没有要求时下载最新的 LTS（跳过没有当前平台二进制包的版本）
+    assert (runtime.version, runtime.source) == ('v20.11.0', 'cache')
+    assert (cache / 'v20.11.0' / 'bin' / 'node').read_text() == '#!/bin/sh\necho v20.11.0\n'
+    assert (cache / 'v20.11.0' / 'bin' / 'npm').is_symlink()
+
+    assert download_node(parse_node_range('^18'), cache, mirror).version == 'v18.19.0'
+    assert [r.version for r in installed_runtimes(tmp_path / 'no-nvm', cache)] == ['v20.11.0', 'v18.19.0']
+
+    with pytest.raises(NodeRuntimeError):
+        download_node(parse_node_range('14'), cache, mirror)
+
+
+def test_download_node_verifies_checksum(dist, tmp_path):
+    root, mirror = dist
+    platform_name, _ = node_platform()
+    (root / 'v21.1.0' / f"node-v21.1.0-{platform_name}.tar.gz").write_bytes(b'corrupted')
+    cache = tmp_path / 'runtimes'
+
+    with pytest.raises(NodeRuntimeError, match='校验失败'):
+        download_node(parse_node_range('21'), cache, mirror)
+    assert not (cache / 'v21.1.0').exists() and not (cache / 'v21.1.0.partial').exists()
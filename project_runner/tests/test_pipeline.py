@@ -0,0 +1,71 @@
+"""
+流水线执行器和包管理器预测测试
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from project_runner.lockfile import predict_package_manager
+from project_runner.pipeline import Pipeline
+
+
+def test_independent_steps_overlap():
+    pipeline = Pipeline()
+    pipeline.add('clone', lambda: time.sleep(0.2))
+    pipeline.add('provision', lambda: time.sleep(0.2))
+    pipeline.add('install', lambda: True, deps=['clone', 'provision'])
+
+    assert pipeline.run()
+    results = pipeline.results
+    assert results['provision'].start < results['clone'].end
+    assert results['install'].start >= max(results['clone'].end, results['provision'].end)
+
+
+def test_failure_skips_dependents():
+    def broken():
+        raise RuntimeError('boom')
+
+    pipeline = Pipeline()
+    pipeline.add('clone', lambda: False)
+    pipeline.add('provision', broken)
+    pipeline.add('install', lambda: True, deps=['clone', 'provision'])
+    pipeline.add('run', lambda: True, deps=['install'])
+
+    assert not pipeline.run()
+    assert pipeline.results['clone'].status == 'failed'
+    assert pipeline.results['provision'].error == 'boom'
+    assert pipeline.results['run'].status == 'skipped'
+    assert 'install' in pipeline.format_timeline()
+
+
+def test_add_rejects_unknown_dependency():
+    with pytest.raises(ValueError):
+        Pipeline().add('install', lambda: True, deps=['clone'])
+
+
+def test_predict_package_manager():
+    assert predict_package_manager('Python', ['package.json', 'pnpm-lock.yaml']) == 'pnpm'
+    assert predict_package_manager(None, ['package.json']) == 'npm'
+    assert predict_package_manager('TypeScript', []) is None
+    assert predict_package_manager('TypeScript', None) == 'npm'
+    assert predict_package_manager('Go', None) is None
+
+
+def test_coroutine_steps_share_the_event_loop():
+    async def probe():
+        await asyncio.sleep(0.2)
+
+    pipeline = Pipeline(max_workers=1)
+    pipeline.add('probe-a', probe)
+    pipeline.add('probe-b', probe)
+    pipeline.add('clone', lambda: time.sleep(0.2))
+    pipeline.add('install', lambda: True, deps=['probe-a', 'probe-b', 'clone'])
+
+    assert asyncio.run(pipeline.run_async())
+    # 三个步骤的执行区间两两重叠：协程步骤没有占用唯一的线程池 worker
+    results = [pipeline.results[name] for name in ('probe-a', 'probe-b', 'clone')]
+    assert all(a.start < b.end and b.start < a.end
+               for i, a in enumerate(results) for b in results[i + 1:])
+    assert pipeline.results['install'].start >= max(r.end for r in results)
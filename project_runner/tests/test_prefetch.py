@@ -0,0 +1,84 @@
+"""
+依赖预取测试（本地 HTTP 服务器模拟 raw.githubusercontent.com）
+"""
+
+import json
+
+import pytest
+
+from project_runner import prefetch
+from project_runner.prefetch import Prefetcher, build_prefetch_command, npm_tarball_urls
+
+
+@pytest.fixture
+def raw_server(tmp_path, monkeypatch, serve_http):
+    root = tmp_path / 'raw'
+    repo = root / 'owner' / 'app' / 'HEAD'
+    repo.mkdir(parents=True)
+    (repo / 'package.json').write_text('{"name": "app"}')
+    (repo / 'pnpm-lock.yaml').write_text("lockfileVersion: '9.0'\n")
+
+    server = serve_http(directory=root)
+    monkeypatch.setattr(prefetch, 'RAW_URL', server.url + '/{owner}/{repo}/{ref}/{path}')
+
+
+def test_prefetch_downloads_only_manifests(raw_server, tmp_path):
+    calls = []
+
+    def fake_run(args, cwd):
+        calls.append((args, sorted(p.name for p in cwd.iterdir())))
+        return 0, ''
+
+    prefetcher = Prefetcher('https://github.com/owner/app')
+    result = prefetcher.run('pnpm', fake_run)
+
+    assert result.success
+    args, files = calls[0]
+    assert args[:2] == ['pnpm', 'fetch']
+    assert files == ['package.json', 'pnpm-lock.yaml']
+    work_dir = prefetcher.work_dir
+    prefetcher.cleanup()
+    assert not work_dir.exists()
+
+
+def test_prefetch_without_lockfile(raw_server):
+    prefetcher = Prefetcher('https://github.com/owner/app')
+    result = prefetcher.run('npm', lambda args, cwd: (0, ''))
+    prefetcher.cleanup()
+    assert not result.success
+
+
+def test_yarn_berry_is_not_prefetched(tmp_path):
+    (tmp_path / '.yarnrc.yml').write_text('nodeLinker: node-modules\n')
+    assert build_prefetch_command('yarn', tmp_path) is None
+    assert build_prefetch_command('npm', tmp_path) is None
+    assert build_prefetch_command('bun', tmp_path) is None
+
+
+def test_npm_prefetch_adds_lockfile_tarballs(tmp_path):
+    (tmp_path / 'package-lock.json').write_text(json.dumps({
+        'lockfileVersion': 3,
+        'packages': {
+            '': {'name': 'app'},
+            'node_modules/react': {'resolved': 'https://registry.npmjs.org/react/-/react-18.3.1.tgz'},
+            'node_modules/a/node_modules/react': {'resolved': 'https://registry.npmjs.org/react/-/react-18.3.1.tgz'},
+            'node_modules/ui': {'resolved': 'packages/ui', 'link': True},
+            'node_modules/dep': {'resolved': 'git+ssh://git@github.com/a/dep.git#abc'},
+            'node_modules/x/node_modules/y': {'inBundle': True},
+        },
+    }))
+    assert build_prefetch_command('npm', tmp_path) == [
+        'npm', 'cache', 'add', 'https://registry.npmjs.org/react/-/react-18.3.1.tgz'
+    ]
+    assert build_prefetch_command('npm', tmp_path, registry='https://mirror.example/npm')[-1] == (
+        'https://mirror.example/npm/react/-/react-18.3.1.tgz'
+    )
+
+    (tmp_path / 'package-lock.json').write_text(json.dumps({
+        'lockfileVersion': 1,
+        'dependencies': {'a': {'resolved': 'https://registry.npmjs.org/a/-/a-1.0.0.tgz',
+                               'dependencies': {'b': {'resolved': 'https://registry.npmjs.org/b/-/b-2.0.0.tgz'}}}},
+    }))
+    assert npm_tarball_urls(tmp_path / 'package-lock.json') == [
+        'https://registry.npmjs.org/a/-/a-1.0.0.tgz', 'https://registry.npmjs.org/b/-/b-2.0.0.tgz'
+    ]
@@ -0,0 +1,54 @@
+"""
+流式执行子进程测试
+"""
+
+import sys
+import threading
+import time
+
+from project_runner.process import RingBuffer, run_streaming
+
+
+def test_ring_buffer_keeps_tail():
+    buffer = RingBuffer(max_chars=10)
+    for i in range(100):
+        buffer.append(f"line{i}\n")
+    assert buffer.size <= 10 and buffer.dropped > 0
+    assert buffer.text() == 'line99\n'
+
+    buffer = RingBuffer(max_chars=4)
+    buffer.append('abcdefgh')
+    assert buffer.text() == 'efgh'
+
+
+def test_captures_tail_and_writes_full_log(tmp_path):
+    log = tmp_path / 'run.log'
+    script = "import sys\nfor i in range(5000): print('x' * 50, i)\nsys.stderr.write('boom\\n')\nsys.exit(3)"
+    result = run_streaming([sys.executable, '-c', script], shell=False, log_path=log, buffer_chars=1024)
+    assert result.returncode == 3
+    assert result.truncated and len(result.stdout) <= 1024
+    assert result.stdout.rstrip().endswith(' 4999')
+    assert result.stderr == 'boom\n'
+    assert log.read_text().count('\n') > 5000
+
+
+def test_echo_streams_lines(capsys):
+    run_streaming([sys.executable, '-c', "print('hello'); print('progress 50%', end='\\r')"],
+                  shell=False, echo=True, prefix='> ')
+    assert capsys.readouterr().out.splitlines() == ['> hello', '> progress 50%']
+
+
+def test_timeout_kills_process_group():
+    start = time.perf_counter()
+    # shell 启动的 sleep 是孙进程，只终止 shell 时管道不会关闭
+    result = run_streaming('sleep 30 & wait', timeout=0.5)
+    assert result.timed_out and result.returncode != 0
+    assert time.perf_counter() - start < 10
+    assert '超时' in result.stderr
+
+
+def test_cancel():
+    cancel = threading.Event()
+    threading.Timer(0.3, cancel.set).start()
+    result = run_streaming('sleep 30', cancel=cancel)
+    assert result.cancelled and result.returncode != 0
@@ -0,0 +1,74 @@
+"""
+阶段分析器测试
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+from project_runner.process import run_streaming
+from project_runner.profiler import Profiler, _format_size
+
+
+BUSY = 'import time; data = bytearray(64 * 1024 * 1024); end = time.process_time() + 0.4\nwhile time.process_time() < end: pass'
+
+linux_only = pytest.mark.skipif(not Path('/proc/self/stat').exists(), reason='需要 procfs')
+
+
+@linux_only
+def test_child_process_tree_is_measured():
+    profiler = Profiler(interval=0.05)
+    with profiler.phase('install', scope='user/repo'):
+        # shell 依次启动两个子进程：已回收的子进程的 CPU 时间通过 cutime 计入
+        command = f"{sys.executable} -c '{BUSY}'; {sys.executable} -c '{BUSY}'"
+        result = run_streaming(command, on_start=profiler.attach)
+    profiler.close()
+    assert result.returncode == 0
+
+    record = profiler.records[0]
+    assert record.wall_seconds >= 0.8
+    assert 0.7 <= record.children_cpu_seconds <= record.cpu_seconds
+    assert record.peak_rss_bytes >= 64 * 1024 * 1024
+    assert record.processes >= 2
+    assert record.disk_write_bytes is not None and record.net_rx_bytes is not None
+
+
+def test_nested_phases_and_reports(tmp_path):
+    profiler = Profiler(interval=0.05)
+    with profiler.phase('install'):
+        with profiler.phase('toolchain-probe'):
+            pass
+        outer = profiler.start('startup')
+        inner = profiler.start('probe')
+        # 结束外层阶段时，未结束的嵌套阶段一起结束
+        profiler.stop(outer)
+        profiler.stop(outer)
+    profiler.close()
+
+    names = [(r.name, r.parent, r.depth) for r in profiler.records]
+    assert names == [('install', None, 0), ('toolchain-probe', 'install', 1),
+                     ('startup', 'install', 1), ('probe', 'startup', 2)]
+    assert inner.end is not None and inner.end <= outer.end
+
+    profiler.write_report(tmp_path / 'profile.json', url='https://github.com/user/repo')
+    report = json.loads((tmp_path / 'profile.json').read_text(encoding='utf-8'))
+    assert report['url'] == 'https://github.com/user/repo'
+    assert [phase['name'] for phase in report['phases']] == ['install', 'toolchain-probe', 'startup', 'probe']
+    assert report['totals']['wall_seconds'] >= report['phases'][0]['wall_seconds']
+
+    profiler.write_trace(tmp_path / 'trace.json')
+    events = json.loads((tmp_path / 'trace.json').read_text(encoding='utf-8'))['traceEvents']
+    complete = [event for event in events if event['ph'] == 'X']
+    assert [event['name'] for event in complete] == ['install', 'toolchain-probe', 'startup', 'probe']
+    assert all(event['dur'] >= 0 and 'cpu_seconds' in event['args'] for event in complete)
+
+    summary = profiler.format_summary()
+    assert 'install' in summary and '    probe' in summary
+
+
+def test_format_size():
+    assert _format_size(None) == '-'
+    assert _format_size(512) == '512 B'
+    assert _format_size(3 * 1024 ** 2) == '3.0 MiB'
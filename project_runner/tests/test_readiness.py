@@ -0,0 +1,71 @@
+"""
+启动脚本选择和就绪检测测试
+"""
+
+import asyncio
+import os
+import sys
+
+from project_runner.readiness import ReadinessWatcher, find_urls, listening_ports, select_script, serve
+
+
+SERVER = '''
+import http.server, socketserver, sys, time
+time.sleep(0.3)
+with socketserver.TCPServer(("127.0.0.1", 0), http.server.SimpleHTTPRequestHandler) as httpd:
+    print(f"  \\x1b[32m➜\\x1b[0m  Local:   http://localhost:{httpd.server_address[1]}/", flush=True)
+    httpd.serve_forever()
+'''
+
+
+def test_select_script():
+    assert select_script({'build': 'vite build', 'start': 'node server.js', 'dev': 'vite'}) == 'dev'
+    assert select_script({'serve': 'vue-cli-service serve', 'lint': 'eslint .'}) == 'serve'
+    assert select_script({'build': 'tsc', 'dev:web': 'vite --port 3000'}) == 'dev:web'
+    assert select_script({'build': 'vite build', 'web': 'next dev'}) == 'web'
+    assert select_script({'build': 'tsc', 'test': 'jest'}) is None
+
+
+def test_find_urls():
+    text = "\x1b[1mNetwork: http://192.168.1.2:5173/\x1b[0m\nListening on http://0.0.0.0:3000\n"
+    assert find_urls(text) == ['http://localhost:3000/']
+    assert find_urls('ready - started server on [::]:3000, url: http://localhost:3000') == ['http://localhost:3000/']
+    assert find_urls('Serving HTTP on 0.0.0.0 port 8000 (http://0.0.0.0:8000/) ...') == ['http://localhost:8000/']
+    assert find_urls('Open http://localhost:5173/app/.') == ['http://localhost:5173/app/']
+
+
+def test_watcher_joins_split_output():
+    watcher = ReadinessWatcher(expected_port=4000, probe=lambda url: url.endswith(':4000/'))
+    watcher.feed('Local: http://local')
+    watcher.feed('host:5173/\n')
+    assert watcher.candidates() == ['http://localhost:5173/', 'http://localhost:4000/']
+    assert watcher.check() == 'http://localhost:4000/'
+
+
+def test_serve_reports_time_to_ready(tmp_path):
+    ready = []
+    result = asyncio.run(serve(
+        [sys.executable, '-c', SERVER], cwd=tmp_path, ready_timeout=10, keep_running=False,
+        on_ready=lambda url, seconds: ready.append((url, seconds))
+    ))
+    assert result.ready and result.url.startswith('http://localhost:')
+    assert ready == [(result.url, result.seconds_to_ready)]
+    assert 0.3 <= result.seconds_to_ready < 10
+    # 就绪后立即终止了整个进程组
+    assert result.process.cancelled
+
+
+def test_serve_reports_early_exit():
+    result = asyncio.run(serve([sys.executable, '-c', 'import sys; sys.exit("boom")'], ready_timeout=5))
+    assert not result.ready and result.process.returncode == 1
+    assert 'boom' in result.process.stderr
+
+
+def test_listening_ports_from_proc():
+    if not os.path.exists('/proc/net/tcp'):
+        return
+    import socket
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        sock.listen()
+        assert sock.getsockname()[1] in listening_ports(os.getpgid(0))
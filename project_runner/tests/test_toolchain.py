@@ -0,0 +1,81 @@
+"""
+工具链清单测试（用临时目录模拟 ~/.nvm）
+"""
+
+import os
+import sys
+
+import pytest
+
+from project_runner.toolchain import load_inventory, resolve_nvm_alias
+
+pytestmark = pytest.mark.skipif(sys.platform == 'win32', reason='依赖 shell 脚本')
+
+
+def _fake_node(root, version):
+    bin_dir = root / 'versions' / 'node' / version / 'bin'
+    bin_dir.mkdir(parents=True)
+    for name in ('node', 'npm'):
+        script = bin_dir / name
+        script.write_text(f'#!/bin/sh\necho {version}\n')
+        script.chmod(0o755)
+    return bin_dir
+
+
+def test_resolve_nvm_alias(tmp_path):
+    versions = ['v21.1.0', 'v20.11.0', 'v18.19.0']
+    (tmp_path / 'alias').mkdir()
+    (tmp_path / 'alias' / 'default').write_text('lts/*\n')
+    (tmp_path / 'alias' / 'work').write_text('18')
+
+    assert resolve_nvm_alias('default', versions, tmp_path) == 'v20.11.0'
+    assert resolve_nvm_alias('work', versions, tmp_path) == 'v18.19.0'
+    assert resolve_nvm_alias('node', versions, tmp_path) == 'v21.1.0'
+    assert resolve_nvm_alias('16', versions, tmp_path) is None
+
+
+def test_inventory_resolves_nvm_and_caches(tmp_path, monkeypatch):
+    nvm = tmp_path / 'nvm'
+    (nvm / 'alias').mkdir(parents=True)
+    (nvm / 'alias' / 'default').write_text('18')
+    (nvm / 'nvm.sh').write_text('')
+    _fake_node(nvm, 'v20.1.0')
+    bin_dir = _fake_node(nvm, 'v18.2.0')
+    empty_path = tmp_path / 'bin'
+    empty_path.mkdir()
+    monkeypatch.setenv('PATH', str(empty_path))
+    cache = tmp_path / 'toolchain.json'
+
+    first = load_inventory(cache, root=nvm)
+    assert not first.from_cache
+    assert first.path('npm') == str(bin_dir / 'npm')
+    assert first.tools['node'].source == 'nvm' and first.tools['node'].version == '18.2.0'
+    assert first.has('nvm') and not first.has('git')
+    assert first.env()['PATH'].split(os.pathsep)[0] == str(bin_dir)
+
+    assert load_inventory(cache, root=nvm).from_cache
+
+    # 修改默认版本会改变 alias 目录的 mtime，缓存失效
+    (nvm / 'alias' / 'default').write_text('20')
+    os.utime(nvm / 'alias', (1, 1))
+    third = load_inventory(cache, root=nvm)
+    assert not third.from_cache
+    assert third.tools['node'].version == '20.1.0'
+
+
+def test_inventory_uses_search_path_without_touching_environ(tmp_path, monkeypatch):
+    empty_path = tmp_path / 'bin'
+    empty_path.mkdir()
+    brew_bin = tmp_path / 'brew'
+    brew_bin.mkdir()
+    script = brew_bin / 'git'
+    script.write_text('#!/bin/sh\necho git version 2.40.1\n')
+    script.chmod(0o755)
+    monkeypatch.setenv('PATH', str(empty_path))
+    search_path = os.pathsep.join([str(brew_bin), str(empty_path)])
+
+    inventory = load_inventory(None, root=tmp_path / 'nvm', search_path=search_path)
+    assert inventory.path('git') == str(script)
+    assert inventory.tools['git'].version == '2.40.1'
+    assert os.environ['PATH'] == str(empty_path)
+    assert not load_inventory(None, root=tmp_path / 'nvm').has('git')
@@ -0,0 +1,113 @@
+"""
+增量更新和锁文件指纹测试（需要本机安装 git）
+"""
+
+import shutil
+import socket
+import subprocess
+import time
+
+import pytest
+
+from project_runner.lockfile import is_install_fresh, lockfile_hash, write_stamp
+from project_runner.update import check_remote, local_revision, remote_revision, update_checkout
+
+
+def _git(*args, cwd=None):
+    subprocess.run(
+        ['git', '-c', 'user.name=t', '-c', 'user.email=t@t', *args],
+        cwd=cwd, check=True, capture_output=True
+    )
+
+
+def test_lockfile_stamp_tracks_lockfile(tmp_path):
+    (tmp_path / 'package.json').write_text('{"scripts": {"dev": "vite"}}')
+    (tmp_path / 'package-lock.json').write_text('{"v": 1}')
+    (tmp_path / 'node_modules').mkdir()
+    assert not is_install_fresh(tmp_path)
+
+    write_stamp(tmp_path, lockfile_hash(tmp_path), 'npm')
+    assert is_install_fresh(tmp_path)
+
+    (tmp_path / 'package-lock.json').write_text('{"v": 2}')
+    assert not is_install_fresh(tmp_path)
+
+
+def test_hash_without_lockfile_ignores_scripts(tmp_path):
+    (tmp_path / 'package.json').write_text('{"dependencies": {"a": "1"}, "scripts": {}}')
+    before = lockfile_hash(tmp_path)
+    (tmp_path / 'package.json').write_text('{"dependencies": {"a": "1"}, "scripts": {"x": "y"}}')
+    assert lockfile_hash(tmp_path) == before
+
+
+@pytest.mark.skipif(shutil.which('git') is None, reason='git 未安装')
+def test_update_checkout_resets_and_keeps_node_modules(tmp_path):
+    upstream = tmp_path / 'upstream'
+    upstream.mkdir()
+    _git('init', '-q', '-b', 'main', cwd=upstream)
+    (upstream / 'index.js').write_text('v1')
+    _git('add', '.', cwd=upstream)
+    _git('commit', '-qm', 'v1', cwd=upstream)
+
+    checkout = tmp_path / 'checkout'
+    _git('clone', '-q', '--depth', '1', upstream.as_uri(), str(checkout))
+    (checkout / 'node_modules').mkdir()
+    (checkout / 'node_modules' / 'dep.js').write_text('dep')
+    (checkout / 'dist').mkdir()
+    (checkout / 'index.js').write_text('local edit')
+
+    (upstream / 'index.js').write_text('v2')
+    _git('commit', '-qam', 'v2', cwd=upstream)
+
+    assert check_remote(checkout, upstream.as_uri())[0]
+    assert not check_remote(checkout, 'https://github.com/other/repo')[0]
+
+    result = update_checkout(checkout)
+    assert result.success and result.changed
+    assert (checkout / 'index.js').read_text() == 'v2'
+    assert not (checkout / 'dist').exists()
+    assert (checkout / 'node_modules' / 'dep.js').exists()
+
+
+@pytest.mark.skipif(shutil.which('git') is None, reason='git 未安装')
+def test_local_and_remote_revision(tmp_path):
+    upstream = tmp_path / 'upstream'
+    upstream.mkdir()
+    _git('init', '-q', '-b', 'main', cwd=upstream)
+    (upstream / 'index.js').write_text('v1')
+    _git('add', '.', cwd=upstream)
+    _git('commit', '-qm', 'v1', cwd=upstream)
+    _git('tag', '-a', 'v1.0.0', '-m', 'release', cwd=upstream)
+    checkout = tmp_path / 'checkout'
+    _git('clone', '-q', upstream.as_uri(), str(checkout))
+    head = local_revision(checkout)
+    assert head and len(head) == 40
+
+    # 远程有新提交；feature/main 分支不应被当作 main
+    (upstream / 'index.js').write_text('v2')
+    _git('commit', '-qam', 'v2', cwd=upstream)
+    _git('branch', 'feature/main', 'v1.0.0', cwd=upstream)
+    latest = remote_revision(checkout)
+    assert latest not in (None, head)
+    assert remote_revision(checkout, 'main') == latest
+    assert remote_revision(checkout, 'v1.0.0') == head
+    assert remote_revision(checkout, 'missing') is None
+    assert local_revision(tmp_path) is None
+
+
+@pytest.mark.skipif(shutil.which('git') is None, reason='git 未安装')
+def test_remote_revision_times_out(tmp_path):
+    # 接受连接但从不回复的远程
+    listener = socket.socket()
+    listener.bind(('127.0.0.1', 0))
+    listener.listen()
+    checkout = tmp_path / 'checkout'
+    _git('init', '-q', str(checkout))
+    _git('remote', 'add', 'origin', f"http://127.0.0.1:{listener.getsockname()[1]}/repo.git", cwd=checkout)
+
+    start = time.perf_counter()
+    try:
+        assert remote_revision(checkout, 'main', timeout=0.5) is None
+    finally:
+        listener.close()
+    assert time.perf_counter() - start < 5
@@ -0,0 +1,70 @@
+"""
+monorepo 工作区分析测试
+"""
+
+import json
+
+from project_runner.install import build_install_strategy
+from project_runner.workspace import build_run_command, load_workspace, parse_pnpm_workspace
+
+
+def _package(root, path, name, scripts=None, dependencies=None):
+    directory = root / path
+    directory.mkdir(parents=True, exist_ok=True)
+    (directory / 'package.json').write_text(json.dumps({
+        'name': name, 'scripts': scripts or {}, 'dependencies': dependencies or {}
+    }))
+
+
+def _monorepo(root):
+    (root / 'pnpm-workspace.yaml').write_text(
+        "packages:\n  - 'apps/*'\n  - \"packages/*\"  # 共享包\n  - '!packages/legacy'\n"
+    )
+    _package(root, '.', 'root', {'dev': 'turbo dev'})
+    _package(root, 'apps/web', 'web', {'dev': 'vite'}, {'@acme/ui': 'workspace:*', 'react': '^18'})
+    _package(root, 'apps/docs', 'docs', {'dev': 'vitepress dev'}, {'@acme/ui': 'workspace:*'})
+    _package(root, 'packages/ui', '@acme/ui', {'build': 'tsc'}, {'@acme/utils': 'workspace:*'})
+    _package(root, 'packages/utils', '@acme/utils', {'build': 'tsc'})
+    _package(root, 'packages/legacy', '@acme/legacy', {'start': 'node .'})
+
+
+def test_parse_pnpm_workspace():
+    text = "# comment\npackages:\n  - apps/*\n  - 'packages/**'\ncatalog:\n  react: ^18\n"
+    assert parse_pnpm_workspace(text) == ['apps/*', 'packages/**']
+
+
+def test_pick_app_and_closure(tmp_path):
+    _monorepo(tmp_path)
+    workspace = load_workspace(tmp_path)
+    assert set(workspace.packages) == {'web', 'docs', '@acme/ui', '@acme/utils'}
+
+    app = workspace.pick_app()
+    assert app.name == 'web' and app.run_script == 'dev'
+    assert workspace.closure('web') == ['web', '@acme/ui', '@acme/utils']
+    assert workspace.pick_app('apps/docs').name == 'docs'
+    assert workspace.pick_app('missing') is None
+
+
+def test_npm_workspaces_field(tmp_path):
+    (tmp_path / 'package.json').write_text(json.dumps({'workspaces': {'packages': ['app', 'lib']}}))
+    _package(tmp_path, 'app', 'app', {'start': 'node server.js'}, {'lib': '*'})
+    _package(tmp_path, 'lib', 'lib')
+    workspace = load_workspace(tmp_path)
+    assert workspace.pick_app().name == 'app'
+
+    strategy = build_install_strategy('npm', tmp_path, workspace_packages=workspace.closure('app'))
+    assert strategy.args[-2:] == ['--workspace=app', '--workspace=lib']
+
+
+def test_not_a_monorepo(tmp_path):
+    _package(tmp_path, '.', 'single', {'dev': 'vite'})
+    assert load_workspace(tmp_path) is None
+
+
+def test_filtered_commands(tmp_path):
+    (tmp_path / 'pnpm-lock.yaml').write_text('')
+    strategy = build_install_strategy('pnpm', tmp_path, workspace_packages=['web', '@acme/ui'])
+    assert '--filter=web...' in strategy.args
+    assert build_run_command('pnpm', 'web', 'dev') == ['pnpm', '--filter', 'web', 'run', 'dev']
+    assert build_run_command('yarn', 'web', 'dev') == ['yarn', 'workspace', 'web', 'run', 'dev']
+    assert build_run_command('npm', 'web', 'start') == ['npm', 'run', 'start', '--workspace=web']
@@ -0,0 +1,296 @@
+"""
+工具链清单
+
+一次性并发探测 git、brew、nvm、node、npm、pnpm、yarn，解析出可执行文件的绝对路径
+（包括 nvm 管理的 Node 版本，直接读取 ~/.nvm 目录而不 source nvm.sh）。
+探测结果缓存到磁盘，PATH 或相关目录的修改时间变化时失效。
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .fs_cache import DEFAULT_CACHE_ROOT
+
+
+TOOLS = ('git', 'brew', 'nvm', 'node', 'npm', 'pnpm', 'yarn')
+
+# 由 Node 版本提供的工具，PATH 中找不到时到 nvm 的默认版本中查找
+NODE_TOOLS = ('node', 'npm', 'pnpm', 'yarn')
+
+DEFAULT_CACHE_PATH = DEFAULT_CACHE_ROOT / 'toolchain.json'
+
+CACHE_VERSION = 1
+
+_VERSION_PATTERN = re.compile(r'v?(\d+(?:\.\d+)*)')
+
+
+@dataclass
+class ToolInfo:
+    """单个工具的探测结果"""
+    path: str
+    version: Optional[str] = None
+    source: str = 'path'  # path / nvm
+
+
+@dataclass
+class ToolchainInventory:
+    """工具链清单"""
+    tools: Dict[str, ToolInfo] = field(default_factory=dict)
+    # nvm 默认 Node 版本的 bin 目录（需要加入 PATH，npm 等脚本依赖 node）
+    node_bin_dir: Optional[str] = None
+    probe_seconds: float = 0.0
+    from_cache: bool = False
+
+    def has(self, name: str) -> bool:
+        return name in self.tools
+
+    def path(self, name: str) -> Optional[str]:
+        info = self.tools.get(name)
+        return info.path if info else None
+
+    def env(self, base: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+        """
+        运行命令用的环境变量：nvm 的 Node bin 目录放在 PATH 最前面
+
+        Args:
+            base: 基础环境变量，默认为当前进程的环境变量
+
+        Returns:
+            新的环境变量字典
+        """
+        env = dict(os.environ if base is None else base)
+        if self.node_bin_dir:
+            paths = env.get('PATH', '').split(os.pathsep)
+            if self.node_bin_dir not in paths:
+                env['PATH'] = os.pathsep.join([self.node_bin_dir, *filter(None, paths)])
+        return env
+
+    def describe(self) -> str:
+        """一行摘要，例如: git 2.43.0, node 20.11.0 (nvm), pnpm 9.1.0"""
+        parts = []
+        for name in TOOLS:
+            info = self.tools.get(name)
+            if info:
+                version = f" {info.version}" if info.version else ""
+                source = " (nvm)" if info.source == 'nvm' else ""
+                parts.append(f"{name}{version}{source}")
+        return ', '.join(parts) or '无'
+
+
+def nvm_dir() -> Path:
+    """nvm 安装目录"""
+    return Path(os.environ.get('NVM_DIR') or Path.home() / '.nvm')
+
+
+def _version_key(version: str) -> tuple:
+    match = _VERSION_PATTERN.match(version)
+    if not match:
+        return ()
+    return tuple(int(part) for part in match.group(1).split('.'))
+
+
+def installed_node_versions(root: Optional[Path] = None) -> List[str]:
+    """nvm 已安装的 Node 版本（从新到旧）"""
+    versions_dir = (root or nvm_dir()) / 'versions' / 'node'
+    if not versions_dir.is_dir():
+        return []
+    versions = [p.name for p in versions_dir.iterdir() if (p / 'bin' / 'node').exists()]
+    return sorted(versions, key=_version_key, reverse=True)
+
+
+def resolve_nvm_alias(alias: str, versions: List[str], root: Optional[Path] = None, depth: int = 0) -> Optional[str]:
+    """
+    把 nvm 别名解析为已安装的版本（不执行 nvm.sh）
+
+    支持 node / stable / lts/*、版本前缀（如 18、v20.1）以及 ~/.nvm/alias 下的自定义别名。
+
+    Args:
+        alias: 别名或版本
+        versions: 已安装的版本（从新到旧）
+        root: nvm 目录
+
+    Returns:
+        已安装的版本目录名，例如 v20.11.0
+    """
+    alias = alias.strip()
+    if not alias or not versions or depth > 5:
+        return None
+    if alias in ('node', 'stable'):
+        return versions[0]
+    if alias == 'lts/*':
+        # 离线无法得知 LTS 列表，取偶数大版本中最新的一个
+        lts = [v for v in versions if _version_key(v) and _version_key(v)[0] % 2 == 0]
+        return (lts or versions)[0]
+
+    alias_file = (root or nvm_dir()) / 'alias' / alias
+    if alias_file.is_file():
+        target = alias_file.read_text(encoding='utf-8').strip()
+        if target != alias:
+            return resolve_nvm_alias(target, versions, root, depth + 1)
+
+    wanted = _version_key(alias)
+    if not wanted:
+        return None
+    for version in versions:
+        if _version_key(version)[:len(wanted)] == wanted:
+            return version
+    return None
+
+
+def nvm_default_bin(root: Optional[Path] = None) -> Optional[Path]:
+    """nvm 默认 Node 版本的 bin 目录（没有默认别名时取最新版本）"""
+    root = root or nvm_dir()
+    versions = installed_node_versions(root)
+    if not versions:
+        return None
+    version = resolve_nvm_alias('default', versions, root) or versions[0]
+    return root / 'versions' / 'node' / version / 'bin'
+
+
+def _mtime(path: Path) -> float:
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return 0.0
+
+
+def cache_key(root: Optional[Path] = None, search_path: Optional[str] = None) -> str:
+    """
+    缓存失效键：PATH、PATH 中每个目录以及 nvm 相关目录的修改时间
+
+    安装或卸载工具会修改所在目录的 mtime，因此这些目录不变时探测结果仍然有效。
+    search_path 为 None 时使用当前进程的 PATH。
+    """
+    root = root or nvm_dir()
+    if search_path is None:
+        search_path = os.environ.get('PATH', '')
+    path_dirs = search_path.split(os.pathsep)
+    watched = [*path_dirs, root, root / 'alias', root / 'alias' / 'default', root / 'versions' / 'node']
+    bin_dir = nvm_default_bin(root)
+    if bin_dir:
+        watched.append(bin_dir)
+    payload = json.dumps([search_path, [(str(p), _mtime(Path(p))) for p in watched if p]])
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _tool_version(name: str, path: str, env: Dict[str, str]) -> Optional[str]:
+    """执行 <tool> --version 解析版本号"""
+    try:
+        result = subprocess.run(
+            [path, '--version'], capture_output=True, text=True, timeout=15, env=env
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    match = _VERSION_PATTERN.search(result.stdout)
+    return match.group(1) if match and result.returncode == 0 else None
+
+
+def probe_toolchain(
+    root: Optional[Path] = None,
+    max_workers: int = 8,
+    search_path: Optional[str] = None
+) -> ToolchainInventory:
+    """
+    并发探测工具链
+
+    Args:
+        root: nvm 目录
+        max_workers: 并发探测版本号的线程数
+        search_path: 查找命令用的 PATH，None 表示当前进程的 PATH
+
+    Returns:
+        工具链清单
+    """
+    start = time.perf_counter()
+    root = root or nvm_dir()
+    inventory = ToolchainInventory()
+
+    for name in ('git', 'brew'):
+        path = shutil.which(name, path=search_path)
+        if path:
+            inventory.tools[name] = ToolInfo(path)
+
+    if (root / 'nvm.sh').is_file():
+        inventory.tools['nvm'] = ToolInfo(str(root / 'nvm.sh'))
+
+    bin_dir = nvm_default_bin(root)
+    for name in NODE_TOOLS:
+        path = shutil.which(name, path=search_path)
+        if path:
+            inventory.tools[name] = ToolInfo(path)
+        elif bin_dir and (bin_dir / name).exists():
+            inventory.tools[name] = ToolInfo(str(bin_dir / name), source='nvm')
+            inventory.node_bin_dir = str(bin_dir)
+
+    base = dict(os.environ)
+    if search_path is not None:
+        base['PATH'] = search_path
+    env = inventory.env(base)
+    probes = {name: info for name, info in inventory.tools.items() if name != 'nvm'}
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {name: pool.submit(_tool_version, name, info.path, env) for name, info in probes.items()}
+        for name, future in futures.items():
+            inventory.tools[name].version = future.result()
+
+    inventory.probe_seconds = time.perf_counter() - start
+    return inventory
+
+
+def load_inventory(
+    cache_path: Optional[Path] = DEFAULT_CACHE_PATH,
+    refresh: bool = False,
+    root: Optional[Path] = None,
+    search_path: Optional[str] = None
+) -> ToolchainInventory:
+    """
+    读取工具链清单：缓存有效时直接使用，否则重新探测并写回缓存
+
+    Args:
+        cache_path: 缓存文件路径，None 表示不使用缓存
+        refresh: 忽略缓存强制重新探测
+        root: nvm 目录
+        search_path: 查找命令用的 PATH，None 表示当前进程的 PATH
+
+    Returns:
+        工具链清单
+    """
+    start = time.perf_counter()
+    key = cache_key(root, search_path)
+    if cache_path and not refresh:
+        try:
+            data = json.loads(Path(cache_path).read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            data = None
+        if data and data.get('version') == CACHE_VERSION and data.get('key') == key:
+            tools = {name: ToolInfo(**info) for name, info in data['tools'].items()}
+            if all(os.path.exists(info.path) for info in tools.values()):
+                return ToolchainInventory(
+                    tools, data.get('node_bin_dir'), time.perf_counter() - start, from_cache=True
+                )
+
+    inventory = probe_toolchain(root, search_path=search_path)
+    if cache_path:
+        payload = {
+            'version': CACHE_VERSION,
+            'key': key,
+            'tools': {name: asdict(info) for name, info in inventory.tools.items()},
+            'node_bin_dir': inventory.node_bin_dir,
+        }
+        try:
+            cache_path = Path(cache_path)
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = cache_path.with_suffix('.tmp')
+            tmp_path.write_text(json.dumps(payload, indent=2), encoding='utf-8')
+            tmp_path.replace(cache_path)
+        except OSError:
+            pass
+    return inventory
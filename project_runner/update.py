@@ -0,0 +1,129 @@
+"""
+已有项目目录的增量更新
+
+项目目录已存在时不再删除重克隆：校验 origin 指向同一个仓库后，
+`git fetch --depth` 目标 ref、硬重置到 FETCH_HEAD，再清理未跟踪的构建产物
+（保留 node_modules 和本地 .env 配置）。
+"""
+
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .mirror_cache import LS_REMOTE_TIMEOUT, normalize_url
+from .process import run_streaming
+
+
+# git clean 时保留的路径
+CLEAN_EXCLUDES = ('node_modules', '.env', '.env.*')
+
+
+@dataclass
+class UpdateResult:
+    """一次增量更新的结果"""
+    success: bool
+    old_head: Optional[str] = None
+    new_head: Optional[str] = None
+    seconds: float = 0.0
+    error: str = ''
+
+    @property
+    def changed(self) -> bool:
+        return self.old_head != self.new_head
+
+
+def _git(project_path: Path, args: List[str], env: Optional[Dict[str, str]] = None,
+         timeout: Optional[float] = None, log_path: Optional[Path] = None) -> Tuple[int, str, str]:
+    """在项目目录中执行 git 命令并返回 (返回码, stdout, stderr)，超时后终止 git 及其子进程"""
+    result = run_streaming(['git', '-C', str(project_path), *args], shell=False, env=env,
+                           timeout=timeout, log_path=log_path)
+    return result.returncode, result.stdout.strip(), result.stderr
+
+
+def check_remote(project_path: Path, expected_url: str) -> Tuple[bool, str]:
+    """
+    校验已有目录是否是同一个仓库的检出
+
+    Args:
+        project_path: 项目目录
+        expected_url: 期望的远程 URL（HTTPS 与 SSH 写法视为相同）
+
+    Returns:
+        (是否一致, 实际的 origin URL 或错误信息)
+    """
+    if not (Path(project_path) / '.git').exists():
+        return False, '不是 git 仓库'
+    returncode, actual, stderr = _git(project_path, ['remote', 'get-url', 'origin'])
+    if returncode != 0:
+        return False, stderr.strip() or '没有 origin 远程'
+    return normalize_url(actual) == normalize_url(expected_url), actual
+
+
+def local_revision(project_path: Path) -> Optional[str]:
+    """当前检出的提交（不是 git 仓库时返回 None）"""
+    if not (Path(project_path) / '.git').exists():
+        return None
+    returncode, head, _ = _git(project_path, ['rev-parse', 'HEAD'])
+    return head if returncode == 0 and head else None
+
+
+def remote_revision(project_path: Path, ref: Optional[str] = None, env: Optional[Dict[str, str]] = None,
+                    timeout: Optional[float] = LS_REMOTE_TIMEOUT) -> Optional[str]:
+    """
+    远程 ref 当前指向的提交（git ls-remote，不下载对象）
+
+    Args:
+        project_path: 项目目录（使用其中的 origin）
+        ref: 分支或标签，为空时使用远程默认分支
+        env: git 的环境变量（例如代理设置）
+        timeout: 超时（秒），网络不通时不会一直等待
+
+    Returns:
+        提交 SHA；无法访问、超时或 ref 是提交 SHA 时返回 None
+    """
+    ref = ref or 'HEAD'
+    returncode, stdout, _ = _git(project_path, ['ls-remote', 'origin', ref, f'{ref}^{{}}'], env, timeout)
+    if returncode != 0:
+        return None
+    refs = dict(reversed(line.split('\t', 1)) for line in stdout.splitlines() if '\t' in line)
+    # 模式也会匹配 refs/heads/feature/<ref>，按完整名称查找；附注标签取 ^{} 行（它指向的提交）
+    for name in (ref, f'refs/heads/{ref}', f'refs/tags/{ref}^{{}}', f'refs/tags/{ref}'):
+        if name in refs:
+            return refs[name]
+    return None
+
+
+def update_checkout(project_path: Path, ref: Optional[str] = None, depth: int = 1,
+                    env: Optional[Dict[str, str]] = None, timeout: Optional[float] = None,
+                    log_path: Optional[Path] = None) -> UpdateResult:
+    """
+    把已有检出更新到远程最新的 ref
+
+    Args:
+        project_path: 项目目录
+        ref: 分支、标签或提交，为空时使用远程默认分支
+        depth: fetch 深度
+        env: git 的环境变量（例如代理设置），为 None 时继承当前进程
+        timeout: 每个 git 命令的超时（秒），为 None 时不限制
+        log_path: 日志文件，git 的输出原样追加写入
+
+    Returns:
+        更新结果
+    """
+    start = time.perf_counter()
+    _, old_head, _ = _git(project_path, ['rev-parse', 'HEAD'])
+
+    steps = [
+        ['fetch', f'--depth={depth}', 'origin', ref or 'HEAD'],
+        ['reset', '--hard', 'FETCH_HEAD'],
+        ['clean', '-fdx', *[arg for pattern in CLEAN_EXCLUDES for arg in ('-e', pattern)]],
+    ]
+    for args in steps:
+        returncode, _, stderr = _git(project_path, args, env, timeout, log_path)
+        if returncode != 0:
+            return UpdateResult(False, old_head or None, seconds=time.perf_counter() - start,
+                                error=stderr)
+
+    _, new_head, _ = _git(project_path, ['rev-parse', 'HEAD'])
+    return UpdateResult(True, old_head or None, new_head, time.perf_counter() - start)
@@ -0,0 +1,192 @@
+"""
+monorepo 工作区分析
+
+解析 pnpm-workspace.yaml 和 package.json 的 workspaces 字段，构建工作区包之间的
+依赖图，找出可运行的应用（带 dev / start / serve 等启动脚本的包），只安装和运行该应用及其
+依赖的工作区包。
+"""
+
+import json
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+from .lockfile import DEPENDENCY_FIELDS
+from .readiness import select_script
+
+
+# 路径中包含这些词的包通常不是要运行的应用
+_NON_APP_HINTS = ('docs', 'doc', 'example', 'examples', 'playground', 'demo', 'test', 'e2e', 'storybook')
+_APP_DIRS = ('apps', 'app', 'sites', 'web', 'frontend')
+
+_YAML_ITEM = re.compile(r'''^\s*-\s*['"]?([^'"#]+?)['"]?\s*(?:#.*)?$''')
+
+
+@dataclass
+class WorkspacePackage:
+    """工作区中的一个包"""
+    name: str
+    path: str  # 相对仓库根目录，使用 / 分隔
+    scripts: Dict[str, str] = field(default_factory=dict)
+    dependencies: Set[str] = field(default_factory=set)
+
+    @property
+    def run_script(self) -> Optional[str]:
+        """用于启动的脚本（优先 dev）"""
+        return select_script(self.scripts)
+
+
+@dataclass
+class Workspace:
+    """工作区（monorepo）"""
+    root: Path
+    packages: Dict[str, WorkspacePackage]
+
+    def internal_dependencies(self, name: str) -> Set[str]:
+        """包直接依赖的工作区包"""
+        return {dep for dep in self.packages[name].dependencies if dep in self.packages}
+
+    def closure(self, name: str) -> List[str]:
+        """包本身及其传递依赖的工作区包"""
+        seen: List[str] = []
+        stack = [name]
+        while stack:
+            current = stack.pop()
+            if current in seen:
+                continue
+            seen.append(current)
+            stack.extend(sorted(self.internal_dependencies(current) - set(seen)))
+        return seen
+
+    def pick_app(self, preferred: Optional[str] = None) -> Optional[WorkspacePackage]:
+        """
+        找出要运行的应用
+
+        Args:
+            preferred: 用户指定的包名或路径
+
+        Returns:
+            应用包，找不到带启动脚本的包时返回 None
+        """
+        if preferred:
+            for package in self.packages.values():
+                if preferred in (package.name, package.path):
+                    return package
+            return None
+
+        candidates = [p for p in self.packages.values() if p.run_script]
+        if not candidates:
+            return None
+        return max(candidates, key=lambda p: (self._app_score(p), p.name))
+
+    def _app_score(self, package: WorkspacePackage) -> float:
+        parts = set(re.split(r'[/@._-]', package.path.lower()))
+        score = 2.0 if 'dev' in package.scripts else 1.0
+        if parts & set(_APP_DIRS) or package.path.split('/')[0] in _APP_DIRS:
+            score += 2
+        if parts & set(_NON_APP_HINTS):
+            score -= 3
+        # 依赖其他工作区包越多，越可能是最终的应用
+        score += 0.1 * len(self.closure(package.name))
+        return score
+
+
+def _read_json(path: Path) -> dict:
+    try:
+        data = json.loads(path.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def parse_pnpm_workspace(text: str) -> List[str]:
+    """解析 pnpm-workspace.yaml 中的 packages 列表（只支持常见的块列表写法）"""
+    patterns = []
+    in_packages = False
+    for line in text.splitlines():
+        if not line.strip() or line.lstrip().startswith('#'):
+            continue
+        if not line[0].isspace() and not line.startswith('-'):
+            in_packages = line.split(':', 1)[0].strip() == 'packages'
+            continue
+        if in_packages:
+            match = _YAML_ITEM.match(line)
+            if match:
+                patterns.append(match.group(1).strip())
+    return patterns
+
+
+def workspace_patterns(project_path: Path) -> List[str]:
+    """工作区包的 glob 列表（支持以 ! 开头的排除规则）"""
+    project_path = Path(project_path)
+    pnpm_file = project_path / 'pnpm-workspace.yaml'
+    if pnpm_file.is_file():
+        return parse_pnpm_workspace(pnpm_file.read_text(encoding='utf-8'))
+
+    workspaces = _read_json(project_path / 'package.json').get('workspaces')
+    if isinstance(workspaces, dict):
+        workspaces = workspaces.get('packages')
+    return [p for p in workspaces or [] if isinstance(p, str)]
+
+
+def _expand(project_path: Path, patterns: List[str]) -> List[Path]:
+    included: Set[Path] = set()
+    excluded: Set[Path] = set()
+    for pattern in patterns:
+        target = excluded if pattern.startswith('!') else included
+        pattern = pattern.lstrip('!').strip('/') or '.'
+        for path in project_path.glob(pattern):
+            if path.is_dir() and (path / 'package.json').is_file() and 'node_modules' not in path.parts:
+                target.add(path)
+    return sorted(included - excluded)
+
+
+def load_workspace(project_path: Path) -> Optional[Workspace]:
+    """
+    读取工作区
+
+    Args:
+        project_path: 仓库根目录
+
+    Returns:
+        工作区，不是 monorepo 时返回 None
+    """
+    project_path = Path(project_path)
+    patterns = workspace_patterns(project_path)
+    if not patterns:
+        return None
+
+    packages: Dict[str, WorkspacePackage] = {}
+    for path in _expand(project_path, patterns):
+        data = _read_json(path / 'package.json')
+        name = data.get('name')
+        if not name or path == project_path:
+            continue
+        dependencies = set()
+        for dep_field in DEPENDENCY_FIELDS:
+            if isinstance(data.get(dep_field), dict):
+                dependencies.update(data[dep_field])
+        scripts = data.get('scripts') if isinstance(data.get('scripts'), dict) else {}
+        packages[name] = WorkspacePackage(name, path.relative_to(project_path).as_posix(), scripts, dependencies)
+
+    return Workspace(project_path, packages) if packages else None
+
+
+def build_run_command(package_manager: str, app: str, script: str) -> List[str]:
+    """
+    在仓库根目录运行工作区应用脚本的命令
+
+    Args:
+        package_manager: npm / pnpm / yarn
+        app: 应用的包名
+        script: 脚本名（dev / start）
+
+    Returns:
+        命令参数列表
+    """
+    if package_manager == 'pnpm':
+        return ['pnpm', '--filter', app, 'run', script]
+    if package_manager == 'yarn':
+        return ['yarn', 'workspace', app, 'run', script]
+    return ['npm', 'run', script, f'--workspace={app}']
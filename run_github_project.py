@@ -4,27 +4,113 @@ GitHub 项目自动运行 Agent
 自动检查和安装所需依赖，克隆并运行 GitHub 项目
 """
 
-import subprocess
+import asyncio
+import json
 import sys
 import os
+import shlex
 import shutil
+import threading
+import time
+from contextlib import nullcontext
+from dataclasses import replace
 from pathlib import Path
 
+from project_runner.clone import (
+    CLONE_STRATEGIES, CloneStats, build_clone_command, choose_strategy,
+    dir_size, format_bytes, parse_received_bytes, sparse_directories
+)
+from project_runner.archive import ArchiveError, download_archive
+from project_runner.batch import DEFAULT_BASE_PORT, BatchItem, project_slug, read_urls, run_batch
+from project_runner.dep_cache import DEFAULT_MAX_BYTES as DEFAULT_DEP_CACHE_BYTES, DependencyCache
+from project_runner.fs_cache import DEFAULT_CACHE_ROOT
+from project_runner.instances import InstanceRegistry, RunningInstance
+from project_runner.install import InstallReport, InstallStrategy, build_install_strategy, cache_size
+from project_runner.lockfile import (
+    LOCKFILES, find_lockfile, is_install_fresh, lockfile_hash, predict_package_manager,
+    probe_remote_lockfiles, read_stamp, write_stamp
+)
+from project_runner.mirror_cache import (
+    DEFAULT_MAX_BYTES as DEFAULT_MIRROR_CACHE_BYTES, LS_REMOTE_TIMEOUT, MirrorCache
+)
+from project_runner.mirrors import DEFAULT_NPM_MIRRORS, DEFAULT_TTL as DEFAULT_MIRROR_TTL, MirrorManager, looks_like_network_error
+from project_runner.netcheck import check_network, default_endpoints
+from project_runner.node_runtime import (
+    NodeRuntime, NodeRuntimeError, download_node, fetch_node_requirement, installed_runtimes,
+    read_node_requirement, select_runtime
+)
+from project_runner.options import CloneOptions, InstallOptions, RunOptions
+from project_runner.pipeline import Pipeline
+from project_runner.readiness import build_script_command, select_script, serve
+from project_runner.prefetch import PREFETCH_FILES, Prefetcher
+from project_runner.process import ProcessResult, run_async
+from project_runner.profiler import Profiler, write_profile
+from project_runner.toolchain import NODE_TOOLS, TOOLS, ToolchainInventory, load_inventory
+from project_runner.update import check_remote, local_revision, remote_revision, update_checkout
+from project_runner.workspace import build_run_command, load_workspace, workspace_patterns
+
 
 class GitHubProjectRunner:
-    def __init__(self, github_url: str, use_proxy: str = None, use_ssh: bool = False):
+    # 同一进程中的多个运行器（批量模式）不能同时安装全局工具
+    _provision_lock = threading.Lock()
+    # 任一运行器安装新工具后递增，其他运行器据此重新读取工具链清单
+    _toolchain_generation = 0
+    # 运行中新装工具的目录（如 Homebrew），只加到子进程的 PATH，不修改 os.environ
+    _extra_path_dirs = ()
+    
+    def __init__(self, github_url: str, use_proxy: str = None,
+                 clone_options: CloneOptions = None, install_options: InstallOptions = None,
+                 run_options: RunOptions = None, repo_size_kb: int = None, repo_language: str = None,
+                 profiler: Profiler = None, mirrors: MirrorManager = None):
         self.github_url = github_url
         self.use_proxy = use_proxy
-        self.use_ssh = use_ssh
+        # 复制一份：网络诊断会改写 use_ssh，批量模式的多个运行器共用同一组选项
+        self.clone_options = replace(clone_options or CloneOptions())
+        self.install_options = replace(install_options or InstallOptions())
+        self.run_options = replace(run_options or RunOptions())
+        # 仓库大小（KB，来自 GitHub 搜索结果），用于自动选择克隆策略
+        self.repo_size_kb = repo_size_kb
+        # GitHub 仓库的主要语言（来自搜索结果），用于在克隆前预测包管理器
+        self.repo_language = repo_language
+        # 工具链清单（首次检查命令时探测，安装新工具后重新探测）
+        self.toolchain = None
+        self._toolchain_stale = False
+        self._toolchain_lock = threading.Lock()
+        self._generation = GitHubProjectRunner._toolchain_generation
+        self.predicted_package_manager = None
+        self.remote_files = []
+        self.install_reports = []
+        self.step_results = {}
+        self.workspace = None
+        self.workspace_app = None
+        self.workspace_closure = []
+        self._workspace_resolved = False
+        # 实际用于安装的包管理器
+        self.package_manager = None
+        # 所有命令的完整输出追加到该文件（内存中只保留最后一部分）
+        log_file = self.run_options.log_file
+        self.log_file = Path(log_file).expanduser() if log_file else None
+        self.clone_stats = None
         self.project_name = self._extract_project_name(github_url)
-        self.project_path = Path.cwd() / self.project_name
+        # 项目克隆到 work_dir 下（默认当前目录）
+        self.project_path = Path(self.clone_options.work_dir or Path.cwd()) / self.project_name
+        self.ready_url = None
+        self.time_to_ready = None
+        # 按阶段统计耗时和资源占用，为 None 时不统计
+        self.profiler = profiler
+        # 最近一次网络诊断的结果
+        self.network_report = None
+        # 远程 git / npm 镜像选择，为 None 时只使用 GitHub 和 --registry（或默认 registry）
+        self.mirrors = mirrors
+        self._registry_candidates = None
+        self._registry_lock = threading.Lock()
+        # 按项目版本要求选中的 Node.js（bin 目录放在命令的 PATH 最前面）
+        self.node_runtime = None
+        self._remote_node_requirement = None
+        self._remote_node_checked = False
         
-        # 如果指定使用代理，设置环境变量
+        # 代理只传给本工具启动的命令，不修改当前进程的环境变量
         if self.use_proxy:
-            os.environ['http_proxy'] = self.use_proxy
-            os.environ['https_proxy'] = self.use_proxy
-            os.environ['HTTP_PROXY'] = self.use_proxy
-            os.environ['HTTPS_PROXY'] = self.use_proxy
             print(f"🌐 使用代理: {self.use_proxy}")
         
     def _extract_project_name(self, url: str) -> str:
@@ -50,59 +136,176 @@ class GitHubProjectRunner:
         return url
     
     def check_network_connectivity(self) -> bool:
-        """检查网络连接"""
+        """
+        并发诊断网络（github.com / api / codeload / npm registry / LLM 接口），按结果调整克隆方式
+        
+        HTTPS 不通而 github.com:22 可达、并且本机有 SSH 密钥时改用 SSH；代理不通而直连正常时
+        不再使用代理。结果保存在 network_report 中。
+        
+        Returns:
+            是否能够访问 GitHub（HTTPS 或 SSH）
+        """
         print("🔍 检查网络连接...")
-        # 尝试 ping github.com
-        returncode, stdout, stderr = self.run_command('ping -c 1 -W 2 github.com')
-        if returncode == 0:
+        endpoints = default_endpoints(self.install_options.registry, os.environ.get('LLM_API_BASE'))
+        with self._phase('network'):
+            report = asyncio.run(check_network(endpoints, proxy=self.use_proxy))
+        self.network_report = report
+        print(report.format_table())
+        
+        if report.proxy_usable() is False:
+            print(f"⚠️  代理 {self.use_proxy} 无法访问 github.com，直连正常，本次不使用代理")
+            self.use_proxy = None
+        if report.github_ok:
             print("✅ 网络连接正常")
             return True
-        else:
-            print("⚠️  无法连接到 github.com")
-            return False
+        if report.recommend_transport() == 'ssh':
+            if self.clone_options.use_ssh:
+                print("ℹ️  HTTPS 无法访问 github.com，SSH 端口可达，使用 SSH 克隆")
+                return True
+            if any((Path.home() / '.ssh').glob('id_*')):
+                print("🔑 HTTPS 无法访问 github.com，SSH 端口可达，改用 SSH 克隆")
+                self.clone_options.use_ssh = True
+                return True
+            print("⚠️  HTTPS 无法访问 github.com，SSH 端口可达；配置 SSH 密钥后可以使用 --ssh 克隆")
+        print("⚠️  无法连接到 github.com")
+        return False
     
-    def run_command(self, command: str, shell: bool = True, check: bool = False) -> tuple[int, str, str]:
-        """执行命令并返回结果"""
-        try:
-            result = subprocess.run(
-                command,
-                shell=shell,
-                capture_output=True,
-                text=True,
-                check=check
-            )
-            return result.returncode, result.stdout, result.stderr
-        except subprocess.CalledProcessError as e:
-            return e.returncode, e.stdout, e.stderr
-        except Exception as e:
-            return -1, "", str(e)
+    async def run_command_async(self, command, cwd: Path = None, env: dict = None,
+                                stream: bool = False, shell: bool = True) -> ProcessResult:
+        """
+        执行命令（默认使用工具链的环境变量，选中的 Node 运行时在 PATH 中，并带上代理设置）
+        
+        输出边读边处理，内存中只保留最后一部分用于错误诊断；指定了日志文件时完整写入日志。
+        
+        Args:
+            command: 命令字符串（通过 shell 执行）或参数列表
+            cwd: 工作目录，为 None 时使用当前目录（不会切换当前进程的工作目录）
+            env: 环境变量，为 None 时使用 _command_env()
+            stream: 是否把输出实时显示在控制台（用于耗时较长的安装和克隆）
+            shell: 字符串命令是否通过 shell 执行
+        
+        Returns:
+            执行结果
+        """
+        result = await run_async(
+            command,
+            shell=shell,
+            env=env if env is not None else self._command_env(),
+            cwd=cwd,
+            timeout=self.run_options.command_timeout,
+            echo=stream,
+            log_path=self.log_file,
+            on_start=self.profiler.attach if self.profiler else None
+        )
+        if result.timed_out:
+            print(f"⏱️  命令超过 {self.run_options.command_timeout:g}s 未完成，已终止: {command}")
+        return result
+    
+    def run_command(self, command, shell: bool = True, check: bool = False,
+                    env: dict = None, stream: bool = False, cwd: Path = None) -> tuple[int, str, str]:
+        """
+        执行命令并返回 (返回码, stdout, stderr)（run_command_async 的同步版本）
+        
+        Args:
+            command: 命令字符串或参数列表
+            shell: 字符串命令是否通过 shell 执行
+            check: 为兼容保留（失败时同样返回返回码和输出）
+            env: 环境变量，为 None 时使用 _command_env()
+            stream: 是否把输出实时显示在控制台
+            cwd: 工作目录
+        
+        Returns:
+            (返回码, stdout, stderr)
+        """
+        result = asyncio.run(self.run_command_async(command, cwd=cwd, env=env, stream=stream, shell=shell))
+        return result.returncode, result.stdout, result.stderr
     
     def check_command_exists(self, command: str) -> bool:
         """检查命令是否存在"""
-        return shutil.which(command) is not None
+        if command in NODE_TOOLS and self.node_runtime and self.node_runtime.has(command):
+            return True
+        if command in TOOLS:
+            return self.get_toolchain().has(command)
+        return shutil.which(command, path=self._search_path()) is not None
+    
+    def _search_path(self) -> str:
+        """查找命令用的 PATH：运行中新装工具的目录放在当前进程的 PATH 前面"""
+        paths = os.environ.get('PATH', '').split(os.pathsep)
+        extra = [p for p in GitHubProjectRunner._extra_path_dirs if p not in paths]
+        return os.pathsep.join([*extra, *filter(None, paths)])
+    
+    def get_toolchain(self) -> ToolchainInventory:
+        """工具链清单（并发探测一次，磁盘缓存，PATH 或 nvm 目录变化时自动失效）"""
+        with self._toolchain_lock:
+            if self.toolchain is None or self._generation != GitHubProjectRunner._toolchain_generation:
+                self._generation = GitHubProjectRunner._toolchain_generation
+                with self._phase('toolchain-probe'):
+                    self.toolchain = load_inventory(refresh=self._toolchain_stale, search_path=self._search_path())
+                self._toolchain_stale = False
+                source = "缓存" if self.toolchain.from_cache else "探测"
+                print(f"🧰 工具链（{source}，{self.toolchain.probe_seconds:.2f}s）: {self.toolchain.describe()}")
+            return self.toolchain
+    
+    def _invalidate_toolchain(self):
+        """安装新工具后，下次使用时重新探测"""
+        with self._toolchain_lock:
+            self.toolchain = None
+            self._toolchain_stale = True
+            GitHubProjectRunner._toolchain_generation += 1
+    
+    def _phase(self, name: str):
+        """统计一个阶段（没有启用分析时什么都不做）"""
+        if self.profiler is None:
+            return nullcontext()
+        return self.profiler.phase(name, scope=project_slug(self.github_url))
+    
+    def _profiled(self, name: str, fn):
+        """把步骤函数包装为统计阶段的版本"""
+        def run():
+            with self._phase(name):
+                return fn()
+        return run
+    
+    def _command_env(self) -> dict:
+        """执行命令用的环境变量：新装工具的目录和工具链的 PATH、选中的 Node.js 加上代理设置"""
+        env = dict(os.environ, PATH=self._search_path())
+        if self.toolchain:
+            env = self.toolchain.env(env)
+        if self.node_runtime:
+            env = self.node_runtime.env(env)
+        if self.use_proxy:
+            for name in ('http_proxy', 'https_proxy', 'HTTP_PROXY', 'HTTPS_PROXY'):
+                env[name] = self.use_proxy
+        env.update(self.run_options.extra_env)
+        return env
     
     def install_homebrew(self) -> bool:
         """安装 Homebrew"""
         print("📦 检测到系统缺少 Homebrew，正在安装...")
         install_script = '/bin/bash -c "$(curl -fsSL https://raw.githubusercontent.com/Homebrew/install/HEAD/install.sh)"'
-        returncode, stdout, stderr = self.run_command(install_script)
+        returncode, stdout, stderr = self.run_command(install_script, stream=True)
         
         if returncode == 0:
             print("✅ Homebrew 安装成功")
             # 刷新环境变量
             self._refresh_brew_env()
+            self._invalidate_toolchain()
             return True
         else:
             print(f"❌ Homebrew 安装失败: {stderr}")
             return False
     
     def _refresh_brew_env(self):
-        """刷新 Homebrew 环境变量"""
+        """
+        把 Homebrew 的 bin 目录加入后续命令的 PATH
+
+        步骤在线程池中并发执行，因此只记录目录，由 _command_env 放进每条命令的环境变量，
+        不修改进程级的 os.environ。
+        """
         # 在 M1/M2 Mac 上，Homebrew 安装在 /opt/homebrew
         brew_paths = ['/opt/homebrew/bin', '/usr/local/bin']
-        for brew_path in brew_paths:
-            if os.path.exists(brew_path) and brew_path not in os.environ['PATH']:
-                os.environ['PATH'] = f"{brew_path}:{os.environ['PATH']}"
+        added = [p for p in brew_paths if os.path.exists(p) and p not in GitHubProjectRunner._extra_path_dirs]
+        GitHubProjectRunner._extra_path_dirs = (*added, *GitHubProjectRunner._extra_path_dirs)
     
     def install_git(self) -> bool:
         """安装 Git"""
@@ -113,121 +316,124 @@ class GitHubProjectRunner:
             if not self.install_homebrew():
                 return False
         
-        returncode, stdout, stderr = self.run_command('brew install git')
+        returncode, stdout, stderr = self.run_command('brew install git', stream=True)
         if returncode == 0:
             print("✅ Git 安装成功")
+            self._invalidate_toolchain()
             return True
         else:
             print(f"❌ Git 安装失败: {stderr}")
             return False
     
-    def install_nvm(self) -> bool:
-        """安装 NVM"""
-        print("📦 检测到系统缺少 NVM，正在安装...")
-        
-        # 下载并安装 NVM
-        install_script = 'curl -o- https://raw.githubusercontent.com/nvm-sh/nvm/v0.39.7/install.sh | bash'
-        returncode, stdout, stderr = self.run_command(install_script)
-        
-        if returncode == 0:
-            print("✅ NVM 安装成功")
-            # 设置 NVM 环境变量
-            self._setup_nvm_env()
-            return True
-        else:
-            print(f"❌ NVM 安装失败: {stderr}")
+    def install_node(self, node_range=None) -> bool:
+        """下载 Node.js 官方二进制包到运行时缓存（不需要 nvm，已下载过的版本直接复用）"""
+        wanted = node_range.raw if node_range else 'LTS'
+        print(f"📦 没有满足要求的 Node.js，正在下载 {wanted}...")
+        try:
+            runtime = download_node(node_range, proxy=self.use_proxy)
+        except NodeRuntimeError as e:
+            print(f"❌ Node.js 安装失败: {e}")
             return False
+        print(f"✅ Node.js {runtime.version} 安装成功: {runtime.bin_dir}")
+        self.node_runtime = runtime
+        return True
     
-    def _setup_nvm_env(self):
-        """设置 NVM 环境变量"""
-        nvm_dir = os.path.expanduser('~/.nvm')
-        os.environ['NVM_DIR'] = nvm_dir
-        
-    def _source_nvm(self) -> str:
-        """返回 source NVM 的命令前缀"""
-        nvm_dir = os.path.expanduser('~/.nvm')
-        return f'export NVM_DIR="{nvm_dir}" && [ -s "$NVM_DIR/nvm.sh" ] && . "$NVM_DIR/nvm.sh" && '
+    def node_requirement(self):
+        """项目的 Node 版本要求：已克隆时读取项目目录，否则从远程下载版本文件（只下载一次）"""
+        if (self.project_path / 'package.json').exists():
+            return read_node_requirement(self.project_path)
+        if not self._remote_node_checked:
+            self._remote_node_checked = True
+            self._remote_node_requirement = fetch_node_requirement(self.github_url, self.clone_options.ref, self.use_proxy)
+        return self._remote_node_requirement
     
-    def install_node(self) -> bool:
-        """使用 NVM 安装 Node.js"""
-        print("📦 检测到系统缺少 Node.js，正在安装...")
-        
-        # 检查 NVM 是否存在
-        nvm_dir = os.path.expanduser('~/.nvm')
-        if not os.path.exists(nvm_dir):
-            if not self.install_nvm():
-                return False
+    def ensure_node(self) -> bool:
+        """选择满足项目版本要求的 Node.js：依次查找 PATH、nvm 和运行时缓存，都没有时才下载"""
+        requirement = self.node_requirement()
+        node_range = None
+        if requirement:
+            try:
+                node_range = requirement.range
+            except NodeRuntimeError as e:
+                print(f"⚠️  {e}（{requirement.source}），忽略版本要求")
+                requirement = None
+        if self.node_runtime and (node_range is None or node_range.matches(self.node_runtime.version)):
+            return True
         
-        # 使用 NVM 安装 Node.js LTS 版本
-        nvm_command = self._source_nvm() + 'nvm install --lts'
-        returncode, stdout, stderr = self.run_command(nvm_command)
+        node = self.get_toolchain().tools.get('node')
+        current = None
+        if node and node.version:
+            current = NodeRuntime(f"v{node.version}", str(Path(node.path).parent), node.source)
+        runtime = select_runtime(node_range, installed_runtimes(), current)
+        if runtime is None:
+            if current:
+                print(f"⚠️  当前 Node.js {current.version} 不满足 {requirement.describe()}")
+            return self.install_node(node_range)
         
-        if returncode == 0:
-            print("✅ Node.js 安装成功")
-            return True
-        else:
-            print(f"❌ Node.js 安装失败: {stderr}")
-            return False
+        self.node_runtime = runtime
+        suffix = f"，满足 {requirement.describe()}" if requirement else ""
+        print(f"🟢 使用 Node.js {runtime.describe()}{suffix}")
+        return True
+    
+    def _node_version(self):
+        """实际使用的 Node 版本（依赖缓存的键之一，原生模块与 Node ABI 相关）"""
+        if self.node_runtime:
+            return self.node_runtime.version.lstrip('v')
+        node = self.get_toolchain().tools.get('node')
+        return node.version if node else None
     
     def install_pnpm(self) -> bool:
         """安装 pnpm"""
         print("📦 检测到系统缺少 pnpm，正在安装...")
         
         # 确保 npm 可用
-        if not self.check_npm_available():
-            if not self.install_node():
-                return False
+        if not self.ensure_node():
+            return False
         
-        # 使用 npm 安装 pnpm
-        npm_command = self._get_npm_command('npm install -g pnpm')
-        returncode, stdout, stderr = self.run_command(npm_command)
+        # 使用 npm 安装 pnpm（选中的 Node 运行时在 _command_env 的 PATH 中）
+        returncode, stdout, stderr = self.run_command('npm install -g pnpm', stream=True)
         
         if returncode == 0:
             print("✅ pnpm 安装成功")
+            self._invalidate_toolchain()
             return True
         else:
             print(f"❌ pnpm 安装失败: {stderr}")
             return False
     
-    def check_npm_available(self) -> bool:
-        """检查 npm 是否可用（包括通过 nvm 安装的）"""
-        if self.check_command_exists('npm'):
-            return True
+    def install_yarn(self) -> bool:
+        """安装 yarn（Yarn 2+ 项目会由 yarn 1.x 按 .yarnrc.yml 中的 yarnPath 切换版本）"""
+        print("📦 检测到系统缺少 yarn，正在安装...")
         
-        # 尝试通过 NVM 查找 npm
-        nvm_dir = os.path.expanduser('~/.nvm')
-        if os.path.exists(nvm_dir):
-            nvm_command = self._source_nvm() + 'npm --version'
-            returncode, stdout, stderr = self.run_command(nvm_command)
-            return returncode == 0
+        if not self.ensure_node():
+            return False
         
-        return False
-    
-    def _get_npm_command(self, npm_cmd: str) -> str:
-        """获取 npm 命令，如果需要则加上 nvm source"""
-        if self.check_command_exists('npm'):
-            return npm_cmd
+        returncode, stdout, stderr = self.run_command('npm install -g yarn', stream=True)
+        if returncode == 0:
+            print("✅ yarn 安装成功")
+            self._invalidate_toolchain()
+            return True
         else:
-            return self._source_nvm() + npm_cmd
+            print(f"❌ yarn 安装失败: {stderr}")
+            return False
     
-    def _get_pnpm_command(self, pnpm_cmd: str) -> str:
-        """获取 pnpm 命令，如果需要则加上 nvm source"""
-        if self.check_command_exists('pnpm'):
-            return pnpm_cmd
-        else:
-            return self._source_nvm() + pnpm_cmd
+    def check_npm_available(self) -> bool:
+        """检查 npm 是否可用（包括选中的 Node 运行时自带的 npm）"""
+        return self.check_command_exists('npm')
     
     def clone_repository(self) -> bool:
         """克隆 Git 仓库"""
         print(f"📥 正在克隆项目: {self.github_url}")
         
-        # 确保 Git 可用
-        if not self.check_command_exists('git'):
+        # 确保 Git 可用（源码包模式不需要 git）
+        if not self.clone_options.use_archive and not self.check_command_exists('git'):
             if not self.install_git():
                 return False
         
         # 检查目录是否已存在
         if self.project_path.exists():
+            if self.clone_options.update:
+                return self.update_repository()
             print(f"⚠️  项目目录已存在: {self.project_path}")
             user_input = input("是否删除现有目录并重新克隆? (y/N): ").strip().lower()
             if user_input == 'y':
@@ -237,17 +443,44 @@ class GitHubProjectRunner:
                 print("ℹ️  使用现有项目目录")
                 return True
         
+        if self.clone_options.use_archive:
+            return self._download_archive()
+        
         # 决定使用的 URL
         clone_url = self.github_url
-        if self.use_ssh:
+        if self.clone_options.use_ssh:
             clone_url = self._convert_to_ssh_url(self.github_url)
             print(f"🔑 使用 SSH 方式克隆: {clone_url}")
         
+        # 选择克隆策略
+        strategy = self.clone_options.strategy
+        if strategy == 'auto':
+            strategy = choose_strategy(self.repo_size_kb)
+        if self.clone_options.mirror_cache:
+            # 镜像中已有完整历史，本地克隆不需要 --depth / --filter
+            strategy = 'sparse+mirror' if strategy == 'sparse' else 'mirror'
+        size_hint = f"（仓库大小 {format_bytes(self.repo_size_kb * 1024)}）" if self.repo_size_kb else ""
+        print(f"📦 克隆策略: {strategy}{size_hint}")
+        
         # 克隆仓库
-        returncode, stdout, stderr = self.run_command(f'git clone {clone_url}')
+        start = time.perf_counter()
+        received = None
+        if self.clone_options.mirror_cache:
+            returncode, stderr, received = self._clone_from_mirror(clone_url, strategy)
+        else:
+            returncode, stderr = self._clone_remote(clone_url, strategy)
+        if returncode == 0 and strategy.startswith('sparse'):
+            returncode, sparse_stderr = self._apply_sparse_checkout()
+            stderr += sparse_stderr
         
         if returncode == 0:
+            if received is None:
+                received = parse_received_bytes(stderr)
+            if received is None:
+                received = dir_size(self.project_path / '.git')
+            self.clone_stats = CloneStats(strategy, time.perf_counter() - start, received)
             print(f"✅ 项目克隆成功: {self.project_path}")
+            print(f"📊 克隆统计: {self.clone_stats.describe()}")
             return True
         else:
             print(f"❌ 项目克隆失败: {stderr}")
@@ -265,6 +498,224 @@ class GitHubProjectRunner:
             
             return False
     
+    def update_repository(self) -> bool:
+        """增量更新已存在的项目目录"""
+        print(f"🔄 更新已有项目: {self.project_path}")
+        if self.clone_options.use_archive:
+            return self._refresh_archive()
+        
+        matches, actual = check_remote(self.project_path, self.github_url)
+        if not matches:
+            print(f"❌ 现有目录与目标仓库不一致（origin: {actual}），不会覆盖")
+            print("💡 请删除或移走该目录后重试，或去掉 --update 交互处理")
+            return False
+        
+        result = update_checkout(self.project_path, self.clone_options.ref, env=self._command_env(),
+                                 timeout=self.run_options.command_timeout, log_path=self.log_file)
+        if not result.success:
+            print(f"❌ 项目更新失败: {result.error}")
+            return False
+        
+        if result.changed:
+            print(f"✅ 已更新: {(result.old_head or '?')[:7]} -> {result.new_head[:7]}（{result.seconds:.1f}s）")
+        else:
+            print(f"✅ 已是最新: {result.new_head[:7]}（{result.seconds:.1f}s）")
+        return True
+    
+    def _refresh_archive(self) -> bool:
+        """源码包模式下的更新：下载新源码包，把原有 node_modules 移过去后替换项目目录"""
+        fresh_path = self.project_path.with_name(self.project_path.name + '.new')
+        shutil.rmtree(fresh_path, ignore_errors=True)
+        try:
+            result = download_archive(self.github_url, fresh_path, self.clone_options.ref, self.use_proxy)
+        except ArchiveError as e:
+            print(f"❌ 源码包下载失败: {e}")
+            return False
+        
+        node_modules = self.project_path / 'node_modules'
+        if node_modules.is_dir():
+            node_modules.rename(fresh_path / 'node_modules')
+        shutil.rmtree(self.project_path)
+        fresh_path.rename(self.project_path)
+        
+        self.clone_stats = CloneStats('archive', result.seconds, result.bytes_received)
+        print(f"✅ 已更新: {result.commit[:7] if result.commit else self.clone_options.ref or '默认分支'}")
+        print(f"📊 下载统计: {self.clone_stats.describe()}")
+        return True
+    
+    def _download_archive(self) -> bool:
+        """下载源码包并边下载边解压到项目目录"""
+        print(f"📦 源码包模式: {self.clone_options.ref or '默认分支'}（不下载 git 历史）")
+        if self.clone_options.use_ssh:
+            print("ℹ️  源码包模式通过 HTTPS 下载，忽略 --ssh")
+        
+        try:
+            result = download_archive(self.github_url, self.project_path, self.clone_options.ref, self.use_proxy)
+        except ArchiveError as e:
+            print(f"❌ 源码包下载失败: {e}")
+            print("💡 可以去掉 --archive 改用 git clone，或使用代理: --proxy http://127.0.0.1:7890")
+            return False
+        
+        self.clone_stats = CloneStats('archive', result.seconds, result.bytes_received)
+        print(f"✅ 项目下载成功: {self.project_path}（{result.files} 个文件）")
+        if result.commit:
+            print(f"🔖 提交: {result.commit}")
+        resumed = f", 续传 {result.resumes} 次" if result.resumes else ""
+        print(f"📊 下载统计: {self.clone_stats.describe()}{resumed}")
+        return True
+    
+    def _clone_remote(self, clone_url: str, strategy: str) -> tuple[int, str]:
+        """从远程克隆；启用了镜像选择时从最快的镜像开始依次尝试，返回 (返回码, stderr)"""
+        candidates = [(None, clone_url)]
+        if self.mirrors and not self.clone_options.use_ssh:
+            candidates = self.mirrors.git_candidates(self.github_url)
+        
+        for index, (mirror, url) in enumerate(candidates):
+            if url != clone_url:
+                print(f"🚀 使用 git 镜像: {url}")
+            returncode, stdout, stderr = self.run_command(
+                build_clone_command(strategy, url, self.project_path, self.clone_options.ref), stream=True
+            )
+            if returncode == 0:
+                if url != clone_url:
+                    # origin 指回 GitHub，--update 的远程校验和后续更新不依赖镜像
+                    self.run_command(['git', '-C', str(self.project_path), 'remote', 'set-url', 'origin', clone_url],
+                                     shell=False)
+                return 0, stderr
+            if index == len(candidates) - 1:
+                return returncode, stderr
+            if looks_like_network_error(stderr):
+                self.mirrors.report_failure('git', mirror, stderr.strip().splitlines()[-1] if stderr.strip() else '')
+            print(f"⚠️  从 {url} 克隆失败，改用下一个镜像")
+            shutil.rmtree(self.project_path, ignore_errors=True)
+        return 1, ''
+    
+    def _clone_from_mirror(self, clone_url: str, strategy: str) -> tuple[int, str, int]:
+        """通过本地镜像克隆，返回 (返回码, stderr, 网络传输字节数)"""
+        mirror_path = self.clone_options.mirror_cache.mirror_path(clone_url)
+        action = "增量更新" if mirror_path.exists() else "创建"
+        print(f"🪞 {action}本地镜像: {mirror_path}")
+        
+        result = self.clone_options.mirror_cache.clone(
+            clone_url, self.project_path, sparse=strategy.startswith('sparse'), ref=self.clone_options.ref,
+            env=self._command_env(), timeout=self.run_options.command_timeout, log_path=self.log_file
+        )
+        return (0 if result.success else 1), result.error, result.bytes_fetched
+    
+    def _apply_sparse_checkout(self) -> tuple[int, str]:
+        """sparse 克隆后只检出安装和运行需要的目录"""
+        path = shlex.quote(str(self.project_path))
+        returncode, stdout, stderr = self.run_command(f'git -C {path} ls-tree -d --name-only HEAD')
+        if returncode != 0:
+            return returncode, stderr
+        
+        # 根目录文件已经检出，工作区声明的包目录不能被排除
+        dirs = sparse_directories(stdout.splitlines(), self.clone_options.sparse_paths,
+                                  workspace_patterns(self.project_path))
+        print(f"🌿 sparse-checkout 目录: {', '.join(dirs) if dirs else '（仅根目录文件）'}")
+        quoted = ' '.join(shlex.quote(d) for d in dirs)
+        returncode, stdout, stderr = self.run_command(
+            f'git -C {path} sparse-checkout set --cone {quoted}'
+        )
+        return returncode, stderr
+    
+    def predict_package_manager(self) -> str:
+        """克隆完成前预测包管理器：探测远程锁文件，失败时参考仓库语言"""
+        remote_files = probe_remote_lockfiles(self.github_url, self.clone_options.ref, self.use_proxy)
+        self.remote_files = remote_files or []
+        self.predicted_package_manager = predict_package_manager(self.repo_language, remote_files)
+        if self.predicted_package_manager:
+            print(f"🔮 预测包管理器: {self.predicted_package_manager}")
+        return self.predicted_package_manager
+    
+    def provision_toolchain(self) -> bool:
+        """按预测的包管理器提前准备 Node.js / pnpm（失败时留给安装依赖阶段重试）"""
+        package_manager = self.predicted_package_manager
+        if package_manager is None:
+            print("ℹ️  无法预测包管理器，克隆完成后再准备工具链")
+            return True
+        
+        with self._provision_lock, self._phase('toolchain-install'):
+            ready = self.ensure_node()
+            if ready and package_manager == 'pnpm' and not self.check_command_exists('pnpm'):
+                ready = self.install_pnpm()
+            elif ready and package_manager == 'yarn' and not self.check_command_exists('yarn'):
+                ready = self.install_yarn()
+        if not ready:
+            print("⚠️  提前准备工具链失败，将在安装依赖时重试")
+        return True
+    
+    def prefetch_dependencies(self) -> bool:
+        """克隆的同时只下载 package.json 和锁文件，提前把依赖下载到包管理器缓存（失败不影响后续安装）"""
+        # 安装依赖于预取只是为了不让两个包管理器同时写缓存，预取出错时照常安装
+        try:
+            self._prefetch_dependencies()
+        except Exception as e:
+            print(f"⚠️  依赖预取出错，安装阶段会正常下载: {e}")
+        return True
+    
+    def _prefetch_dependencies(self):
+        """预取的实际步骤（可能抛出异常，由 prefetch_dependencies 兜底）"""
+        package_manager = self.predicted_package_manager
+        if not self.install_options.prefetch or package_manager is None or not set(self.remote_files) & set(LOCKFILES):
+            return
+        if package_manager not in PREFETCH_FILES:
+            # bun 没有只下载不安装的命令（bun.lockb 为二进制格式，也无法读出 tarball 地址）
+            print(f"ℹ️  {package_manager} 不支持预取，依赖在安装阶段下载")
+            return
+        
+        prefetcher = Prefetcher(self.github_url, self.clone_options.ref, self.use_proxy, self.npm_registry())
+        try:
+            if not prefetcher.download(package_manager):
+                return
+            if self.install_options.dep_cache:
+                # 依赖缓存命中时安装阶段不访问网络，预取没有意义
+                key = self.install_options.dep_cache.make_key(lockfile_hash(prefetcher.work_dir), package_manager,
+                                              self._node_version())
+                if self.install_options.dep_cache.has(key):
+                    print("📦 依赖缓存已包含该锁文件，跳过预取")
+                    return
+            
+            print(f"🚚 预取依赖（{package_manager}），与克隆并行...")
+            self.get_toolchain()
+            env = self._command_env()
+            result = prefetcher.run(
+                package_manager,
+                lambda args, cwd: self._run_in(args, cwd, env)
+            )
+        finally:
+            prefetcher.cleanup()
+        
+        if result.success:
+            print(f"✅ 依赖预取完成（{result.seconds:.1f}s）")
+        else:
+            print(f"⚠️  依赖预取失败，安装阶段会正常下载: {result.message}")
+    
+    def _run_in(self, args: list, cwd: Path, env: dict) -> tuple[int, str]:
+        """在指定目录执行命令（不切换当前进程的工作目录），返回 (返回码, stderr)"""
+        returncode, stdout, stderr = self.run_command(args, shell=False, env=env, cwd=cwd)
+        return returncode, stderr
+    
+    async def prepare_async(self) -> bool:
+        """克隆与工具链准备并行，二者都完成后安装依赖（各步骤的结果保存在 step_results 中）"""
+        pipeline = Pipeline()
+        pipeline.add('clone', self._profiled('clone', self.clone_repository))
+        pipeline.add('predict', self._profiled('predict', lambda: self.predict_package_manager() or True))
+        pipeline.add('provision', self.provision_toolchain, deps=['predict'])
+        pipeline.add('prefetch', self._profiled('prefetch', self.prefetch_dependencies), deps=['provision'])
+        pipeline.add('install', self._profiled('install', self.install_dependencies),
+                     deps=['clone', 'provision', 'prefetch'])
+        success = await pipeline.run_async()
+        self.step_results = pipeline.results
+        
+        print()
+        print(pipeline.format_timeline())
+        if pipeline.results['clone'].status != 'ok':
+            print("❌ 流程终止：克隆项目失败")
+        elif pipeline.results['install'].status != 'ok':
+            print("❌ 流程终止：安装依赖失败")
+        return success
+    
     def detect_package_manager(self) -> str:
         """检测项目使用的包管理器"""
         if (self.project_path / 'pnpm-lock.yaml').exists():
@@ -286,81 +737,320 @@ class GitHubProjectRunner:
             print("ℹ️  未检测到 package.json，跳过依赖安装")
             return True
         
+        fingerprint = lockfile_hash(self.project_path)
+        app = self.resolve_workspace_app()
+        if app:
+            # 只安装了部分工作区包，换一个应用运行时需要重新安装
+            fingerprint = f"{fingerprint}:{app.name}"
+        if is_install_fresh(self.project_path, fingerprint):
+            print("⚡ 锁文件未变化，复用现有 node_modules，跳过安装")
+            return True
+        
         package_manager = self.detect_package_manager()
         print(f"🔍 检测到包管理器: {package_manager}")
         
-        # 切换到项目目录
-        os.chdir(self.project_path)
-        
-        # 优先使用 pnpm
-        if package_manager == 'pnpm' or self.check_command_exists('pnpm'):
-            if not self.check_command_exists('pnpm'):
-                if not self.install_pnpm():
-                    print("⚠️  pnpm 安装失败，尝试使用 npm")
-                    package_manager = 'npm'
-                else:
-                    package_manager = 'pnpm'
-            else:
-                package_manager = 'pnpm'
+        package_manager = self._ensure_package_manager(package_manager)
+        if package_manager is None:
+            return False
+        self.package_manager = package_manager
         
-        # 如果不是 pnpm，使用 npm
-        if package_manager != 'pnpm':
-            if not self.check_npm_available():
-                if not self.install_node():
-                    return False
-            package_manager = 'npm'
+        # monorepo 中缓存应用及其依赖的工作区包各自的 node_modules
+        cache_paths = ['.'] + [self.workspace.packages[name].path for name in self.workspace_closure]
         
-        # 执行安装
-        if package_manager == 'pnpm':
-            install_cmd = self._get_pnpm_command('pnpm install')
-        else:
-            install_cmd = self._get_npm_command('npm install')
+        # 依赖缓存（只缓存有锁文件的项目，没有锁文件时依赖版本不确定）
+        cache_key = None
+        if self.install_options.dep_cache and find_lockfile(self.project_path):
+            cache_key = self.install_options.dep_cache.make_key(fingerprint, package_manager, self._node_version())
+            restored = self.install_options.dep_cache.restore(cache_key, self.project_path, cache_paths)
+            if restored:
+                print(f"⚡ 依赖缓存命中: 恢复 {restored.files} 个文件"
+                      f"（硬链接 {restored.linked} 个，{restored.seconds:.1f}s），跳过安装")
+                write_stamp(self.project_path, fingerprint, package_manager)
+                return True
         
-        print(f"🔧 执行: {package_manager} install")
-        returncode, stdout, stderr = self.run_command(install_cmd)
+        returncode, stderr = self._install_from(package_manager, self.npm_registry())
+        # 网络错误时改用下一个 registry 镜像
+        while returncode != 0 and self._next_registry(stderr):
+            returncode, stderr = self._install_from(package_manager, self.npm_registry())
         
         if returncode == 0:
             print("✅ 依赖安装成功")
+            # 记录安装前的指纹（安装过程可能改写锁文件，而 --update 会把它重置回来）
+            write_stamp(self.project_path, fingerprint, package_manager)
+            if cache_key and self.install_options.dep_cache.store(cache_key, self.project_path, cache_paths):
+                print("💾 已写入依赖缓存")
             return True
         else:
             print(f"❌ 依赖安装失败: {stderr}")
             return False
     
-    def run_project(self) -> bool:
-        """运行项目"""
-        print("🚀 正在启动项目...")
+    def _install_from(self, package_manager: str, registry: str) -> tuple[int, str]:
+        """优先严格按锁文件安装，锁文件与 package.json 不一致时改用普通安装，返回 (返回码, stderr)"""
+        strategy = build_install_strategy(package_manager, self.project_path, registry,
+                                          workspace_packages=self.workspace_closure)
+        returncode, stderr = self._run_install(strategy)
+        if returncode != 0 and strategy.frozen:
+            print("⚠️  按锁文件安装失败（锁文件可能与 package.json 不一致），改用普通安装")
+            strategy = build_install_strategy(package_manager, self.project_path, registry, frozen=False,
+                                              workspace_packages=self.workspace_closure)
+            returncode, stderr = self._run_install(strategy)
+        return returncode, stderr
+    
+    def npm_registry(self) -> str:
+        """安装和预取使用的 registry：--registry 优先，其次是镜像选择中最快的一个"""
+        if self.install_options.registry or not self.mirrors:
+            return self.install_options.registry
+        with self._registry_lock:
+            if self._registry_candidates is None:
+                self._registry_candidates = self.mirrors.npm_registries()
+                print(f"🚀 使用 npm registry: {self._registry_candidates[0]}")
+            return self._registry_candidates[0]
+    
+    def _next_registry(self, stderr: str) -> bool:
+        """安装因网络失败时换用下一个 registry 镜像，没有可换的镜像时返回 False"""
+        if not self._registry_candidates or len(self._registry_candidates) < 2 or not looks_like_network_error(stderr):
+            return False
+        with self._registry_lock:
+            failed = self._registry_candidates.pop(0)
+            self.mirrors.report_failure('npm', failed, stderr.strip().splitlines()[-1] if stderr.strip() else '')
+            print(f"⚠️  从 {failed} 安装失败，改用 {self._registry_candidates[0]}")
+        return True
+    
+    def resolve_workspace_app(self):
+        """monorepo 中找出要运行的应用及其依赖的工作区包（不是 monorepo 时返回 None）"""
+        if self._workspace_resolved:
+            return self.workspace_app
+        self._workspace_resolved = True
         
-        if not (self.project_path / 'package.json').exists():
-            print("ℹ️  未检测到 package.json，无法自动运行项目")
-            print(f"✅ 项目已准备就绪: {self.project_path}")
-            return True
+        workspace = load_workspace(self.project_path)
+        if workspace is None:
+            if self.install_options.app:
+                print(f"⚠️  项目不是 monorepo，忽略 --app {self.install_options.app}")
+            return None
+        
+        app = workspace.pick_app(self.install_options.app) if self.install_options.app else None
+        if self.install_options.app and app is None:
+            print(f"⚠️  工作区中没有找到 {self.install_options.app}，自动选择应用")
+        app = app or workspace.pick_app()
+        if app is None:
+            print("ℹ️  工作区中没有带 dev / start 脚本的包，安装整个工作区")
+            return None
+        
+        self.workspace = workspace
+        self.workspace_app = app
+        self.workspace_closure = workspace.closure(app.name)
+        print(f"🧩 检测到 monorepo（{len(workspace.packages)} 个工作区包），运行 {app.name}（{app.path}）")
+        if len(self.workspace_closure) > 1:
+            print(f"   依赖的工作区包: {', '.join(self.workspace_closure[1:])}")
+        return app
+    
+    def _ensure_package_manager(self, package_manager: str) -> str:
+        """确保包管理器可用，返回实际使用的包管理器（Node.js 都无法安装时返回 None）"""
+        # 没有锁文件时沿用 pnpm 优先；有锁文件时使用与锁文件对应的包管理器。
+        # pnpm 只认 pnpm-workspace.yaml，package.json 中声明 workspaces 的 monorepo 不能改用 pnpm
+        pnpm_compatible = self.workspace_app is None or (self.project_path / 'pnpm-workspace.yaml').exists()
+        if find_lockfile(self.project_path) is None and pnpm_compatible and self.check_command_exists('pnpm'):
+            package_manager = 'pnpm'
+        
+        with self._provision_lock, self._phase('toolchain-install'):
+            # 克隆后按项目目录中的版本文件重新确认（--serial 或预测失败时在这里第一次选择）
+            if not self.ensure_node():
+                return None
+            if package_manager == 'pnpm' and not self.check_command_exists('pnpm'):
+                if not self.install_pnpm():
+                    print("⚠️  pnpm 安装失败，尝试使用 npm")
+                    package_manager = 'npm'
+            elif package_manager == 'yarn' and not self.check_command_exists('yarn'):
+                if not self.install_yarn():
+                    print("⚠️  yarn 安装失败，尝试使用 npm")
+                    package_manager = 'npm'
+            
+            if package_manager == 'npm' and not self.check_npm_available():
+                print("❌ 选中的 Node.js 中没有 npm")
+                return None
+        return package_manager
+    
+    def _run_install(self, strategy: InstallStrategy) -> tuple[int, str]:
+        """执行安装命令并输出耗时和缓存增长（近似网络下载量）"""
+        print(f"🔧 执行: {strategy.command}")
+        before = cache_size(strategy) if self.install_options.install_stats else None
+        self.get_toolchain()
+        env = {**self._command_env(), **strategy.env}
+        
+        start = time.perf_counter()
+        returncode, stdout, stderr = self.run_command(strategy.command, env=env, stream=True,
+                                                      cwd=self.project_path)
+        seconds = time.perf_counter() - start
         
+        growth = None
+        if before is not None:
+            growth = max(0, (cache_size(strategy) or 0) - before)
+        report = InstallReport(strategy.name, seconds, growth)
+        self.install_reports.append(report)
+        print(f"📊 安装统计: {report.describe()}")
+        return returncode, stderr
+    
+    def _launch_command(self):
+        """启动项目的命令（在项目目录中执行），package.json 中没有启动脚本时返回 None"""
         # 检测使用的包管理器
         package_manager = self.detect_package_manager()
+        app = self.resolve_workspace_app()
+        
+        if app and app.run_script:
+            # monorepo：在仓库根目录只运行选中的应用
+            stamp = read_stamp(self.project_path) or {}
+            package_manager = self.package_manager or stamp.get('package_manager') or package_manager
+            args = build_run_command(package_manager, app.name, app.run_script)
+            run_cmd = ' '.join(shlex.quote(arg) for arg in args)
+            print(f"🔧 执行: {run_cmd}")
+            return run_cmd
+        
+        # 直接按 scripts 选择启动脚本，不再先试 dev 失败后再试 start
+        try:
+            scripts = json.loads((self.project_path / 'package.json').read_text(encoding='utf-8')).get('scripts')
+        except (OSError, ValueError, AttributeError):
+            scripts = None
+        script = select_script(scripts if isinstance(scripts, dict) else {})
+        if script is None:
+            return None
         
         # 优先使用 pnpm
         if self.check_command_exists('pnpm') or package_manager == 'pnpm':
-            run_cmd = self._get_pnpm_command('pnpm dev || pnpm start')
+            package_manager = 'pnpm'
         else:
-            run_cmd = self._get_npm_command('npm run dev || npm start')
+            package_manager = 'npm'
+        run_cmd = ' '.join(shlex.quote(arg) for arg in build_script_command(package_manager, script))
+        print(f"🔧 执行: {run_cmd}")
+        return run_cmd
+    
+    async def _serve(self, run_cmd: str, ready_timeout: float, keep_running: bool, **serve_options):
+        """启动开发服务器并检测就绪（startup 阶段在服务就绪、超时或进程退出时结束）"""
+        port = self.run_options.extra_env.get('PORT')
+        phase = self.profiler.start('startup', scope=project_slug(self.github_url)) if self.profiler else None
+        # 只登记持续运行的服务（就绪后立即停止的不需要复用）
+        registry = self.run_options.instances if keep_running else None
+        # local_revision 会同步执行 git，放到线程池中，不阻塞也不嵌套当前事件循环
+        loop = asyncio.get_running_loop()
+        identity = await loop.run_in_executor(None, self._instance_identity) if registry else None
+        pids = []
         
-        print(f"🔧 执行: {package_manager} run dev/start")
+        def end_phase():
+            if phase is not None:
+                self.profiler.stop(phase)
+        
+        def on_start(pid: int):
+            pids.append(pid)
+            if self.profiler:
+                self.profiler.attach(pid)
+        
+        def on_ready(url: str, seconds: float):
+            end_phase()
+            self.ready_url = url
+            self.time_to_ready = seconds
+            print(f"✅ 项目已就绪: {url}（启动耗时 {seconds:.1f}s）")
+            if registry and pids:
+                revision, fingerprint = identity
+                registry.register(RunningInstance(
+                    self.github_url, str(self.project_path), pids[0], url, app=self.install_options.app,
+                    revision=revision, lockfile_hash=fingerprint
+                ))
+        
+        def on_timeout():
+            end_phase()
+            print(f"⚠️  {ready_timeout:g}s 内没有检测到服务就绪，项目继续运行")
+        
+        try:
+            return await serve(
+                run_cmd, cwd=self.project_path, env=self._command_env(),
+                ready_timeout=ready_timeout, keep_running=keep_running,
+                expected_port=int(port) if port else None,
+                on_ready=on_ready, on_timeout=on_timeout if keep_running else None,
+                on_start=on_start, echo=True, **serve_options
+            )
+        finally:
+            end_phase()
+            if registry and pids:
+                registry.unregister(pids[0])
+    
+    def _instance_identity(self) -> tuple:
+        """判断是否为同一版本的依据：(当前提交, 锁文件指纹)"""
+        return local_revision(self.project_path), lockfile_hash(self.project_path)
+    
+    def find_running_instance(self):
+        """同一项目、同一版本已有健康的开发服务器在运行时返回它的登记信息（不安装、不启动）"""
+        if self.run_options.instances is None or not (self.project_path / 'package.json').exists():
+            return None
+        revision, fingerprint = self._instance_identity()
+        if self.clone_options.update and revision:
+            # --update 时与远程比较，远程有新提交就照常更新并重新启动
+            latest = remote_revision(self.project_path, self.clone_options.ref, self._command_env(),
+                                     timeout=min(self.run_options.command_timeout or LS_REMOTE_TIMEOUT, LS_REMOTE_TIMEOUT))
+            if latest and latest != revision:
+                return None
+        return self.run_options.instances.find(
+            self.github_url, self.project_path, self.install_options.app, revision, fingerprint
+        )
+    
+    def run_project(self) -> bool:
+        """运行项目"""
+        print("🚀 正在启动项目...")
+        
+        if not (self.project_path / 'package.json').exists():
+            print("ℹ️  未检测到 package.json，无法自动运行项目")
+            print(f"✅ 项目已准备就绪: {self.project_path}")
+            return True
+        
+        run_cmd = self._launch_command()
+        if run_cmd is None:
+            print("ℹ️  package.json 中没有可用于启动的脚本（dev / start / serve 等）")
+            print(f"✅ 项目已准备就绪: {self.project_path}")
+            return True
         print(f"📁 项目目录: {self.project_path}")
         print("\n" + "="*50)
         print("项目正在运行中...")
-        print("按 Ctrl+C 停止")
+        if not self.run_options.exit_when_ready:
+            print("按 Ctrl+C 停止")
         print("="*50 + "\n")
         
-        # 在项目目录中运行
-        os.chdir(self.project_path)
-        
         try:
-            # 直接运行，输出显示给用户
-            subprocess.run(run_cmd, shell=True)
+            # 在项目目录中运行，输出实时显示给用户，同时检测服务何时就绪
+            result = asyncio.run(self._serve(
+                run_cmd, self.run_options.ready_timeout, keep_running=not self.run_options.exit_when_ready, prefix=''
+            ))
         except KeyboardInterrupt:
             print("\n\n⏹️  项目已停止")
+            return True
         
-        return True
+        if result.ready:
+            if self.run_options.exit_when_ready:
+                print("⏹️  项目已就绪，停止开发服务器")
+            return True
+        process = result.process
+        if process.cancelled:
+            print(f"❌ {self.run_options.ready_timeout:g}s 内项目没有就绪")
+        elif process.returncode != 0:
+            lines = (process.stderr.strip() or process.stdout.strip()).splitlines()
+            print(f"❌ 项目启动失败（退出码 {process.returncode}）: {lines[-1] if lines else ''}")
+        else:
+            print("ℹ️  项目进程已退出")
+        return False
+    
+    def launch(self, ready_timeout: float):
+        """
+        非交互地启动项目，就绪后立即停止（批量模式使用）
+        
+        Args:
+            ready_timeout: 等待就绪的最长时间（秒）
+        
+        Returns:
+            ServeResult，没有 package.json 或启动脚本时返回 None
+        """
+        if not (self.project_path / 'package.json').exists():
+            return None
+        run_cmd = self._launch_command()
+        if run_cmd is None:
+            return None
+        return asyncio.run(self._serve(run_cmd, ready_timeout, keep_running=False))
     
     def run(self):
         """执行完整的流程"""
@@ -369,22 +1059,41 @@ class GitHubProjectRunner:
         print("=" * 60)
         print(f"📍 目标仓库: {self.github_url}\n")
         
-        # 1. 克隆项目
-        if not self.clone_repository():
-            print("❌ 流程终止：克隆项目失败")
-            sys.exit(1)
+        instance = self.find_running_instance()
+        if instance:
+            self.ready_url = instance.url
+            print(f"♻️  项目已在运行（PID {instance.pid}，提交 {(instance.revision or '-')[:7]}）: {instance.url}")
+            print("💡 代码和锁文件都没有变化，跳过安装和启动（使用 --no-reuse 强制重新启动）")
+            return True
         
-        # 2. 安装依赖
-        if not self.install_dependencies():
-            print("❌ 流程终止：安装依赖失败")
-            sys.exit(1)
+        if self.run_options.overlap:
+            # 1-2. 克隆项目的同时准备工具链，然后安装依赖
+            if not asyncio.run(self.prepare_async()):
+                sys.exit(1)
+        else:
+            # 1. 克隆项目
+            if not self._profiled('clone', self.clone_repository)():
+                print("❌ 流程终止：克隆项目失败")
+                sys.exit(1)
+            
+            # 2. 安装依赖
+            if not self._profiled('install', self.install_dependencies)():
+                print("❌ 流程终止：安装依赖失败")
+                sys.exit(1)
         
         # 3. 运行项目
-        self.run_project()
+        if not self.run_project() and self.run_options.exit_when_ready:
+            sys.exit(1)
         
         print("\n" + "=" * 60)
         print("✅ 流程完成")
         print("=" * 60)
+        return True
+
+
+def _env_list(name: str) -> list:
+    """逗号分隔的环境变量"""
+    return [item.strip() for item in os.environ.get(name, '').split(',') if item.strip()]
 
 
 def main():
@@ -399,27 +1108,208 @@ def main():
   python run_github_project.py https://github.com/user/repo --proxy http://127.0.0.1:7890
   python run_github_project.py https://github.com/user/repo --ssh
   python run_github_project.py https://github.com/user/repo --check-network
+  python run_github_project.py https://github.com/user/repo --clone-strategy blobless
+  python run_github_project.py https://github.com/user/repo --mirror-cache
+  python run_github_project.py https://github.com/user/repo --auto-mirror --git-mirror https://gh.example.com/https://github.com
+  python run_github_project.py https://github.com/user/repo --archive --ref v1.2.0
+  python run_github_project.py https://github.com/user/repo --update
+  python run_github_project.py https://github.com/user/monorepo --app web
+  python run_github_project.py https://github.com/user/repo --log-file run.log --command-timeout 900
+  python run_github_project.py https://github.com/user/repo --exit-when-ready --ready-timeout 60
+  python run_github_project.py https://github.com/user/repo --no-reuse
+  python run_github_project.py https://github.com/user/repo --profile profile.json --trace trace.json
+  python run_github_project.py --batch repos.txt --install-jobs 2 --report report.jsonl
         """
     )
     
-    parser.add_argument('github_url', help='GitHub 仓库 URL')
+    parser.add_argument('github_url', nargs='?', help='GitHub 仓库 URL（批量模式下省略）')
     parser.add_argument('--proxy', '-p', help='代理地址，例如: http://127.0.0.1:7890')
     parser.add_argument('--ssh', '-s', action='store_true', help='使用 SSH 方式克隆（需要配置 SSH 密钥）')
-    parser.add_argument('--check-network', '-c', action='store_true', help='运行前检查网络连接')
+    parser.add_argument('--check-network', '-c', action='store_true',
+                        help='运行前并发诊断 GitHub / npm registry 的 DNS、TCP、TLS 和首字节延迟，并据此选择 HTTPS / SSH 和代理')
+    parser.add_argument('--clone-strategy', choices=CLONE_STRATEGIES, default='auto',
+                        help='克隆策略: full / shallow (--depth 1) / blobless / treeless / sparse，'
+                             'auto 根据仓库大小选择（默认: auto）')
+    parser.add_argument('--sparse-path', action='append', default=[],
+                        help='sparse 策略下额外检出的路径（可多次指定）')
+    parser.add_argument('--archive', '-a', action='store_true',
+                        help='下载源码包（tar.gz）代替 git clone，不需要 git，也不包含提交历史')
+    parser.add_argument('--ref', help='要运行的分支或标签（--archive 模式下也可以是提交 SHA）')
+    parser.add_argument('--update', '-u', action='store_true',
+                        help='项目目录已存在时增量更新（fetch + reset），锁文件未变化时复用 node_modules')
+    parser.add_argument('--app',
+                        help='monorepo 中要运行的应用（包名或相对路径），默认选择带 dev / start 脚本的应用包；'
+                             '只安装该应用及其依赖的工作区包')
+    parser.add_argument('--serial', action='store_true',
+                        help='按顺序执行克隆和安装（默认克隆的同时准备 Node.js / pnpm）')
+    parser.add_argument('--mirror-cache', '-m', action='store_true',
+                        help='使用本地 bare 镜像缓存，重复克隆同一仓库时只增量 fetch')
+    parser.add_argument('--cache-dir', default=str(DEFAULT_CACHE_ROOT),
+                        help=f'缓存根目录（默认: {DEFAULT_CACHE_ROOT}）')
+    parser.add_argument('--mirror-cache-size', type=float, default=DEFAULT_MIRROR_CACHE_BYTES / 1024 ** 3,
+                        help='镜像缓存大小上限（GB），超过时淘汰最久未使用的镜像（默认: 10）')
+    
+    parser.add_argument('--dep-cache', '-d', action='store_true',
+                        help='使用按锁文件寻址的 node_modules 缓存，锁文件相同时直接硬链接恢复')
+    parser.add_argument('--dep-cache-size', type=float, default=DEFAULT_DEP_CACHE_BYTES / 1024 ** 3,
+                        help='依赖缓存大小上限（GB），超过时淘汰最久未使用的条目（默认: 20）')
+    
+    parser.add_argument('--no-prefetch', action='store_true',
+                        help='不在克隆的同时预取依赖（默认只下载锁文件，提前预热包管理器缓存）')
+    parser.add_argument('--auto-mirror', action='store_true',
+                        help='探测 GitHub 和 npm registry 镜像的速度，克隆和安装时自动使用最快的一个，失败时改用下一个')
+    parser.add_argument('--git-mirror', action='append', default=_env_list('RUN_GITHUB_PROJECT_GIT_MIRRORS'),
+                        help='git 镜像（可多次指定，隐含 --auto-mirror），例如 https://gh.example.com/https://github.com '
+                             '或 https://example.com/{owner}/{repo}.git（默认读取环境变量 RUN_GITHUB_PROJECT_GIT_MIRRORS）')
+    parser.add_argument('--npm-mirror', action='append', default=_env_list('RUN_GITHUB_PROJECT_NPM_MIRRORS'),
+                        help=f'npm registry 镜像候选（可多次指定，隐含 --auto-mirror，默认: {", ".join(DEFAULT_NPM_MIRRORS)}；'
+                             '环境变量 RUN_GITHUB_PROJECT_NPM_MIRRORS）')
+    parser.add_argument('--mirror-ttl', type=float, default=DEFAULT_MIRROR_TTL,
+                        help=f'镜像测速结果的缓存秒数（默认: {DEFAULT_MIRROR_TTL}）')
+    parser.add_argument('--registry', default=os.environ.get('RUN_GITHUB_PROJECT_REGISTRY'),
+                        help='npm registry 镜像，例如 https://registry.npmmirror.com'
+                             '（默认读取环境变量 RUN_GITHUB_PROJECT_REGISTRY）')
+    parser.add_argument('--log-file',
+                        help='把所有命令的完整输出追加到日志文件（控制台只实时显示安装和克隆的输出）')
+    parser.add_argument('--command-timeout', type=float,
+                        help='单个命令的超时秒数，超时后终止该命令及其子进程（默认不限制）')
+    parser.add_argument('--install-stats', action='store_true',
+                        help='统计安装前后包管理器缓存目录的增长，近似网络下载量')
+    parser.add_argument('--profile', metavar='FILE',
+                        help='统计各阶段的墙钟时间、CPU 时间、峰值内存、磁盘写入和网络流量，'
+                             '结束时输出摘要并把 JSON 报告写入 FILE')
+    parser.add_argument('--trace', metavar='FILE',
+                        help='把各阶段写入 Chrome trace 文件（chrome://tracing / Perfetto），同时输出统计摘要')
+    
+    parser.add_argument('--work-dir',
+                        help='项目克隆到的目录（默认当前目录，批量模式默认 ./batch-projects）')
+    
+    parser.add_argument('--batch', metavar='FILE',
+                        help='批量模式：从文件读取仓库 URL（每行一个，- 表示标准输入），'
+                             '并发克隆、安装并启动，结果写入 JSONL 报告')
+    parser.add_argument('--clone-jobs', type=int, default=4, help='批量模式同时克隆的仓库数（默认: 4）')
+    parser.add_argument('--install-jobs', type=int, default=2, help='批量模式同时安装依赖的项目数（默认: 2）')
+    parser.add_argument('--run-jobs', type=int, default=4, help='批量模式同时运行的开发服务器数（默认: 4）')
+    parser.add_argument('--ready-timeout', type=float, default=120,
+                        help='等待开发服务器就绪的最长秒数（批量模式下超时视为失败，默认: 120）')
+    parser.add_argument('--exit-when-ready', action='store_true',
+                        help='检测到服务就绪后停止开发服务器并退出，未就绪时退出码为 1（用于 CI）')
+    parser.add_argument('--no-reuse', action='store_true',
+                        help='即使同一项目、同一版本已在运行也重新安装并启动（默认直接返回运行中实例的地址）')
+    parser.add_argument('--report', default='batch-report.jsonl',
+                        help='批量模式的 JSONL 报告路径（默认: batch-report.jsonl）')
+    parser.add_argument('--base-port', type=int, default=DEFAULT_BASE_PORT,
+                        help=f'批量模式分配给开发服务器的起始端口，通过 PORT 环境变量传入（默认: {DEFAULT_BASE_PORT}）')
     
     args = parser.parse_args()
+    if not args.github_url and not args.batch:
+        parser.error('需要指定 github_url 或 --batch')
+    
+    profiler = Profiler() if args.profile or args.trace else None
     
     # 如果需要，先检查网络
     if args.check_network:
-        runner_temp = GitHubProjectRunner(args.github_url)
+        runner_temp = GitHubProjectRunner(args.github_url or 'https://github.com', use_proxy=args.proxy,
+                                          clone_options=CloneOptions(use_ssh=args.ssh),
+                                          install_options=InstallOptions(registry=args.registry), profiler=profiler)
         if not runner_temp.check_network_connectivity():
             print("\n⚠️  网络连接异常，可能需要使用代理")
             sys.exit(1)
+        # 按诊断结果选择克隆方式和是否使用代理
+        args.ssh = runner_temp.clone_options.use_ssh
+        args.proxy = runner_temp.use_proxy
+    
+    mirror_cache = None
+    if args.mirror_cache:
+        mirror_cache = MirrorCache(
+            Path(args.cache_dir) / 'mirrors',
+            max_bytes=int(args.mirror_cache_size * 1024 ** 3)
+        )
+    
+    dep_cache = None
+    if args.dep_cache:
+        dep_cache = DependencyCache(
+            Path(args.cache_dir) / 'deps',
+            max_bytes=int(args.dep_cache_size * 1024 ** 3)
+        )
+    
+    mirrors = None
+    if args.auto_mirror or args.git_mirror or args.npm_mirror:
+        mirrors = MirrorManager(
+            git_mirrors=args.git_mirror,
+            npm_mirrors=args.npm_mirror or DEFAULT_NPM_MIRRORS,
+            ttl=args.mirror_ttl,
+            cache_path=Path(args.cache_dir) / 'mirror-rankings.json',
+            proxy=args.proxy
+        )
+    
+    clone_options = CloneOptions(
+        use_ssh=args.ssh,
+        strategy=args.clone_strategy,
+        sparse_paths=args.sparse_path,
+        mirror_cache=mirror_cache,
+        use_archive=args.archive,
+        ref=args.ref,
+        update=args.update,
+        work_dir=args.work_dir
+    )
+    install_options = InstallOptions(
+        dep_cache=dep_cache,
+        registry=args.registry,
+        install_stats=args.install_stats,
+        prefetch=not args.no_prefetch,
+        app=args.app
+    )
+    run_options = RunOptions(
+        overlap=not args.serial,
+        log_file=args.log_file,
+        command_timeout=args.command_timeout,
+        ready_timeout=args.ready_timeout,
+        exit_when_ready=args.exit_when_ready,
+        instances=None if args.no_reuse else InstanceRegistry(Path(args.cache_dir) / 'instances.json')
+    )
+    
+    try:
+        _run_main(args, clone_options, install_options, run_options, profiler, mirrors)
+    finally:
+        if profiler is not None:
+            write_profile(profiler, args.profile, args.trace, url=args.github_url, batch=args.batch)
+
+
+def _run_main(args, clone_options: CloneOptions, install_options: InstallOptions, run_options: RunOptions,
+              profiler: Profiler, mirrors: MirrorManager):
+    """按命令行参数运行单个仓库或批量模式"""
+    if args.batch:
+        urls = read_urls(sys.stdin if args.batch == '-' else Path(args.batch).read_text(encoding='utf-8').splitlines())
+        if not urls:
+            print("❌ 没有读取到仓库 URL")
+            sys.exit(1)
+        results = run_batch(
+            [BatchItem(url) for url in urls],
+            GitHubProjectRunner,
+            work_dir=args.work_dir or 'batch-projects',
+            report_path=args.report,
+            clone_jobs=args.clone_jobs,
+            install_jobs=args.install_jobs,
+            run_jobs=args.run_jobs,
+            base_port=args.base_port,
+            clone_options=clone_options,
+            run_options=run_options,
+            use_proxy=args.proxy,
+            install_options=install_options,
+            profiler=profiler,
+            mirrors=mirrors
+        )
+        sys.exit(0 if all(result.success for result in results) else 1)
     
     runner = GitHubProjectRunner(
-        github_url=args.github_url,
+        args.github_url,
         use_proxy=args.proxy,
-        use_ssh=args.ssh
+        clone_options=clone_options,
+        install_options=install_options,
+        run_options=run_options,
+        profiler=profiler,
+        mirrors=mirrors
     )
     runner.run()
 